@@ -15,6 +15,8 @@ be put into classes in this module.
 import math
 import sys
 
+import numpy
+
 from Bio.Seq import Seq
 
 
@@ -58,49 +60,8 @@ class SummaryInfo:
 
         """
         # Iddo Friedberg, 1-JUL-2004: changed ambiguous default to "X"
-        consensus = ""
-
-        # find the length of the consensus we are creating
-        con_len = self.alignment.get_alignment_length()
-
-        # go through each seq item
-        for n in range(con_len):
-            # keep track of the counts of the different atoms we get
-            atom_dict = {}
-            num_atoms = 0
-
-            for record in self.alignment:
-                # make sure we haven't run past the end of any sequences
-                # if they are of different lengths
-                if n < len(record.seq):
-                    if record.seq[n] != "-" and record.seq[n] != ".":
-                        if record.seq[n] not in atom_dict:
-                            atom_dict[record.seq[n]] = 1
-                        else:
-                            atom_dict[record.seq[n]] += 1
-
-                        num_atoms = num_atoms + 1
-
-            max_atoms = []
-            max_size = 0
-
-            for atom in atom_dict:
-                if atom_dict[atom] > max_size:
-                    max_atoms = [atom]
-                    max_size = atom_dict[atom]
-                elif atom_dict[atom] == max_size:
-                    max_atoms.append(atom)
-
-            if require_multiple and num_atoms == 1:
-                consensus += ambiguous
-            elif (len(max_atoms) == 1) and (
-                (float(max_size) / float(num_atoms)) >= threshold
-            ):
-                consensus += max_atoms[0]
-            else:
-                consensus += ambiguous
-
-        return Seq(consensus)
+        letters = self._get_all_letters().replace("-", "").replace(".", "")
+        return self._consensus(letters, threshold, ambiguous, require_multiple)
 
     def gap_consensus(self, threshold=0.7, ambiguous="X", require_multiple=False):
         """Output a fast consensus sequence of the alignment, allowing gaps.
@@ -114,47 +75,34 @@ class SummaryInfo:
            it takes the same as input.
 
         """
-        consensus = ""
-
-        # find the length of the consensus we are creating
-        con_len = self.alignment.get_alignment_length()
+        letters = self._get_all_letters()
+        return self._consensus(letters, threshold, ambiguous, require_multiple)
 
-        # go through each seq item
-        for n in range(con_len):
-            # keep track of the counts of the different atoms we get
-            atom_dict = {}
-            num_atoms = 0
-
-            for record in self.alignment:
-                # make sure we haven't run past the end of any sequences
-                # if they are of different lengths
-                if n < len(record.seq):
-                    if record.seq[n] not in atom_dict:
-                        atom_dict[record.seq[n]] = 1
-                    else:
-                        atom_dict[record.seq[n]] += 1
-
-                    num_atoms += 1
-
-            max_atoms = []
-            max_size = 0
-
-            for atom in atom_dict:
-                if atom_dict[atom] > max_size:
-                    max_atoms = [atom]
-                    max_size = atom_dict[atom]
-                elif atom_dict[atom] == max_size:
-                    max_atoms.append(atom)
-
-            if require_multiple and num_atoms == 1:
-                consensus += ambiguous
-            elif (len(max_atoms) == 1) and (
-                (float(max_size) / float(num_atoms)) >= threshold
-            ):
-                consensus += max_atoms[0]
-            else:
-                consensus += ambiguous
+    def _consensus(self, letters, threshold, ambiguous, require_multiple):
+        """Build a consensus sequence from the given letters (PRIVATE).
 
+        The counts of the letters in each column of the alignment are
+        calculated as vectorized NumPy reductions; letters not in letters are
+        not counted.
+        """
+        con_len = self.alignment.get_alignment_length()
+        if not letters:
+            return Seq(ambiguous * con_len)
+        counts = self.alignment._letter_counts(letters)
+        num_atoms = counts.sum(1)
+        max_size = counts.max(1)
+        # a unique most common letter, which may not be absent from the column
+        unique = (counts == max_size[:, None]).sum(1) == 1
+        unique &= max_size > 0
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            unique &= max_size / num_atoms >= threshold
+        if require_multiple:
+            unique &= num_atoms != 1
+        best = counts.argmax(1)
+        consensus = "".join(
+            letters[index] if flag else ambiguous
+            for index, flag in zip(best.tolist(), unique.tolist())
+        )
         return Seq(consensus)
 
     def replacement_dictionary(self, skip_chars=None, letters=None):
@@ -233,12 +181,12 @@ class SummaryInfo:
 
     def _get_all_letters(self):
         """Return a string containing the expected letters in the alignment (PRIVATE)."""
-        set_letters = set()
-        for record in self.alignment:
-            set_letters.update(record.seq)
-        list_letters = sorted(set_letters)
-        all_letters = "".join(list_letters)
-        return all_letters
+        return self.alignment._letters()
+
+    def _get_weights(self):
+        """Return the weights of the sequences in the alignment as an array (PRIVATE)."""
+        weights = [record.annotations.get("weight", 1.0) for record in self.alignment]
+        return numpy.array(weights, float)
 
     def pos_specific_score_matrix(self, axis_seq=None, chars_to_ignore=None):
         """Create a position specific score matrix object for the alignment.
@@ -279,28 +227,11 @@ class SummaryInfo:
         else:
             left_seq = self.dumb_consensus()
 
-        pssm_info = []
-        # now start looping through all of the sequences and getting info
-        for residue_num in range(len(left_seq)):
-            score_dict = dict.fromkeys(all_letters, 0)
-            for record in self.alignment:
-                try:
-                    this_residue = record.seq[residue_num]
-                # if we hit an index error we've run out of sequence and
-                # should not add new residues
-                except IndexError:
-                    this_residue = None
-
-                if this_residue and this_residue not in chars_to_ignore:
-                    weight = record.annotations.get("weight", 1.0)
-                    try:
-                        score_dict[this_residue] += weight
-                    except KeyError:
-                        raise ValueError(
-                            "Residue %s not found" % this_residue
-                        ) from None
-
-            pssm_info.append((left_seq[residue_num], score_dict))
+        counts = self.alignment._letter_counts(all_letters, self._get_weights())
+        pssm_info = [
+            (residue, dict(zip(all_letters, row)))
+            for residue, row in zip(left_seq, counts.tolist())
+        ]
 
         return PSSM(pssm_info)
 
@@ -349,166 +280,61 @@ class SummaryInfo:
                 "Start (%s) and end (%s) are not in the range %s to %s"
                 % (start, end, 0, len(self.alignment[0].seq))
             )
-        # determine random expected frequencies, if necessary
-        random_expected = None
-        # determine all of the letters we have to deal with
-        all_letters = self._get_all_letters()
-        for char in chars_to_ignore:
-            all_letters = all_letters.replace(char, "")
-
-        info_content = {}
-        for residue_num in range(start, end):
-            freq_dict = self._get_letter_freqs(
-                residue_num,
-                self.alignment,
-                all_letters,
-                chars_to_ignore,
-                pseudo_count,
-                e_freq_table,
-                random_expected,
-            )
-            # print(freq_dict, end="")
-            column_score = self._get_column_info_content(
-                freq_dict, e_freq_table, log_base, random_expected
-            )
-            info_content[residue_num] = column_score
-        # sum up the score
-        total_info = sum(info_content.values())
-        # fill in the ic_vector member: holds IC for each column
-        # reset ic_vector to empty list at each call
-        self.ic_vector = []
-        for (i, k) in enumerate(info_content):
-            self.ic_vector.append(info_content[i + start])
-        return total_info
-
-    def _get_letter_freqs(
-        self,
-        residue_num,
-        all_records,
-        letters,
-        to_ignore,
-        pseudo_count=0,
-        e_freq_table=None,
-        random_expected=None,
-    ):
-        """Determine the frequency of specific letters in the alignment (PRIVATE).
-
-        Arguments:
-         - residue_num - The number of the column we are getting frequencies
-           from.
-         - all_records - All of the SeqRecords in the alignment.
-         - letters - The letters we are interested in getting the frequency
-           for.
-         - to_ignore - Letters we are specifically supposed to ignore.
-         - pseudo_count - Optional argument specifying the Pseudo count (k)
-           to add in order to prevent a frequency of 0 for a letter.
-         - e_freq_table - An optional argument specifying a dictionary with
-           the expected frequencies for each letter.
-         - random_expected - Optional argument that specify the frequency to use
-           when e_freq_table is not defined.
-
-        This will calculate the frequencies of each of the specified letters
-        in the alignment at the given frequency, and return this as a
-        dictionary where the keys are the letters and the values are the
-        frequencies. Pseudo count can be added to prevent a null frequency
-        """
-        freq_info = dict.fromkeys(letters, 0)
-
-        total_count = 0
-
-        gap_char = "-"
-
         if pseudo_count < 0:
             raise ValueError(
                 "Positive value required for pseudo_count, %s provided" % (pseudo_count)
             )
 
-        # collect the count info into the dictionary for all the records
-        for record in all_records:
-            try:
-                if record.seq[residue_num] not in to_ignore:
-                    weight = record.annotations.get("weight", 1.0)
-                    freq_info[record.seq[residue_num]] += weight
-                    total_count += weight
-            except KeyError:
-                raise ValueError(
-                    "Residue %s not found in letters %s"
-                    % (record.seq[residue_num], letters)
-                ) from None
-
-        if e_freq_table:
-            # check if all the residus in freq_info are in e_freq_table
-            for key in freq_info:
-                if key != gap_char and key not in e_freq_table:
-                    raise ValueError("%s not found in expected frequency table" % key)
-
-        if total_count == 0:
-            # This column must be entirely ignored characters
-            for letter in freq_info:
-                assert freq_info[letter] == 0
-                # TODO - Map this to NA or NaN?
-        else:
-            # now convert the counts into frequencies
-            for letter in freq_info:
-                if pseudo_count and (random_expected or e_freq_table):
-                    # use either the expected random freq or the
-                    if e_freq_table:
-                        ajust_freq = e_freq_table[letter]
-                    else:
-                        ajust_freq = random_expected
-
-                    ajusted_letter_count = freq_info[letter] + ajust_freq * pseudo_count
-                    ajusted_total = total_count + pseudo_count
-                    freq_info[letter] = ajusted_letter_count / ajusted_total
-
-                else:
-                    freq_info[letter] = freq_info[letter] / total_count
-
-        return freq_info
-
-    def _get_column_info_content(
-        self, obs_freq, e_freq_table, log_base, random_expected
-    ):
-        """Calculate the information content for a column (PRIVATE).
-
-        Arguments:
-         - obs_freq - The frequencies observed for each letter in the column.
-         - e_freq_table - An optional argument specifying a dictionary with
-           the expected frequencies for each letter.
-         - log_base - The base of the logarithm to use in calculating the
-           info content.
-
-        """
         gap_char = "-"
+        # determine all of the letters we have to deal with
+        all_letters = self._get_all_letters()
+        for char in chars_to_ignore:
+            all_letters = all_letters.replace(char, "")
 
+        self.ic_vector = []
+        if start >= end:
+            return 0
         if e_freq_table:
-            # check the expected freq information to make sure it is good
-            for key in obs_freq:
-                if key != gap_char and key not in e_freq_table:
+            # check if all the residues are in e_freq_table
+            for letter in all_letters:
+                if letter != gap_char and letter not in e_freq_table:
                     raise ValueError(
-                        f"Frequency table provided does not contain observed letter {key}"
+                        "%s not found in expected frequency table" % letter
                     )
-
-        total_info = 0.0
-
-        for letter in obs_freq:
-            inner_log = 0.0
-            # if we have expected frequencies, modify the log value by them
-            # gap characters do not have expected frequencies, so they
-            # should just be the observed frequency.
-            if letter != gap_char:
-                if e_freq_table:
-                    inner_log = obs_freq[letter] / e_freq_table[letter]
-                else:
-                    inner_log = obs_freq[letter] / random_expected
+        elif all_letters.replace(gap_char, ""):
+            raise TypeError("e_freq_table is required to calculate information content")
+
+        counts = self.alignment._letter_counts(
+            all_letters, self._get_weights(), start, end
+        )
+        total_count = counts.sum(1)[:, None]
+        # columns consisting entirely of ignored characters get a frequency of
+        # zero for all letters
+        total_count[total_count == 0] = numpy.inf
+        if pseudo_count and e_freq_table:
+            e_freqs = numpy.array([e_freq_table[letter] for letter in all_letters])
+            obs_freqs = (counts + e_freqs * pseudo_count) / (total_count + pseudo_count)
+            obs_freqs[numpy.isinf(total_count[:, 0])] = 0
+        else:
+            obs_freqs = counts / total_count
+
+        # gap characters do not have expected frequencies, and do not add to
+        # the information content
+        indices = [i for i, letter in enumerate(all_letters) if letter != gap_char]
+        obs_freqs = obs_freqs[:, indices]
+        e_freqs = numpy.array([e_freq_table[all_letters[i]] for i in indices])
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            inner_log = obs_freqs / e_freqs
             # if the observed frequency is zero, we don't add any info to the
             # total information content
-            if inner_log > 0:
-                letter_info = (
-                    obs_freq[letter] * math.log(inner_log) / math.log(log_base)
-                )
-                total_info += letter_info
-        return total_info
+            letter_info = numpy.where(
+                inner_log > 0, obs_freqs * numpy.log(inner_log), 0.0
+            )
+        info_content = letter_info.sum(1) / math.log(log_base)
+        # fill in the ic_vector member: holds IC for each column
+        self.ic_vector = info_content.tolist()
+        # sum up the score
+        return sum(self.ic_vector)
 
     def get_column(self, col):
         """Return column of alignment."""
@@ -13,9 +13,14 @@ class, used in the Bio.AlignIO module.
 
 """
 
+import math
+import random
 import sys
 import warnings
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from Bio import BiopythonDeprecationWarning
 from Bio.Align import _aligners
 from Bio.Align import substitution_matrices
@@ -159,6 +164,7 @@ class MultipleSeqAlignment:
             raise ValueError("The alphabet argument is no longer supported")
 
         self._records = []
+        self._array = None
         if records:
             self.extend(records)
 
@@ -175,6 +181,17 @@ class MultipleSeqAlignment:
         # Handle this via the property set function which will validate it
         self.column_annotations = column_annotations
 
+    def __getstate__(self):
+        """Return the state of the alignment for pickling, without the array cache."""
+        state = self.__dict__.copy()
+        state["_array"] = None
+        return state
+
+    def __setstate__(self, state):
+        """Restore the state of a pickled alignment, which may lack the array cache."""
+        self.__dict__.update(state)
+        self._array = None
+
     def _set_per_column_annotations(self, value):
         if not isinstance(value, dict):
             raise TypeError(
@@ -527,6 +544,7 @@ class MultipleSeqAlignment:
             raise ValueError("Sequences must all be the same length")
 
         self._records.append(record)
+        self._array = None
 
     def __add__(self, other):
         """Combine two alignments with the same number of rows by adding them.
@@ -756,6 +774,9 @@ class MultipleSeqAlignment:
             return self._records[row_index][col_index]
         elif isinstance(col_index, int):
             # e.g. col_or_part_col = align[1:5, 6], gives a string
+            array = self._cached_array()
+            if array is not None:
+                return array[row_index, col_index].tobytes().decode()
             return "".join(rec[col_index] for rec in self._records[row_index])
         else:
             # e.g. sub_align = align[1:4, 5:7], gives another alignment
@@ -845,6 +866,121 @@ class MultipleSeqAlignment:
             self._records.sort(key=lambda r: r.id, reverse=reverse)
         else:
             self._records.sort(key=key, reverse=reverse)
+        self._array = None
+
+    def as_array(self):
+        """Return the alignment as a NumPy array of ASCII codes.
+
+        The array has one row per sequence and one column per alignment
+        column, with data type uint8:
+
+        >>> from Bio.Seq import Seq
+        >>> from Bio.SeqRecord import SeqRecord
+        >>> from Bio.Align import MultipleSeqAlignment
+        >>> a = SeqRecord(Seq("ACGT"), id="Alpha")
+        >>> b = SeqRecord(Seq("A--T"), id="Beta")
+        >>> align = MultipleSeqAlignment([a, b])
+        >>> array = align.as_array()
+        >>> array.shape
+        (2, 4)
+        >>> bytes(array[1])
+        b'A--T'
+
+        The array is read-only. It is built the first time this method is
+        called and kept for later calls for as long as the alignment rows keep
+        the same (immutable) Seq objects; appending, extending, or sorting the
+        alignment, or assigning a new sequence to a row, invalidates it.  While
+        the array is available, extracting a column such as align[:, 3] reads
+        it from the array instead of from each SeqRecord.
+        """
+        import numpy
+
+        array = self._cached_array()
+        if array is not None:
+            return array
+        seqs = [record.seq for record in self._records]
+        array = numpy.empty((len(seqs), self.get_alignment_length()), numpy.uint8)
+        for row, seq in zip(array, seqs):
+            row[:] = numpy.frombuffer(bytes(seq), numpy.uint8)
+        array.flags.writeable = False
+        if not any(isinstance(seq, MutableSeq) for seq in seqs):
+            self._array = (seqs, array)
+        return array
+
+    def _cached_array(self):
+        """Return the array built by as_array if it is still valid, or None (PRIVATE)."""
+        if self._array is None:
+            return None
+        seqs, array = self._array
+        records = self._records
+        if len(seqs) != len(records):
+            return None
+        for seq, record in zip(seqs, records):
+            if seq is not record.seq:
+                return None
+        return array
+
+    def _letters(self):
+        """Return a string with the sorted letters used in the alignment (PRIVATE)."""
+        import numpy
+
+        counts = numpy.bincount(self.as_array().ravel(), minlength=256)
+        return bytes(numpy.flatnonzero(counts).astype(numpy.uint8)).decode()
+
+    def _letter_counts(self, letters, weights=None, start=0, end=None):
+        """Count the letters in each column of the alignment (PRIVATE).
+
+        Returns an array of shape (number of columns, len(letters)) with the
+        number of occurrences of each letter in each of the columns from start
+        to end. Letters not in letters are not counted. If weights is given,
+        each row contributes its weight instead of 1.
+        """
+        import numpy
+
+        array = self.as_array()[:, start:end]
+        nrows, ncols = array.shape
+        size = len(letters) + 1
+        indices = numpy.full(256, len(letters), numpy.intp)
+        for index, letter in enumerate(letters):
+            indices[ord(letter)] = index
+        if weights is None:
+            counts = numpy.zeros(size * ncols, numpy.intp)
+        else:
+            counts = numpy.zeros(size * ncols)
+        offsets = numpy.arange(ncols)
+        # process the rows in blocks to limit the size of the index arrays
+        step = max(1, 2 ** 22 // max(ncols, 1))
+        for row in range(0, nrows, step):
+            block = indices[array[row : row + step]]
+            block *= ncols
+            block += offsets
+            if weights is None:
+                counts += numpy.bincount(block.ravel(), minlength=size * ncols)
+            else:
+                block_weights = numpy.repeat(weights[row : row + step], ncols)
+                counts += numpy.bincount(
+                    block.ravel(), weights=block_weights, minlength=size * ncols
+                )
+        return counts.reshape(size, ncols)[:-1].transpose()
+
+    def gap_fraction(self, gap_characters="-"):
+        """Return the fraction of gaps in each column as a NumPy array.
+
+        >>> from Bio.Seq import Seq
+        >>> from Bio.SeqRecord import SeqRecord
+        >>> from Bio.Align import MultipleSeqAlignment
+        >>> a = SeqRecord(Seq("ACGT"), id="Alpha")
+        >>> b = SeqRecord(Seq("A--T"), id="Beta")
+        >>> c = SeqRecord(Seq("AC-T"), id="Gamma")
+        >>> d = SeqRecord(Seq("AC-."), id="Delta")
+        >>> align = MultipleSeqAlignment([a, b, c, d])
+        >>> align.gap_fraction()
+        array([ 0.  ,  0.25,  0.75,  0.  ])
+        >>> align.gap_fraction("-.")
+        array([ 0.  ,  0.25,  0.75,  0.25])
+        """
+        counts = self._letter_counts(gap_characters).sum(1)
+        return counts / len(self._records)
 
     @property
     def substitutions(self):
@@ -895,30 +1031,25 @@ class MultipleSeqAlignment:
             ('A', 'C') : 0.8 * 1.0 = 0.8
 
         """
-        letters = set.union(*[set(record.seq) for record in self])
-        try:
-            letters.remove("-")
-        except KeyError:
-            pass
-        letters = "".join(sorted(letters))
+        import numpy
+
+        letters = self._letters().replace("-", "")
+        weights = [record.annotations.get("weight", 1.0) for record in self]
+        if all(weight == 1.0 for weight in weights):
+            counts = self._letter_counts(letters)
+            self_counts = counts.sum(0)
+        else:
+            weights = numpy.array(weights, float)
+            counts = self._letter_counts(letters, weights)
+            self_counts = self._letter_counts(letters, weights * weights).sum(0)
+        # In each column, the pairs of letters between different rows are
+        # given by the outer product of the letter counts, minus the pairs of
+        # each row with itself.
+        counts = numpy.asarray(counts, float)
+        pairs = numpy.dot(counts.transpose(), counts)
+        pairs[numpy.diag_indices(len(letters))] -= self_counts
         m = substitution_matrices.Array(letters, dims=2)
-        for rec_num1, alignment1 in enumerate(self):
-            seq1 = alignment1.seq
-            weight1 = alignment1.annotations.get("weight", 1.0)
-            for rec_num2, alignment2 in enumerate(self):
-                if rec_num1 == rec_num2:
-                    break
-                seq2 = alignment2.seq
-                weight2 = alignment2.annotations.get("weight", 1.0)
-                for residue1, residue2 in zip(seq1, seq2):
-                    if residue1 == "-":
-                        continue
-                    if residue2 == "-":
-                        continue
-                    m[(residue1, residue2)] += weight1 * weight2
-
-        m += m.transpose()
-        m /= 2.0
+        m[:, :] = pairs / 2.0
 
         return m
 
@@ -2430,93 +2561,150 @@ class Alignment:
         >>> format(alignment, "psl")
         '8\t0\t0\t0\t0\t0\t1\t11\t+\tquery\t8\t0\t8\ttarget\t40\t11\t30\t2\t4,4,\t0,4,\t11,26,\n'
         """
+        return self.map_many([alignment])[0]
+
+    def map_many(self, alignments):
+        """Map each of the alignments to self.target and return a list of alignments.
+
+        This is equivalent to ``[self.map(alignment) for alignment in
+        alignments]``, but the aligned blocks of all alignments are
+        intersected with those of self in a single step, which is much faster
+        if many alignments (for example, sequencing reads aligned to a
+        transcript) are mapped through the same alignment (for example, a
+        chain alignment between the transcript and the chromosome):
+
+        >>> from Bio import Align
+        >>> aligner = Align.PairwiseAligner()
+        >>> aligner.mode = 'local'
+        >>> aligner.open_gap_score = -1
+        >>> aligner.extend_gap_score = 0
+        >>> chromosome = "AAAAAAAACCCCCCCAAAAAAAAAAAGGGGGGAAAAAAAA"
+        >>> transcript = "CCCCCCCGGGGGG"
+        >>> alignment1 = aligner.align(chromosome, transcript)[0]
+        >>> alignments2 = [aligner.align(transcript, sequence)[0]
+        ...                for sequence in ("CCCCGGGG", "CCGG", "GGGGG")]
+        >>> for alignment in alignment1.map_many(alignments2):
+        ...     print(alignment.coordinates)
+        [[11 15 26 30]
+         [ 0  4  4  8]]
+        [[13 15 26 28]
+         [ 0  2  2  4]]
+        [[26 31]
+         [ 0  5]]
+
+        As for the map method, the query sequence of self and the target
+        sequence of each of the alignments must be the same.
+        """
         import numpy
 
-        alignment1, alignment2 = self, alignment
-        if len(alignment1.query) != len(alignment2.target):
-            raise ValueError(
-                "length of alignment1 query sequence (%d) != length of alignment2 target sequence (%d)"
-                % (len(alignment1.query), len(alignment2.target))
-            )
+        alignment1 = self
         target = alignment1.target
-        query = alignment2.query
-        coordinates1 = alignment1.coordinates
-        coordinates2 = alignment2.coordinates
         n1 = len(alignment1.query)
-        n2 = len(alignment2.query)
+        coordinates1 = alignment1.coordinates
         if coordinates1[1, 0] < coordinates1[1, -1]:  # mapped to forward strand
             strand1 = "+"
         else:  # mapped to reverse strand
             strand1 = "-"
-        if coordinates2[1, 0] < coordinates2[1, -1]:  # mapped to forward strand
-            strand2 = "+"
-        else:  # mapped to reverse strand
-            strand2 = "-"
-        if strand1 == "+":
-            if strand2 == "-":  # mapped to reverse strand
-                coordinates2 = coordinates2.copy()
-                coordinates2[1, :] = n2 - coordinates2[1, :]
-        else:  # mapped to reverse strand
             coordinates1 = coordinates1.copy()
             coordinates1[1, :] = n1 - coordinates1[1, :]
-            coordinates2 = coordinates2.copy()
-            coordinates2[0, :] = n1 - coordinates2[0, ::-1]
-            if strand2 == "+":
-                coordinates2[1, :] = n2 - coordinates2[1, ::-1]
+        # aligned blocks of self, with their start in the target and query
+        steps1 = numpy.diff(coordinates1, axis=1)
+        aligned1 = (steps1[0, :] > 0) & (steps1[1, :] > 0)
+        tStarts1 = coordinates1[0, :-1][aligned1]
+        qStarts1 = coordinates1[1, :-1][aligned1]
+        qEnds1 = qStarts1 + steps1[1, aligned1]
+        queries = []
+        strands = []
+        blocks = []
+        for alignment2 in alignments:
+            if n1 != len(alignment2.target):
+                raise ValueError(
+                    "length of alignment1 query sequence (%d) != length of alignment2 target sequence (%d)"
+                    % (n1, len(alignment2.target))
+                )
+            query = alignment2.query
+            n2 = len(query)
+            coordinates2 = alignment2.coordinates
+            if coordinates2[1, 0] < coordinates2[1, -1]:  # mapped to forward strand
+                strand2 = "+"
             else:  # mapped to reverse strand
-                coordinates2[1, :] = coordinates2[1, ::-1]
-        path = []
-        tEnd, qEnd = sys.maxsize, sys.maxsize
-        coordinates1 = iter(coordinates1.transpose())
-        tStart1, qStart1 = sys.maxsize, sys.maxsize
-        for tEnd1, qEnd1 in coordinates1:
-            if tStart1 < tEnd1 and qStart1 < qEnd1:
-                break
-            tStart1, qStart1 = tEnd1, qEnd1
-        tStart2, qStart2 = sys.maxsize, sys.maxsize
-        for tEnd2, qEnd2 in coordinates2.transpose():
-            while qStart2 < qEnd2 and tStart2 < tEnd2:
-                while True:
-                    if tStart2 < qStart1:
-                        if tEnd2 < qStart1:
-                            size = tEnd2 - tStart2
-                        else:
-                            size = qStart1 - tStart2
-                        break
-                    elif tStart2 < qEnd1:
-                        offset = tStart2 - qStart1
-                        if tEnd2 > qEnd1:
-                            size = qEnd1 - tStart2
-                        else:
-                            size = tEnd2 - tStart2
-                        qStart = qStart2
-                        tStart = tStart1 + offset
-                        if tStart > tEnd and qStart > qEnd:
-                            # adding a gap both in target and in query;
-                            # add gap to target first:
-                            path.append([tStart, qEnd])
-                        qEnd = qStart2 + size
-                        tEnd = tStart + size
-                        path.append([tStart, qStart])
-                        path.append([tEnd, qEnd])
-                        break
-                    tStart1, qStart1 = sys.maxsize, sys.maxsize
-                    for tEnd1, qEnd1 in coordinates1:
-                        if tStart1 < tEnd1 and qStart1 < qEnd1:
-                            break
-                        tStart1, qStart1 = tEnd1, qEnd1
-                    else:
-                        size = qEnd2 - qStart2
-                        break
-                qStart2 += size
-                tStart2 += size
-            tStart2, qStart2 = tEnd2, qEnd2
-        coordinates = numpy.array(path).transpose()
-        if strand1 != strand2:
-            coordinates[1, :] = n2 - coordinates[1, :]
-        sequences = [target, query]
-        alignment = Alignment(sequences, coordinates)
-        return alignment
+                strand2 = "-"
+            if strand1 == "+":
+                if strand2 == "-":  # mapped to reverse strand
+                    coordinates2 = coordinates2.copy()
+                    coordinates2[1, :] = n2 - coordinates2[1, :]
+            else:  # mapped to reverse strand
+                coordinates2 = coordinates2.copy()
+                coordinates2[0, :] = n1 - coordinates2[0, ::-1]
+                if strand2 == "+":
+                    coordinates2[1, :] = n2 - coordinates2[1, ::-1]
+                else:  # mapped to reverse strand
+                    coordinates2[1, :] = coordinates2[1, ::-1]
+            queries.append(query)
+            strands.append(strand2)
+            blocks.append(coordinates2)
+        if not blocks:
+            return []
+        # aligned blocks of all alignments, with the index of their alignment;
+        # the step from the last column of an alignment to the first column of
+        # the next alignment is not a block.
+        widths = numpy.array([coordinates2.shape[1] for coordinates2 in blocks])
+        coordinates2 = numpy.concatenate(blocks, axis=1)
+        steps2 = numpy.diff(coordinates2, axis=1)
+        aligned2 = (steps2[0, :] > 0) & (steps2[1, :] > 0)
+        aligned2[numpy.cumsum(widths)[:-1] - 1] = False
+        indices = numpy.repeat(numpy.arange(len(blocks)), widths)[:-1][aligned2]
+        tStarts2 = coordinates2[0, :-1][aligned2]
+        qStarts2 = coordinates2[1, :-1][aligned2]
+        tEnds2 = tStarts2 + steps2[0, aligned2]
+        # blocks of self overlapping each block of the alignments
+        firsts = numpy.searchsorted(qEnds1, tStarts2, "right")
+        counts = numpy.searchsorted(qStarts1, tEnds2, "left") - firsts
+        counts[counts < 0] = 0
+        blocks2 = numpy.repeat(numpy.arange(len(counts)), counts)
+        offsets = numpy.arange(len(blocks2)) - numpy.repeat(
+            numpy.cumsum(counts) - counts, counts
+        )
+        blocks1 = numpy.repeat(firsts, counts) + offsets
+        # intersection of the overlapping blocks in the shared sequence
+        starts = numpy.maximum(tStarts2[blocks2], qStarts1[blocks1])
+        ends = numpy.minimum(tEnds2[blocks2], qEnds1[blocks1])
+        sizes = ends - starts
+        tStarts = tStarts1[blocks1] + starts - qStarts1[blocks1]
+        qStarts = qStarts2[blocks2] + starts - tStarts2[blocks2]
+        tEnds = tStarts + sizes
+        qEnds = qStarts + sizes
+        indices = indices[blocks2]
+        # Each block contributes its start and end to the path. If there is a
+        # gap in both the target and the query between two consecutive blocks
+        # of the same alignment, add the gap to the target first.
+        n = len(indices)
+        points = numpy.empty((n, 3, 2), coordinates2.dtype)
+        points[:, 0, 0] = tStarts
+        points[1:, 0, 1] = qEnds[:-1]
+        points[:, 1, 0] = tStarts
+        points[:, 1, 1] = qStarts
+        points[:, 2, 0] = tEnds
+        points[:, 2, 1] = qEnds
+        keep = numpy.ones((n, 3), bool)
+        keep[:1, 0] = False
+        keep[1:, 0] = (
+            (indices[1:] == indices[:-1])
+            & (tStarts[1:] > tEnds[:-1])
+            & (qStarts[1:] > qEnds[:-1])
+        )
+        points = points[keep]
+        indices = numpy.repeat(indices, keep.sum(1))
+        bounds = numpy.searchsorted(indices, numpy.arange(len(blocks) + 1))
+        mapped_alignments = []
+        for i, (query, strand2) in enumerate(zip(queries, strands)):
+            coordinates = points[bounds[i] : bounds[i + 1]].transpose().copy()
+            if strand1 != strand2:
+                coordinates[1, :] = len(query) - coordinates[1, :]
+            sequences = [target, query]
+            alignment = Alignment(sequences, coordinates)
+            mapped_alignments.append(alignment)
+        return mapped_alignments
 
     @property
     def substitutions(self):
@@ -2586,28 +2774,98 @@ class Alignment:
         The total number of substitutions between T's and C's in the alignment
         is 3.5 + 3.5 = 7.
         """
+        import numpy
+
         sequences = self.sequences
-        letters = set.union(*[set(sequence) for sequence in sequences])
-        letters = "".join(sorted(letters))
+        codes = [_code_points(sequence) for sequence in sequences]
+        # the letters in the sequences, in sorted order
+        values = numpy.unique(numpy.concatenate(codes))
+        letters = "".join(map(chr, values))
         m = substitution_matrices.Array(letters, dims=2)
+        k = len(letters)
+        indices = [numpy.searchsorted(values, sequence) for sequence in codes]
+        coordinates = self.coordinates
+        steps = numpy.diff(coordinates, axis=1)
         n = len(sequences)
+        counts = numpy.zeros(k * k, int)
         for i1 in range(n):
-            coordinates1 = self.coordinates[i1, :]
-            sequence1 = sequences[i1]
             for i2 in range(i1 + 1, n):
-                coordinates2 = self.coordinates[i2, :]
-                sequence2 = sequences[i2]
-                start1, start2 = sys.maxsize, sys.maxsize
-                for end1, end2 in zip(coordinates1, coordinates2):
-                    if start1 < end1 and start2 < end2:  # aligned
-                        segment1 = sequence1[start1:end1]
-                        segment2 = sequence2[start2:end2]
-                        for c1, c2 in zip(segment1, segment2):
-                            m[c1, c2] += 1.0
-                    start1, start2 = end1, end2
+                aligned = (steps[i1, :] > 0) & (steps[i2, :] > 0)
+                sizes = steps[i1, aligned]
+                # positions of the aligned letters in each segment
+                offsets = numpy.arange(sizes.sum()) - numpy.repeat(
+                    numpy.cumsum(sizes) - sizes, sizes
+                )
+                positions1 = numpy.repeat(coordinates[i1, :-1][aligned], sizes)
+                positions2 = numpy.repeat(coordinates[i2, :-1][aligned], sizes)
+                indices1 = indices[i1][positions1 + offsets]
+                indices2 = indices[i2][positions2 + offsets]
+                counts += numpy.bincount(indices1 * k + indices2, minlength=k * k)
+        m += counts.reshape(k, k)
         return m
 
 
+def _code_points(sequence):
+    """Return the letters of a sequence as a NumPy array of code points (PRIVATE)."""
+    import numpy
+
+    if isinstance(sequence, SeqRecord):
+        sequence = sequence.seq
+    if isinstance(sequence, str):
+        data = sequence.encode("utf-32-le")
+        return numpy.frombuffer(data, numpy.uint32)
+    return numpy.frombuffer(bytes(sequence), numpy.uint8)
+
+
+class _PathList:
+    """Iterator over a precalculated list of alignment paths (PRIVATE).
+
+    This provides the same interface as the path generator returned by the C
+    aligner, for aligners that calculate the paths in advance (such as the
+    banded and X-drop aligners).
+    """
+
+    def __init__(self, paths):
+        self._paths = paths
+        self._index = 0
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._index == len(self._paths):
+            raise StopIteration
+        path = self._paths[self._index]
+        self._index += 1
+        return path
+
+    def reset(self):
+        self._index = 0
+
+    def count_modulo(self, modulus):
+        return len(self._paths) % modulus
+
+    def sample(self, rng):
+        if not self._paths:
+            return None
+        index = min(int(rng() * len(self._paths)), len(self._paths) - 1)
+        return self._paths[index]
+
+
+def _modular_inverse(a, modulus):
+    """Return the inverse of a modulo modulus, which are coprime (PRIVATE)."""
+    x, previous_x = 0, 1
+    b = modulus
+    while b:
+        quotient = a // b
+        a, b = b, a - quotient * b
+        x, previous_x = previous_x - quotient * x, x
+    return previous_x % modulus
+
+
 class PairwiseAlignments:
     """Implements an iterator over pairwise alignments returned by the aligner.
 
@@ -2618,10 +2876,12 @@ class PairwiseAlignments:
     even for relatively short sequences, if they align poorly to each other. We
     therefore recommend to first check the number of alignments, accessible as
     len(alignments), which can be calculated quickly even if the number of
-    alignments is very large.
+    alignments is very large. If it is too large for len, use the count method.
+    To look at a few of them, use the max_alignments argument of the align
+    method of the aligner, or draw random alignments with the sample method.
     """
 
-    def __init__(self, seqA, seqB, score, paths):
+    def __init__(self, seqA, seqB, score, paths, max_alignments=None):
         """Initialize a new PairwiseAlignments object.
 
         Arguments:
@@ -2630,25 +2890,45 @@ class PairwiseAlignments:
          - score - The alignment score.
          - paths - An iterator over the paths in the traceback matrix;
                    each path defines one alignment.
+         - max_alignments - The maximum number of alignments to return
+                   (default: None, meaning all alignments).
 
         You would normally obtain a PairwiseAlignments object by calling
         aligner.align(seqA, seqB), where aligner is a PairwiseAligner object.
+
+        If max_alignments is given, the paths are stored while iterating,
+        and the traceback matrix is released once max_alignments paths have
+        been found, or when there are no more paths.
         """
+        if max_alignments is not None and max_alignments < 1:
+            raise ValueError("max_alignments must be at least 1")
+        if isinstance(paths, _PathList) and max_alignments is not None:
+            paths = _PathList(paths._paths[:max_alignments])
         self.sequences = [seqA, seqB]
         self.score = score
         self.paths = paths
         self.index = -1
+        self.max_alignments = max_alignments
+        if max_alignments is None or isinstance(paths, _PathList):
+            self._stored_paths = None
+        else:
+            self._stored_paths = []
 
     def __len__(self):
         """Return the number of alignments."""
-        return len(self.paths)
+        if self.max_alignments is None:
+            return len(self.paths)
+        try:
+            length = len(self.paths)
+        except OverflowError:
+            return self.max_alignments
+        return min(length, self.max_alignments)
 
     def __getitem__(self, index):
         if index == self.index:
             return self.alignment
         if index < self.index:
-            self.paths.reset()
-            self.index = -1
+            self._reset()
         while self.index < index:
             try:
                 alignment = next(self)
@@ -2657,21 +2937,134 @@ class PairwiseAlignments:
         return alignment
 
     def __iter__(self):
-        self.paths.reset()
-        self.index = -1
+        self._reset()
         return self
 
     def __next__(self):
+        if self.index + 1 == self.max_alignments:
+            raise StopIteration
+        try:
+            path = next(self.paths)
+        except StopIteration:
+            if self._stored_paths is not None:
+                self._release_traceback()
+            raise
+        self.index += 1
+        if self._stored_paths is not None:
+            self._stored_paths.append(path)
+            if len(self._stored_paths) == self.max_alignments:
+                self._release_traceback()
+        alignment = self._create_alignment(path)
+        self.alignment = alignment
+        return alignment
+
+    def _reset(self):
+        """Restart the iteration over the alignments (PRIVATE)."""
+        self.paths.reset()
+        self.index = -1
+        if self._stored_paths is not None:
+            self._stored_paths = []
+
+    def _create_alignment(self, path):
+        """Return the Alignment object for one path (PRIVATE)."""
         import numpy
 
-        path = next(self.paths)
-        self.index += 1
         coordinates = numpy.array(path).transpose()
         alignment = Alignment(self.sequences, coordinates)
         alignment.score = self.score
-        self.alignment = alignment
         return alignment
 
+    def _release_traceback(self):
+        """Store the remaining paths and release the traceback (PRIVATE).
+
+        This is used if max_alignments was given, and the stored paths are
+        used instead of the traceback matrix from then on.
+        """
+        paths = self._stored_paths
+        while len(paths) < self.max_alignments:
+            try:
+                paths.append(next(self.paths))
+            except StopIteration:
+                break
+        self.paths = _PathList(paths)
+        self.paths._index = self.index + 1
+        self._stored_paths = None
+
+    def count(self):
+        """Return the number of alignments as a Python integer.
+
+        In contrast to len(alignments), this also works if the number of
+        alignments does not fit in a C integer. The number of paths through
+        the traceback matrix is then counted modulo several large numbers,
+        and the results are combined using the Chinese remainder theorem.
+
+        >>> from Bio import Align
+        >>> aligner = Align.PairwiseAligner()
+        >>> alignments = aligner.align("A" * 60, "C" * 60)
+        >>> alignments.count()
+        632514482944482357481224596228193170999575489
+        """
+        try:
+            return len(self)
+        except OverflowError:
+            pass
+        nA, nB = (len(sequence) for sequence in self.sequences)
+        # Each alignment is a path of horizontal, vertical, and diagonal
+        # steps between two cells of the traceback matrix, so the number of
+        # alignments is less than
+        bound = 3 ** (nA + nB) * ((nA + 1) * (nB + 1)) ** 2
+        count = 0
+        product = 1
+        modulus = sys.maxsize >> 2
+        while product <= bound:
+            if math.gcd(modulus, product) == 1:
+                residue = self.paths.count_modulo(modulus)
+                inverse = _modular_inverse(product % modulus, modulus)
+                count += product * ((residue - count) * inverse % modulus)
+                product *= modulus
+            modulus -= 1
+        return count
+
+    def sample(self, size=1, seed=None):
+        """Return a list of alignments drawn at random.
+
+        Arguments:
+         - size - The number of alignments to draw (default: 1).
+         - seed - Seed for the random number generator (default: None).
+
+        The alignments are drawn independently from each other, and each
+        alignment has the same probability to be drawn, so the same alignment
+        may occur more than once. This is fast even if the number of
+        alignments is astronomical, as the number of paths leading to each
+        cell of the traceback matrix determines the probability of each step.
+        If max_alignments was given, the alignments are drawn from the first
+        max_alignments alignments only.
+
+        >>> from Bio import Align
+        >>> aligner = Align.PairwiseAligner()
+        >>> alignments = aligner.align("TACCG", "ACG")
+        >>> for alignment in alignments.sample(3, seed=1):
+        ...     print(alignment in list(alignments))
+        ...
+        True
+        True
+        True
+        """
+        if self._stored_paths is not None:
+            index = self.index
+            alignment = self.alignment if index >= 0 else None
+            self._release_traceback()
+            self.index = index
+            self.alignment = alignment
+        generator = random.Random(seed)
+        alignments = []
+        for i in range(size):
+            path = self.paths.sample(generator.random)
+            if path is None:
+                raise ValueError("no alignments to sample from")
+            alignments.append(self._create_alignment(path))
+        return alignments
+
 
 class PairwiseAligner(_aligners.PairwiseAligner):
     """Performs pairwise sequence alignment using dynamic programming.
@@ -2816,6 +3209,39 @@ class PairwiseAligner(_aligners.PairwiseAligner):
     -A-CG
     <BLANKLINE>
 
+    For long, similar sequences, you can restrict the dynamic programming
+    to a band around the main diagonals by setting band_width; the
+    alignment path then never deviates more than band_width positions
+    from the diagonals that start and end the global alignment.  For local
+    alignments, setting xdrop additionally stops extending the alignment
+    where its score drops more than xdrop below the best score found so
+    far.  Both reduce the running time and memory to roughly the number of
+    cells inside the band.  In these modes, the aligner returns one
+    optimal alignment instead of all of them:
+
+    >>> aligner = Align.PairwiseAligner(mode='global', match_score=2, mismatch_score=-1)
+    >>> aligner.band_width = 2
+    >>> alignments = aligner.align("TACCG", "ACG")
+    >>> len(alignments)
+    1
+    >>> print(alignments[0].score)
+    6.0
+
+    The traceback matrices used by the align method take memory proportional
+    to the product of the sequence lengths.  To align long sequences, set
+    memory_mode to 'linear'; the aligner then finds one optimal alignment
+    by the divide-and-conquer algorithm of Hirschberg (as extended to
+    affine gap scores by Myers and Miller), using memory proportional to
+    the sequence lengths at about twice the running time:
+
+    >>> aligner = Align.PairwiseAligner(mode='global', match_score=2, mismatch_score=-1)
+    >>> aligner.memory_mode = 'linear'
+    >>> alignments = aligner.align("TACCG", "ACG")
+    >>> len(alignments)
+    1
+    >>> print(alignments[0].score)
+    6.0
+
     """
 
     def __init__(self, **kwargs):
@@ -2835,8 +3261,15 @@ class PairwiseAligner(_aligners.PairwiseAligner):
             raise AttributeError("'PairwiseAligner' object has no attribute '%s'" % key)
         _aligners.PairwiseAligner.__setattr__(self, key, value)
 
-    def align(self, seqA, seqB, strand="+"):
-        """Return the alignments of two sequences using PairwiseAligner."""
+    def align(self, seqA, seqB, strand="+", max_alignments=None):
+        """Return the alignments of two sequences using PairwiseAligner.
+
+        The alignments are generated lazily while iterating over the returned
+        PairwiseAlignments object. Use max_alignments to return at most that
+        many alignments; the traceback matrix is then released as soon as
+        they have been found. For example, with max_alignments=1, the memory
+        used for the traceback is freed after creating the first alignment.
+        """
         if isinstance(seqA, (Seq, MutableSeq)):
             sA = bytes(seqA)
         else:
@@ -2848,7 +3281,9 @@ class PairwiseAligner(_aligners.PairwiseAligner):
         if isinstance(sB, (Seq, MutableSeq)):
             sB = bytes(sB)
         score, paths = _aligners.PairwiseAligner.align(self, sA, sB, strand)
-        alignments = PairwiseAlignments(seqA, seqB, score, paths)
+        if isinstance(paths, list):
+            paths = _PathList(paths)
+        alignments = PairwiseAlignments(seqA, seqB, score, paths, max_alignments)
         return alignments
 
     def score(self, seqA, seqB, strand="+"):
@@ -2861,6 +3296,93 @@ class PairwiseAligner(_aligners.PairwiseAligner):
             seqB = bytes(seqB)
         return _aligners.PairwiseAligner.score(self, seqA, seqB, strand)
 
+    def score_many(self, pairs, strand="+", threads=1):
+        """Return the alignment scores of many pairs of sequences.
+
+        Arguments:
+         - pairs   - An iterable of (seqA, seqB) tuples of sequences.
+         - strand  - The strand of the second sequence of each pair, as
+                     for the score method.
+         - threads - The number of threads to use (default 1).
+
+        The scores are returned as a NumPy array of floats, in the same
+        order as the input pairs. The dynamic programming is done without
+        holding the Python Global Interpreter Lock (except if gap score
+        functions are used), so the pairs are scored in parallel if threads
+        is more than one:
+
+        >>> from Bio import Align
+        >>> aligner = Align.PairwiseAligner()
+        >>> pairs = [("TACCG", "ACG"), ("GAACT", "GAT"), ("ACGT", "TGCA")]
+        >>> print(aligner.score_many(pairs, threads=2))
+        [ 3.  3.  1.]
+        """
+        import numpy
+
+        if threads < 1:
+            raise ValueError("threads must be at least 1, not %r" % threads)
+        pairs = list(pairs)
+        scores = numpy.empty(len(pairs))
+        if threads == 1 or len(pairs) < 2:
+            for index, (seqA, seqB) in enumerate(pairs):
+                scores[index] = self.score(seqA, seqB, strand)
+            return scores
+
+        def score_chunk(start, end):
+            for index in range(start, end):
+                seqA, seqB = pairs[index]
+                scores[index] = self.score(seqA, seqB, strand)
+
+        # Use a few chunks per thread to balance pairs of different lengths
+        size = -(-len(pairs) // (4 * threads))
+        with ThreadPoolExecutor(threads) as executor:
+            futures = [
+                executor.submit(score_chunk, start, min(start + size, len(pairs)))
+                for start in range(0, len(pairs), size)
+            ]
+            for future in futures:
+                future.result()
+        return scores
+
+    def align_many(self, pairs, strand="+", threads=1):
+        """Align many pairs of sequences, returning an iterator.
+
+        Arguments:
+         - pairs   - An iterable of (seqA, seqB) tuples of sequences.
+         - strand  - The strand of the second sequence of each pair, as
+                     for the align method.
+         - threads - The number of threads to use (default 1).
+
+        This yields a PairwiseAlignments object for each pair of sequences,
+        in the same order as the input pairs. If threads is more than one,
+        the dynamic programming matrices of the next few pairs are filled in
+        parallel in background threads while you work on the current one:
+
+        >>> from Bio import Align
+        >>> aligner = Align.PairwiseAligner()
+        >>> pairs = [("TACCG", "ACG"), ("GAACT", "GAT")]
+        >>> for alignments in aligner.align_many(pairs, threads=2):
+        ...     print(alignments.score, len(alignments))
+        ...
+        3.0 2
+        3.0 2
+        """
+        if threads < 1:
+            raise ValueError("threads must be at least 1, not %r" % threads)
+        if threads == 1:
+            for seqA, seqB in pairs:
+                yield self.align(seqA, seqB, strand)
+            return
+        # Limit the read ahead, as each result holds its traceback matrices
+        with ThreadPoolExecutor(threads) as executor:
+            pending = deque()
+            for seqA, seqB in pairs:
+                pending.append(executor.submit(self.align, seqA, seqB, strand))
+                if len(pending) >= 2 * threads:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def __getstate__(self):
         state = {
             "wildcard": self.wildcard,
@@ -2877,6 +3399,9 @@ class PairwiseAligner(_aligners.PairwiseAligner):
             "query_right_open_gap_score": self.query_right_open_gap_score,
             "query_right_extend_gap_score": self.query_right_extend_gap_score,
             "mode": self.mode,
+            "band_width": self.band_width,
+            "xdrop": self.xdrop,
+            "memory_mode": self.memory_mode,
         }
         if self.substitution_matrix is None:
             state["match_score"] = self.match_score
@@ -2902,6 +3427,9 @@ class PairwiseAligner(_aligners.PairwiseAligner):
         self.query_right_open_gap_score = state["query_right_open_gap_score"]
         self.query_right_extend_gap_score = state["query_right_extend_gap_score"]
         self.mode = state["mode"]
+        self.band_width = state.get("band_width")
+        self.xdrop = state.get("xdrop")
+        self.memory_mode = state.get("memory_mode", "quadratic")
         substitution_matrix = state.get("substitution_matrix")
         if substitution_matrix is None:
             self.match_score = state["match_score"]
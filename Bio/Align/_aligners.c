@@ -10,6 +10,7 @@
 #define PY_SSIZE_T_CLEAN
 #include "Python.h"
 #include "float.h"
+#include "math.h"
 
 
 #define HORIZONTAL 0x1
@@ -28,10 +29,25 @@
 
 #define MISSING_LETTER -1
 
+/* If modulus is nonzero, the number of paths is counted modulo modulus
+ * (which is at most MAX_MODULUS). The COUNT_NONZERO flag is then set on all
+ * counts that are nonzero before taking the modulo, so that we can still
+ * test if a cell has any paths leading to it. */
+#define COUNT_NONZERO ((Py_ssize_t)1 << (8 * sizeof(Py_ssize_t) - 2))
+#define MAX_MODULUS (COUNT_NONZERO >> 1)
+
 #define SAFE_ADD(t, s) \
 {   if (s != OVERFLOW_ERROR) { \
         term = t; \
-        if (term > PY_SSIZE_T_MAX - s) s = OVERFLOW_ERROR; \
+        if (modulus) { \
+            if (term) { \
+                s = (s & ~COUNT_NONZERO) + (term & ~COUNT_NONZERO); \
+                if (s >= modulus) s -= modulus; \
+                s |= COUNT_NONZERO; \
+            } \
+        } \
+        else if (term == OVERFLOW_ERROR || term > PY_SSIZE_T_MAX - s) \
+            s = OVERFLOW_ERROR; \
         else s += term; \
     } \
 }
@@ -44,6 +60,8 @@ typedef enum {NeedlemanWunschSmithWaterman,
 
 typedef enum {Global, Local} Mode;
 
+typedef enum {Quadratic, Linear} MemoryMode;
+
 typedef struct {
     unsigned char trace : 5;
     unsigned char path : 3;
@@ -74,6 +92,11 @@ typedef struct {
     Algorithm algorithm;
     Py_ssize_t length;
     unsigned char strand;
+    /* For random sampling; calculated when needed: */
+    double* weights;  /* log of the number of paths to each cell and matrix */
+    Py_ssize_t nends;  /* number of end points */
+    int* ends;  /* row, column, and matrix of each end point */
+    double* cumulative;  /* cumulative probability of each end point */
 } PathGenerator;
 
 static PyObject*
@@ -179,7 +202,7 @@ PathGenerator_create_path(PathGenerator* self, int i, int j) {
 }
 
 static Py_ssize_t
-PathGenerator_needlemanwunsch_length(PathGenerator* self)
+PathGenerator_needlemanwunsch_length(PathGenerator* self, Py_ssize_t modulus)
 {
     int i;
     int j;
@@ -188,12 +211,13 @@ PathGenerator_needlemanwunsch_length(PathGenerator* self)
     const int nB = self->nB;
     Trace** M = self->M;
     Py_ssize_t term;
+    const Py_ssize_t one = modulus ? COUNT_NONZERO | 1 : 1;
     Py_ssize_t count = MEMORY_ERROR;
     Py_ssize_t temp;
     Py_ssize_t* counts;
     counts = PyMem_Malloc((nB+1)*sizeof(Py_ssize_t));
     if (!counts) goto exit;
-    counts[0] = 1;
+    counts[0] = one;
     for (j = 1; j <= nB; j++) {
         trace = M[0][j].trace;
         count = 0;
@@ -222,7 +246,7 @@ exit:
 }
 
 static Py_ssize_t
-PathGenerator_smithwaterman_length(PathGenerator* self)
+PathGenerator_smithwaterman_length(PathGenerator* self, Py_ssize_t modulus)
 {
     int i;
     int j;
@@ -231,17 +255,18 @@ PathGenerator_smithwaterman_length(PathGenerator* self)
     const int nB = self->nB;
     Trace** M = self->M;
     Py_ssize_t term;
+    const Py_ssize_t one = modulus ? COUNT_NONZERO | 1 : 1;
     Py_ssize_t count = MEMORY_ERROR;
     Py_ssize_t total = 0;
     Py_ssize_t temp;
     Py_ssize_t* counts;
     counts = PyMem_Malloc((nB+1)*sizeof(Py_ssize_t));
     if (!counts) goto exit;
-    counts[0] = 1;
-    for (j = 1; j <= nB; j++) counts[j] = 1;
+    counts[0] = one;
+    for (j = 1; j <= nB; j++) counts[j] = one;
     for (i = 1; i <= nA; i++) {
         temp = counts[0];
-        counts[0] = 1;
+        counts[0] = one;
         for (j = 1; j <= nB; j++) {
             trace = M[i][j].trace;
             count = 0;
@@ -250,7 +275,7 @@ PathGenerator_smithwaterman_length(PathGenerator* self)
             if (trace & HORIZONTAL) SAFE_ADD(counts[j-1], count);
             if (trace & VERTICAL) SAFE_ADD(counts[j], count);
             temp = counts[j];
-            if (count == 0 && (trace & STARTPOINT)) count = 1;
+            if (count == 0 && (trace & STARTPOINT)) count = one;
             counts[j] = count;
         }
     }
@@ -261,7 +286,7 @@ exit:
 }
 
 static Py_ssize_t
-PathGenerator_gotoh_global_length(PathGenerator* self)
+PathGenerator_gotoh_global_length(PathGenerator* self, Py_ssize_t modulus)
 {
     int i;
     int j;
@@ -272,6 +297,7 @@ PathGenerator_gotoh_global_length(PathGenerator* self)
     TraceGapsGotoh** gaps = self->gaps.gotoh;
     Py_ssize_t count = MEMORY_ERROR;
     Py_ssize_t term;
+    const Py_ssize_t one = modulus ? COUNT_NONZERO | 1 : 1;
     Py_ssize_t M_temp;
     Py_ssize_t Ix_temp;
     Py_ssize_t Iy_temp;
@@ -284,19 +310,19 @@ PathGenerator_gotoh_global_length(PathGenerator* self)
     if (!Ix_counts) goto exit;
     Iy_counts = PyMem_Malloc((nB+1)*sizeof(Py_ssize_t));
     if (!Iy_counts) goto exit;
-    M_counts[0] = 1;
+    M_counts[0] = one;
     Ix_counts[0] = 0;
     Iy_counts[0] = 0;
     for (j = 1; j <= nB; j++) {
         M_counts[j] = 0;
         Ix_counts[j] = 0;
-        Iy_counts[j] = 1;
+        Iy_counts[j] = one;
     }
     for (i = 1; i <= nA; i++) {
         M_temp = M_counts[0];
         M_counts[0] = 0;
         Ix_temp = Ix_counts[0];
-        Ix_counts[0] = 1;
+        Ix_counts[0] = one;
         Iy_temp = Iy_counts[0];
         Iy_counts[0] = 0;
         for (j = 1; j <= nB; j++) {
@@ -335,7 +361,7 @@ exit:
 }
 
 static Py_ssize_t
-PathGenerator_gotoh_local_length(PathGenerator* self)
+PathGenerator_gotoh_local_length(PathGenerator* self, Py_ssize_t modulus)
 {
     int i;
     int j;
@@ -345,6 +371,7 @@ PathGenerator_gotoh_local_length(PathGenerator* self)
     Trace** M = self->M;
     TraceGapsGotoh** gaps = self->gaps.gotoh;
     Py_ssize_t term;
+    const Py_ssize_t one = modulus ? COUNT_NONZERO | 1 : 1;
     Py_ssize_t count = MEMORY_ERROR;
     Py_ssize_t total = 0;
     Py_ssize_t M_temp;
@@ -359,17 +386,17 @@ PathGenerator_gotoh_local_length(PathGenerator* self)
     if (!Ix_counts) goto exit;
     Iy_counts = PyMem_Malloc((nB+1)*sizeof(Py_ssize_t));
     if (!Iy_counts) goto exit;
-    M_counts[0] = 1;
+    M_counts[0] = one;
     Ix_counts[0] = 0;
     Iy_counts[0] = 0;
     for (j = 1; j <= nB; j++) {
-        M_counts[j] = 1;
+        M_counts[j] = one;
         Ix_counts[j] = 0;
         Iy_counts[j] = 0;
     }
     for (i = 1; i <= nA; i++) {
         M_temp = M_counts[0];
-        M_counts[0] = 1;
+        M_counts[0] = one;
         Ix_temp = Ix_counts[0];
         Ix_counts[0] = 0;
         Iy_temp = Iy_counts[0];
@@ -380,7 +407,7 @@ PathGenerator_gotoh_local_length(PathGenerator* self)
             if (trace & M_MATRIX) SAFE_ADD(M_temp, count);
             if (trace & Ix_MATRIX) SAFE_ADD(Ix_temp, count);
             if (trace & Iy_MATRIX) SAFE_ADD(Iy_temp, count);
-            if (count == 0 && (trace & STARTPOINT)) count = 1;
+            if (count == 0 && (trace & STARTPOINT)) count = one;
             M_temp = M_counts[j];
             M_counts[j] = count;
             if (M[i][j].trace & ENDPOINT) SAFE_ADD(count, total);
@@ -409,7 +436,7 @@ exit:
 }
 
 static Py_ssize_t
-PathGenerator_waterman_smith_beyer_global_length(PathGenerator* self)
+PathGenerator_waterman_smith_beyer_global_length(PathGenerator* self, Py_ssize_t modulus)
 {
     int i;
     int j;
@@ -422,6 +449,7 @@ PathGenerator_waterman_smith_beyer_global_length(PathGenerator* self)
     TraceGapsWatermanSmithBeyer** gaps = self->gaps.waterman_smith_beyer;
     Py_ssize_t count = MEMORY_ERROR;
     Py_ssize_t term;
+    const Py_ssize_t one = modulus ? COUNT_NONZERO | 1 : 1;
     Py_ssize_t** M_count = NULL;
     Py_ssize_t** Ix_count = NULL;
     Py_ssize_t** Iy_count = NULL;
@@ -446,7 +474,7 @@ PathGenerator_waterman_smith_beyer_global_length(PathGenerator* self)
             if (trace & M_MATRIX) SAFE_ADD(M_count[i-1][j-1], count);
             if (trace & Ix_MATRIX) SAFE_ADD(Ix_count[i-1][j-1], count);
             if (trace & Iy_MATRIX) SAFE_ADD(Iy_count[i-1][j-1], count);
-            if (count == 0) count = 1; /* happens at M[0][0] only */
+            if (count == 0) count = one; /* happens at M[0][0] only */
             M_count[i][j] = count;
             count = 0;
             p = gaps[i][j].MIx;
@@ -519,7 +547,7 @@ exit:
 }
 
 static Py_ssize_t
-PathGenerator_waterman_smith_beyer_local_length(PathGenerator* self)
+PathGenerator_waterman_smith_beyer_local_length(PathGenerator* self, Py_ssize_t modulus)
 {
     int i;
     int j;
@@ -531,6 +559,7 @@ PathGenerator_waterman_smith_beyer_local_length(PathGenerator* self)
     Trace** M = self->M;
     TraceGapsWatermanSmithBeyer** gaps = self->gaps.waterman_smith_beyer;
     Py_ssize_t term;
+    const Py_ssize_t one = modulus ? COUNT_NONZERO | 1 : 1;
     Py_ssize_t count = MEMORY_ERROR;
     Py_ssize_t total = 0;
     Py_ssize_t** M_count = NULL;
@@ -557,7 +586,7 @@ PathGenerator_waterman_smith_beyer_local_length(PathGenerator* self)
             if (trace & M_MATRIX) SAFE_ADD(M_count[i-1][j-1], count);
             if (trace & Ix_MATRIX) SAFE_ADD(Ix_count[i-1][j-1], count);
             if (trace & Iy_MATRIX) SAFE_ADD(Iy_count[i-1][j-1], count);
-            if (count == 0 && (trace & STARTPOINT)) count = 1;
+            if (count == 0 && (trace & STARTPOINT)) count = one;
             M_count[i][j] = count;
             if (M[i][j].trace & ENDPOINT) SAFE_ADD(count, total);
             count = 0;
@@ -624,63 +653,71 @@ exit:
     return count;
 }
 
+static Py_ssize_t
+PathGenerator_count(PathGenerator* self, Py_ssize_t modulus) {
+    Py_ssize_t count;
+    switch (self->algorithm) {
+        case NeedlemanWunschSmithWaterman:
+            switch (self->mode) {
+                case Global:
+                    count = PathGenerator_needlemanwunsch_length(self, modulus);
+                    break;
+                case Local:
+                    count = PathGenerator_smithwaterman_length(self, modulus);
+                    break;
+                default:
+                    /* should not happen, but some compilers complain that
+                     * that count can be used uninitialized.
+                     */
+                    PyErr_SetString(PyExc_RuntimeError, "Unknown mode");
+                    return -1;
+            }
+            break;
+        case Gotoh:
+            switch (self->mode) {
+                case Global:
+                    count = PathGenerator_gotoh_global_length(self, modulus);
+                    break;
+                case Local:
+                    count = PathGenerator_gotoh_local_length(self, modulus);
+                    break;
+                default:
+                    /* should not happen, but some compilers complain that
+                     * that count can be used uninitialized.
+                     */
+                    PyErr_SetString(PyExc_RuntimeError, "Unknown mode");
+                    return -1;
+            }
+            break;
+        case WatermanSmithBeyer:
+            switch (self->mode) {
+                case Global:
+                    count = PathGenerator_waterman_smith_beyer_global_length(self, modulus);
+                    break;
+                case Local:
+                    count = PathGenerator_waterman_smith_beyer_local_length(self, modulus);
+                    break;
+                default:
+                    /* should not happen, but some compilers complain that
+                     * that count can be used uninitialized.
+                     */
+                    PyErr_SetString(PyExc_RuntimeError, "Unknown mode");
+                    return -1;
+            }
+            break;
+        case Unknown:
+        default:
+            PyErr_SetString(PyExc_RuntimeError, "Unknown algorithm");
+            return -1;
+    }
+    return count;
+}
+
 static Py_ssize_t PathGenerator_length(PathGenerator* self) {
     Py_ssize_t length = self->length;
     if (length == 0) {
-        switch (self->algorithm) {
-            case NeedlemanWunschSmithWaterman:
-                switch (self->mode) {
-                    case Global:
-                        length = PathGenerator_needlemanwunsch_length(self);
-                        break;
-                    case Local:
-                        length = PathGenerator_smithwaterman_length(self);
-                        break;
-                    default:
-                        /* should not happen, but some compilers complain that
-                         * that length can be used uninitialized.
-                         */
-                        PyErr_SetString(PyExc_RuntimeError, "Unknown mode");
-                        return -1;
-                }
-                break;
-            case Gotoh:
-                switch (self->mode) {
-                    case Global:
-                        length = PathGenerator_gotoh_global_length(self);
-                        break;
-                    case Local:
-                        length = PathGenerator_gotoh_local_length(self);
-                        break;
-                    default:
-                        /* should not happen, but some compilers complain that
-                         * that length can be used uninitialized.
-                         */
-                        PyErr_SetString(PyExc_RuntimeError, "Unknown mode");
-                        return -1;
-                }
-                break;
-            case WatermanSmithBeyer:
-                switch (self->mode) {
-                    case Global:
-                        length = PathGenerator_waterman_smith_beyer_global_length(self);
-                        break;
-                    case Local:
-                        length = PathGenerator_waterman_smith_beyer_local_length(self);
-                        break;
-                    default:
-                        /* should not happen, but some compilers complain that
-                         * that length can be used uninitialized.
-                         */
-                        PyErr_SetString(PyExc_RuntimeError, "Unknown mode");
-                        return -1;
-                }
-                break;
-            case Unknown:
-            default:
-                PyErr_SetString(PyExc_RuntimeError, "Unknown algorithm");
-                return -1;
-        }
+        length = PathGenerator_count(self, 0);
+        if (length == -1 && PyErr_Occurred()) return -1;
         self->length = length;
     }
     switch (length) {
@@ -755,6 +792,9 @@ PathGenerator_dealloc(PathGenerator* self)
             PyErr_WriteUnraisable((PyObject*)self);
             break;
     }
+    if (self->weights) PyMem_Free(self->weights);
+    if (self->ends) PyMem_Free(self->ends);
+    if (self->cumulative) PyMem_Free(self->cumulative);
     Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
@@ -1662,12 +1702,565 @@ PathGenerator_reset(PathGenerator* self)
     return Py_None;
 }
 
+static const char PathGenerator_count_modulo__doc__[] = "number of paths modulo the argument";
+
+static PyObject*
+PathGenerator_count_modulo(PathGenerator* self, PyObject* arg)
+{
+    Py_ssize_t count;
+    const Py_ssize_t modulus = PyLong_AsSsize_t(arg);
+    if (modulus == -1 && PyErr_Occurred()) return NULL;
+    if (modulus < 2 || modulus > MAX_MODULUS) {
+        PyErr_Format(PyExc_ValueError,
+                     "modulus should be between 2 and %zd", MAX_MODULUS);
+        return NULL;
+    }
+    count = PathGenerator_count(self, modulus);
+    if (count < 0) {
+        if (!PyErr_Occurred()) PyErr_SetNone(PyExc_MemoryError);
+        return NULL;
+    }
+    return PyLong_FromSsize_t(count & ~COUNT_NONZERO);
+}
+
+/* Weights for random sampling.
+ *
+ * For each cell, the weight is the logarithm of the number of paths from the
+ * start of an alignment to that cell, calculated in the same way as in the
+ * PathGenerator_*_length functions. Sampling walks back from an end point,
+ * choosing each step with a probability proportional to the number of paths
+ * leading to it, which gives each alignment the same probability.
+ */
+
+#define WEIGHT(m, i, j) weights[((m) * (nA+1) + (i)) * (nB+1) + (j)]
+
+static double
+_log_add(double a, double b)
+{
+    double t;
+    if (a < b) {
+        t = a;
+        a = b;
+        b = t;
+    }
+    if (b == -INFINITY) return a;
+    return a + log1p(exp(b - a));
+}
+
+static void
+_add_end_point(PathGenerator* self, int i, int j, int m, double weight)
+{
+    const Py_ssize_t k = self->nends;
+    if (weight == -INFINITY) return;
+    self->ends[3*k] = i;
+    self->ends[3*k+1] = j;
+    self->ends[3*k+2] = m;
+    self->cumulative[k] = weight;
+    self->nends++;
+}
+
+static void
+PathGenerator_needlemanwunsch_weights(PathGenerator* self)
+{
+    int i;
+    int j;
+    int trace;
+    double weight;
+    const int nA = self->nA;
+    const int nB = self->nB;
+    Trace** M = self->M;
+    double* weights = self->weights;
+    for (i = 0; i <= nA; i++) {
+        for (j = 0; j <= nB; j++) {
+            trace = M[i][j].trace;
+            weight = -INFINITY;
+            if (i == 0 && j == 0) weight = 0;
+            if ((trace & HORIZONTAL) && j > 0)
+                weight = _log_add(weight, WEIGHT(0, i, j-1));
+            if ((trace & VERTICAL) && i > 0)
+                weight = _log_add(weight, WEIGHT(0, i-1, j));
+            if ((trace & DIAGONAL) && i > 0 && j > 0)
+                weight = _log_add(weight, WEIGHT(0, i-1, j-1));
+            WEIGHT(0, i, j) = weight;
+        }
+    }
+    _add_end_point(self, nA, nB, 0, WEIGHT(0, nA, nB));
+}
+
+static void
+PathGenerator_smithwaterman_weights(PathGenerator* self)
+{
+    int i;
+    int j;
+    int trace;
+    double weight;
+    const int nA = self->nA;
+    const int nB = self->nB;
+    Trace** M = self->M;
+    double* weights = self->weights;
+    for (i = 0; i <= nA; i++) {
+        for (j = 0; j <= nB; j++) {
+            if (i == 0 || j == 0) {
+                WEIGHT(0, i, j) = 0;
+                continue;
+            }
+            trace = M[i][j].trace;
+            weight = -INFINITY;
+            if (trace & DIAGONAL) weight = WEIGHT(0, i-1, j-1);
+            /* paths ending in a gap are excluded */
+            if (trace & ENDPOINT) _add_end_point(self, i, j, 0, weight);
+            if (trace & HORIZONTAL)
+                weight = _log_add(weight, WEIGHT(0, i, j-1));
+            if (trace & VERTICAL)
+                weight = _log_add(weight, WEIGHT(0, i-1, j));
+            if (weight == -INFINITY && (trace & STARTPOINT)) weight = 0;
+            WEIGHT(0, i, j) = weight;
+        }
+    }
+}
+
+static double
+_gotoh_weight(const double* weights, int nA, int nB, int trace, int i, int j)
+{
+    double weight = -INFINITY;
+    if (i < 0 || j < 0) return weight;
+    if (trace & M_MATRIX) weight = _log_add(weight, WEIGHT(0, i, j));
+    if (trace & Ix_MATRIX) weight = _log_add(weight, WEIGHT(1, i, j));
+    if (trace & Iy_MATRIX) weight = _log_add(weight, WEIGHT(2, i, j));
+    return weight;
+}
+
+static void
+PathGenerator_gotoh_weights(PathGenerator* self)
+{
+    int i;
+    int j;
+    int trace;
+    double weight;
+    const int nA = self->nA;
+    const int nB = self->nB;
+    const Mode mode = self->mode;
+    Trace** M = self->M;
+    TraceGapsGotoh** gaps = self->gaps.gotoh;
+    double* weights = self->weights;
+    for (i = 0; i <= nA; i++) {
+        for (j = 0; j <= nB; j++) {
+            if (i == 0 || j == 0) {
+                switch (mode) {
+                    case Global:
+                        WEIGHT(0, i, j) = (i == 0 && j == 0) ? 0 : -INFINITY;
+                        WEIGHT(1, i, j) = (i > 0) ? 0 : -INFINITY;
+                        WEIGHT(2, i, j) = (j > 0) ? 0 : -INFINITY;
+                        break;
+                    case Local:
+                        WEIGHT(0, i, j) = 0;
+                        WEIGHT(1, i, j) = -INFINITY;
+                        WEIGHT(2, i, j) = -INFINITY;
+                        break;
+                }
+                continue;
+            }
+            trace = M[i][j].trace;
+            weight = _gotoh_weight(weights, nA, nB, trace, i-1, j-1);
+            if (mode == Local) {
+                if (weight == -INFINITY && (trace & STARTPOINT)) weight = 0;
+                if (trace & ENDPOINT) _add_end_point(self, i, j, 0, weight);
+            }
+            WEIGHT(0, i, j) = weight;
+            trace = gaps[i][j].Ix;
+            WEIGHT(1, i, j) = _gotoh_weight(weights, nA, nB, trace, i-1, j);
+            trace = gaps[i][j].Iy;
+            WEIGHT(2, i, j) = _gotoh_weight(weights, nA, nB, trace, i, j-1);
+        }
+    }
+    if (mode == Global) {
+        if (M[nA][nB].trace)
+            _add_end_point(self, nA, nB, 0, WEIGHT(0, nA, nB));
+        if (gaps[nA][nB].Ix)
+            _add_end_point(self, nA, nB, 1, WEIGHT(1, nA, nB));
+        if (gaps[nA][nB].Iy)
+            _add_end_point(self, nA, nB, 2, WEIGHT(2, nA, nB));
+    }
+}
+
+static void
+PathGenerator_waterman_smith_beyer_weights(PathGenerator* self)
+{
+    int i;
+    int j;
+    int trace;
+    int* p;
+    double weight;
+    const int nA = self->nA;
+    const int nB = self->nB;
+    const Mode mode = self->mode;
+    Trace** M = self->M;
+    TraceGapsWatermanSmithBeyer** gaps = self->gaps.waterman_smith_beyer;
+    double* weights = self->weights;
+    for (i = 0; i <= nA; i++) {
+        for (j = 0; j <= nB; j++) {
+            trace = M[i][j].trace;
+            weight = -INFINITY;
+            if (i > 0 && j > 0)
+                weight = _gotoh_weight(weights, nA, nB, trace, i-1, j-1);
+            switch (mode) {
+                case Global:
+                    if (i == 0 && j == 0) weight = 0;
+                    break;
+                case Local:
+                    if (weight == -INFINITY && (trace & STARTPOINT))
+                        weight = 0;
+                    if (trace & ENDPOINT)
+                        _add_end_point(self, i, j, 0, weight);
+                    break;
+            }
+            WEIGHT(0, i, j) = weight;
+            weight = -INFINITY;
+            p = gaps[i][j].MIx;
+            if (p) for ( ; *p; p++)
+                weight = _log_add(weight, WEIGHT(0, i - *p, j));
+            p = gaps[i][j].IyIx;
+            if (p) for ( ; *p; p++)
+                weight = _log_add(weight, WEIGHT(2, i - *p, j));
+            WEIGHT(1, i, j) = weight;
+            weight = -INFINITY;
+            p = gaps[i][j].MIy;
+            if (p) for ( ; *p; p++)
+                weight = _log_add(weight, WEIGHT(0, i, j - *p));
+            p = gaps[i][j].IxIy;
+            if (p) for ( ; *p; p++)
+                weight = _log_add(weight, WEIGHT(1, i, j - *p));
+            WEIGHT(2, i, j) = weight;
+        }
+    }
+    if (mode == Global) {
+        TraceGapsWatermanSmithBeyer* end = &gaps[nA][nB];
+        if (M[nA][nB].trace)
+            _add_end_point(self, nA, nB, 0, WEIGHT(0, nA, nB));
+        if ((end->MIx && end->MIx[0]) || (end->IyIx && end->IyIx[0]))
+            _add_end_point(self, nA, nB, 1, WEIGHT(1, nA, nB));
+        if ((end->MIy && end->MIy[0]) || (end->IxIy && end->IxIy[0]))
+            _add_end_point(self, nA, nB, 2, WEIGHT(2, nA, nB));
+    }
+}
+
+static int
+PathGenerator_weights(PathGenerator* self)
+{
+    Py_ssize_t k;
+    Py_ssize_t size;
+    Py_ssize_t nends;
+    double total = -INFINITY;
+    double sum = 0;
+    const Py_ssize_t nA = self->nA;
+    const Py_ssize_t nB = self->nB;
+    const Algorithm algorithm = self->algorithm;
+    if (self->weights) return 0;
+    size = (nA+1) * (nB+1);
+    nends = (self->mode == Local) ? size : 3;
+    if (algorithm != NeedlemanWunschSmithWaterman) size *= 3;
+    self->weights = PyMem_Malloc(size*sizeof(double));
+    self->ends = PyMem_Malloc(3*nends*sizeof(int));
+    self->cumulative = PyMem_Malloc(nends*sizeof(double));
+    if (!self->weights || !self->ends || !self->cumulative) {
+        PyErr_SetNone(PyExc_MemoryError);
+        goto exit;
+    }
+    self->nends = 0;
+    switch (algorithm) {
+        case NeedlemanWunschSmithWaterman:
+            switch (self->mode) {
+                case Global:
+                    PathGenerator_needlemanwunsch_weights(self);
+                    break;
+                case Local:
+                    PathGenerator_smithwaterman_weights(self);
+                    break;
+            }
+            break;
+        case Gotoh:
+            PathGenerator_gotoh_weights(self);
+            break;
+        case WatermanSmithBeyer:
+            PathGenerator_waterman_smith_beyer_weights(self);
+            break;
+        case Unknown:
+        default:
+            PyErr_SetString(PyExc_RuntimeError, "Unknown algorithm");
+            goto exit;
+    }
+    /* Convert the weights of the end points to cumulative probabilities */
+    nends = self->nends;
+    for (k = 0; k < nends; k++) total = _log_add(total, self->cumulative[k]);
+    for (k = 0; k < nends; k++) {
+        sum += exp(self->cumulative[k] - total);
+        self->cumulative[k] = sum;
+    }
+    return 0;
+exit:
+    if (self->weights) PyMem_Free(self->weights);
+    if (self->ends) PyMem_Free(self->ends);
+    if (self->cumulative) PyMem_Free(self->cumulative);
+    self->weights = NULL;
+    self->ends = NULL;
+    self->cumulative = NULL;
+    self->nends = 0;
+    return -1;
+}
+
+static Py_ssize_t
+_random_choice(PyObject* random, const double* cumulative, Py_ssize_t n)
+{
+    /* Return the index k with probability cumulative[k] - cumulative[k-1],
+     * where cumulative[n-1] is about 1. */
+    double value;
+    PyObject* result;
+    Py_ssize_t low = 0;
+    Py_ssize_t high = n - 1;
+    Py_ssize_t middle;
+    if (n == 1) return 0;
+    result = PyObject_CallObject(random, NULL);
+    if (!result) return -1;
+    value = PyFloat_AsDouble(result) * cumulative[n-1];
+    Py_DECREF(result);
+    if (value == -1.0 && PyErr_Occurred()) return -1;
+    while (low < high) {
+        middle = (low + high) / 2;
+        if (value < cumulative[middle]) high = middle;
+        else low = middle + 1;
+    }
+    return low;
+}
+
+static const char PathGenerator_sample__doc__[] = "return a random path, or None if there are no paths";
+
+static PyObject*
+PathGenerator_sample(PathGenerator* self, PyObject* random)
+{
+    int i;
+    int j;
+    int m;
+    int k;
+    int n = 0;
+    int ncandidates;
+    int trace;
+    int* p;
+    int gap;
+    Py_ssize_t index;
+    const int nA = self->nA;
+    const int nB = self->nB;
+    const Algorithm algorithm = self->algorithm;
+    Trace** M = self->M;
+    double* weights;
+    double weight;
+    double total;
+    double sum;
+    /* Each candidate step back is stored as row, column, matrix, direction,
+     * and number of steps. */
+    int* candidates = NULL;
+    double* probabilities = NULL;
+    unsigned char* steps = NULL;
+    unsigned char* saved = NULL;
+    PyObject* path = NULL;
+
+    if (!PyCallable_Check(random)) {
+        PyErr_SetString(PyExc_TypeError, "argument should be callable");
+        return NULL;
+    }
+    if (PathGenerator_weights(self) < 0) return NULL;
+    if (self->nends == 0) Py_RETURN_NONE;
+    weights = self->weights;
+    k = 2 * (nA > nB ? nA : nB) + 3;  /* maximum number of candidates */
+    candidates = PyMem_Malloc(5*k*sizeof(int));
+    probabilities = PyMem_Malloc(k*sizeof(double));
+    steps = PyMem_Malloc((nA+nB+1)*sizeof(unsigned char));
+    saved = PyMem_Malloc((nA+nB+1)*sizeof(unsigned char));
+    if (!candidates || !probabilities || !steps || !saved) {
+        PyErr_SetNone(PyExc_MemoryError);
+        goto exit;
+    }
+
+    index = _random_choice(random, self->cumulative, self->nends);
+    if (index < 0) goto exit;
+    i = self->ends[3*index];
+    j = self->ends[3*index+1];
+    m = self->ends[3*index+2];
+    if (algorithm == NeedlemanWunschSmithWaterman && self->mode == Local) {
+        /* Only allow paths ending with a diagonal step. */
+        steps[n++] = DIAGONAL;
+        i--;
+        j--;
+    }
+
+#define ADD_CANDIDATE(ii, jj, mm, direction, length) \
+    { candidates[5*ncandidates] = ii; \
+      candidates[5*ncandidates+1] = jj; \
+      candidates[5*ncandidates+2] = mm; \
+      candidates[5*ncandidates+3] = direction; \
+      candidates[5*ncandidates+4] = length; \
+      ncandidates++; }
+
+    while (1) {
+        ncandidates = 0;
+        switch (algorithm) {
+            case NeedlemanWunschSmithWaterman:
+                trace = M[i][j].trace;
+                if ((trace & HORIZONTAL) && j > 0)
+                    ADD_CANDIDATE(i, j-1, 0, HORIZONTAL, 1);
+                if ((trace & VERTICAL) && i > 0)
+                    ADD_CANDIDATE(i-1, j, 0, VERTICAL, 1);
+                if ((trace & DIAGONAL) && i > 0 && j > 0)
+                    ADD_CANDIDATE(i-1, j-1, 0, DIAGONAL, 1);
+                break;
+            case Gotoh:
+            case WatermanSmithBeyer:
+                switch (m) {
+                    case 0:
+                        if (i == 0 || j == 0) break;
+                        trace = M[i][j].trace;
+                        if (trace & M_MATRIX)
+                            ADD_CANDIDATE(i-1, j-1, 0, DIAGONAL, 1);
+                        if (trace & Ix_MATRIX)
+                            ADD_CANDIDATE(i-1, j-1, 1, DIAGONAL, 1);
+                        if (trace & Iy_MATRIX)
+                            ADD_CANDIDATE(i-1, j-1, 2, DIAGONAL, 1);
+                        break;
+                    case 1:
+                        if (algorithm == Gotoh) {
+                            if (i == 0) break;
+                            trace = self->gaps.gotoh[i][j].Ix;
+                            if (trace & M_MATRIX)
+                                ADD_CANDIDATE(i-1, j, 0, VERTICAL, 1);
+                            if (trace & Ix_MATRIX)
+                                ADD_CANDIDATE(i-1, j, 1, VERTICAL, 1);
+                            if (trace & Iy_MATRIX)
+                                ADD_CANDIDATE(i-1, j, 2, VERTICAL, 1);
+                        }
+                        else {
+                            p = self->gaps.waterman_smith_beyer[i][j].MIx;
+                            if (p) for ( ; (gap = *p); p++)
+                                ADD_CANDIDATE(i-gap, j, 0, VERTICAL, gap);
+                            p = self->gaps.waterman_smith_beyer[i][j].IyIx;
+                            if (p) for ( ; (gap = *p); p++)
+                                ADD_CANDIDATE(i-gap, j, 2, VERTICAL, gap);
+                        }
+                        break;
+                    case 2:
+                        if (algorithm == Gotoh) {
+                            if (j == 0) break;
+                            trace = self->gaps.gotoh[i][j].Iy;
+                            if (trace & M_MATRIX)
+                                ADD_CANDIDATE(i, j-1, 0, HORIZONTAL, 1);
+                            if (trace & Ix_MATRIX)
+                                ADD_CANDIDATE(i, j-1, 1, HORIZONTAL, 1);
+                            if (trace & Iy_MATRIX)
+                                ADD_CANDIDATE(i, j-1, 2, HORIZONTAL, 1);
+                        }
+                        else {
+                            p = self->gaps.waterman_smith_beyer[i][j].MIy;
+                            if (p) for ( ; (gap = *p); p++)
+                                ADD_CANDIDATE(i, j-gap, 0, HORIZONTAL, gap);
+                            p = self->gaps.waterman_smith_beyer[i][j].IxIy;
+                            if (p) for ( ; (gap = *p); p++)
+                                ADD_CANDIDATE(i, j-gap, 1, HORIZONTAL, gap);
+                        }
+                        break;
+                }
+                break;
+            case Unknown:
+            default:
+                PyErr_SetString(PyExc_RuntimeError, "Unknown algorithm");
+                goto exit;
+        }
+        /* Keep only the candidates with paths leading to them. */
+        total = -INFINITY;
+        k = 0;
+        while (k < ncandidates) {
+            weight = WEIGHT(candidates[5*k+2], candidates[5*k], candidates[5*k+1]);
+            if (weight == -INFINITY) {
+                ncandidates--;
+                memcpy(candidates+5*k, candidates+5*ncandidates, 5*sizeof(int));
+                continue;
+            }
+            probabilities[k] = weight;
+            total = _log_add(total, weight);
+            k++;
+        }
+        if (ncandidates == 0) break;  /* we reached the start of the path */
+        sum = 0;
+        for (k = 0; k < ncandidates; k++) {
+            sum += exp(probabilities[k] - total);
+            probabilities[k] = sum;
+        }
+        k = _random_choice(random, probabilities, ncandidates);
+        if (k < 0) goto exit;
+        i = candidates[5*k];
+        j = candidates[5*k+1];
+        m = candidates[5*k+2];
+        for (gap = 0; gap < candidates[5*k+4]; gap++)
+            steps[n++] = candidates[5*k+3];
+    }
+
+#undef ADD_CANDIDATE
+
+    /* Store the path in the path field of the trace matrix temporarily, so
+     * that we can use PathGenerator_create_path. The path field also stores
+     * the state of the iterator, so we restore it afterwards. */
+    for (k = n - 1; k >= 0; k--) {
+        saved[k] = M[i][j].path;
+        M[i][j].path = steps[k];
+        switch (steps[k]) {
+            case HORIZONTAL: j++; break;
+            case VERTICAL: i++; break;
+            case DIAGONAL: i++; j++; break;
+        }
+    }
+    saved[n] = M[i][j].path;
+    M[i][j].path = 0;
+    for (k = 0; k < n; k++) {
+        switch (steps[k]) {
+            case HORIZONTAL: j--; break;
+            case VERTICAL: i--; break;
+            case DIAGONAL: i--; j--; break;
+        }
+    }
+    path = PathGenerator_create_path(self, i, j);
+    for (k = n - 1; k >= 0; k--) {
+        M[i][j].path = saved[k];
+        switch (steps[k]) {
+            case HORIZONTAL: j++; break;
+            case VERTICAL: i++; break;
+            case DIAGONAL: i++; j++; break;
+        }
+    }
+    M[i][j].path = saved[n];
+
+exit:
+    if (candidates) PyMem_Free(candidates);
+    if (probabilities) PyMem_Free(probabilities);
+    if (steps) PyMem_Free(steps);
+    if (saved) PyMem_Free(saved);
+    return path;
+}
+
+#undef WEIGHT
+
 static PyMethodDef PathGenerator_methods[] = {
     {"reset",
      (PyCFunction)PathGenerator_reset,
      METH_NOARGS,
      PathGenerator_reset__doc__
     },
+    {"count_modulo",
+     (PyCFunction)PathGenerator_count_modulo,
+     METH_O,
+     PathGenerator_count_modulo__doc__
+    },
+    {"sample",
+     (PyCFunction)PathGenerator_sample,
+     METH_O,
+     PathGenerator_sample__doc__
+    },
     {NULL}  /* Sentinel */
 };
 
@@ -1738,6 +2331,9 @@ typedef struct {
     PyObject* alphabet;
     int* mapping;
     int wildcard;
+    Py_ssize_t band_width;
+    double xdrop;
+    MemoryMode memory_mode;
 } Aligner;
 
 
@@ -1854,6 +2450,9 @@ Aligner_init(Aligner *self, PyObject *args, PyObject *kwds)
     self->alphabet = NULL;
     self->mapping = NULL;
     self->wildcard = -1;
+    self->band_width = -1;
+    self->xdrop = -1;
+    self->memory_mode = Quadratic;
     return 0;
 }
 
@@ -1940,6 +2539,12 @@ Aligner_str(Aligner* self)
         p += sprintf(p, "  query_right_extend_gap_score: %f\n",
                      self->query_right_extend_gap_score);
     }
+    if (self->band_width >= 0)
+        p += sprintf(p, "  band_width: %zd\n", self->band_width);
+    if (self->xdrop >= 0)
+        p += sprintf(p, "  xdrop: %f\n", self->xdrop);
+    if (self->memory_mode == Linear)
+        p += sprintf(p, "  memory_mode: linear\n");
     switch (self->mode) {
         case Global: sprintf(p, "  mode: global\n"); break;
         case Local: sprintf(p, "  mode: local\n"); break;
@@ -1969,13 +2574,43 @@ Aligner_set_mode(Aligner* self, PyObject* value, void* closure)
             self->mode = Global;
             return 0;
         }
-        if (PyUnicode_CompareWithASCIIString(value, "local") == 0) {
-            self->mode = Local;
+        if (PyUnicode_CompareWithASCIIString(value, "local") == 0) {
+            self->mode = Local;
+            return 0;
+        }
+    }
+    PyErr_SetString(PyExc_ValueError,
+                    "invalid mode (expected 'global' or 'local'");
+    return -1;
+}
+
+static char Aligner_memory_mode__doc__[] = "memory used for the traceback ('quadratic' or 'linear')";
+
+static PyObject*
+Aligner_get_memory_mode(Aligner* self, void* closure)
+{   const char* message = NULL;
+    switch (self->memory_mode) {
+        case Quadratic: message = "quadratic"; break;
+        case Linear: message = "linear"; break;
+    }
+    return PyUnicode_FromString(message);
+}
+
+static int
+Aligner_set_memory_mode(Aligner* self, PyObject* value, void* closure)
+{
+    if (PyUnicode_Check(value)) {
+        if (PyUnicode_CompareWithASCIIString(value, "quadratic") == 0) {
+            self->memory_mode = Quadratic;
+            return 0;
+        }
+        if (PyUnicode_CompareWithASCIIString(value, "linear") == 0) {
+            self->memory_mode = Linear;
             return 0;
         }
     }
     PyErr_SetString(PyExc_ValueError,
-                    "invalid mode (expected 'global' or 'local'");
+                    "invalid memory_mode (expected 'quadratic' or 'linear')");
     return -1;
 }
 
@@ -3737,6 +4372,73 @@ Aligner_set_wildcard(Aligner* self, PyObject* value, void* closure)
 
 static char Aligner_wildcard__doc__[] = "wildcard character";
 
+static char Aligner_band_width__doc__[] = "maximum distance of the alignment path from the main diagonals, or None";
+
+static PyObject*
+Aligner_get_band_width(Aligner* self, void* closure)
+{
+    if (self->band_width < 0) {
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+    return PyLong_FromSsize_t(self->band_width);
+}
+
+static int
+Aligner_set_band_width(Aligner* self, PyObject* value, void* closure)
+{
+    Py_ssize_t band_width;
+    if (value == Py_None) {
+        self->band_width = -1;
+        return 0;
+    }
+    if (!PyLong_Check(value)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "band_width should be a non-negative integer, or None");
+        return -1;
+    }
+    band_width = PyLong_AsSsize_t(value);
+    if (band_width == -1 && PyErr_Occurred()) return -1;
+    if (band_width < 0) {
+        PyErr_SetString(PyExc_ValueError,
+                        "band_width should be a non-negative integer, or None");
+        return -1;
+    }
+    self->band_width = band_width;
+    return 0;
+}
+
+static char Aligner_xdrop__doc__[] = "X-drop threshold for local alignments, or None";
+
+static PyObject*
+Aligner_get_xdrop(Aligner* self, void* closure)
+{
+    if (self->xdrop < 0) {
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+    return PyFloat_FromDouble(self->xdrop);
+}
+
+static int
+Aligner_set_xdrop(Aligner* self, PyObject* value, void* closure)
+{
+    double xdrop;
+    if (value == Py_None) {
+        self->xdrop = -1;
+        return 0;
+    }
+    xdrop = PyFloat_AsDouble(value);
+    if (xdrop == -1.0 && PyErr_Occurred()) return -1;
+    if (!(xdrop >= 0)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "xdrop should be a non-negative number, or None");
+        return -1;
+    }
+    self->xdrop = xdrop;
+    return 0;
+}
+
 static Algorithm _get_algorithm(Aligner* self)
 {
     Algorithm algorithm = self->algorithm;
@@ -3821,6 +4523,10 @@ static PyGetSetDef Aligner_getset[] = {
         (getter)Aligner_get_mode,
         (setter)Aligner_set_mode,
         Aligner_mode__doc__, NULL},
+    {"memory_mode",
+        (getter)Aligner_get_memory_mode,
+        (setter)Aligner_set_memory_mode,
+        Aligner_memory_mode__doc__, NULL},
     {"match_score",
         (getter)Aligner_get_match_score,
         (setter)Aligner_set_match_score,
@@ -4033,6 +4739,14 @@ static PyGetSetDef Aligner_getset[] = {
         (getter)Aligner_get_wildcard,
         (setter)Aligner_set_wildcard,
         Aligner_wildcard__doc__, NULL},
+    {"band_width",
+        (getter)Aligner_get_band_width,
+        (setter)Aligner_set_band_width,
+        Aligner_band_width__doc__, NULL},
+    {"xdrop",
+        (getter)Aligner_get_xdrop,
+        (setter)Aligner_set_xdrop,
+        Aligner_xdrop__doc__, NULL},
     {"algorithm",
         (getter)Aligner_get_algorithm,
         (setter)NULL,
@@ -4346,6 +5060,7 @@ static PyGetSetDef Aligner_getset[] = {
     /* Needleman-Wunsch algorithm */ \
     row = PyMem_Malloc((nB+1)*sizeof(double)); \
     if (!row) return PyErr_NoMemory(); \
+    Py_BEGIN_ALLOW_THREADS \
 \
     /* The top row of the score matrix is a special case, \
      * as there are no previously aligned characters. \
@@ -4386,6 +5101,7 @@ static PyGetSetDef Aligner_getset[] = {
     SELECT_SCORE_GLOBAL(temp + (align_score), \
                         row[nB] + right_gap_extend_B, \
                         row[nB-1] + right_gap_extend_A); \
+    Py_END_ALLOW_THREADS \
     PyMem_Free(row); \
     return PyFloat_FromDouble(score);
 
@@ -4405,6 +5121,7 @@ static PyGetSetDef Aligner_getset[] = {
     /* Smith-Waterman algorithm */ \
     row = PyMem_Malloc((nB+1)*sizeof(double)); \
     if (!row) return PyErr_NoMemory(); \
+    Py_BEGIN_ALLOW_THREADS \
 \
     /* The top row of the score matrix is a special case, \
      * as there are no previously aligned characters. \
@@ -4437,6 +5154,7 @@ static PyGetSetDef Aligner_getset[] = {
     } \
     kB = sB[nB-1]; \
     SELECT_SCORE_LOCAL1(temp + (align_score)); \
+    Py_END_ALLOW_THREADS \
     PyMem_Free(row); \
     return PyFloat_FromDouble(maximum);
 
@@ -4486,6 +5204,7 @@ static PyGetSetDef Aligner_getset[] = {
         return PyErr_NoMemory(); \
     } \
     M = paths->M; \
+    Py_BEGIN_ALLOW_THREADS \
     row[0] = 0; \
     for (j = 1; j <= nB; j++) row[j] = j * left_gap_extend_A; \
     for (i = 1; i < nA; i++) { \
@@ -4508,6 +5227,7 @@ static PyGetSetDef Aligner_getset[] = {
     } \
     kB = sB[j-1]; \
     SELECT_TRACE_NEEDLEMAN_WUNSCH(right_gap_extend_A, right_gap_extend_B, align_score); \
+    Py_END_ALLOW_THREADS \
     PyMem_Free(row); \
     M[nA][nB].path = 0; \
     return Py_BuildValue("fN", score, paths);
@@ -4540,6 +5260,7 @@ static PyGetSetDef Aligner_getset[] = {
         return PyErr_NoMemory(); \
     } \
     M = paths->M; \
+    Py_BEGIN_ALLOW_THREADS \
     for (j = 0; j <= nB; j++) row[j] = 0; \
     for (i = 1; i < nA; i++) { \
         temp = 0; \
@@ -4559,6 +5280,7 @@ static PyGetSetDef Aligner_getset[] = {
     } \
     kB = sB[nB-1]; \
     SELECT_TRACE_SMITH_WATERMAN_D(align_score); \
+    Py_END_ALLOW_THREADS \
     PyMem_Free(row); \
 \
     /* As we don't allow zero-score extensions to alignments, \
@@ -4655,6 +5377,7 @@ static PyGetSetDef Aligner_getset[] = {
     if (!Ix_row) goto exit; \
     Iy_row = PyMem_Malloc((nB+1)*sizeof(double)); \
     if (!Iy_row) goto exit; \
+    Py_BEGIN_ALLOW_THREADS \
 \
     /* The top row of the score matrix is a special case, \
      * as there are no previously aligned characters. \
@@ -4754,6 +5477,7 @@ static PyGetSetDef Aligner_getset[] = {
     Iy_row[nB] = score; \
 \
     SELECT_SCORE_GLOBAL(M_row[nB], Ix_row[nB], Iy_row[nB]); \
+    Py_END_ALLOW_THREADS \
     PyMem_Free(M_row); \
     PyMem_Free(Ix_row); \
     PyMem_Free(Iy_row); \
@@ -4792,6 +5516,7 @@ exit: \
     if (!Ix_row) goto exit; \
     Iy_row = PyMem_Malloc((nB+1)*sizeof(double)); \
     if (!Iy_row) goto exit; \
+    Py_BEGIN_ALLOW_THREADS \
  \
     /* The top row of the score matrix is a special case, \
      * as there are no previously aligned characters. \
@@ -4866,6 +5591,7 @@ exit: \
                                    Ix_temp, \
                                    Iy_temp, \
                                    (align_score)); \
+    Py_END_ALLOW_THREADS \
     PyMem_Free(M_row); \
     PyMem_Free(Ix_row); \
     PyMem_Free(Iy_row); \
@@ -4944,6 +5670,7 @@ exit: \
     if (!Iy_row) goto exit; \
     M = paths->M; \
     gaps = paths->gaps.gotoh; \
+    Py_BEGIN_ALLOW_THREADS \
  \
     /* Gotoh algorithm with three states */ \
     M_row[0] = 0; \
@@ -5043,6 +5770,10 @@ exit: \
     if (M_row[nB] < score - epsilon) M[nA][nB].trace = 0; \
     if (Ix_row[nB] < score - epsilon) gaps[nA][nB].Ix = 0; \
     if (Iy_row[nB] < score - epsilon) gaps[nA][nB].Iy = 0; \
+    Py_END_ALLOW_THREADS \
+    PyMem_Free(M_row); \
+    PyMem_Free(Ix_row); \
+    PyMem_Free(Iy_row); \
     return Py_BuildValue("fN", score, paths); \
 exit: \
     Py_DECREF(paths); \
@@ -5089,6 +5820,7 @@ exit: \
     if (!Ix_row) goto exit; \
     Iy_row = PyMem_Malloc((nB+1)*sizeof(double)); \
     if (!Iy_row) goto exit; \
+    Py_BEGIN_ALLOW_THREADS \
     M_row[0] = 0; \
     Ix_row[0] = -DBL_MAX; \
     Iy_row[0] = -DBL_MAX; \
@@ -5161,6 +5893,7 @@ exit: \
     gaps[nA][nB].Ix = 0; \
     gaps[nA][nB].Iy = 0; \
 \
+    Py_END_ALLOW_THREADS \
     PyMem_Free(M_row); \
     PyMem_Free(Ix_row); \
     PyMem_Free(Iy_row); \
@@ -5787,6 +6520,10 @@ PathGenerator_create_NWSW(Py_ssize_t nA, Py_ssize_t nB, Mode mode, unsigned char
     paths->mode = mode;
     paths->length = 0;
     paths->strand = strand;
+    paths->weights = NULL;
+    paths->nends = 0;
+    paths->ends = NULL;
+    paths->cumulative = NULL;
 
     M = PyMem_Malloc((nA+1)*sizeof(Trace*));
     paths->M = M;
@@ -5849,6 +6586,10 @@ PathGenerator_create_Gotoh(Py_ssize_t nA, Py_ssize_t nB, Mode mode, unsigned cha
     paths->mode = mode;
     paths->length = 0;
     paths->strand = strand;
+    paths->weights = NULL;
+    paths->nends = 0;
+    paths->ends = NULL;
+    paths->cumulative = NULL;
 
     M = PyMem_Malloc((nA+1)*sizeof(Trace*));
     if (!M) goto exit;
@@ -5923,6 +6664,10 @@ PathGenerator_create_WSB(Py_ssize_t nA, Py_ssize_t nB, Mode mode, unsigned char
     paths->mode = mode;
     paths->length = 0;
     paths->strand = strand;
+    paths->weights = NULL;
+    paths->nends = 0;
+    paths->ends = NULL;
+    paths->cumulative = NULL;
 
     M = PyMem_Malloc((nA+1)*sizeof(Trace*));
     if (!M) goto exit;
@@ -6402,6 +7147,1087 @@ Aligner_watermansmithbeyer_local_align_matrix(Aligner* self,
     WATERMANSMITHBEYER_EXIT_ALIGN;
 }
 
+/* ----------------- banded and X-drop alignment ----------------- */
+
+/* If band_width or xdrop is set, a single affine gap (Gotoh) dynamic
+ * programming implementation is used for all algorithms except
+ * Waterman-Smith-Beyer; a linear gap score is the special case of equal
+ * open and extend gap scores.  Only the cells inside the band, and for
+ * X-drop only the cells that were not dropped, are calculated, and the
+ * traceback stores one byte per calculated cell.  The traceback then
+ * follows one optimal path through these cells.  All memory is allocated
+ * with the raw allocator, so the calculation can run without the GIL. */
+
+#define BAND_FROM_M 0
+#define BAND_FROM_IX 1
+#define BAND_FROM_IY 2
+#define BAND_START 3
+
+typedef struct {
+    Mode mode;
+    double match;
+    double mismatch;
+    int wildcard;
+    const double* scores;
+    Py_ssize_t n;
+    /* gap scores at the left end, internally, and at the right end */
+    double target_open[3];
+    double target_extend[3];
+    double query_open[3];
+    double query_extend[3];
+    Py_ssize_t band_width;
+    double xdrop;
+} AffineParameters;
+
+typedef struct {
+    unsigned char* trace;
+    Py_ssize_t size;
+    Py_ssize_t allocated;
+    Py_ssize_t* first;
+    Py_ssize_t* offset;
+} BandedTrace;
+
+static inline double
+_affine_pair_score(const AffineParameters* p, int kA, int kB)
+{
+    if (p->scores) return p->scores[kA*p->n+kB];
+    if (kA == p->wildcard || kB == p->wildcard) return 0;
+    if (kA == kB) return p->match;
+    return p->mismatch;
+}
+
+static void
+_affine_parameters(Aligner* self, unsigned char strand, AffineParameters* p)
+{
+    int left = 0;
+    int right = 2;
+    if (strand == '-') {
+        left = 2;
+        right = 0;
+    }
+    p->mode = self->mode;
+    p->match = self->match;
+    p->mismatch = self->mismatch;
+    p->wildcard = self->wildcard;
+    if (self->substitution_matrix.obj) {
+        p->scores = self->substitution_matrix.buf;
+        p->n = self->substitution_matrix.shape[0];
+    }
+    else {
+        p->scores = NULL;
+        p->n = 0;
+    }
+    p->target_open[left] = self->target_left_open_gap_score;
+    p->target_open[1] = self->target_internal_open_gap_score;
+    p->target_open[right] = self->target_right_open_gap_score;
+    p->target_extend[left] = self->target_left_extend_gap_score;
+    p->target_extend[1] = self->target_internal_extend_gap_score;
+    p->target_extend[right] = self->target_right_extend_gap_score;
+    p->query_open[left] = self->query_left_open_gap_score;
+    p->query_open[1] = self->query_internal_open_gap_score;
+    p->query_open[right] = self->query_right_open_gap_score;
+    p->query_extend[left] = self->query_left_extend_gap_score;
+    p->query_extend[1] = self->query_internal_extend_gap_score;
+    p->query_extend[right] = self->query_right_extend_gap_score;
+    p->band_width = self->band_width;
+    p->xdrop = self->xdrop;
+}
+
+#define SELECT_BANDED(value, state, score1, score2, score3) \
+    value = score1; \
+    state = BAND_FROM_M; \
+    if (score2 > value) { \
+        value = score2; \
+        state = BAND_FROM_IX; \
+    } \
+    if (score3 > value) { \
+        value = score3; \
+        state = BAND_FROM_IY; \
+    }
+
+#define PREVIOUS(row, j) \
+    ((j) >= previous_first && (j) <= previous_last ? row[j] : -DBL_MAX)
+
+static int
+_banded_fill(const AffineParameters* p,
+             const int* sA, Py_ssize_t nA,
+             const int* sB, Py_ssize_t nB,
+             double* score, Py_ssize_t* end_i, Py_ssize_t* end_j,
+             int* end_state, BandedTrace* bt)
+/* Fill the dynamic programming matrices, returning 0 if out of memory. */
+{
+    const int local = (p->mode == Local);
+    const int xdrop = (p->xdrop >= 0);
+    Py_ssize_t i;
+    Py_ssize_t j;
+    Py_ssize_t lo;
+    Py_ssize_t hi;
+    Py_ssize_t dlo;
+    Py_ssize_t dhi;
+    Py_ssize_t first = 0;
+    Py_ssize_t last = -1;
+    Py_ssize_t previous_first;
+    Py_ssize_t previous_last;
+    Py_ssize_t alive_first = 0;
+    Py_ssize_t alive_last = nB;
+    Py_ssize_t row_alive_first;
+    Py_ssize_t row_alive_last;
+    Py_ssize_t best_i = 0;
+    Py_ssize_t best_j = 0;
+    double best = 0;
+    double threshold = -DBL_MAX;
+    double* buffer;
+    double* M;
+    double* Ix;
+    double* Iy;
+    double* M_previous;
+    double* Ix_previous;
+    double* Iy_previous;
+    double* temp;
+    double value;
+    double open;
+    double extend;
+    double a;
+    double b;
+    double c;
+    int state;
+    int alive;
+    int left_alive = 0;
+    int position;
+    int kA = 0;
+    int kB;
+    unsigned char trace;
+
+    if (p->band_width >= 0) {
+        dlo = (nB < nA ? nB - nA : 0) - p->band_width;
+        dhi = (nB > nA ? nB - nA : 0) + p->band_width;
+    }
+    else {
+        dlo = -nA;
+        dhi = nB;
+    }
+    buffer = PyMem_RawMalloc(6*(nB+1)*sizeof(double));
+    if (!buffer) return 0;
+    M = buffer;
+    Ix = M + nB + 1;
+    Iy = Ix + nB + 1;
+    M_previous = Iy + nB + 1;
+    Ix_previous = M_previous + nB + 1;
+    Iy_previous = Ix_previous + nB + 1;
+    if (bt) {
+        bt->size = 0;
+        bt->allocated = (nA + 1) * (dhi - dlo + 1 < nB + 1 ? dhi - dlo + 1 : nB + 1);
+        if (xdrop && bt->allocated > 65536) bt->allocated = 65536;
+        bt->trace = PyMem_RawMalloc(bt->allocated);
+        if (!bt->trace) {
+            PyMem_RawFree(buffer);
+            return 0;
+        }
+    }
+
+    for (i = 0; i <= nA; i++) {
+        temp = M_previous; M_previous = M; M = temp;
+        temp = Ix_previous; Ix_previous = Ix; Ix = temp;
+        temp = Iy_previous; Iy_previous = Iy; Iy = temp;
+        previous_first = first;
+        previous_last = last;
+        lo = i + dlo;
+        if (lo < 0) lo = 0;
+        if (lo < alive_first) lo = alive_first;
+        hi = i + dhi;
+        if (hi > nB) hi = nB;
+        if (bt) {
+            if (bt->size + hi - lo + 1 > bt->allocated) {
+                Py_ssize_t allocated = 2 * bt->allocated;
+                unsigned char* trace;
+                if (allocated < bt->size + hi - lo + 1)
+                    allocated = bt->size + hi - lo + 1;
+                trace = PyMem_RawRealloc(bt->trace, allocated);
+                if (!trace) {
+                    PyMem_RawFree(buffer);
+                    return 0;
+                }
+                bt->trace = trace;
+                bt->allocated = allocated;
+            }
+            bt->first[i] = lo;
+            bt->offset[i] = bt->size;
+        }
+        first = lo;
+        row_alive_first = -1;
+        row_alive_last = -1;
+        if (i > 0) kA = sA[i-1];
+        for (j = lo; j <= hi; j++) {
+            /* Beyond the previous row, only horizontal moves can arrive */
+            if (i > 0 && j > alive_last + 1 && !left_alive) break;
+            /* aligned letters */
+            if (i == 0 || j == 0) {
+                M[j] = (local || j == i) ? 0 : -DBL_MAX;
+                trace = BAND_START;
+            }
+            else {
+                kB = sB[j-1];
+                a = PREVIOUS(M_previous, j-1);
+                b = PREVIOUS(Ix_previous, j-1);
+                c = PREVIOUS(Iy_previous, j-1);
+                SELECT_BANDED(value, state, a, b, c);
+                if (value > -DBL_MAX) {
+                    value += _affine_pair_score(p, kA, kB);
+                    if (local && value <= 0) {
+                        value = 0;
+                        state = BAND_START;
+                    }
+                }
+                M[j] = value;
+                trace = state;
+            }
+            /* gap in the query */
+            if (i == 0 || (local && j == 0)) Ix[j] = -DBL_MAX;
+            else {
+                position = (local || (j > 0 && j < nB)) ? 1 : (j == 0 ? 0 : 2);
+                open = p->query_open[position];
+                extend = p->query_extend[position];
+                a = PREVIOUS(M_previous, j) + open;
+                b = PREVIOUS(Ix_previous, j) + extend;
+                c = PREVIOUS(Iy_previous, j) + open;
+                SELECT_BANDED(Ix[j], state, a, b, c);
+                trace |= state << 2;
+            }
+            /* gap in the target */
+            if (j == first || (local && i == 0)) Iy[j] = -DBL_MAX;
+            else {
+                position = (local || (i > 0 && i < nA)) ? 1 : (i == 0 ? 0 : 2);
+                open = p->target_open[position];
+                extend = p->target_extend[position];
+                a = M[j-1] + open;
+                b = Ix[j-1] + open;
+                c = Iy[j-1] + extend;
+                SELECT_BANDED(Iy[j], state, a, b, c);
+                trace |= state << 4;
+            }
+            if (local) {
+                if (M[j] > best) {
+                    best = M[j];
+                    best_i = i;
+                    best_j = j;
+                    if (xdrop) threshold = best - p->xdrop;
+                }
+                if (M[j] < threshold) M[j] = -DBL_MAX;
+                if (Ix[j] < threshold) Ix[j] = -DBL_MAX;
+                if (Iy[j] < threshold) Iy[j] = -DBL_MAX;
+            }
+            alive = (M[j] > -DBL_MAX || Ix[j] > -DBL_MAX || Iy[j] > -DBL_MAX);
+            if (alive) {
+                if (row_alive_first < 0) row_alive_first = j;
+                row_alive_last = j;
+            }
+            left_alive = alive;
+            if (bt) bt->trace[bt->size++] = trace;
+        }
+        last = j - 1;
+        left_alive = 0;
+        if (row_alive_first < 0) break;  /* everything was dropped */
+        alive_first = row_alive_first;
+        alive_last = row_alive_last;
+    }
+    if (local) {
+        *score = best;
+        *end_i = best_i;
+        *end_j = best_j;
+        *end_state = BAND_FROM_M;
+    }
+    else {
+        /* the band always includes the last row and column */
+        SELECT_BANDED(*score, *end_state, M[nB], Ix[nB], Iy[nB]);
+        *end_i = nA;
+        *end_j = nB;
+    }
+    PyMem_RawFree(buffer);
+    return 1;
+}
+
+static Py_ssize_t
+_banded_traceback(const BandedTrace* bt, Py_ssize_t i, Py_ssize_t j,
+                  int state, Py_ssize_t* vertices)
+/* Store the vertices of the path ending at (i, j), and return their number. */
+{
+    Py_ssize_t n = 0;
+    Py_ssize_t k;
+    Py_ssize_t temp;
+    int direction = -1;
+    int previous;
+    unsigned char trace;
+
+    vertices[n++] = i;
+    vertices[n++] = j;
+    while (1) {
+        trace = bt->trace[bt->offset[i] + j - bt->first[i]];
+        switch (state) {
+            case BAND_FROM_M: previous = trace & 3; break;
+            case BAND_FROM_IX: previous = (trace >> 2) & 3; break;
+            case BAND_FROM_IY: previous = (trace >> 4) & 3; break;
+            default: previous = BAND_START; break;
+        }
+        if (state == BAND_FROM_M && previous == BAND_START) break;
+        if (direction != -1 && direction != state) {
+            vertices[n++] = i;
+            vertices[n++] = j;
+        }
+        direction = state;
+        switch (state) {
+            case BAND_FROM_M: i--; j--; break;
+            case BAND_FROM_IX: i--; break;
+            case BAND_FROM_IY: j--; break;
+        }
+        state = previous;
+    }
+    if (direction != -1) {
+        vertices[n++] = i;
+        vertices[n++] = j;
+    }
+    /* reverse the order of the vertices */
+    for (k = 0; k < n / 2; k += 2) {
+        temp = vertices[k];
+        vertices[k] = vertices[n-2-k];
+        vertices[n-2-k] = temp;
+        temp = vertices[k+1];
+        vertices[k+1] = vertices[n-1-k];
+        vertices[n-1-k] = temp;
+    }
+    return n / 2;
+}
+
+static PyObject*
+Aligner_banded(Aligner* self,
+               const int* sA, Py_ssize_t nA,
+               const int* sB, Py_ssize_t nB,
+               unsigned char strand, int traceback)
+{
+    AffineParameters parameters;
+    BandedTrace bt = {NULL, 0, 0, NULL, NULL};
+    Py_ssize_t* vertices = NULL;
+    Py_ssize_t n = 0;
+    Py_ssize_t k;
+    Py_ssize_t end_i;
+    Py_ssize_t end_j;
+    int end_state;
+    double score;
+    int ok;
+    PyObject* paths = NULL;
+    PyObject* path;
+    PyObject* vertex;
+    PyObject* result = NULL;
+
+    if (_get_algorithm(self) == WatermanSmithBeyer) {
+        PyErr_SetString(PyExc_ValueError,
+                        "band_width and xdrop cannot be used with "
+                        "gap score functions");
+        return NULL;
+    }
+    if (self->xdrop >= 0 && self->mode != Local) {
+        PyErr_SetString(PyExc_ValueError,
+                        "xdrop can only be used for local alignments");
+        return NULL;
+    }
+    _affine_parameters(self, strand, &parameters);
+    if (traceback) {
+        bt.first = PyMem_RawMalloc((nA+1)*sizeof(Py_ssize_t));
+        bt.offset = PyMem_RawMalloc((nA+1)*sizeof(Py_ssize_t));
+        vertices = PyMem_RawMalloc(2*(nA+nB+2)*sizeof(Py_ssize_t));
+        if (!bt.first || !bt.offset || !vertices) {
+            PyErr_NoMemory();
+            goto exit;
+        }
+    }
+    Py_BEGIN_ALLOW_THREADS
+    ok = _banded_fill(&parameters, sA, nA, sB, nB,
+                      &score, &end_i, &end_j, &end_state,
+                      traceback ? &bt : NULL);
+    if (ok && traceback && (parameters.mode == Global || score > 0))
+        n = _banded_traceback(&bt, end_i, end_j, end_state, vertices);
+    Py_END_ALLOW_THREADS
+    if (!ok) {
+        PyErr_NoMemory();
+        goto exit;
+    }
+    if (!traceback) {
+        result = PyFloat_FromDouble(score);
+        goto exit;
+    }
+    paths = PyList_New(0);
+    if (!paths) goto exit;
+    if (n > 0) {
+        path = PyTuple_New(n);
+        if (!path) goto exit;
+        for (k = 0; k < n; k++) {
+            const Py_ssize_t i = vertices[2*k];
+            const Py_ssize_t j = vertices[2*k+1];
+            vertex = Py_BuildValue("(nn)", i, strand == '+' ? j : nB - j);
+            if (!vertex) {
+                Py_DECREF(path);
+                goto exit;
+            }
+            PyTuple_SET_ITEM(path, k, vertex);
+        }
+        if (PyList_Append(paths, path) == -1) {
+            Py_DECREF(path);
+            goto exit;
+        }
+        Py_DECREF(path);
+    }
+    result = Py_BuildValue("dO", score, paths);
+exit:
+    Py_XDECREF(paths);
+    if (bt.trace) PyMem_RawFree(bt.trace);
+    if (bt.first) PyMem_RawFree(bt.first);
+    if (bt.offset) PyMem_RawFree(bt.offset);
+    if (vertices) PyMem_RawFree(vertices);
+    return result;
+}
+
+/* ----------------- linear-memory alignment ----------------- */
+
+/* If memory_mode is "linear", one optimal alignment is found by the
+ * divide-and-conquer algorithm of Hirschberg, extended to affine gaps by
+ * Myers and Miller.  The scores of the best paths from the start to the
+ * middle row, and from the middle row to the end, are calculated in linear
+ * memory; the best way to cross the middle row, including the state of the
+ * path at that point, then splits the problem into two halves.  Small
+ * subproblems are solved by a full dynamic programming with traceback.
+ * For local alignments, the start and end of the best local alignment are
+ * found first, after which the alignment between them is solved as a
+ * global alignment using the internal gap scores. */
+
+#define LINEAR_ANY -1
+#define LINEAR_BASE_CELLS 16384
+
+#define MAX3(a, b, c) ((a) >= (b) ? ((a) >= (c) ? (a) : (c)) : ((b) >= (c) ? (b) : (c)))
+
+#define GAP_POSITION(internal, k, n) \
+    ((internal) ? 1 : ((k) == 0 ? 0 : ((k) == (n) ? 2 : 1)))
+
+typedef struct {
+    const AffineParameters* p;
+    int internal;  /* use the internal gap scores everywhere */
+    const int* sA;
+    Py_ssize_t nA;
+    const int* sB;
+    Py_ssize_t nB;
+    double* buffer;
+    unsigned char* moves;
+    Py_ssize_t nmoves;
+} LinearAligner;
+
+static void
+_linear_forward(const LinearAligner* a,
+                Py_ssize_t i0, Py_ssize_t j0, int start,
+                Py_ssize_t i1, Py_ssize_t j1,
+                double* M, double* Ix, double* Iy)
+/* Calculate the scores of the best paths from (i0, j0) to row i1. */
+{
+    const AffineParameters* p = a->p;
+    const Py_ssize_t n = j1 - j0;
+    Py_ssize_t i;
+    Py_ssize_t j;
+    int position;
+    int kA;
+    double target_open;
+    double target_extend;
+    double query_open;
+    double query_extend;
+    double diagonal_M;
+    double diagonal_Ix;
+    double diagonal_Iy;
+    double left_M;
+    double left_Ix;
+    double left_Iy;
+    double temp_M;
+    double temp_Ix;
+    double temp_Iy;
+
+    /* The scores of the cell to the left are kept in local variables;
+     * this avoids a store-to-load dependency through the arrays. */
+    left_M = M[0] = (start == BAND_FROM_M) ? 0 : -DBL_MAX;
+    left_Ix = Ix[0] = (start == BAND_FROM_IX) ? 0 : -DBL_MAX;
+    left_Iy = Iy[0] = (start == BAND_FROM_IY) ? 0 : -DBL_MAX;
+    position = GAP_POSITION(a->internal, i0, a->nA);
+    target_open = p->target_open[position];
+    target_extend = p->target_extend[position];
+    for (j = 1; j <= n; j++) {
+        left_Iy = MAX3(left_M + target_open,
+                       left_Ix + target_open,
+                       left_Iy + target_extend);
+        left_M = -DBL_MAX;
+        left_Ix = -DBL_MAX;
+        M[j] = left_M;
+        Ix[j] = left_Ix;
+        Iy[j] = left_Iy;
+    }
+    for (i = i0 + 1; i <= i1; i++) {
+        kA = a->sA[i-1];
+        position = GAP_POSITION(a->internal, i, a->nA);
+        target_open = p->target_open[position];
+        target_extend = p->target_extend[position];
+        position = GAP_POSITION(a->internal, j0, a->nB);
+        query_open = p->query_open[position];
+        query_extend = p->query_extend[position];
+        diagonal_M = M[0];
+        diagonal_Ix = Ix[0];
+        diagonal_Iy = Iy[0];
+        left_M = -DBL_MAX;
+        left_Ix = MAX3(M[0] + query_open, Ix[0] + query_extend, Iy[0] + query_open);
+        left_Iy = -DBL_MAX;
+        M[0] = left_M;
+        Ix[0] = left_Ix;
+        Iy[0] = left_Iy;
+        for (j = 1; j <= n; j++) {
+            temp_M = M[j];
+            temp_Ix = Ix[j];
+            temp_Iy = Iy[j];
+            left_Iy = MAX3(left_M + target_open,
+                           left_Ix + target_open,
+                           left_Iy + target_extend);
+            left_M = MAX3(diagonal_M, diagonal_Ix, diagonal_Iy)
+                   + _affine_pair_score(p, kA, a->sB[j0+j-1]);
+            position = GAP_POSITION(a->internal, j0 + j, a->nB);
+            query_open = p->query_open[position];
+            query_extend = p->query_extend[position];
+            left_Ix = MAX3(temp_M + query_open,
+                           temp_Ix + query_extend,
+                           temp_Iy + query_open);
+            M[j] = left_M;
+            Ix[j] = left_Ix;
+            Iy[j] = left_Iy;
+            diagonal_M = temp_M;
+            diagonal_Ix = temp_Ix;
+            diagonal_Iy = temp_Iy;
+        }
+    }
+}
+
+static void
+_linear_backward(const LinearAligner* a,
+                 Py_ssize_t i0, Py_ssize_t j0,
+                 Py_ssize_t i1, Py_ssize_t j1, int end,
+                 double* M, double* Ix, double* Iy)
+/* Calculate the scores of the best paths from row i0 to (i1, j1), for each
+ * state in which the path arrives at row i0. */
+{
+    const AffineParameters* p = a->p;
+    const Py_ssize_t n = j1 - j0;
+    Py_ssize_t i;
+    Py_ssize_t k;
+    int position;
+    int kA;
+    double target_open;
+    double target_extend;
+    double query_open;
+    double query_extend;
+    double diagonal;
+    double right;
+    double temp;
+    double d;
+
+    M[n] = (end == LINEAR_ANY || end == BAND_FROM_M) ? 0 : -DBL_MAX;
+    Ix[n] = (end == LINEAR_ANY || end == BAND_FROM_IX) ? 0 : -DBL_MAX;
+    Iy[n] = (end == LINEAR_ANY || end == BAND_FROM_IY) ? 0 : -DBL_MAX;
+    position = GAP_POSITION(a->internal, i1, a->nA);
+    target_open = p->target_open[position];
+    target_extend = p->target_extend[position];
+    /* the score of the cell to the right, arrived at by a horizontal move */
+    right = Iy[n];
+    for (k = n - 1; k >= 0; k--) {
+        M[k] = right + target_open;
+        Ix[k] = right + target_open;
+        right += target_extend;
+        Iy[k] = right;
+    }
+    for (i = i1 - 1; i >= i0; i--) {
+        kA = a->sA[i];
+        position = GAP_POSITION(a->internal, i, a->nA);
+        target_open = p->target_open[position];
+        target_extend = p->target_extend[position];
+        position = GAP_POSITION(a->internal, j1, a->nB);
+        query_open = p->query_open[position];
+        query_extend = p->query_extend[position];
+        diagonal = M[n];
+        temp = Ix[n];
+        M[n] = temp + query_open;
+        Ix[n] = temp + query_extend;
+        right = temp + query_open;
+        Iy[n] = right;
+        for (k = n - 1; k >= 0; k--) {
+            d = diagonal + _affine_pair_score(p, kA, a->sB[j0+k]);
+            diagonal = M[k];
+            temp = Ix[k];
+            position = GAP_POSITION(a->internal, j0 + k, a->nB);
+            query_open = p->query_open[position];
+            query_extend = p->query_extend[position];
+            M[k] = MAX3(d, temp + query_open, right + target_open);
+            Ix[k] = MAX3(d, temp + query_extend, right + target_open);
+            right = MAX3(d, temp + query_open, right + target_extend);
+            Iy[k] = right;
+        }
+    }
+}
+
+static int
+_linear_base(LinearAligner* a,
+             Py_ssize_t i0, Py_ssize_t j0, int start,
+             Py_ssize_t i1, Py_ssize_t j1, int end)
+/* Align a small subproblem by dynamic programming with a traceback matrix,
+ * and append the moves along the path.  Return 0 if out of memory. */
+{
+    const AffineParameters* p = a->p;
+    const Py_ssize_t n = j1 - j0 + 1;
+    double* M = a->buffer;
+    double* Ix = M + n;
+    double* Iy = Ix + n;
+    unsigned char* trace;
+    unsigned char* moves;
+    unsigned char t;
+    Py_ssize_t i;
+    Py_ssize_t j;
+    Py_ssize_t k;
+    Py_ssize_t nmoves;
+    int position;
+    int state;
+    int kA;
+    double target_open;
+    double target_extend;
+    double query_open;
+    double query_extend;
+    double diagonal_M;
+    double diagonal_Ix;
+    double diagonal_Iy;
+    double left_M;
+    double left_Ix;
+    double left_Iy;
+    double temp_M;
+    double temp_Ix;
+    double temp_Iy;
+    double value;
+
+    trace = PyMem_RawMalloc((i1 - i0 + 1) * n);
+    if (!trace) return 0;
+    left_M = M[0] = (start == BAND_FROM_M) ? 0 : -DBL_MAX;
+    left_Ix = Ix[0] = (start == BAND_FROM_IX) ? 0 : -DBL_MAX;
+    left_Iy = Iy[0] = (start == BAND_FROM_IY) ? 0 : -DBL_MAX;
+    position = GAP_POSITION(a->internal, i0, a->nA);
+    target_open = p->target_open[position];
+    target_extend = p->target_extend[position];
+    for (k = 1; k < n; k++) {
+        SELECT_BANDED(value, state, left_M + target_open,
+                                    left_Ix + target_open,
+                                    left_Iy + target_extend);
+        left_M = -DBL_MAX;
+        left_Ix = -DBL_MAX;
+        left_Iy = value;
+        M[k] = left_M;
+        Ix[k] = left_Ix;
+        Iy[k] = left_Iy;
+        trace[k] = state << 4;
+    }
+    for (i = i0 + 1; i <= i1; i++) {
+        t = 0;
+        kA = a->sA[i-1];
+        position = GAP_POSITION(a->internal, i, a->nA);
+        target_open = p->target_open[position];
+        target_extend = p->target_extend[position];
+        position = GAP_POSITION(a->internal, j0, a->nB);
+        query_open = p->query_open[position];
+        query_extend = p->query_extend[position];
+        diagonal_M = M[0];
+        diagonal_Ix = Ix[0];
+        diagonal_Iy = Iy[0];
+        SELECT_BANDED(value, state, M[0] + query_open,
+                                    Ix[0] + query_extend,
+                                    Iy[0] + query_open);
+        left_M = -DBL_MAX;
+        left_Ix = value;
+        left_Iy = -DBL_MAX;
+        M[0] = left_M;
+        Ix[0] = left_Ix;
+        Iy[0] = left_Iy;
+        trace[(i-i0)*n] = state << 2;
+        for (k = 1; k < n; k++) {
+            temp_M = M[k];
+            temp_Ix = Ix[k];
+            temp_Iy = Iy[k];
+            SELECT_BANDED(value, state, left_M + target_open,
+                                        left_Ix + target_open,
+                                        left_Iy + target_extend);
+            left_Iy = value;
+            t = state << 4;
+            SELECT_BANDED(value, state, diagonal_M, diagonal_Ix, diagonal_Iy);
+            left_M = value + _affine_pair_score(p, kA, a->sB[j0+k-1]);
+            t |= state;
+            position = GAP_POSITION(a->internal, j0 + k, a->nB);
+            query_open = p->query_open[position];
+            query_extend = p->query_extend[position];
+            SELECT_BANDED(left_Ix, state, temp_M + query_open,
+                                          temp_Ix + query_extend,
+                                          temp_Iy + query_open);
+            t |= state << 2;
+            M[k] = left_M;
+            Ix[k] = left_Ix;
+            Iy[k] = left_Iy;
+            trace[(i-i0)*n+k] = t;
+            diagonal_M = temp_M;
+            diagonal_Ix = temp_Ix;
+            diagonal_Iy = temp_Iy;
+        }
+    }
+    if (end == LINEAR_ANY) {
+        SELECT_BANDED(value, state, M[n-1], Ix[n-1], Iy[n-1]);
+    }
+    else state = end;
+    /* store the moves in reverse order, then reverse them */
+    moves = a->moves + a->nmoves;
+    nmoves = 0;
+    i = i1;
+    j = j1;
+    while (i > i0 || j > j0) {
+        t = trace[(i-i0)*n+(j-j0)];
+        moves[nmoves++] = state;
+        switch (state) {
+            case BAND_FROM_M: i--; j--; break;
+            case BAND_FROM_IX: i--; break;
+            case BAND_FROM_IY: j--; break;
+        }
+        state = (t >> (2 * state)) & 3;
+    }
+    for (k = 0; k < nmoves / 2; k++) {
+        t = moves[k];
+        moves[k] = moves[nmoves-1-k];
+        moves[nmoves-1-k] = t;
+    }
+    a->nmoves += nmoves;
+    PyMem_RawFree(trace);
+    return 1;
+}
+
+static int
+_linear_align(LinearAligner* a,
+              Py_ssize_t i0, Py_ssize_t j0, int start,
+              Py_ssize_t i1, Py_ssize_t j1, int end)
+/* Append the moves of an optimal path from (i0, j0) to (i1, j1), starting
+ * after a move of type start and ending with a move of type end.  Return 0
+ * if out of memory. */
+{
+    const Py_ssize_t n = j1 - j0 + 1;
+    const Py_ssize_t i = (i0 + i1) / 2;
+    double* forward_M = a->buffer;
+    double* forward_Ix = forward_M + n;
+    double* forward_Iy = forward_Ix + n;
+    double* backward_M = forward_Iy + n;
+    double* backward_Ix = backward_M + n;
+    double* backward_Iy = backward_Ix + n;
+    double score = 0;
+    double value;
+    Py_ssize_t k;
+    Py_ssize_t j = -1;
+    int state = BAND_FROM_M;
+
+    if (i1 - i0 <= 1 || (i1 - i0 + 1) * n <= LINEAR_BASE_CELLS)
+        return _linear_base(a, i0, j0, start, i1, j1, end);
+    _linear_forward(a, i0, j0, start, i, j1,
+                    forward_M, forward_Ix, forward_Iy);
+    _linear_backward(a, i, j0, i1, j1, end,
+                     backward_M, backward_Ix, backward_Iy);
+    for (k = 0; k < n; k++) {
+        value = forward_M[k] + backward_M[k];
+        if (j < 0 || value > score) {
+            score = value;
+            j = j0 + k;
+            state = BAND_FROM_M;
+        }
+        value = forward_Ix[k] + backward_Ix[k];
+        if (value > score) {
+            score = value;
+            j = j0 + k;
+            state = BAND_FROM_IX;
+        }
+        value = forward_Iy[k] + backward_Iy[k];
+        if (value > score) {
+            score = value;
+            j = j0 + k;
+            state = BAND_FROM_IY;
+        }
+    }
+    if (!_linear_align(a, i0, j0, start, i, j, state)) return 0;
+    return _linear_align(a, i, j, state, i1, j1, end);
+}
+
+static double
+_linear_local_ends(const AffineParameters* p,
+                   const int* sA, Py_ssize_t nA,
+                   const int* sB, Py_ssize_t nB,
+                   double* buffer, Py_ssize_t* starts,
+                   Py_ssize_t* start_i, Py_ssize_t* start_j,
+                   Py_ssize_t* end_i, Py_ssize_t* end_j)
+/* Find the start and end of the best local alignment, and return its score.
+ * The start of the best path into each cell is stored as i*(nB+1)+j. */
+{
+    const double open = p->query_open[1];
+    const double extend = p->query_extend[1];
+    const double target_open = p->target_open[1];
+    const double target_extend = p->target_extend[1];
+    double* M = buffer;
+    double* Ix = M + nB + 1;
+    double* Iy = Ix + nB + 1;
+    Py_ssize_t* M_start = starts;
+    Py_ssize_t* Ix_start = M_start + nB + 1;
+    Py_ssize_t* Iy_start = Ix_start + nB + 1;
+    Py_ssize_t diagonal_M_start;
+    Py_ssize_t diagonal_Ix_start;
+    Py_ssize_t diagonal_Iy_start;
+    Py_ssize_t temp_M_start;
+    Py_ssize_t temp_Ix_start;
+    Py_ssize_t temp_Iy_start;
+    Py_ssize_t start = 0;
+    Py_ssize_t i;
+    Py_ssize_t j;
+    Py_ssize_t left_M_start;
+    Py_ssize_t left_Ix_start;
+    Py_ssize_t left_Iy_start;
+    double diagonal_M;
+    double diagonal_Ix;
+    double diagonal_Iy;
+    double left_M;
+    double left_Ix;
+    double left_Iy;
+    double temp_M;
+    double temp_Ix;
+    double temp_Iy;
+    double value;
+    double best = 0;
+    int state;
+    int kA;
+
+    *start_i = *start_j = *end_i = *end_j = 0;
+    for (j = 0; j <= nB; j++) {
+        M[j] = 0;
+        M_start[j] = j;
+        Ix[j] = -DBL_MAX;
+        Iy[j] = -DBL_MAX;
+    }
+    for (i = 1; i <= nA; i++) {
+        kA = sA[i-1];
+        diagonal_M = M[0];
+        diagonal_Ix = Ix[0];
+        diagonal_Iy = Iy[0];
+        diagonal_M_start = M_start[0];
+        diagonal_Ix_start = Ix_start[0];
+        diagonal_Iy_start = Iy_start[0];
+        left_M = M[0] = 0;
+        left_M_start = M_start[0] = i * (nB + 1);
+        left_Ix = Ix[0] = -DBL_MAX;
+        left_Iy = Iy[0] = -DBL_MAX;
+        left_Ix_start = left_Iy_start = 0;
+        for (j = 1; j <= nB; j++) {
+            temp_M = M[j];
+            temp_Ix = Ix[j];
+            temp_Iy = Iy[j];
+            temp_M_start = M_start[j];
+            temp_Ix_start = Ix_start[j];
+            temp_Iy_start = Iy_start[j];
+            SELECT_BANDED(value, state, diagonal_M, diagonal_Ix, diagonal_Iy);
+            switch (state) {
+                case BAND_FROM_M: start = diagonal_M_start; break;
+                case BAND_FROM_IX: start = diagonal_Ix_start; break;
+                case BAND_FROM_IY: start = diagonal_Iy_start; break;
+            }
+            value += _affine_pair_score(p, kA, sB[j-1]);
+            if (value <= 0) {
+                value = 0;
+                start = i * (nB + 1) + j;
+            }
+            M[j] = value;
+            M_start[j] = start;
+            SELECT_BANDED(value, state, temp_M + open,
+                                        temp_Ix + extend,
+                                        temp_Iy + open);
+            switch (state) {
+                case BAND_FROM_M: start = temp_M_start; break;
+                case BAND_FROM_IX: start = temp_Ix_start; break;
+                case BAND_FROM_IY: start = temp_Iy_start; break;
+            }
+            Ix[j] = value;
+            Ix_start[j] = start;
+            SELECT_BANDED(value, state, left_M + target_open,
+                                        left_Ix + target_open,
+                                        left_Iy + target_extend);
+            switch (state) {
+                case BAND_FROM_M: start = left_M_start; break;
+                case BAND_FROM_IX: start = left_Ix_start; break;
+                case BAND_FROM_IY: start = left_Iy_start; break;
+            }
+            Iy[j] = left_Iy = value;
+            Iy_start[j] = left_Iy_start = start;
+            left_M = M[j];
+            left_M_start = M_start[j];
+            left_Ix = Ix[j];
+            left_Ix_start = Ix_start[j];
+            if (M[j] > best) {
+                best = M[j];
+                *start_i = M_start[j] / (nB + 1);
+                *start_j = M_start[j] % (nB + 1);
+                *end_i = i;
+                *end_j = j;
+            }
+            diagonal_M = temp_M;
+            diagonal_Ix = temp_Ix;
+            diagonal_Iy = temp_Iy;
+            diagonal_M_start = temp_M_start;
+            diagonal_Ix_start = temp_Ix_start;
+            diagonal_Iy_start = temp_Iy_start;
+        }
+    }
+    return best;
+}
+
+static double
+_linear_path_score(const LinearAligner* a, Py_ssize_t i, Py_ssize_t j)
+/* Calculate the score of the path stored in the moves. */
+{
+    const AffineParameters* p = a->p;
+    Py_ssize_t k;
+    int state = BAND_FROM_M;
+    int position;
+    double score = 0;
+
+    for (k = 0; k < a->nmoves; k++) {
+        switch (a->moves[k]) {
+            case BAND_FROM_M:
+                score += _affine_pair_score(p, a->sA[i], a->sB[j]);
+                i++;
+                j++;
+                break;
+            case BAND_FROM_IX:
+                position = GAP_POSITION(a->internal, j, a->nB);
+                if (state == BAND_FROM_IX) score += p->query_extend[position];
+                else score += p->query_open[position];
+                i++;
+                break;
+            case BAND_FROM_IY:
+                position = GAP_POSITION(a->internal, i, a->nA);
+                if (state == BAND_FROM_IY) score += p->target_extend[position];
+                else score += p->target_open[position];
+                j++;
+                break;
+        }
+        state = a->moves[k];
+    }
+    return score;
+}
+
+static PyObject*
+Aligner_linear(Aligner* self,
+               const int* sA, Py_ssize_t nA,
+               const int* sB, Py_ssize_t nB,
+               unsigned char strand)
+{
+    AffineParameters parameters;
+    LinearAligner aligner;
+    Py_ssize_t* starts = NULL;
+    Py_ssize_t start_i = 0;
+    Py_ssize_t start_j = 0;
+    Py_ssize_t end_i = nA;
+    Py_ssize_t end_j = nB;
+    Py_ssize_t i;
+    Py_ssize_t j;
+    Py_ssize_t k;
+    Py_ssize_t n;
+    double score = 0;
+    int ok = 1;
+    PyObject* paths = NULL;
+    PyObject* path = NULL;
+    PyObject* vertex;
+    PyObject* result = NULL;
+
+    if (_get_algorithm(self) == WatermanSmithBeyer) {
+        PyErr_SetString(PyExc_ValueError,
+                        "memory_mode 'linear' cannot be used with "
+                        "gap score functions");
+        return NULL;
+    }
+    _affine_parameters(self, strand, &parameters);
+    aligner.p = &parameters;
+    aligner.internal = (self->mode == Local);
+    aligner.sA = sA;
+    aligner.nA = nA;
+    aligner.sB = sB;
+    aligner.nB = nB;
+    aligner.nmoves = 0;
+    aligner.buffer = PyMem_RawMalloc(6*(nB+1)*sizeof(double));
+    aligner.moves = PyMem_RawMalloc(nA+nB);
+    if (self->mode == Local)
+        starts = PyMem_RawMalloc(3*(nB+1)*sizeof(Py_ssize_t));
+    if (!aligner.buffer || !aligner.moves
+     || (self->mode == Local && !starts)) {
+        PyErr_NoMemory();
+        goto exit;
+    }
+    Py_BEGIN_ALLOW_THREADS
+    if (self->mode == Local)
+        score = _linear_local_ends(&parameters, sA, nA, sB, nB,
+                                   aligner.buffer, starts,
+                                   &start_i, &start_j, &end_i, &end_j);
+    if (self->mode == Global)
+        ok = _linear_align(&aligner, 0, 0, BAND_FROM_M, nA, nB, LINEAR_ANY);
+    else if (score > 0) {
+        /* a local alignment starts and ends with aligned letters */
+        aligner.moves[aligner.nmoves++] = BAND_FROM_M;
+        ok = _linear_align(&aligner, start_i + 1, start_j + 1, BAND_FROM_M,
+                           end_i, end_j, BAND_FROM_M);
+    }
+    if (ok && (self->mode == Global || score > 0))
+        score = _linear_path_score(&aligner, start_i, start_j);
+    Py_END_ALLOW_THREADS
+    if (!ok) {
+        PyErr_NoMemory();
+        goto exit;
+    }
+    paths = PyList_New(0);
+    if (!paths) goto exit;
+    if (self->mode == Global || score > 0) {
+        /* count the vertices, which are where the direction changes */
+        n = 2;
+        for (k = 1; k < aligner.nmoves; k++)
+            if (aligner.moves[k] != aligner.moves[k-1]) n++;
+        if (aligner.nmoves == 0) n = 1;
+        path = PyTuple_New(n);
+        if (!path) goto exit;
+        i = start_i;
+        j = start_j;
+        n = 0;
+        for (k = 0; k <= aligner.nmoves; k++) {
+            if (k == 0 || k == aligner.nmoves
+             || aligner.moves[k] != aligner.moves[k-1]) {
+                vertex = Py_BuildValue("(nn)", i, strand == '+' ? j : nB - j);
+                if (!vertex) goto exit;
+                PyTuple_SET_ITEM(path, n++, vertex);
+            }
+            if (k == aligner.nmoves) break;
+            switch (aligner.moves[k]) {
+                case BAND_FROM_M: i++; j++; break;
+                case BAND_FROM_IX: i++; break;
+                case BAND_FROM_IY: j++; break;
+            }
+        }
+        if (PyList_Append(paths, path) == -1) goto exit;
+    }
+    result = Py_BuildValue("dO", score, paths);
+exit:
+    Py_XDECREF(path);
+    Py_XDECREF(paths);
+    if (aligner.buffer) PyMem_RawFree(aligner.buffer);
+    if (aligner.moves) PyMem_RawFree(aligner.moves);
+    if (starts) PyMem_RawFree(starts);
+    return result;
+}
+
 static int*
 convert_1bytes_to_ints(const int mapping[], Py_ssize_t n, const unsigned char s[])
 {
@@ -6734,7 +8560,15 @@ Aligner_score(Aligner* self, PyObject* args, PyObject* keywords)
     sB = bB.buf;
     nB = bB.len / bB.itemsize;
 
-    switch (algorithm) {
+    /* The GIL is released while filling the dynamic programming matrices;
+     * keep the substitution matrix alive in case another thread replaces
+     * it on this aligner in the meantime. */
+    Py_XINCREF(substitution_matrix);
+
+    if (self->band_width >= 0 || self->xdrop >= 0) {
+        result = Aligner_banded(self, sA, nA, sB, nB, strand, 0);
+    }
+    else switch (algorithm) {
         case NeedlemanWunschSmithWaterman:
             switch (mode) {
                 case Global:
@@ -6789,6 +8623,7 @@ Aligner_score(Aligner* self, PyObject* args, PyObject* keywords)
             break;
     }
 
+    Py_XDECREF(substitution_matrix);
     sequence_converter(NULL, &bA);
     sequence_converter(NULL, &bB);
 
@@ -6827,7 +8662,24 @@ Aligner_align(Aligner* self, PyObject* args, PyObject* keywords)
     sB = bB.buf;
     nB = bB.len / bB.itemsize;
 
-    switch (algorithm) {
+    /* The GIL is released while filling the dynamic programming matrices;
+     * keep the substitution matrix alive in case another thread replaces
+     * it on this aligner in the meantime. */
+    Py_XINCREF(substitution_matrix);
+
+    if (self->memory_mode == Linear
+     && (self->band_width >= 0 || self->xdrop >= 0)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "memory_mode 'linear' cannot be combined with "
+                        "band_width or xdrop");
+    }
+    else if (self->memory_mode == Linear) {
+        result = Aligner_linear(self, sA, nA, sB, nB, strand);
+    }
+    else if (self->band_width >= 0 || self->xdrop >= 0) {
+        result = Aligner_banded(self, sA, nA, sB, nB, strand, 1);
+    }
+    else switch (algorithm) {
         case NeedlemanWunschSmithWaterman:
             switch (mode) {
                 case Global:
@@ -6882,6 +8734,7 @@ Aligner_align(Aligner* self, PyObject* args, PyObject* keywords)
             break;
     }
 
+    Py_XDECREF(substitution_matrix);
     sequence_converter(NULL, &bA);
     sequence_converter(NULL, &bB);
 
@@ -7,10 +7,13 @@
 
 """Substitution matrices."""
 
+import functools
 import os
 import string
 import numpy
 
+from Bio.Seq import reverse_complement
+
 
 class Array(numpy.ndarray):
     """numpy array subclass indexed by integers and by letters."""
@@ -123,27 +126,43 @@ class Array(numpy.ndarray):
             return
         self._alphabet = getattr(obj, "_alphabet", None)
 
+    def _convert_letter(self, letter):
+        try:
+            return _alphabet_indices(self._alphabet)[0][letter]
+        except KeyError:
+            pass
+        try:
+            return self._alphabet.index(letter)
+        except ValueError:
+            raise IndexError("'%s'" % letter) from None
+
     def _convert_key(self, key):
         if isinstance(key, tuple):
             indices = []
             for index in key:
                 if isinstance(index, str):
-                    try:
-                        index = self._alphabet.index(index)
-                    except ValueError:
-                        raise IndexError("'%s'" % index) from None
+                    index = self._convert_letter(index)
                 indices.append(index)
             key = tuple(indices)
         elif isinstance(key, str):
-            try:
-                key = self._alphabet.index(key)
-            except ValueError:
-                raise IndexError("'%s'" % key) from None
+            key = self._convert_letter(key)
         return key
 
+    def _convert_codes(self, codes):
+        """Convert an array of ASCII codes to indices in the alphabet (PRIVATE)."""
+        indices = _alphabet_indices(self._alphabet)[1][codes]
+        missing = indices < 0
+        if missing.any():
+            letter = chr(codes[missing.argmax()])
+            raise IndexError("'%s'" % letter)
+        return indices
+
     def __getitem__(self, key):
         key = self._convert_key(key)
         value = numpy.ndarray.__getitem__(self, key)
+        if not isinstance(value, numpy.ndarray):
+            # a single value
+            return value
         if value.ndim == 2:
             if self.ndim == 2:
                 if value.shape != self.shape:
@@ -167,6 +186,20 @@ class Array(numpy.ndarray):
 
     def __contains__(self, key):
         # Follow dict definition of __contains__
+        indices = _alphabet_indices(self._alphabet)[0]
+        try:
+            if self.ndim == 1:
+                return key in indices
+            if self.ndim == 2:
+                return (
+                    isinstance(key, tuple)
+                    and len(key) == 2
+                    and key[0] in indices
+                    and key[1] in indices
+                )
+        except TypeError:
+            # unhashable key
+            return False
         return key in self.keys()
 
     def __array_prepare__(self, out_arr, context=None):
@@ -347,6 +380,109 @@ class Array(numpy.ndarray):
         a[ii] = numpy.ndarray.__getitem__(self, jj)
         return a
 
+    def score_pairs(self, seqA, seqB):
+        """Return the scores of the pairs of letters at each position of two sequences.
+
+        The sequences can be given as strings, bytes, Seq objects, or NumPy
+        arrays of ASCII codes, and must have the same length. The letters are
+        converted to indices in the alphabet with a precalculated table, and
+        the scores are returned as a NumPy array taken from the matrix in a
+        single step:
+
+        >>> from Bio.Align import substitution_matrices
+        >>> m = substitution_matrices.load("BLOSUM62")
+        >>> m.score_pairs("HEAGAWGHEE", "PAWHEAEHEE")
+        array([-2., -1., -3., -2., -1., -3., -2.,  8.,  5.,  5.])
+
+        This requires a two-dimensional array with single-letter keys. A
+        letter that is not in the alphabet raises an IndexError, as for
+        ``m['H', 'P']``.
+        """
+        if self.ndim != 2:
+            raise ValueError("score_pairs requires a two-dimensional array")
+        codesA = _sequence_codes(seqA)
+        codesB = _sequence_codes(seqB)
+        if len(codesA) != len(codesB):
+            raise ValueError("sequences must have the same length")
+        indicesA = self._convert_codes(codesA)
+        indicesB = self._convert_codes(codesB)
+        return numpy.asarray(self)[indicesA, indicesB]
+
+    def score_alignment(self, alignment):
+        """Return the sum of the scores of the pairs of aligned letters in an alignment.
+
+        For an ``Alignment`` object, the letters aligned to each other in
+        each pair of sequences are scored, with the letter of the first
+        sequence as the row index. Sequences aligned to the reverse strand
+        are reverse complemented first. For a ``MultipleSeqAlignment``, the
+        letters in each column of each pair of rows are scored, skipping
+        columns where one of the two is a gap ("-"). The scores of gaps are
+        not included, so with a gap score of zero this is the score of a
+        pairwise alignment:
+
+        >>> from Bio.Align import substitution_matrices, PairwiseAligner
+        >>> m = substitution_matrices.load("BLOSUM62")
+        >>> aligner = PairwiseAligner()
+        >>> aligner.substitution_matrix = m
+        >>> alignment = aligner.align("HEAGAWGHEE", "PAWHEAE")[0]
+        >>> print(alignment)
+        HE-AGAWGHE-E
+        ---|--|-||-|
+        --PA--W-HEAE
+        <BLANKLINE>
+        >>> alignment.score
+        33.0
+        >>> m.score_alignment(alignment)
+        33.0
+
+        The scores are collected for all aligned letters at once, using a
+        precalculated table to convert the letters to indices.
+        """
+        if self.ndim != 2:
+            raise ValueError("score_alignment requires a two-dimensional array")
+        values = numpy.asarray(self)
+        score = values.dtype.type(0)
+        try:
+            coordinates = alignment.coordinates
+        except AttributeError:
+            # MultipleSeqAlignment
+            rows = alignment.as_array()
+            gap = ord("-")
+            for i1 in range(len(rows)):
+                row1 = rows[i1]
+                for i2 in range(i1 + 1, len(rows)):
+                    row2 = rows[i2]
+                    aligned = (row1 != gap) & (row2 != gap)
+                    indices1 = self._convert_codes(row1[aligned])
+                    indices2 = self._convert_codes(row2[aligned])
+                    score += values[indices1, indices2].sum()
+            return score
+        coordinates = numpy.array(coordinates)
+        sequences = []
+        for sequence, row in zip(alignment.sequences, coordinates):
+            sequence = getattr(sequence, "seq", sequence)
+            if row[0] > row[-1]:
+                # mapped to the reverse strand
+                sequence = reverse_complement(sequence)
+                row[:] = len(sequence) - row
+            sequences.append(_sequence_codes(sequence))
+        steps = numpy.diff(coordinates, axis=1)
+        n = len(sequences)
+        for i1 in range(n):
+            for i2 in range(i1 + 1, n):
+                aligned = (steps[i1] > 0) & (steps[i2] > 0)
+                lengths = steps[i1, aligned]
+                # positions of the aligned letters in each segment
+                offsets = numpy.arange(lengths.sum()) - numpy.repeat(
+                    numpy.cumsum(lengths) - lengths, lengths
+                )
+                positions1 = numpy.repeat(coordinates[i1, :-1][aligned], lengths)
+                positions2 = numpy.repeat(coordinates[i2, :-1][aligned], lengths)
+                indices1 = self._convert_codes(sequences[i1][positions1 + offsets])
+                indices2 = self._convert_codes(sequences[i2][positions2 + offsets])
+                score += values[indices1, indices2].sum()
+        return score
+
     def _format_1D(self, fmt):
         _alphabet = self._alphabet
         n = len(_alphabet)
@@ -451,6 +587,39 @@ class Array(numpy.ndarray):
         return text
 
 
+@functools.lru_cache(maxsize=128)
+def _alphabet_indices(alphabet):
+    """Return a dict and a table of ASCII codes of the indices of the letters (PRIVATE).
+
+    The table has 256 entries, with -1 for ASCII codes that are not a
+    letter in the alphabet.
+    """
+    indices = {}
+    for index, letter in enumerate(alphabet):
+        indices.setdefault(letter, index)
+    table = numpy.full(256, -1, numpy.intp)
+    for letter, index in indices.items():
+        if len(letter) == 1 and ord(letter) < 256:
+            table[ord(letter)] = index
+    table.flags.writeable = False
+    return indices, table
+
+
+def _sequence_codes(sequence):
+    """Return the ASCII codes of a sequence as a NumPy array (PRIVATE)."""
+    if isinstance(sequence, numpy.ndarray):
+        return sequence
+    if isinstance(sequence, str):
+        try:
+            sequence = sequence.encode("latin-1")
+        except UnicodeEncodeError as exception:
+            letter = exception.object[exception.start]
+            raise IndexError("'%s'" % letter) from None
+    else:
+        sequence = bytes(sequence)
+    return numpy.frombuffer(sequence, numpy.uint8)
+
+
 def read(handle, dtype=float):
     """Parse the file and return an Array object."""
     try:
@@ -508,6 +677,12 @@ def load(name=None):
     subdirectory = os.path.join(directory, "data")
     if name is None:
         filenames = os.listdir(subdirectory)
+        try:
+            filenames.remove("README.txt")
+            # The README.txt file is not present in usual Biopython
+            # installations, but is included in a development install.
+        except ValueError:
+            pass
         return sorted(filenames)
     path = os.path.join(subdirectory, name)
     matrix = read(path)
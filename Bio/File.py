@@ -12,11 +12,18 @@ indexing files. These are not intended for direct use.
 """
 
 import os
+import sys
+import mmap
+import struct
 import contextlib
 import itertools
 import collections.abc
 
+from array import array
+
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 
 try:
     import sqlite3
@@ -147,6 +154,176 @@ class _IndexedSeqFileProxy(ABC):
         raise NotImplementedError("Not available for this file format.")
 
 
+# Persistent offset index files, written next to the indexed file.
+#
+# These hold the record keys (as UTF-8) sorted by key, and the record offsets,
+# so that the index can be memory mapped and searched without loading it:
+#
+# - header (see _OFFSETS_HEADER), including the size and modification time
+#   of the indexed file, which are checked before using the index
+# - key starts, count + 1 unsigned 64 bit integers (sorted key order)
+# - record offsets, count unsigned 64 bit integers (sorted key order)
+# - file order, count unsigned 64 bit integers mapping the order of the
+#   records in the indexed file to their position in the sorted key order
+# - key data, the UTF-8 encoded keys concatenated in sorted order
+#
+# The integers are in the native byte order, recorded in the header.
+_OFFSETS_MAGIC = b"BIOIDX01"
+_OFFSETS_HEADER = struct.Struct("<8s32sQqQQ")
+_OFFSETS_BYTEORDER = {"little": b"<", "big": b">"}
+
+
+def _offsets_index_filename(filename):
+    """Return the default filename for a persistent offset index (PRIVATE)."""
+    return filename + ".bidx"
+
+
+def _write_offsets_index(index_filename, filename, fmt, offsets):
+    """Save a dictionary of keys and offsets as a persistent index (PRIVATE).
+
+    The offsets dictionary should be in the record order of the file, and
+    all the keys must be strings. The index is first written to a temporary
+    file which is then renamed, so an incomplete index is never used.
+    """
+    stat = os.stat(filename)
+    keys = sorted(offsets)
+    count = len(keys)
+    order = {key: i for i, key in enumerate(keys)}
+    encoded = [key.encode("utf-8") for key in keys]
+    starts = array("Q", [0])
+    for key in encoded:
+        starts.append(starts[-1] + len(key))
+    record_offsets = array("Q", (offsets[key] for key in keys))
+    file_order = array("Q", (order[key] for key in offsets))
+    header = _OFFSETS_HEADER.pack(
+        _OFFSETS_MAGIC,
+        _OFFSETS_BYTEORDER[sys.byteorder] + fmt.encode("ascii"),
+        stat.st_size,
+        stat.st_mtime_ns,
+        count,
+        starts[-1],
+    )
+    tmp_filename = index_filename + ".tmp"
+    with open(tmp_filename, "wb") as handle:
+        handle.write(header)
+        starts.tofile(handle)
+        record_offsets.tofile(handle)
+        file_order.tofile(handle)
+        handle.write(b"".join(encoded))
+    os.replace(tmp_filename, index_filename)
+
+
+def _load_offsets_index(index_filename, filename, fmt):
+    """Load a persistent offset index if present and up to date (PRIVATE).
+
+    Returns an _OffsetsIndex object, or None if the index file is missing,
+    is for a different format, or if the size or modification time of the
+    indexed file do not match those recorded in the index.
+    """
+    try:
+        handle = open(index_filename, "rb")
+    except OSError:
+        return None
+    with handle:
+        header = handle.read(_OFFSETS_HEADER.size)
+        if len(header) != _OFFSETS_HEADER.size:
+            return None
+        magic, index_fmt, size, mtime, count, key_bytes = _OFFSETS_HEADER.unpack(header)
+        stat = os.stat(filename)
+        if (
+            magic != _OFFSETS_MAGIC
+            or index_fmt.rstrip(b"\0")
+            != _OFFSETS_BYTEORDER[sys.byteorder] + fmt.encode("ascii")
+            or size != stat.st_size
+            or mtime != stat.st_mtime_ns
+        ):
+            return None
+        expected = _OFFSETS_HEADER.size + 8 * (3 * count + 1) + key_bytes
+        if os.fstat(handle.fileno()).st_size != expected:
+            return None
+        if expected == _OFFSETS_HEADER.size + 8:
+            # Empty index, can't memory map just the header
+            return _OffsetsIndex(None, 0)
+        data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return _OffsetsIndex(data, count)
+
+
+class _OffsetsIndex(collections.abc.Mapping):
+    """Read only dictionary of record offsets in a memory mapped file (PRIVATE).
+
+    This is used by _IndexedSeqFileDict in place of an in memory dictionary,
+    the keys are found by binary search of the sorted keys. Iterating over
+    the keys follows the record order of the indexed file.
+    """
+
+    def __init__(self, data, count):
+        """Initialize the class."""
+        self._data = data
+        self._count = count
+        if data is None:
+            self._starts = self._offsets = self._order = ()
+            return
+        view = memoryview(data)
+        start = _OFFSETS_HEADER.size
+        end = start + 8 * (count + 1)
+        self._starts = view[start:end].cast("Q")
+        start, end = end, end + 8 * count
+        self._offsets = view[start:end].cast("Q")
+        start, end = end, end + 8 * count
+        self._order = view[start:end].cast("Q")
+        self._key_start = end
+
+    def _key(self, i):
+        """Return the UTF-8 encoded key at the given sorted position (PRIVATE)."""
+        start = self._key_start
+        return self._data[start + self._starts[i] : start + self._starts[i + 1]]
+
+    def _find(self, key):
+        """Return the sorted position of the key, or -1 if missing (PRIVATE)."""
+        if not isinstance(key, str):
+            return -1
+        target = key.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key(low) == target:
+            return low
+        return -1
+
+    def __len__(self):
+        """Return the number of records."""
+        return self._count
+
+    def __iter__(self):
+        """Iterate over the keys, in the order of the indexed file."""
+        for i in self._order:
+            yield self._key(i).decode("utf-8")
+
+    def __contains__(self, key):
+        """Return True if the key is in the index."""
+        return self._find(key) != -1
+
+    def __getitem__(self, key):
+        """Return the offset of the record with this key."""
+        i = self._find(key)
+        if i == -1:
+            raise KeyError(key)
+        return self._offsets[i]
+
+    def close(self):
+        """Close the memory mapped index file."""
+        if self._data is not None:
+            self._starts.release()
+            self._offsets.release()
+            self._order.release()
+            self._data.close()
+            self._data = None
+
+
 class _IndexedSeqFileDict(collections.abc.Mapping):
     """Read only dictionary interface to a sequential record file.
 
@@ -170,15 +347,22 @@ class _IndexedSeqFileDict(collections.abc.Mapping):
 
     Note that this dictionary is essentially read only. You cannot
     add or change values, pop values, nor clear the dictionary.
+
+    Rather than scanning the file, the keys and offsets can be taken from
+    a previously saved persistent index (see _load_offsets_index).
     """
 
-    def __init__(self, random_access_proxy, key_function, repr, obj_repr):
+    def __init__(self, random_access_proxy, key_function, repr, obj_repr, offsets=None):
         """Initialize the class."""
         # Use key_function=None for default value
         self._proxy = random_access_proxy
         self._key_function = key_function
         self._repr = repr
         self._obj_repr = obj_repr
+        if offsets is not None:
+            # Using a persistent index, no need to scan the file
+            self._offsets = offsets
+            return
         if key_function:
             offset_iter = ((key_function(k), o, l) for (k, o, l) in random_access_proxy)
         else:
@@ -250,6 +434,112 @@ class _IndexedSeqFileDict(collections.abc.Mapping):
         all open handles to that file.
         """
         self._proxy._handle.close()
+        if isinstance(self._offsets, _OffsetsIndex):
+            self._offsets.close()
+
+    def _save_offsets(self, index_filename, filename, fmt):
+        """Save the keys and offsets as a persistent index file (PRIVATE)."""
+        if self._key_function:
+            raise ValueError("Cannot save the index when using a key_function")
+        _write_offsets_index(index_filename, filename, fmt, self._offsets)
+
+
+# Large uncompressed files in these formats can be split at record
+# boundaries and the pieces scanned in parallel when building an index:
+_INDEX_CHUNK_SIZE = 2 ** 26
+_CHUNKED_FORMATS = ("fasta", "fastq", "fastq-sanger", "fastq-solexa", "fastq-illumina")
+
+
+def _find_record_start(handle, offset, fmt):
+    """Return the offset of the first record starting at or after offset (PRIVATE).
+
+    Expects a binary handle to an uncompressed FASTA or FASTQ file, and
+    returns None if there are no more records. For FASTQ where quality
+    lines can also start with "@", a record start is taken to be an "@"
+    line where the line after next is a "+" line (either bare, or
+    repeating the title), followed by a quality line of the same length
+    as the sequence line. Therefore this assumes records are not line
+    wrapped, which is true for any FASTQ file from a modern sequencer.
+    """
+    handle.seek(offset)
+    if offset:
+        # Skip the remainder of the current line
+        handle.readline()
+    if fmt == "fasta":
+        while True:
+            start = handle.tell()
+            line = handle.readline()
+            if not line:
+                return None
+            if line.startswith(b">"):
+                return start
+    starts = []
+    lines = []
+    while True:
+        starts.append(handle.tell())
+        lines.append(handle.readline())
+        if len(lines) < 4:
+            if not lines[-1]:
+                return None
+            continue
+        title, seq, plus, qual = lines
+        if (
+            title.startswith(b"@")
+            and plus.rstrip() in (b"+", b"+" + title[1:].rstrip())
+            and len(seq.rstrip()) == len(qual.rstrip())
+        ):
+            return starts[0]
+        if not qual:
+            return None
+        del starts[0], lines[0]
+
+
+def _scan_offsets(proxy_factory, fmt, filename, start=0, end=None):
+    """Return a list of (key, offset, length) tuples for a file (PRIVATE).
+
+    If end is given, only the records between these two offsets (which
+    must be record boundaries) are scanned. This is used as the task for
+    each worker process when building an index in parallel.
+    """
+    random_access_proxy = proxy_factory(fmt, filename)
+    handle = random_access_proxy._handle
+    try:
+        if end is None:
+            return list(random_access_proxy)
+        # The proxies all scan from the start of their handle, so give
+        # them just this chunk and then correct the offsets
+        handle.seek(start)
+        random_access_proxy._handle = BytesIO(handle.read(end - start))
+        return [(k, o + start, l) for (k, o, l) in random_access_proxy]
+    finally:
+        handle.close()
+
+
+def _split_for_scanning(filename, fmt, chunk_size=None):
+    """Return a list of (start, end) record boundaries to scan (PRIVATE).
+
+    Only large uncompressed files in the line based formats listed in
+    _CHUNKED_FORMATS are split, otherwise returns [(0, None)] meaning
+    scan the whole file.
+    """
+    if chunk_size is None:
+        chunk_size = _INDEX_CHUNK_SIZE
+    size = os.path.getsize(filename)
+    if fmt not in _CHUNKED_FORMATS or size <= chunk_size:
+        return [(0, None)]
+    with open(filename, "rb") as handle:
+        if handle.read(2) == b"\x1f\x8b":
+            # Compressed (e.g. BGZF), can't split this
+            return [(0, None)]
+        boundaries = [0]
+        for offset in range(chunk_size, size, chunk_size):
+            start = _find_record_start(handle, offset, fmt)
+            if start is None:
+                break
+            if start > boundaries[-1]:
+                boundaries.append(start)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
 
 
 class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
@@ -265,6 +555,11 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
     There are OS limits on the number of files that can be open at once,
     so a pool are kept. If a record is required from a closed file, then
     one of the open handles is closed first.
+
+    When building a new index, the files can be scanned in parallel using
+    a pool of worker processes (the proxy_factory must then be picklable).
+    Large uncompressed FASTA and FASTQ files are also split at record
+    boundaries, and the pieces scanned in parallel.
     """
 
     def __init__(
@@ -276,6 +571,7 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         key_function,
         repr,
         max_open=10,
+        processes=1,
     ):
         """Initialize the class."""
         # TODO? - Don't keep filename list in memory (just in DB)?
@@ -290,6 +586,8 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
             raise MissingPythonDependencyError(
                 "Python was compiled without the sqlite3 module"
             )
+        if processes < 1:
+            raise ValueError("Use processes with a minimum of 1")
         if filenames is not None:
             filenames = list(filenames)  # In case it was a generator
 
@@ -301,6 +599,7 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         self._proxy_factory = proxy_factory
         self._repr = repr
         self._max_open = max_open
+        self._processes = processes
         self._proxies = {}
 
         # Note if using SQLite :memory: trick index filename, this will
@@ -422,7 +721,6 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         fmt = self._format
         key_function = self._key_function
         proxy_factory = self._proxy_factory
-        max_open = self._max_open
         random_access_proxies = self._proxies
 
         if not fmt or not filenames:
@@ -454,7 +752,6 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
             "CREATE TABLE offset_data (key TEXT, "
             "file_number INTEGER, offset INTEGER, length INTEGER);"
         )
-        count = 0
         for i, filename in enumerate(filenames):
             # Default to storing as an absolute path,
             f = os.path.abspath(filename)
@@ -476,15 +773,16 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
             con.execute(
                 "INSERT INTO file_data (file_number, name) VALUES (?,?);", (i, f)
             )
-            random_access_proxy = proxy_factory(fmt, filename)
+        # All the offsets are inserted in a single transaction, and the key
+        # is only indexed at the end (much faster)
+        count = 0
+        for i, offsets in self._scan_files():
             if key_function:
-                offset_iter = (
-                    (key_function(k), i, o, l) for (k, o, l) in random_access_proxy
-                )
+                offset_iter = ((key_function(k), i, o, l) for (k, o, l) in offsets)
             else:
-                offset_iter = ((k, i, o, l) for (k, o, l) in random_access_proxy)
+                offset_iter = ((k, i, o, l) for (k, o, l) in offsets)
             while True:
-                batch = list(itertools.islice(offset_iter, 100))
+                batch = list(itertools.islice(offset_iter, 1000))
                 if not batch:
                     break
                 # print("Inserting batch of %i offsets, %s ... %s"
@@ -493,12 +791,8 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
                     "INSERT INTO offset_data (key,file_number,offset,length) VALUES (?,?,?,?);",
                     batch,
                 )
-                con.commit()
                 count += len(batch)
-            if len(random_access_proxies) < max_open:
-                random_access_proxies[i] = random_access_proxy
-            else:
-                random_access_proxy._handle.close()
+        con.commit()
         self._length = count
         # print("About to index %i entries" % count)
         try:
@@ -515,6 +809,38 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         con.commit()
         # print("Index created")
 
+    def _scan_files(self):
+        """Yield (file number, offsets) for each file or piece of a file (PRIVATE).
+
+        Called from _build_index, this scans the files in order when using a
+        single process (keeping the first few proxies open for later use), or
+        on a pool of worker processes.
+        """
+        filenames = self._filenames
+        fmt = self._format
+        proxy_factory = self._proxy_factory
+        random_access_proxies = self._proxies
+        if self._processes == 1:
+            for i, filename in enumerate(filenames):
+                random_access_proxy = proxy_factory(fmt, filename)
+                yield i, random_access_proxy
+                if len(random_access_proxies) < self._max_open:
+                    random_access_proxies[i] = random_access_proxy
+                else:
+                    random_access_proxy._handle.close()
+            return
+        tasks = []
+        for i, filename in enumerate(filenames):
+            for start, end in _split_for_scanning(filename, fmt):
+                tasks.append((i, filename, start, end))
+        with ProcessPoolExecutor(self._processes) as executor:
+            futures = [
+                executor.submit(_scan_offsets, proxy_factory, fmt, filename, start, end)
+                for (i, filename, start, end) in tasks
+            ]
+            for (i, filename, start, end), future in zip(tasks, futures):
+                yield i, future.result()
+
     def __repr__(self):
         return self._repr
 
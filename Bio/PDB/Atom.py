@@ -29,8 +29,16 @@ class Atom:
 
     In the case of PQR files, B factor and occupancy are replaced by
     atomic charge and radius.
+
+    If the atom is part of a Model, its coordinates, B factor, occupancy
+    and element are stored in a row of the AtomArrays object of the Model
+    (see Model.get_atom_arrays), and the coord attribute is a view of that
+    row.
     """
 
+    # For atom sorting (protein backbone atoms first)
+    _sorting_keys = {"N": 0, "CA": 1, "C": 2, "O": 3}
+
     def __init__(
         self,
         name,
@@ -77,12 +85,15 @@ class Atom:
         self.level = "A"
         # Reference to the residue
         self.parent = None
+        # AtomArrays object storing the atomic data, if any, and the row index
+        self._atom_arrays = None
+        self._index = None
         # the atomic data
         self.name = name  # eg. CA, spaces are removed from atom name
         self.fullname = fullname  # e.g. " CA ", spaces included
-        self.coord = coord
-        self.bfactor = bfactor
-        self.occupancy = occupancy
+        self._coord = coord
+        self._bfactor = bfactor
+        self._occupancy = occupancy
         self.altloc = altloc
         self.full_id = None  # (structure id, model id, chain id, residue id, atom id)
         self.id = name  # id of atom is the atom name (e.g. "CA")
@@ -94,13 +105,102 @@ class Atom:
         # Dictionary that keeps additional properties
         self.xtra = {}
         assert not element or element == element.upper(), element
-        self.element = self._assign_element(element)
+        self._element = self._assign_element(element)
         self.mass = self._assign_atom_mass()
         self.pqr_charge = pqr_charge
         self.radius = radius
 
-        # For atom sorting (protein backbone atoms first)
-        self._sorting_keys = {"N": 0, "CA": 1, "C": 2, "O": 3}
+    # Atomic data, stored in the atom arrays of the model if available
+
+    @property
+    def coord(self):
+        """Atomic coordinates as a NumPy array of size 3."""
+        arrays = self._atom_arrays
+        if arrays is None:
+            return self._coord
+        return arrays.coord[self._index]
+
+    @coord.setter
+    def coord(self, value):
+        arrays = self._atom_arrays
+        if arrays is None:
+            self._coord = value
+        else:
+            arrays._set_coords(self._index, value)
+
+    @property
+    def bfactor(self):
+        """Isotropic B factor."""
+        arrays = self._atom_arrays
+        if arrays is None:
+            return self._bfactor
+        return _nan_to_none(arrays.bfactor[self._index])
+
+    @bfactor.setter
+    def bfactor(self, value):
+        arrays = self._atom_arrays
+        if arrays is None:
+            self._bfactor = value
+        else:
+            arrays.bfactor[self._index] = np.nan if value is None else value
+
+    @property
+    def occupancy(self):
+        """Occupancy."""
+        arrays = self._atom_arrays
+        if arrays is None:
+            return self._occupancy
+        return _nan_to_none(arrays.occupancy[self._index])
+
+    @occupancy.setter
+    def occupancy(self, value):
+        arrays = self._atom_arrays
+        if arrays is None:
+            self._occupancy = value
+        else:
+            arrays.occupancy[self._index] = np.nan if value is None else value
+
+    @property
+    def element(self):
+        """Element symbol."""
+        arrays = self._atom_arrays
+        if arrays is None:
+            return self._element
+        return arrays.element[self._index]
+
+    @element.setter
+    def element(self, value):
+        arrays = self._atom_arrays
+        if arrays is None:
+            self._element = value
+        else:
+            arrays.element[self._index] = value
+
+    def _set_atom_arrays(self, arrays, index):
+        """Store the data of this atom in a row of an AtomArrays object (PRIVATE).
+
+        Pass None as arrays to store the data in the atom itself again.
+        """
+        if arrays is None:
+            coord = self.coord
+            if self._atom_arrays is not None:
+                coord = coord.copy()
+            bfactor = self.bfactor
+            occupancy = self.occupancy
+            element = self.element
+            self._atom_arrays = None
+            self._index = None
+            self._coord = coord
+            self._bfactor = bfactor
+            self._occupancy = occupancy
+            self._element = element
+        else:
+            self._atom_arrays = arrays
+            self._index = index
+            self._coord = None
+            self._bfactor = None
+            self._occupancy = None
+            self._element = None
 
     # Sorting Methods
     # standard across different objects and allows direct comparison
@@ -457,12 +557,66 @@ class Atom:
         """
         # Do a shallow copy then explicitly copy what needs to be deeper.
         shallow = copy.copy(self)
+        shallow._set_atom_arrays(None, None)
         shallow.detach_parent()
         shallow.set_coord(copy.copy(self.get_coord()))
         shallow.xtra = self.xtra.copy()
         return shallow
 
 
+def _get_atom_rows(atoms):
+    """Return the AtomArrays objects storing the atoms, with their rows (PRIVATE).
+
+    Returns a list of (arrays, positions, rows) tuples, one for each
+    AtomArrays object, where positions are the indices in the list of atoms
+    and rows the corresponding rows in the arrays. For a DisorderedAtom, the
+    row of the selected atom is used. Returns None if any of the atoms is not
+    stored in an AtomArrays object.
+    """
+    groups = {}
+    try:
+        for position, atom in enumerate(atoms):
+            arrays = atom._atom_arrays
+            try:
+                group = groups[id(arrays)]
+            except KeyError:
+                if arrays is None:
+                    return None
+                group = (arrays, [], [])
+                groups[id(arrays)] = group
+            group[1].append(position)
+            group[2].append(atom._index)
+    except AttributeError:
+        return None
+    return list(groups.values())
+
+
+def _get_coords(atoms):
+    """Return the coordinates of a list of atoms as an array of shape (N, 3) (PRIVATE).
+
+    If the atoms are stored in AtomArrays objects, the coordinates are taken
+    from their coordinate arrays in a single step for each object.
+    """
+    groups = _get_atom_rows(atoms)
+    if groups is None:
+        return np.array([atom.get_coord() for atom in atoms])
+    if len(groups) == 1:
+        arrays, positions, rows = groups[0]
+        return arrays.coord[rows]
+    dtype = np.result_type(*[arrays.coord for arrays, positions, rows in groups])
+    coords = np.empty((len(atoms), 3), dtype)
+    for arrays, positions, rows in groups:
+        coords[positions] = arrays.coord[rows]
+    return coords
+
+
+def _nan_to_none(value):
+    """Return None if value is NaN, or value as a float otherwise (PRIVATE)."""
+    if value != value:
+        return None
+    return float(value)
+
+
 class DisorderedAtom(DisorderedEntityWrapper):
     """Contains all Atom objects that represent the same disordered atom.
 
@@ -528,6 +682,8 @@ class DisorderedAtom(DisorderedEntityWrapper):
         # set the residue parent of the added atom
         residue = self.get_parent()
         atom.set_parent(residue)
+        if residue is not None:
+            residue._invalidate_atom_arrays()
         altloc = atom.get_altloc()
         occupancy = atom.get_occupancy()
         self[altloc] = atom
@@ -549,6 +705,9 @@ class DisorderedAtom(DisorderedEntityWrapper):
         # Detach
         del self.child_dict[altloc]
         atom.detach_parent()
+        residue = self.get_parent()
+        if residue is not None:
+            residue._invalidate_atom_arrays()
 
         if is_selected and self.child_dict:  # pick next highest occupancy
             child = sorted(self.child_dict.values(), key=lambda a: a.occupancy)[-1]
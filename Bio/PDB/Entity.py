@@ -24,6 +24,9 @@ class Entity:
     It deals with storage and lookup.
     """
 
+    # AtomArrays object with the data of the atoms (used by Model)
+    _atom_arrays = None
+
     def __init__(self, id):
         """Initialize the class."""
         self._id = id
@@ -137,6 +140,44 @@ class Entity:
                 pass  # Atoms do not cache their full ids.
         self.full_id = self._generate_full_id()
 
+    def _invalidate_atom_arrays(self):
+        """Discard the AtomArrays of this entity and its parents (PRIVATE).
+
+        This is called if atoms are added or removed. The atoms keep their
+        data in the old arrays until new arrays are created.
+        """
+        entity = self
+        while entity is not None:
+            if entity._atom_arrays is not None:
+                entity._atom_arrays = None
+            entity = entity.parent
+
+    def _get_atom_rows(self):
+        """Return the AtomArrays objects and rows of all atoms in this entity (PRIVATE).
+
+        Returns a list of (arrays, rows) tuples, one for each Model. Disordered
+        atoms and residues are unpacked. Returns None if this entity is not
+        part of a Model.
+        """
+        if self.level == "S":
+            return [(model.get_atom_arrays(), slice(None)) for model in self]
+        model = self
+        while model is not None and model.level != "M":
+            model = model.parent
+        if model is None:
+            return None
+        arrays = model.get_atom_arrays()
+        if model is self:
+            return [(arrays, slice(None))]
+        if self.level == "R":
+            atoms = self.get_unpacked_list()
+        else:
+            atoms = []
+            for residue in self.get_unpacked_list():
+                atoms.extend(residue.get_unpacked_list())
+        rows = [atom._index for atom in atoms]
+        return [(arrays, rows)]
+
     def _generate_full_id(self):
         """Generate full_id (PRIVATE).
 
@@ -209,6 +250,7 @@ class Entity:
         child.detach_parent()
         del self.child_dict[id]
         self.child_list.remove(child)
+        self._invalidate_atom_arrays()
 
     def add(self, entity):
         """Add a child to the Entity."""
@@ -218,6 +260,7 @@ class Entity:
         entity.set_parent(self)
         self.child_list.append(entity)
         self.child_dict[entity_id] = entity
+        self._invalidate_atom_arrays()
 
     def insert(self, pos, entity):
         """Add a child to the Entity at a specified position."""
@@ -227,6 +270,7 @@ class Entity:
         entity.set_parent(self)
         self.child_list[pos:pos] = [entity]
         self.child_dict[entity_id] = entity
+        self._invalidate_atom_arrays()
 
     def get_iterator(self):
         """Return iterator over children."""
@@ -291,9 +335,16 @@ class Entity:
             translation = array((0, 0, 1), 'f')
             entity.transform(rotation, translation)
 
+        If the entity is part of a Model, the coordinates of all its atoms
+        are transformed in a single step in the atom arrays of the Model.
         """
-        for o in self.get_list():
-            o.transform(rot, tran)
+        groups = self._get_atom_rows()
+        if groups is None:
+            for o in self.get_list():
+                o.transform(rot, tran)
+        else:
+            for arrays, rows in groups:
+                arrays._set_coords(rows, np.dot(arrays.coord[rows], rot) + tran)
 
     def center_of_mass(self, geometric=False):
         """Return the center of mass of the Entity as a numpy array.
@@ -305,6 +356,23 @@ class Entity:
         if not len(self):
             raise ValueError(f"{self} does not have children")
 
+        groups = self._get_atom_rows()
+        if groups is not None:
+            coords = [arrays.coord[rows] for arrays, rows in groups]
+            coords = np.asarray(np.concatenate(coords), dtype=np.float32)
+            if geometric:
+                masses = None
+            else:
+                masses = []
+                for arrays, rows in groups:
+                    atoms = arrays.atoms
+                    if isinstance(rows, slice):
+                        masses.extend(atom.mass for atom in atoms[rows])
+                    else:
+                        masses.extend(atoms[row].mass for row in rows)
+                masses = np.asarray(masses, dtype=np.float32)
+            return np.average(coords, axis=0, weights=masses)
+
         maybe_disordered = {"R", "C"}  # to know when to use get_unpacked_list
         only_atom_level = {"A"}
 
@@ -343,6 +411,103 @@ class Entity:
         return shallow
 
 
+class AtomArrays:
+    """Contiguous arrays with the coordinates and other data of atoms.
+
+    A Model stores the coordinates, B factors, occupancies and elements of
+    its atoms in an AtomArrays object, with one row for each atom. Each
+    alternative location of a disordered atom has its own row. The
+    attributes of the Atom objects read and write their row of these
+    arrays, so ``atom.coord`` is a view of one row of ``coord``.
+
+    Attributes:
+     - atoms - list of Atom objects, in the order of the rows
+     - coord - NumPy array of shape (N, 3) with the atomic coordinates
+     - bfactor - NumPy array of floats with the B factors (NaN if None)
+     - occupancy - NumPy array of floats with the occupancies (NaN if None)
+     - element - NumPy array of objects with the element symbols
+
+    The arrays can be used for vectorized calculations on all atoms of a
+    Model, and changes to the arrays are seen by the atoms. If atoms are
+    added to or removed from the Model, it creates new arrays the next time
+    they are requested.
+    """
+
+    def __init__(self, atoms):
+        """Collect the data of the atoms in arrays, and store the atoms in them.
+
+        Arguments:
+         - atoms - list of Atom objects
+
+        """
+        atoms = list(atoms)
+        n = len(atoms)
+        if any(atom._atom_arrays is not None for atom in atoms):
+            coord = [atom.coord for atom in atoms]
+            bfactor = [atom.bfactor for atom in atoms]
+            occupancy = [atom.occupancy for atom in atoms]
+            element = [atom.element for atom in atoms]
+        else:
+            # the atoms store their data themselves; read it directly
+            coord = [atom._coord for atom in atoms]
+            bfactor = [atom._bfactor for atom in atoms]
+            occupancy = [atom._occupancy for atom in atoms]
+            element = [atom._element for atom in atoms]
+        coord = np.array(coord)
+        if n == 0:
+            coord = np.zeros((0, 3), np.float32)
+        elif coord.shape != (n, 3) or coord.dtype.kind not in "fiu":
+            raise ValueError("atomic coordinates must consist of three numbers")
+        self.atoms = atoms
+        self.coord = coord
+        # None is stored as NaN
+        self.bfactor = np.array(bfactor, np.float64)
+        self.occupancy = np.array(occupancy, np.float64)
+        self.element = np.empty(n, object)
+        self.element[:] = element
+        for index, atom in enumerate(atoms):
+            atom._set_atom_arrays(self, index)
+
+    @classmethod
+    def _from_arrays(cls, atoms, coord, bfactor, occupancy, element):
+        """Store the atoms in arrays that already contain their data (PRIVATE).
+
+        This is used by parsers that read the atomic data in bulk, to avoid
+        collecting the data from the Atom objects again. The arrays are used
+        as given, and row i must correspond to atoms[i].
+        """
+        self = cls.__new__(cls)
+        self.atoms = atoms
+        self.coord = coord
+        self.bfactor = bfactor
+        self.occupancy = occupancy
+        self.element = element
+        for index, atom in enumerate(atoms):
+            atom._set_atom_arrays(self, index)
+        return self
+
+    def __len__(self):
+        """Return the number of atoms."""
+        return len(self.atoms)
+
+    def __repr__(self):
+        """Return a string representation of the AtomArrays object."""
+        return "<AtomArrays with %d atoms>" % len(self.atoms)
+
+    def _set_coords(self, rows, values):
+        """Store coordinates in rows of the coordinate array (PRIVATE).
+
+        The coordinate array is converted to a larger data type if needed to
+        store the values without loss of precision.
+        """
+        values = np.asarray(values)
+        coord = self.coord
+        if not np.can_cast(values.dtype, coord.dtype):
+            coord = coord.astype(np.result_type(coord.dtype, values.dtype))
+            self.coord = coord
+        coord[rows] = values
+
+
 class DisorderedEntityWrapper:
     """Wrapper class to group equivalent Entities.
 
@@ -355,6 +520,9 @@ class DisorderedEntityWrapper:
     atom in the structure.
     """
 
+    # not forwarded to the selected child (see Entity._invalidate_atom_arrays)
+    _atom_arrays = None
+
     def __init__(self, id):
         """Initialize the class."""
         self.id = id
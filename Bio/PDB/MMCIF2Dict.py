@@ -8,101 +8,188 @@
 """Turn an mmCIF file into a dictionary."""
 
 
+import re
+
+from itertools import chain
+
+import numpy
+
 from Bio.File import as_handle
 
 
+# A token is a quoted string, which ends at a matching quote followed by
+# whitespace or the end of the line, or a string of non-whitespace characters
+_token = re.compile(r"""[ \t]*('.*?'(?=[ \t]|$)|".*?"(?=[ \t]|$)|[^ \t]+)""")
+
+# Columns in which all values are integers or floating point numbers. Values
+# with leading zeros or a plus sign, such as identifiers "007" or "+1", are
+# not numbers, so that the integers read back as the same text.
+_integer = r"(?:0|-?[1-9][0-9]*)"
+_number = r"-?(?:(?:0|[1-9][0-9]*)(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?"
+_integers = re.compile("%s(?: %s)*" % (_integer, _integer))
+_numbers = re.compile("%s(?: %s)*" % (_number, _number))
+
+
 class MMCIF2Dict(dict):
     """Parse a mmCIF file and return a dictionary."""
 
-    def __init__(self, filename):
+    def __init__(self, filename, categories=None, as_arrays=False):
         """Parse a mmCIF file and return a dictionary.
 
+        Each data item of the file is stored as a list of strings, with one
+        string for each row of a loop, or with a single string for items
+        that are not in a loop. Only the data items of the given categories
+        are stored, for example ``MMCIF2Dict(filename, ["_atom_site"])``
+        to read only the ``_atom_site.*`` items with the atomic coordinates,
+        which is faster and needs less memory for large structures.
+
         Arguments:
          - file - name of the PDB file OR an open filehandle
+         - categories - names of the categories to store, including the
+           leading underscore (default None, to store all data items); a
+           single category can be given as a string
+         - as_arrays - if True, store the data items in which all values
+           are integers or all values are numbers as NumPy arrays of
+           integers or floats, instead of lists of strings (default False).
+           Values with leading zeros or a plus sign (such as "007") are not
+           considered numbers.
+
+        >>> from Bio.PDB.MMCIF2Dict import MMCIF2Dict
+        >>> mmcif_dict = MMCIF2Dict("PDB/1A8O.cif", ["_atom_site"], True)
+        >>> mmcif_dict["_atom_site.label_atom_id"][:3]
+        ['N', 'CA', 'C']
+        >>> mmcif_dict["_atom_site.id"][:3]
+        array([1, 2, 3])
+        >>> print("%.3f" % mmcif_dict["_atom_site.Cartn_x"][0])
+        19.594
+        >>> "_cell.length_a" in mmcif_dict
+        False
 
         """
-        self.quote_chars = ["'", '"']
-        self.whitespace_chars = [" ", "\t"]
+        if isinstance(categories, str):
+            categories = {categories}
+        elif categories is not None:
+            categories = set(categories)
         with as_handle(filename) as handle:
             loop_flag = False
+            keys = []
+            values = None
+            i = 0
             key = None
-            tokens = self._tokenize(handle)
-            try:
-                token = next(tokens)
-            except StopIteration:
-                return  # for Python 3.7 and PEP 479
+            lines = self._tokenize(handle)
+            for tokens, values_only in lines:
+                if tokens:
+                    break
+            else:
+                return  # no tokens
+            token = tokens.pop(0)
             self[token[0:5]] = token[5:]
-            i = 0
-            n = 0
-            for token in tokens:
-                if token.lower() == "loop_":
-                    loop_flag = True
-                    keys = []
-                    i = 0
-                    n = 0
+            for tokens, values_only in chain([(tokens, False)], lines):
+                if loop_flag and values_only and keys:
+                    # none of the tokens can be a key or loop_, so all of
+                    # them are values in the loop
+                    i += len(tokens)
+                    if values is not None:
+                        values.extend(tokens)
                     continue
-                elif loop_flag:
-                    # The second condition checks we are in the first column
-                    # Some mmCIF files (e.g. 4q9r) have values in later columns
-                    # starting with an underscore and we don't want to read
-                    # these as keys
-                    if token.startswith("_") and (n == 0 or i % n == 0):
-                        if i > 0:
-                            loop_flag = False
+                for token in tokens:
+                    if token.lower() == "loop_":
+                        if loop_flag:
+                            self._store_loop(keys, values)
+                        loop_flag = True
+                        keys = []
+                        values = None
+                        i = 0
+                        continue
+                    elif loop_flag:
+                        # The second condition checks we are in the first column
+                        # Some mmCIF files (e.g. 4q9r) have values in later columns
+                        # starting with an underscore and we don't want to read
+                        # these as keys
+                        if token.startswith("_") and (not keys or i % len(keys) == 0):
+                            if i > 0:
+                                loop_flag = False
+                                self._store_loop(keys, values)
+                            else:
+                                keys.append(token)
+                                if values is None and (
+                                    categories is None
+                                    or token.split(".", 1)[0] in categories
+                                ):
+                                    values = []
+                                continue
                         else:
-                            self[token] = []
-                            keys.append(token)
-                            n += 1
+                            if values is not None:
+                                values.append(token)
+                            i += 1
                             continue
+                    if key is None:
+                        key = token
                     else:
-                        self[keys[i % n]].append(token)
-                        i += 1
-                        continue
-                if key is None:
-                    key = token
-                else:
-                    self[key] = [token]
-                    key = None
+                        if categories is None or key.split(".", 1)[0] in categories:
+                            self[key] = [token]
+                        key = None
+            if loop_flag:
+                self._store_loop(keys, values)
+        if as_arrays:
+            for key, values in self.items():
+                if key != "data_":
+                    self[key] = self._to_array(values)
 
     # Private methods
 
+    def _store_loop(self, keys, values):
+        """Store the values of a loop in the dictionary (PRIVATE)."""
+        if values is None:
+            # the loop is not in the requested categories
+            return
+        n = len(keys)
+        for i, key in enumerate(keys):
+            self[key] = values[i::n]
+
+    def _to_array(self, values):
+        """Convert a list of numbers to a NumPy array, if possible (PRIVATE).
+
+        Returns the list itself if any of the values is not a number.
+        """
+        text = " ".join(values)
+        try:
+            if _integers.fullmatch(text):
+                return numpy.array(values, int)
+            elif _numbers.fullmatch(text):
+                return numpy.array(values, float)
+        except (OverflowError, ValueError):
+            # e.g. numbers too large for NumPy, or strings with spaces
+            pass
+        return values
+
     def _splitline(self, line):
         # See https://www.iucr.org/resources/cif/spec/version1.1/cifsyntax for the syntax
-        in_token = False
-        # quote character of the currently open quote, or None if no quote open
-        quote_open_char = None
-        start_i = 0
-        for (i, c) in enumerate(line):
-            if c in self.whitespace_chars:
-                if in_token and not quote_open_char:
-                    in_token = False
-                    yield line[start_i:i]
-            elif c in self.quote_chars:
-                if not quote_open_char and not in_token:
-                    quote_open_char = c
-                    in_token = True
-                    start_i = i + 1
-                elif c == quote_open_char and (
-                    i + 1 == len(line) or line[i + 1] in self.whitespace_chars
-                ):
-                    quote_open_char = None
-                    in_token = False
-                    yield line[start_i:i]
-            elif c == "#" and not in_token:
+        for token in _token.findall(line):
+            c = token[0]
+            if c == "#":
                 # Skip comments. "#" is a valid non-comment char inside of a
-                # quote and inside of an unquoted token (!?!?), so we need to
-                # check that the current char is not in a token.
+                # quote and inside of an unquoted token (!?!?), so it only
+                # starts a comment at the start of a token.
                 return
-            elif not in_token:
-                in_token = True
-                start_i = i
-        if in_token:
-            yield line[start_i:]
-        if quote_open_char:
-            raise ValueError("Line ended with quote open: " + line)
+            elif c == "'" or c == '"':
+                if len(token) == 1 or token[-1] != c:
+                    raise ValueError("Line ended with quote open: " + line)
+                yield token[1:-1]
+            else:
+                yield token
 
     def _tokenize(self, handle):
+        """Yield the tokens of each line of the file (PRIVATE).
+
+        Yields a list of tokens for each line, and a flag that is True if
+        none of the tokens starts with an underscore (so that none of them
+        can be a key or the loop_ keyword). A multi-line string delimited by
+        semicolons is returned as a single token, followed by the tokens
+        after the closing semicolon on the same line.
+        """
         empty = True
+        splitline = self._splitline
         for line in handle:
             empty = False
             if line.startswith("#"):
@@ -115,14 +202,23 @@ class MMCIF2Dict(dict):
                 for line in handle:
                     line = line.rstrip()
                     if line.startswith(";"):
-                        yield "\n".join(token_buffer)
                         line = line[1:]
-                        if line and not line[0] in self.whitespace_chars:
+                        if line and line[0] not in " \t":
                             raise ValueError("Missing whitespace")
                         break
                     token_buffer.append(line)
                 else:
                     raise ValueError("Missing closing semicolon")
-            yield from self._splitline(line.strip())
+                tokens = ["\n".join(token_buffer)]
+                tokens.extend(splitline(line.strip()))
+                yield tokens, False
+            else:
+                line = line.strip()
+                if "'" in line or '"' in line or "#" in line:
+                    tokens = list(splitline(line))
+                else:
+                    # the most common lines, without quotes or comments
+                    tokens = line.split()
+                yield tokens, "_" not in line
         if empty:
             raise ValueError("Empty file.")
@@ -9,6 +9,8 @@
 import numpy
 import warnings
 
+from itertools import chain
+
 from Bio.File import as_handle
 
 from Bio.PDB.MMCIF2Dict import MMCIF2Dict
@@ -64,8 +66,166 @@ class MMCIFParser:
 
         return self._structure_builder.get_structure()
 
+    def iter_models(self, filename, structure_id=None):
+        """Iterate over the models in the mmCIF file, creating one at a time.
+
+        The atom_site table is read one model at a time, so files with many
+        models can be processed without storing all models in memory. The
+        first model is built as usual. If the atoms of the next model only
+        differ from those of the previous one in their serial numbers,
+        coordinates, occupancies and B factors, the same Model object is
+        yielded again, with the new values stored in its AtomArrays (see
+        Model.get_atom_arrays). Otherwise, and if the occupancies of disordered
+        atoms change or the previous model gave any warnings, a new Model is
+        created. The model ids are 0, 1, 2, ... as with get_structure.
+
+        >>> from Bio.PDB.MMCIFParser import MMCIFParser
+        >>> parser = MMCIFParser()
+        >>> for model in parser.iter_models("PDB/2BEG.cif"):
+        ...     atom = model["A"][17]["N"]
+        ...     print(model.id, model.serial_num, atom.serial_number)
+        ...     if model.id == 2:
+        ...         break
+        0 1 1
+        1 2 1856
+        2 3 3711
+
+        As the Model object may be reused, keep a copy (model.copy()) of any
+        model that is needed after the next one has been read. The data items
+        after the atom_site table (such as anisotropic B factors) are not read.
+
+        Arguments:
+         - filename - name of mmCIF file, OR an open text mode file handle
+         - structure_id - the id of the Structure objects containing the models
+
+        """
+        self.header = None
+        with as_handle(filename) as handle:
+            reader = _AtomSiteReader(handle)
+            rows = reader.read_rows()
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            self._mmcif_dict = reader
+            keys = reader.atom_site_keys
+            try:
+                column = keys.index("_atom_site.pdbx_PDB_model_num")
+            except ValueError:
+                # no model column; all atoms are in the same model
+                column = None
+            model_id = 0
+            line_counter = 0
+            previous = None
+            while row is not None:
+                # collect the rows of the next model
+                frame = [row]
+                serial_num = row[column] if column is not None else None
+                for row in rows:
+                    if column is not None and row[column] != serial_num:
+                        break
+                    frame.append(row)
+                else:
+                    row = None
+                with warnings.catch_warnings():
+                    if self.QUIET:
+                        warnings.filterwarnings(
+                            "ignore", category=PDBConstructionWarning
+                        )
+                    reader.update(zip(keys, zip(*frame)))
+                    model, previous = self._read_model(
+                        structure_id, model_id, line_counter, previous
+                    )
+                yield model
+                model_id += 1
+                line_counter += len(frame)
+
     # Private methods
 
+    def _read_model(self, structure_id, model_id, line_counter, previous):
+        """Build the model in the atom_site columns, or reuse its atoms (PRIVATE).
+
+        Returns the Model and the data needed to reuse its Atom objects for
+        the next model.
+        """
+        mmcif_dict = self._mmcif_dict
+        identity = [mmcif_dict.get(key) for key in _atom_site_identity_keys]
+        if previous is not None:
+            model, arrays, rows, serials, previous_identity, disordered = previous
+            if model.get_atom_arrays() is arrays and identity == previous_identity:
+                try:
+                    values = _get_atom_site_values(mmcif_dict)
+                    if mmcif_dict["_atom_site.id"] != serials:
+                        serial_numbers = [int(n) for n in mmcif_dict["_atom_site.id"]]
+                except (KeyError, ValueError):
+                    values = None
+                else:
+                    # the same altlocs of disordered atoms must be selected
+                    # by their occupancy
+                    occupancy = values[2]
+                    if not numpy.array_equal(
+                        occupancy[disordered[0]], disordered[1], equal_nan=True
+                    ):
+                        values = None
+                if values is not None:
+                    # same atoms as in the previous model; store the new values
+                    serial_num, coord, occupancy, bfactor = values
+                    arrays.coord = coord[rows]
+                    arrays.occupancy = occupancy[rows]
+                    arrays.bfactor = bfactor[rows]
+                    if mmcif_dict["_atom_site.id"] != serials:
+                        for atom, row in zip(arrays.atoms, rows):
+                            atom.serial_number = serial_numbers[row]
+                        serials = mmcif_dict["_atom_site.id"]
+                    model.id = model_id
+                    model.serial_num = serial_num
+                    return model, (model, arrays, rows, serials, identity, disordered)
+        try:
+            values = _get_atom_site_values(mmcif_dict)
+        except (KeyError, ValueError):
+            values = None
+        else:
+            n = len(values[1])
+            if n < 2 ** 24:
+                # Build the model with the row number of each atom as its x
+                # coordinate, to find the row of each atom in the AtomArrays
+                x = mmcif_dict["_atom_site.Cartn_x"]
+                mmcif_dict["_atom_site.Cartn_x"] = range(n)
+            else:
+                values = None
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                self._build_structure(structure_id, line_counter)
+        finally:
+            if values is not None:
+                mmcif_dict["_atom_site.Cartn_x"] = x
+        for warning in caught:
+            warnings.warn_explicit(
+                warning.message, warning.category, warning.filename, warning.lineno
+            )
+        if self.header is None:
+            self._structure_builder.set_header(self._get_header())
+        else:
+            self._structure_builder.set_header(self.header)
+        model = self._structure_builder.get_structure().child_list[0]
+        model.id = model_id
+        if values is None:
+            return model, None
+        serial_num, coord, occupancy, bfactor = values
+        arrays = model.get_atom_arrays()
+        rows = arrays.coord[:, 0].astype(numpy.intp)
+        arrays.coord = coord[rows]
+        serials = mmcif_dict["_atom_site.id"]
+        # the rows and occupancies of the alternative locations of atoms
+        disordered = [atom.is_disordered() for atom in arrays.atoms]
+        disordered = rows[numpy.array(disordered, bool)]
+        disordered = (disordered, occupancy[disordered])
+        if caught:
+            # the next model must be built again to issue the same warnings
+            return model, None
+        return model, (model, arrays, rows, serials, identity, disordered)
+
     def _mmcif_get(self, key, dict, deflt):
         if key in dict:
             rslt = dict[key][0]
@@ -122,7 +282,7 @@ class MMCIFParser:
 
         return self.header
 
-    def _build_structure(self, structure_id):
+    def _build_structure(self, structure_id, line_counter=0):
 
         # two special chars as placeholders in the mmCIF format
         # for item values that cannot be explicitly assigned
@@ -187,7 +347,7 @@ class MMCIFParser:
 
             # set the line_counter for 'ATOM' lines only and not
             # as a global line counter found in the PDBParser()
-            structure_builder.set_line_counter(i)
+            structure_builder.set_line_counter(line_counter + i)
 
             # Try coercing serial to int, for compatibility with PDBParser
             # But do not quit if it fails. mmCIF format specs allow strings.
@@ -542,3 +702,123 @@ class FastMMCIFParser:
                 mapped_anisou = [float(_) for _ in u]
                 anisou_array = numpy.array(mapped_anisou, "f")
                 structure_builder.set_anisou(anisou_array)
+
+
+# The columns of the atom_site table defining the atoms of a model
+_atom_site_identity_keys = (
+    "_atom_site.group_PDB",
+    "_atom_site.type_symbol",
+    "_atom_site.label_atom_id",
+    "_atom_site.label_alt_id",
+    "_atom_site.label_comp_id",
+    "_atom_site.label_seq_id",
+    "_atom_site.auth_seq_id",
+    "_atom_site.auth_asym_id",
+    "_atom_site.pdbx_PDB_ins_code",
+)
+
+
+def _get_atom_site_values(mmcif_dict):
+    """Return the values of the atoms in the atom_site columns as arrays (PRIVATE).
+
+    Returns the model serial number, and the coordinates, occupancies and
+    B factors of the atoms. Raises a ValueError for invalid numbers.
+    """
+    try:
+        serial_num = int(mmcif_dict["_atom_site.pdbx_PDB_model_num"][0])
+    except KeyError:
+        serial_num = None
+    coord = numpy.array(
+        (
+            mmcif_dict["_atom_site.Cartn_x"],
+            mmcif_dict["_atom_site.Cartn_y"],
+            mmcif_dict["_atom_site.Cartn_z"],
+        ),
+        float,
+    )
+    coord = coord.transpose().astype("f")
+    occupancy = numpy.array(mmcif_dict["_atom_site.occupancy"], float)
+    bfactor = numpy.array(mmcif_dict["_atom_site.B_iso_or_equiv"], float)
+    return serial_num, coord, occupancy, bfactor
+
+
+class _AtomSiteReader(MMCIF2Dict):
+    """Read the atom_site table of a mmCIF file one row at a time (PRIVATE).
+
+    The data items before the atom_site table are stored in the dictionary
+    as by MMCIF2Dict, and the file is not read beyond the table.
+    """
+
+    def __init__(self, handle):
+        """Initialize the reader with an open text mode file handle."""
+        self.handle = handle
+        self.atom_site_keys = []
+
+    def read_rows(self):
+        """Yield the rows of the atom_site table as lists of values."""
+        lines = self._tokenize(self.handle)
+        for tokens, values_only in lines:
+            if tokens:
+                break
+        else:
+            return
+        token = tokens.pop(0)
+        self[token[0:5]] = token[5:]
+        keys = self.atom_site_keys
+        loop_flag = False
+        atom_site = False
+        key = None
+        row = []
+        i = 0
+        n = 0
+        for tokens, values_only in chain([(tokens, False)], lines):
+            if atom_site and values_only and not row and len(tokens) == n:
+                # a complete row on a single line
+                yield tokens
+                i += n
+                continue
+            for token in tokens:
+                if token.lower() == "loop_":
+                    if atom_site:
+                        return
+                    loop_flag = True
+                    loop_keys = []
+                    i = 0
+                    n = 0
+                    continue
+                elif loop_flag:
+                    # see MMCIF2Dict for the check of the column
+                    if token.startswith("_") and (n == 0 or i % n == 0):
+                        if i > 0:
+                            if atom_site:
+                                return
+                            loop_flag = False
+                        else:
+                            if token.startswith("_atom_site."):
+                                atom_site = True
+                                keys.append(token)
+                            else:
+                                self[token] = []
+                            loop_keys.append(token)
+                            n += 1
+                            continue
+                    elif atom_site:
+                        row.append(token)
+                        if len(row) == n:
+                            yield row
+                            row = []
+                        i += 1
+                        continue
+                    else:
+                        self[loop_keys[i % n]].append(token)
+                        i += 1
+                        continue
+                if key is None:
+                    key = token
+                else:
+                    self[key] = [token]
+                    key = None
+        if not atom_site and "_atom_site.id" in self:
+            # a single atom, not stored in a loop
+            keys.extend(key for key in self if key.startswith("_atom_site."))
+            yield [self.pop(key)[0] for key in keys]
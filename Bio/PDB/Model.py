@@ -5,7 +5,7 @@
 
 """Model class, used in Structure objects."""
 
-from Bio.PDB.Entity import Entity
+from Bio.PDB.Entity import Entity, AtomArrays
 from Bio.PDB.internal_coords import IC_Chain
 
 
@@ -51,6 +51,50 @@ class Model(Entity):
         for r in self.get_residues():
             yield from r
 
+    def get_atom_arrays(self):
+        """Return an AtomArrays object with the data of all atoms in the model.
+
+        The coordinates, B factors, occupancies and elements of the atoms are
+        stored in contiguous NumPy arrays, with one row for each atom,
+        including each alternative location of disordered atoms:
+
+        >>> from Bio.PDB.PDBParser import PDBParser
+        >>> parser = PDBParser()
+        >>> structure = parser.get_structure("example", "PDB/1A8O.pdb")
+        >>> model = structure[0]
+        >>> arrays = model.get_atom_arrays()
+        >>> arrays.coord.shape
+        (644, 3)
+        >>> index = [atom.get_full_id() for atom in arrays.atoms].index(
+        ...     ("example", 0, "A", (" ", 152, " "), ("CA", " "))
+        ... )
+        >>> atom = arrays.atoms[index]
+        >>> atom is model["A"][152]["CA"]
+        True
+        >>> print("%.3f %.3f %.3f" % tuple(arrays.coord[index]))
+        21.835 36.306 28.144
+
+        The Atom objects use these arrays to store their data, so changing the
+        arrays changes the atoms, and vice versa:
+
+        >>> arrays.coord -= arrays.coord.mean(0)
+        >>> atom.coord is not None
+        True
+        >>> print("%.3f" % abs(model.center_of_mass(geometric=True)).max())
+        0.000
+
+        The arrays are created again if atoms are added or removed.
+        """
+        arrays = self._atom_arrays
+        if arrays is None:
+            atoms = []
+            for chain in self.child_list:
+                for residue in chain.get_unpacked_list():
+                    atoms.extend(residue.get_unpacked_list())
+            arrays = AtomArrays(atoms)
+            self._atom_arrays = arrays
+        return arrays
+
     def atom_to_internal_coordinates(self, verbose: bool = False) -> None:
         """Create/update internal coordinates from Atom X,Y,Z coordinates.
 
@@ -11,6 +11,7 @@
 
 import numpy
 
+from Bio.PDB.Atom import _get_coords
 from Bio.PDB.PDBExceptions import PDBException
 from Bio.PDB.Selection import unfold_entities, entity_levels, uniqueify
 
@@ -41,10 +42,8 @@ class NeighborSearch:
         from Bio.PDB.kdtrees import KDTree
 
         self.atom_list = atom_list
-        # get the coordinates
-        coord_list = [a.get_coord() for a in atom_list]
-        # to Nx3 array of type float
-        self.coords = numpy.array(coord_list, dtype="d")
+        # get the coordinates as an Nx3 array of type float
+        self.coords = numpy.array(_get_coords(atom_list), dtype="d")
         assert bucket_size > 1
         assert self.coords.shape[1] == 3
         self.kdt = KDTree(self.coords, bucket_size)
@@ -6,8 +6,11 @@
 """Parser for PDB files."""
 
 
+import gc
 import warnings
 
+from bisect import bisect_left
+
 try:
     import numpy
 except ImportError:
@@ -23,6 +26,9 @@ from Bio.PDB.PDBExceptions import PDBConstructionException
 from Bio.PDB.PDBExceptions import PDBConstructionWarning
 
 from Bio.PDB.StructureBuilder import StructureBuilder
+from Bio.PDB.Atom import Atom
+from Bio.PDB.Entity import AtomArrays
+from Bio.PDB.Residue import Residue
 from Bio.PDB.parse_pdb_header import _parse_pdb_header_list
 
 
@@ -105,6 +111,85 @@ class PDBParser:
 
         return structure
 
+    def iter_models(self, file, id=None):
+        """Iterate over the models in the PDB file, creating one at a time.
+
+        The file is read one model at a time, so files with many models (such
+        as trajectories of molecular dynamics simulations) can be processed
+        without storing all models in memory. The first model is parsed as
+        usual. If the ATOM and HETATM records of the next model only differ
+        from those of the previous one in the coordinates, occupancies and B
+        factors, the same Model object is yielded again, with the new values
+        stored in its AtomArrays (see Model.get_atom_arrays). Otherwise, and if
+        the occupancies of disordered atoms change or the previous model gave
+        any warnings other than for negative occupancies, a new Model is
+        created. The model ids are 0, 1, 2, ... as with get_structure.
+
+        >>> from Bio.PDB.PDBParser import PDBParser
+        >>> parser = PDBParser(QUIET=True)
+        >>> for model in parser.iter_models("PDB/1LCD.pdb"):
+        ...     print(model.id, model.serial_num, len(model.get_atom_arrays()))
+        0 1 1137
+        1 2 1125
+        2 3 1122
+
+        (The models of this NMR structure have different water molecules, so
+        each of them is created anew.) As the Model object may be reused, keep
+        a copy (model.copy()) of any model that is needed after the next one
+        has been read.
+
+        Arguments:
+         - file - name of the PDB file OR an open filehandle
+         - id - the id of the Structure objects containing the models
+
+        """
+        self.header = None
+        self.trailer = None
+        with as_handle(file) as handle:
+            lines = []
+            for line in handle:
+                lines.append(line)
+                if line[0:6] in ("ATOM  ", "HETATM", "MODEL "):
+                    break
+            if not lines:
+                raise ValueError("Empty file.")
+            self.header, frame = self._get_header(lines)
+            model_id = 0
+            previous = None
+            while frame is not None:
+                # collect the lines of the next model
+                next_frame = None
+                has_model = any(
+                    line[0:6] in ("ATOM  ", "HETATM", "MODEL ") for line in frame
+                )
+                for line in handle:
+                    record_type = line[0:6]
+                    if record_type == "END   " or record_type == "CONECT":
+                        self.trailer = [line]
+                        self.trailer.extend(handle)
+                        break
+                    elif record_type == "MODEL " and has_model:
+                        next_frame = [line]
+                        break
+                    frame.append(line)
+                    if record_type == "ATOM  " or record_type == "HETATM":
+                        has_model = True
+                    elif record_type == "ENDMDL":
+                        next_frame = []
+                        break
+                with warnings.catch_warnings():
+                    if self.QUIET:
+                        warnings.filterwarnings(
+                            "ignore", category=PDBConstructionWarning
+                        )
+                    model, previous = self._read_model(id, frame, model_id, previous)
+                if model is not None:
+                    yield model
+                    model_id += 1
+                frame = next_frame
+        if self.trailer is None:
+            self.trailer = []
+
     def get_header(self):
         """Return the header."""
         return self.header
@@ -403,6 +488,137 @@ class PDBParser:
         self.line_counter = self.line_counter + local_line_counter
         return []
 
+    def _read_model(self, id, lines, model_id, previous):
+        """Read the lines of one model in the coordinate section (PRIVATE).
+
+        Returns the Model, or None if the lines do not contain any model, and
+        the data needed to reuse its Atom objects for the next model.
+        """
+        frame = self._read_frame(lines)
+        if frame is not None and previous is not None:
+            identity, coord, occupancy, bfactor, serial_num = frame
+            model, arrays, rows, previous_identity, disordered = previous
+            if (
+                model.get_atom_arrays() is arrays
+                and numpy.array_equal(identity, previous_identity)
+                and (
+                    self.is_pqr
+                    or numpy.array_equal(occupancy[disordered[0]], disordered[1])
+                )
+            ):
+                # same atoms as in the previous model, and the same altlocs of
+                # disordered atoms are selected by occupancy; store the values
+                arrays.coord = coord[rows]
+                if not self.is_pqr:
+                    arrays.occupancy = occupancy[rows]
+                    arrays.bfactor = bfactor[rows]
+                    # as in _parse_coordinates, warn for each atom
+                    for i in range(numpy.count_nonzero(occupancy < 0)):
+                        warnings.warn(
+                            "Negative occupancy in one or more atoms",
+                            PDBConstructionWarning,
+                        )
+                model.id = model_id
+                if serial_num is None:
+                    model.serial_num = model_id
+                else:
+                    model.serial_num = serial_num
+                self.line_counter += sum(1 for line in lines if line.strip())
+                return model, previous
+        structure_builder = self.structure_builder
+        structure_builder.init_structure(id)
+        if frame is not None and len(frame[1]) < 2 ** 24:
+            # Parse the model with the row number of each atom as its x
+            # coordinate, to find the row of each atom in the AtomArrays
+            row_numbers = iter(range(len(frame[1])))
+            lines = [
+                "%s%8d%s" % (line[:30], next(row_numbers), line[38:])
+                if line[0:6] in ("ATOM  ", "HETATM")
+                else line
+                for line in lines
+            ]
+        else:
+            frame = None
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self._parse_coordinates(lines)
+        for warning in caught:
+            warnings.warn_explicit(
+                warning.message, warning.category, warning.filename, warning.lineno
+            )
+        structure_builder.set_header(self.header)
+        structure = structure_builder.get_structure()
+        if len(structure) == 0:
+            return None, previous
+        model = structure.child_list[0]
+        model.id = model_id
+        if not any(line[0:6] == "MODEL " for line in lines):
+            # as in get_structure, the serial number is then the model id
+            model.serial_num = model_id
+        if frame is None:
+            return model, None
+        identity, coord, occupancy, bfactor, serial_num = frame
+        arrays = model.get_atom_arrays()
+        rows = arrays.coord[:, 0].astype(numpy.intp)
+        arrays.coord = coord[rows]
+        # the rows and occupancies of the alternative locations of atoms
+        disordered = [atom.is_disordered() for atom in arrays.atoms]
+        disordered = rows[numpy.array(disordered, bool)]
+        if not self.is_pqr:
+            disordered = (disordered, occupancy[disordered])
+        if any(
+            str(warning.message) != "Negative occupancy in one or more atoms"
+            for warning in caught
+        ):
+            # the next model must be built again to issue the same warnings
+            return model, None
+        return model, (model, arrays, rows, identity, disordered)
+
+    def _read_frame(self, lines):
+        """Read the atomic records of one model in bulk (PRIVATE).
+
+        Returns the columns identifying the atoms (all columns of the ATOM and
+        HETATM records except for the coordinates, and for the occupancy and
+        B factor in PDB files), the coordinates, occupancies, B factors, and
+        the model serial number. Returns None if the lines contain any other
+        records than ATOM, HETATM, MODEL, ENDMDL and TER, or invalid numbers.
+        """
+        atom_lines = []
+        serial_num = None
+        for line in lines:
+            record_type = line[0:6]
+            if record_type == "ATOM  " or record_type == "HETATM":
+                atom_lines.append(line)
+            elif record_type == "MODEL ":
+                try:
+                    serial_num = int(line[10:14])
+                except ValueError:
+                    return None
+            elif record_type not in ("ENDMDL", "TER   ") and line.strip():
+                return None
+        if not atom_lines:
+            return None
+        try:
+            chars = numpy.array(atom_lines, "S80")
+        except UnicodeEncodeError:
+            return None
+        chars = chars.view(numpy.uint8).reshape(-1, 80)
+        chars[chars == 0] = 32
+        chars[chars == 10] = 32
+        n = len(chars)
+        try:
+            coord = _get_column(chars, 30, 54, "S8").astype("f").reshape(n, 3)
+            if self.is_pqr:
+                occupancy = bfactor = None
+                identity = numpy.hstack((chars[:, :30], chars[:, 54:]))
+            else:
+                occupancy = _get_column(chars, 54, 60).astype(float)
+                bfactor = _get_column(chars, 60, 66).astype(float)
+                identity = numpy.hstack((chars[:, :30], chars[:, 66:]))
+        except ValueError:
+            return None
+        return identity, coord, occupancy, bfactor, serial_num
+
     def _handle_PDB_exception(self, message, line_counter):
         """Handle exception (PRIVATE).
 
@@ -423,3 +639,497 @@ class PDBParser:
         else:
             # exceptions are fatal - raise again with new message (including line nr)
             raise PDBConstructionException(message) from None
+
+
+class FastPDBParser(PDBParser):
+    """Parse a PDB file, reading the atomic records in bulk with NumPy.
+
+    The ATOM, HETATM and ANISOU records are read as fixed-width columns into
+    NumPy arrays, and the Atom objects of each residue are created together.
+    The coordinates, B factors, occupancies and elements are stored directly
+    in the AtomArrays object of each Model (see Model.get_atom_arrays). Use
+    get_coordinates to read only the coordinates, without creating a
+    Structure object at all.
+
+    Files that cannot be read in bulk (for example with SIGATM or SIGUIJ
+    records, or with invalid numbers in the atomic records) are parsed with
+    the regular PDBParser code instead, so the result is the same as with
+    PDBParser, only faster.
+    """
+
+    def __init__(self, PERMISSIVE=True, QUIET=False):
+        """Create a FastPDBParser object.
+
+        Arguments:
+         - PERMISSIVE - Evaluated as a Boolean. If false, exceptions in
+           constructing the SMCRA data structure are fatal. If true (DEFAULT),
+           the exceptions are caught, but some residues or atoms will be missing.
+         - QUIET - Evaluated as a Boolean. If true, warnings issued in constructing
+           the SMCRA data will be suppressed. If false (DEFAULT), they will be shown.
+
+        """
+        super().__init__(PERMISSIVE=PERMISSIVE, QUIET=QUIET)
+
+    # Public methods
+
+    def get_structure(self, id, file):
+        """Return the structure.
+
+        Arguments:
+         - id - string, the id that will be used for the structure
+         - file - name of the PDB file OR an open filehandle
+
+        """
+        with warnings.catch_warnings():
+            if self.QUIET:
+                warnings.filterwarnings("ignore", category=PDBConstructionWarning)
+
+            self.header = None
+            self.trailer = None
+            self.structure_builder.init_structure(id)
+
+            with as_handle(file) as handle:
+                lines = handle.readlines()
+            if not lines:
+                raise ValueError("Empty file.")
+            self.header, coords_trailer = self._get_header(lines)
+            atoms = self._read_atoms(coords_trailer)
+            if atoms is None:
+                # use the regular parser
+                self.trailer = self._parse_coordinates(coords_trailer)
+            else:
+                # Creating many objects at once triggers the cyclic garbage
+                # collector repeatedly, while none of them can be freed yet
+                gc_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    self._build_structure(atoms)
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+                self.trailer = atoms["trailer"]
+                self.line_counter += atoms["line_count"]
+
+            self.structure_builder.set_header(self.header)
+            structure = self.structure_builder.get_structure()
+
+        return structure
+
+    def get_coordinates(self, file):
+        """Return the atomic coordinates of each model as NumPy arrays.
+
+        Only the ATOM and HETATM records are read; no Structure, Atom or other
+        objects are created. Returns a list with an array of shape (N, 3) for
+        each model in the file, with one row for each ATOM or HETATM record
+        (so each alternative location of a disordered atom has its own row).
+
+        >>> from Bio.PDB.PDBParser import FastPDBParser
+        >>> parser = FastPDBParser()
+        >>> models = parser.get_coordinates("PDB/1LCD.pdb")
+        >>> len(models)
+        3
+        >>> models[0].shape
+        (1137, 3)
+        >>> print("%.3f %.3f %.3f" % tuple(models[0][0]))
+        8.090 29.550 48.440
+
+        Arguments:
+         - file - name of the PDB file OR an open filehandle
+
+        """
+        with as_handle(file) as handle:
+            lines = handle.readlines()
+        if not lines:
+            raise ValueError("Empty file.")
+        for i, line in enumerate(lines):
+            if line[0:6] in ("ATOM  ", "HETATM", "MODEL "):
+                break
+        self.line_counter = i
+        with warnings.catch_warnings():
+            # warnings about the records would not affect the coordinates
+            warnings.simplefilter("ignore", PDBConstructionWarning)
+            atoms = self._read_atoms(lines[i:], coordinates_only=True)
+        coord = atoms["coord"]
+        return [
+            coord[start:end]
+            for model_id, serial_num, line, start, end in atoms["models"]
+        ]
+
+    # Private methods
+
+    def _read_atoms(self, coords_trailer, coordinates_only=False):
+        """Read the atomic records into NumPy arrays (PRIVATE).
+
+        Returns a dictionary with the columns of the ATOM and HETATM records
+        as arrays, the models as (model id, serial number, line number, start,
+        end) lists with the rows of each model, the number of lines in the
+        coordinate section, and the trailer. Returns None if the records cannot
+        be read in bulk.
+        """
+        width = 80
+        try:
+            lines = numpy.array(coords_trailer, "S%d" % width)
+        except UnicodeEncodeError:
+            if not coordinates_only:
+                return None
+            coords_trailer = [
+                line.encode("ascii", "replace").decode() for line in coords_trailer
+            ]
+            lines = numpy.array(coords_trailer, "S%d" % width)
+        records = lines.astype("S6")
+        is_atom = (records == b"ATOM  ") | (records == b"HETATM")
+        is_anisou = records == b"ANISOU"
+        is_end = (records == b"END   ") | (records == b"CONECT")
+        indices = numpy.flatnonzero(is_end)
+        if len(indices) > 0:
+            end = indices[0]
+        else:
+            end = len(lines)
+        atom_lines = numpy.flatnonzero(is_atom[:end])
+        anisou_lines = numpy.flatnonzero(is_anisou[:end])
+        # all other lines in the coordinate section are handled one by one
+        other_lines = numpy.flatnonzero(~(is_atom | is_anisou)[:end])
+        allowed_records = {b"TER   ", b"MASTER"}
+        # line number of each line in the coordinate section; empty lines are
+        # not counted (as by PDBParser._parse_coordinates)
+        empty_lines = []
+        messages = []
+        models = []
+        model_id = 0
+        model_open = False
+        start = 0
+        for index in other_lines:
+            line = coords_trailer[index].rstrip("\n")
+            if not line.strip():
+                empty_lines.append(index)
+                continue
+            record_type = records[index]
+            if record_type in (b"MODEL ", b"ENDMDL"):
+                row = numpy.searchsorted(atom_lines, index)
+                if row > start and not model_open:
+                    # there was no explicit MODEL record
+                    models.append([model_id, None, None, start])
+                    model_id += 1
+                start = row
+                if record_type == b"MODEL ":
+                    line_number = self._get_line_number(index, empty_lines)
+                    try:
+                        serial_num = int(line[10:14])
+                    except Exception:
+                        # reported when the model is created
+                        serial_num = None
+                    models.append([model_id, serial_num, line_number, row])
+                    model_id += 1
+                    model_open = True
+                else:
+                    model_open = False
+            elif record_type in (b"SIGATM", b"SIGUIJ"):
+                if not coordinates_only:
+                    return None
+            elif record_type not in allowed_records:
+                line_number = self._get_line_number(index, empty_lines)
+                message = "Ignoring unrecognized record '{}' at line {}".format(
+                    line[0:6], line_number
+                )
+                messages.append((line_number, message))
+        n = len(atom_lines)
+        if n > start and not model_open:
+            models.append([model_id, None, None, start])
+        for i, model in enumerate(models[:-1]):
+            model.append(models[i + 1][3])
+        if models:
+            models[-1].append(n)
+        # The atomic records as an array of characters, with one row per atom
+        chars = lines[atom_lines].view(numpy.uint8).reshape(n, width)
+        chars[chars == 10] = 0
+        if not coordinates_only:
+            # the segment identifier is not padded if the line is shorter
+            segid = _get_column(chars, 72, 76).astype("U")
+        chars[chars == 0] = 32
+        try:
+            coord = _get_column(chars, 30, 54, "S8").astype("f").reshape(n, 3)
+        except ValueError:
+            if coordinates_only:
+                for index in atom_lines:
+                    line = coords_trailer[index]
+                    try:
+                        float(line[30:38]), float(line[38:46]), float(line[46:54])
+                    except Exception:
+                        break
+                raise PDBConstructionException(
+                    "Invalid or missing coordinate(s) at line %i."
+                    % self._get_line_number(index, empty_lines)
+                ) from None
+            return None
+        # the number of lines in the coordinate section, and the trailer
+        # starting at the END or CONECT record, if any (as returned by
+        # _parse_coordinates, which does not count empty lines)
+        line_count = int(end) - len(empty_lines)
+        if end < len(lines):
+            trailer = coords_trailer[line_count:]
+        else:
+            trailer = []
+        atoms = {
+            "coord": coord,
+            "models": models,
+            "line_count": line_count,
+            "trailer": trailer,
+        }
+        if coordinates_only:
+            return atoms
+        try:
+            occupancy = _get_column(chars, 54, 60).astype(float)
+            bfactor = _get_column(chars, 60, 66).astype(float)
+            resseq = _get_column(chars, 22, 26).astype(int)
+        except ValueError:
+            return None
+        try:
+            serial_number = _get_column(chars, 6, 11).astype(int).tolist()
+        except ValueError:
+            serial_number = []
+            for value in _get_column(chars, 6, 11):
+                try:
+                    serial_number.append(int(value))
+                except Exception:
+                    serial_number.append(0)
+        if len(anisou_lines) > 0:
+            rows = numpy.searchsorted(atom_lines, anisou_lines) - 1
+            if rows[0] < 0:
+                return None
+            values = lines[anisou_lines].view(numpy.uint8).reshape(-1, width)
+            values[values == 0] = 32
+            values[values == 10] = 32
+            try:
+                values = [
+                    _get_column(values, start, end).astype(float)
+                    for start, end in (
+                        (28, 35),
+                        (35, 42),
+                        (43, 49),
+                        (49, 56),
+                        (56, 63),
+                        (63, 70),
+                    )
+                ]
+            except ValueError:
+                return None
+            # U's are scaled by 10^4
+            values = (numpy.array(values, "f").transpose() / 10000.0).astype("f")
+            anisou = dict(zip(rows.tolist(), values))
+        else:
+            anisou = {}
+        line_number = (
+            atom_lines
+            - numpy.searchsorted(numpy.array(empty_lines, int), atom_lines)
+            + self.line_counter
+            + 1
+        )
+        # PDBParser warns for each atom with a negative occupancy, before any
+        # other warnings about the same line
+        message = "Negative occupancy in one or more atoms"
+        for number in line_number[occupancy < 0].tolist():
+            messages.append((number - 0.5, message))
+        messages.sort()
+        atoms["anisou"] = anisou
+        atoms["occupancy"] = occupancy
+        atoms["bfactor"] = bfactor
+        atoms["resseq"] = resseq
+        atoms["serial_number"] = serial_number
+        atoms["line_number"] = line_number
+        # warnings are issued while the structure is built, in the order of
+        # the lines in the file
+        atoms["messages"] = messages
+        atoms["record_type"] = records[atom_lines]
+        atoms["segid"] = segid
+        for key, first, last in (
+            ("fullname", 12, 16),
+            ("altloc", 16, 17),
+            ("resname", 17, 20),
+            ("chainid", 21, 22),
+            ("icode", 26, 27),
+            ("element", 76, 78),
+        ):
+            atoms[key] = _get_column(chars, first, last).astype("U")
+        return atoms
+
+    def _get_line_number(self, index, empty_lines):
+        """Return the line number of a line in the coordinate section (PRIVATE).
+
+        The empty lines before it are not counted, as in _parse_coordinates.
+        """
+        return self.line_counter + index - bisect_left(empty_lines, index) + 1
+
+    def _build_structure(self, atoms):
+        """Create the models, chains, residues and atoms (PRIVATE)."""
+        structure_builder = self.structure_builder
+        coord = atoms["coord"]
+        occupancy = atoms["occupancy"]
+        bfactor = atoms["bfactor"]
+        serial_number = atoms["serial_number"]
+        anisou = atoms["anisou"]
+        line_number = atoms["line_number"].tolist()
+        # the coordinates of each atom as a view of the row of the array
+        coords = list(coord)
+        bfactors = bfactor.tolist()
+        occupancies = occupancy.tolist()
+        fullname = atoms["fullname"].tolist()
+        altloc = atoms["altloc"].tolist()
+        element = [symbol.strip().upper() for symbol in atoms["element"].tolist()]
+        name = []
+        for value in fullname:
+            split_list = value.split()
+            if len(split_list) == 1:
+                # atom name is like " CA ", so we can strip spaces
+                name.append(split_list[0])
+            else:
+                # atom name has internal spaces, e.g. " N B ", so
+                # we do not strip spaces
+                name.append(value)
+        chainid = atoms["chainid"]
+        icode = atoms["icode"]
+        resname = numpy.char.strip(atoms["resname"])
+        resseq = atoms["resseq"]
+        hetero_flag = numpy.full(len(coord), " ")
+        hetero_flag[atoms["record_type"] == b"HETATM"] = "H"
+        is_water = (resname == "HOH") | (resname == "WAT")
+        hetero_flag[(hetero_flag == "H") & is_water] = "W"
+        # rows where a new chain or a new residue starts
+        new_chain = numpy.ones(len(coord), bool)
+        new_chain[1:] = chainid[1:] != chainid[:-1]
+        new_residue = new_chain.copy()
+        new_residue[1:] |= (
+            (resseq[1:] != resseq[:-1])
+            | (icode[1:] != icode[:-1])
+            | (hetero_flag[1:] != hetero_flag[:-1])
+            | (resname[1:] != resname[:-1])
+        )
+        messages = atoms["messages"][::-1]
+        next_line = _warn(messages, 0)
+        for model_id, serial_num, line, start, end in atoms["models"]:
+            if line is not None and line > next_line:
+                next_line = _warn(messages, line)
+            if serial_num is None and line is not None:
+                self._handle_PDB_exception(
+                    "Invalid or missing model serial number", line
+                )
+                serial_num = 0
+            structure_builder.init_model(model_id, serial_num)
+            model = structure_builder.model
+            if start < end:
+                new_chain[start] = True
+                new_residue[start] = True
+            boundaries = numpy.flatnonzero(new_residue[start:end]) + start
+            boundaries = numpy.append(boundaries, end).tolist()
+            chain_ids = chainid[start:end].tolist()
+            segids = atoms["segid"][start:end].tolist()
+            resnames = resname[start:end].tolist()
+            hetero_flags = hetero_flag[start:end].tolist()
+            resseqs = resseq[start:end].tolist()
+            icodes = icode[start:end].tolist()
+            model_atoms = []
+            for i, j in zip(boundaries[:-1], boundaries[1:]):
+                if line_number[i] > next_line:
+                    next_line = _warn(messages, line_number[i])
+                structure_builder.set_line_counter(line_number[i])
+                if new_chain[i]:
+                    structure_builder.init_chain(chain_ids[i - start])
+                structure_builder.init_seg(segids[i - start])
+                try:
+                    structure_builder.init_residue(
+                        resnames[i - start],
+                        hetero_flags[i - start],
+                        resseqs[i - start],
+                        icodes[i - start],
+                    )
+                except PDBConstructionException as message:
+                    self._handle_PDB_exception(message, line_number[i])
+                residue = structure_builder.residue
+                names = name[i:j]
+                if (
+                    model_atoms is not None
+                    and type(residue) is Residue
+                    and not residue.child_list
+                    and altloc[i:j].count(" ") == j - i
+                    and len(set(names)) == j - i
+                ):
+                    # all atoms can be added to the new residue together
+                    residue_full_id = residue.get_full_id()
+                    residue_atoms = []
+                    for k in range(i, j):
+                        if line_number[k] > next_line:
+                            next_line = _warn(messages, line_number[k])
+                        atom = Atom(
+                            name[k],
+                            coords[k],
+                            bfactors[k],
+                            occupancies[k],
+                            " ",
+                            fullname[k],
+                            serial_number[k],
+                            element[k],
+                        )
+                        atom.parent = residue
+                        atom.full_id = residue_full_id + ((name[k], " "),)
+                        if k in anisou:
+                            atom.set_anisou(anisou[k])
+                        residue_atoms.append(atom)
+                    residue.child_list.extend(residue_atoms)
+                    residue.child_dict.update(zip(names, residue_atoms))
+                    model_atoms.extend(residue_atoms)
+                else:
+                    # disordered or duplicate atoms; let the structure
+                    # builder deal with them one by one
+                    model_atoms = None
+                    for k in range(i, j):
+                        if line_number[k] > next_line:
+                            next_line = _warn(messages, line_number[k])
+                        structure_builder.set_line_counter(line_number[k])
+                        try:
+                            structure_builder.init_atom(
+                                name[k],
+                                coords[k],
+                                bfactors[k],
+                                occupancies[k],
+                                altloc[k],
+                                fullname[k],
+                                serial_number[k],
+                                element[k],
+                            )
+                        except PDBConstructionException as message:
+                            self._handle_PDB_exception(message, line_number[k])
+                        if k in anisou:
+                            structure_builder.set_anisou(anisou[k])
+            if model_atoms is not None:
+                # store the data of the atoms in arrays directly
+                model._atom_arrays = AtomArrays._from_arrays(
+                    model_atoms,
+                    coord[start:end],
+                    bfactor[start:end],
+                    occupancy[start:end],
+                    numpy.array([atom._element for atom in model_atoms], object),
+                )
+        _warn(messages, float("inf"))
+
+
+def _get_column(chars, start, end, dtype=None):
+    """Return columns of the records as an array of byte strings (PRIVATE).
+
+    The characters in columns start to end of each row are joined into one
+    byte string, or into several strings of the given dtype.
+    """
+    if dtype is None:
+        dtype = "S%d" % (end - start)
+    return numpy.ascontiguousarray(chars[:, start:end]).view(dtype).ravel()
+
+
+def _warn(messages, line_number):
+    """Issue the warnings for the lines before the given line number (PRIVATE).
+
+    The messages are (line number, message) tuples, in reverse order. Returns
+    the line number of the next message, or infinity if none is left.
+    """
+    while messages and messages[-1][0] < line_number:
+        warnings.warn(messages.pop()[1], PDBConstructionWarning)
+    if messages:
+        return messages[-1][0]
+    return float("inf")
@@ -138,6 +138,8 @@ class DisorderedResidue(DisorderedEntityWrapper):
         assert not self.disordered_has_id(resname)
         self[resname] = residue
         self.disordered_select(resname)
+        if chain is not None:
+            chain._invalidate_atom_arrays()
 
     def disordered_remove(self, resname):
         """Remove a child residue from the DisorderedResidue.
@@ -153,6 +155,9 @@ class DisorderedResidue(DisorderedEntityWrapper):
         # Detach
         del self.child_dict[resname]
         residue.detach_parent()
+        chain = self.get_parent()
+        if chain is not None:
+            chain._invalidate_atom_arrays()
 
         if is_selected and self.child_dict:  # pick another selected_child
             child = next(iter(self.child_dict))
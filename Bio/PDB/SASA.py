@@ -19,8 +19,11 @@ Reference:
 import collections
 import math
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
+from Bio.PDB.Atom import _get_coords
 from Bio.PDB.kdtrees import KDTree
 
 __all__ = ["ShrakeRupley"]
@@ -141,7 +144,91 @@ class ShrakeRupley:
 
         return coords
 
-    def compute(self, entity, level="A"):
+    def _count_accessible_points(self, coords, radii, threads):
+        """Return the number of accessible points on each atom (PRIVATE).
+
+        All pairs of overlapping atoms are found with a single neighbor search,
+        after which the sphere points buried inside a neighbor are found with
+        array operations on blocks of atoms. The points are tested exactly as
+        with a KDTree search around each neighbor, so the counts are the same.
+        """
+        n_atoms = len(coords)
+        n_points = self.n_points
+
+        # Find all pairs of overlapping atoms, in both directions
+        kdt = KDTree(coords, 10)
+        pairs = kdt.neighbor_search(np.max(radii) * 2)
+        first = np.array([pair.index1 for pair in pairs], dtype=np.intp)
+        second = np.array([pair.index2 for pair in pairs], dtype=np.intp)
+        distances = np.array([pair.radius for pair in pairs], dtype=np.float64)
+        overlap = distances < radii[first] + radii[second]
+        first, second = first[overlap], second[overlap]
+        neighbors_i = np.concatenate([first, second])
+        neighbors_j = np.concatenate([second, first])
+        order = np.argsort(neighbors_i, kind="stable")
+        neighbors_i = neighbors_i[order]
+        neighbors_j = neighbors_j[order]
+        offsets = np.searchsorted(neighbors_i, np.arange(n_atoms + 1))
+
+        # Scale the sphere with the same precision as sphere * radius, and
+        # store the x, y, and z coordinates separately for faster indexing
+        dtype = np.result_type(self._sphere, radii[0])
+        sphere = self._sphere.T.astype(dtype)
+        scaled_radii = radii.astype(dtype)
+        radii_sq = radii * radii
+        coords = coords.T.copy()
+
+        counts = np.full(n_atoms, n_points)
+
+        def count_block(start, end):
+            i = neighbors_i[offsets[start] : offsets[end]]
+            if len(i) == 0:
+                return
+            j = neighbors_j[offsets[start] : offsets[end]]
+            # Select the sphere points s of atom i that may be buried in atom j
+            # using |r_i * s - d| <= r_j, where d is the vector from atom i to
+            # atom j, with a margin for the rounding errors of the exact test
+            d = coords[:, j] - coords[:, i]
+            threshold = radii_sq[i] + np.sum(d * d, 0) - radii_sq[j] - 0.01
+            threshold /= 2 * radii[i]
+            rows, columns = np.nonzero(
+                np.dot(d.T, self._sphere.T) >= threshold[:, np.newaxis]
+            )
+            i = i[rows]
+            j = j[rows]
+            # Calculate the squared distances of these points to atom j
+            x, y, z = (
+                (sphere[k, columns] * scaled_radii[i] + coords[k, i]) - coords[k, j]
+                for k in range(3)
+            )
+            x *= x
+            y *= y
+            z *= z
+            x += y
+            x += z
+            buried = x <= radii_sq[j]
+            accessible = np.ones((end - start, n_points), bool)
+            accessible[i[buried] - start, columns[buried]] = False
+            counts[start:end] = np.count_nonzero(accessible, axis=1)
+
+        # Limit the size of the temporary arrays of each block
+        size = max(1, 2 ** 14 // n_points)
+        blocks = [
+            (start, min(start + size, n_atoms)) for start in range(0, n_atoms, size)
+        ]
+        if threads == 1 or len(blocks) < 2:
+            for start, end in blocks:
+                count_block(start, end)
+        else:
+            with ThreadPoolExecutor(threads) as executor:
+                futures = [
+                    executor.submit(count_block, start, end) for start, end in blocks
+                ]
+                for future in futures:
+                    future.result()
+        return counts
+
+    def compute(self, entity, level="A", threads=1):
         """Calculate surface accessibility surface area for an entity.
 
         The resulting atomic surface accessibility values are attached to the
@@ -158,6 +245,12 @@ class ShrakeRupley:
             values of its children. Defaults to "A".
         :type entity: Bio.PDB.Entity
 
+        :param threads: number of threads used to count the accessible points
+            of the atoms. The counting is done with NumPy array operations,
+            which release the Global Interpreter Lock, so blocks of atoms are
+            processed in parallel if threads is more than one. Defaults to 1.
+        :type threads: int
+
         Example:
         >>> from Bio.PDB import PDBParser
         >>> p = PDBParser(QUIET=1)
@@ -176,6 +269,9 @@ class ShrakeRupley:
                 "Must be Residue, Chain, Model, or Structure"
             )
 
+        if threads < 1:
+            raise ValueError(f"Number of threads must be at least 1: {threads}")
+
         if level not in _ENTITY_HIERARCHY:
             raise ValueError(f"Invalid level '{level}'. Must be A, R, C, M, or S.")
         elif _ENTITY_HIERARCHY[level] > _ENTITY_HIERARCHY[entity.level]:
@@ -191,52 +287,20 @@ class ShrakeRupley:
 
         # Get coordinates as a numpy array
         # We trust DisorderedAtom and friends to pick representatives.
-        coords = np.array([a.coord for a in atoms], dtype=np.float64)
-
-        # Pre-compute atom neighbors using KDTree
-        kdt = KDTree(coords, 10)
+        coords = np.array(_get_coords(atoms), dtype=np.float64)
 
         # Pre-compute radius * probe table
         radii_dict = self.radii_dict
         radii = np.array([radii_dict[a.element] for a in atoms], dtype=np.float64)
         radii += self.probe_radius
-        twice_maxradii = np.max(radii) * 2
-
-        # Calculate ASAs
-        asa_array = np.zeros((n_atoms, 1), dtype=np.int)
-        ptset = set(range(self.n_points))
-        for i in range(n_atoms):
-
-            r_i = radii[i]
-
-            # Move sphere to atom
-            s_on_i = (np.array(self._sphere, copy=True) * r_i) + coords[i]
-            available_set = ptset.copy()
-
-            # KDtree for sphere points
-            kdt_sphere = KDTree(s_on_i, 10)
-
-            # Iterate over neighbors of atom i
-            for jj in kdt.search(coords[i], twice_maxradii):
-                j = jj.index
-                if i == j:
-                    continue
-
-                if jj.radius < (r_i + radii[j]):
-                    # Remove overlapping points on sphere from available set
-                    available_set -= {
-                        pt.index for pt in kdt_sphere.search(coords[j], radii[j])
-                    }
-
-            asa_array[i] = len(available_set)  # update counts
 
-        # Convert accessible point count to surface area in A**2
-        f = radii * radii * (4 * np.pi / self.n_points)
-        asa_array = asa_array * f[:, np.newaxis]
+        # Calculate ASAs, converting accessible point counts to areas in A**2
+        counts = self._count_accessible_points(coords, radii, threads)
+        asa_array = counts * (radii * radii * (4 * np.pi / self.n_points))
 
         # Set atom .sasa
         for i, atom in enumerate(atoms):
-            atom.sasa = asa_array[i, 0]
+            atom.sasa = asa_array[i]
 
         # Aggregate values per entity level if necessary
         if level != "A":
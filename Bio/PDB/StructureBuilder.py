@@ -306,6 +306,9 @@ class StructureBuilder:
         # self.structure.sort()
         # Add the header dict
         self.structure.header = self.header
+        # store the atomic data of each model in contiguous arrays
+        for model in self.structure:
+            model.get_atom_arrays()
         return self.structure
 
     def set_symmetry(self, spacegroup, cell):
@@ -11,6 +11,7 @@
 import numpy
 
 from Bio.SVDSuperimposer import SVDSuperimposer
+from Bio.PDB.Atom import DisorderedAtom, _get_atom_rows, _get_coords
 from Bio.PDB.PDBExceptions import PDBException
 
 
@@ -34,12 +35,8 @@ class Superimposer:
         """
         if not len(fixed) == len(moving):
             raise PDBException("Fixed and moving atom lists differ in size")
-        length = len(fixed)
-        fixed_coord = numpy.zeros((length, 3))
-        moving_coord = numpy.zeros((length, 3))
-        for i in range(0, length):
-            fixed_coord[i] = fixed[i].get_coord()
-            moving_coord[i] = moving[i].get_coord()
+        fixed_coord = numpy.array(_get_coords(fixed), dtype="d")
+        moving_coord = numpy.array(_get_coords(moving), dtype="d")
         sup = SVDSuperimposer()
         sup.set(fixed_coord, moving_coord)
         sup.run()
@@ -53,5 +50,19 @@ class Superimposer:
         rot, tran = self.rotran
         rot = rot.astype("f")
         tran = tran.astype("f")
+        # transform all alternative locations of disordered atoms
+        atoms = []
         for atom in atom_list:
-            atom.transform(rot, tran)
+            if isinstance(atom, DisorderedAtom):
+                atoms.extend(atom.disordered_get_list())
+            else:
+                atoms.append(atom)
+        groups = _get_atom_rows(atoms)
+        if groups is not None and len(set(atoms)) == len(atoms):
+            # transform the coordinates in the atom arrays in one step
+            for arrays, positions, rows in groups:
+                coords = numpy.dot(arrays.coord[rows], rot) + tran
+                arrays._set_coords(rows, coords)
+        else:
+            for atom in atoms:
+                atom.transform(rot, tran)
@@ -24,6 +24,7 @@ Contributions by:
 
 # Get a Structure object from a PDB file
 from .PDBParser import PDBParser
+from .PDBParser import FastPDBParser
 
 from .MMCIFParser import MMCIFParser
 from .MMCIFParser import FastMMCIFParser
@@ -10,13 +10,27 @@
 This module contains a ``_BitString`` class to assist the consensus tree
 searching and some common consensus algorithms such as strict, majority rule and
 adam consensus.
+
+Internally, the clades are represented as Python integers used as bitsets of
+their terminals, with one bit for each taxon name. The first taxon has the
+highest bit, so that the integers are ordered in the same way as the
+equivalent ``_BitString`` objects.
 """
 
+import bisect
 import random
 import itertools
 
-from ast import literal_eval
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+
+import numpy
+
+from Bio.Align import MultipleSeqAlignment
 from Bio.Phylo import BaseTree
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
 
 
 class _BitString(str):
@@ -130,38 +144,38 @@ class _BitString(str):
             )
 
     def __and__(self, other):
-        selfint = literal_eval("0b" + self)
-        otherint = literal_eval("0b" + other)
+        selfint = int(self, 2)
+        otherint = int(other, 2)
         resultint = selfint & otherint
         return _BitString(bin(resultint)[2:].zfill(len(self)))
 
     def __or__(self, other):
-        selfint = literal_eval("0b" + self)
-        otherint = literal_eval("0b" + other)
+        selfint = int(self, 2)
+        otherint = int(other, 2)
         resultint = selfint | otherint
         return _BitString(bin(resultint)[2:].zfill(len(self)))
 
     def __xor__(self, other):
-        selfint = literal_eval("0b" + self)
-        otherint = literal_eval("0b" + other)
+        selfint = int(self, 2)
+        otherint = int(other, 2)
         resultint = selfint ^ otherint
         return _BitString(bin(resultint)[2:].zfill(len(self)))
 
     def __rand__(self, other):
-        selfint = literal_eval("0b" + self)
-        otherint = literal_eval("0b" + other)
+        selfint = int(self, 2)
+        otherint = int(other, 2)
         resultint = otherint & selfint
         return _BitString(bin(resultint)[2:].zfill(len(self)))
 
     def __ror__(self, other):
-        selfint = literal_eval("0b" + self)
-        otherint = literal_eval("0b" + other)
+        selfint = int(self, 2)
+        otherint = int(other, 2)
         resultint = otherint | selfint
         return _BitString(bin(resultint)[2:].zfill(len(self)))
 
     def __rxor__(self, other):
-        selfint = literal_eval("0b" + self)
-        otherint = literal_eval("0b" + other)
+        selfint = int(self, 2)
+        otherint = int(other, 2)
         resultint = otherint ^ selfint
         return _BitString(bin(resultint)[2:].zfill(len(self)))
 
@@ -231,43 +245,44 @@ def strict_consensus(trees):
     first_tree = next(trees_iter)
 
     terms = first_tree.get_terminals()
-    bitstr_counts, tree_count = _count_clades(itertools.chain([first_tree], trees_iter))
+    taxa = _taxon_bits([term.name for term in terms])
+    bits_counts, tree_count = _count_clade_bits(
+        itertools.chain([first_tree], trees_iter), taxa
+    )
 
-    # Store bitstrs for strict clades
-    strict_bitstrs = [
-        bitstr for bitstr, t in bitstr_counts.items() if t[0] == tree_count
-    ]
-    strict_bitstrs.sort(key=lambda bitstr: bitstr.count("1"), reverse=True)
+    # Store bitsets for strict clades
+    strict_bits = [bits for bits, t in bits_counts.items() if t[0] == tree_count]
+    strict_bits.sort(key=_bit_count, reverse=True)
     # Create root
     root = BaseTree.Clade()
-    if strict_bitstrs[0].count("1") == len(terms):
+    if _bit_count(strict_bits[0]) == len(terms):
         root.clades.extend(terms)
     else:
         raise ValueError("Taxons in provided trees should be consistent")
-    # make a bitstr to clades dict and store root clade
-    bitstr_clades = {strict_bitstrs[0]: root}
+    # make a bitset to clades dict and store root clade
+    bits_clades = {strict_bits[0]: root}
     # create inner clades
-    for bitstr in strict_bitstrs[1:]:
-        clade_terms = [terms[i] for i in bitstr.index_one()]
+    for bits in strict_bits[1:]:
+        clade_terms = [terms[i] for i in _bit_indices(bits, len(terms))]
         clade = BaseTree.Clade()
         clade.clades.extend(clade_terms)
-        for bs, c in bitstr_clades.items():
+        for bs, c in bits_clades.items():
             # check if it should be the parent of current clade
-            if bs.contains(bitstr):
-                # remove old bitstring
-                del bitstr_clades[bs]
+            if bs & bits == bits:
+                # remove old bitset
+                del bits_clades[bs]
                 # update clade childs
-                new_childs = [child for child in c.clades if child not in clade_terms]
-                c.clades = new_childs
+                clade_terms = set(clade_terms)
+                c.clades = [child for child in c.clades if child not in clade_terms]
                 # set current clade as child of c
                 c.clades.append(clade)
-                # update bitstring
-                bs = bs ^ bitstr
+                # update bitset
+                bs = bs ^ bits
                 # update clade
-                bitstr_clades[bs] = c
+                bits_clades[bs] = c
                 break
         # put new clade
-        bitstr_clades[bitstr] = clade
+        bits_clades[bits] = clade
     return BaseTree.Tree(root=root)
 
 
@@ -290,86 +305,88 @@ def majority_consensus(trees, cutoff=0):
     first_tree = next(tree_iter)
 
     terms = first_tree.get_terminals()
-    bitstr_counts, tree_count = _count_clades(itertools.chain([first_tree], tree_iter))
+    taxa = _taxon_bits([term.name for term in terms])
+    bits_counts, tree_count = _count_clade_bits(
+        itertools.chain([first_tree], tree_iter), taxa
+    )
 
-    # Sort bitstrs by descending #occurrences, then #tips, then tip order
-    bitstrs = sorted(
-        bitstr_counts.keys(),
-        key=lambda bitstr: (bitstr_counts[bitstr][0], bitstr.count("1"), str(bitstr)),
+    # Sort bitsets by descending #occurrences, then #tips, then tip order
+    all_bits = sorted(
+        bits_counts,
+        key=lambda bits: (bits_counts[bits][0], _bit_count(bits), bits),
         reverse=True,
     )
     root = BaseTree.Clade()
-    if bitstrs[0].count("1") == len(terms):
+    if _bit_count(all_bits[0]) == len(terms):
         root.clades.extend(terms)
     else:
         raise ValueError("Taxons in provided trees should be consistent")
-    # Make a bitstr-to-clades dict and store root clade
-    bitstr_clades = {bitstrs[0]: root}
+    # Make a bitset-to-clades dict and store root clade
+    bits_clades = {all_bits[0]: root}
+    # the accepted bitsets, by descending number of tips
+    bsckeys = [all_bits[0]]
+    sizes = [-len(terms)]
     # create inner clades
-    for bitstr in bitstrs[1:]:
+    for bits in all_bits[1:]:
         # apply majority rule
-        count_in_trees, branch_length_sum = bitstr_counts[bitstr]
+        count_in_trees, branch_length_sum = bits_counts[bits]
         confidence = 100.0 * count_in_trees / tree_count
         if confidence < cutoff * 100.0:
             break
-        clade_terms = [terms[i] for i in bitstr.index_one()]
+        clade_terms = [terms[i] for i in _bit_indices(bits, len(terms))]
         clade = BaseTree.Clade()
         clade.clades.extend(clade_terms)
         clade.confidence = confidence
         clade.branch_length = branch_length_sum / count_in_trees
-        bsckeys = sorted(bitstr_clades, key=lambda bs: bs.count("1"), reverse=True)
 
         # check if current clade is compatible with previous clades and
         # record its possible parent and child clades.
         compatible = True
-        parent_bitstr = None
-        child_bitstrs = []  # multiple independent childs
+        parent_bits = None
+        child_bits = []  # multiple independent childs
         for bs in bsckeys:
-            if not bs.iscompatible(bitstr):
+            common = bs & bits
+            if common and common != bits and common != bs:
                 compatible = False
                 break
             # assign the closest ancestor as its parent
             # as bsckeys is sorted, it should be the last one
-            if bs.contains(bitstr):
-                parent_bitstr = bs
+            if common == bits:
+                parent_bits = bs
             # assign the closest descendant as its child
             # the largest and independent clades
-            if (
-                bitstr.contains(bs)
-                and bs != bitstr
-                and all(c.independent(bs) for c in child_bitstrs)
-            ):
-                child_bitstrs.append(bs)
+            if common == bs and bs != bits and all(c & bs == 0 for c in child_bits):
+                child_bits.append(bs)
         if not compatible:
             continue
 
-        if parent_bitstr:
-            # insert current clade; remove old bitstring
-            parent_clade = bitstr_clades.pop(parent_bitstr)
+        if parent_bits:
+            # insert current clade
+            parent_clade = bits_clades[parent_bits]
             # update parent clade childs
+            clade_terms = set(clade_terms)
             parent_clade.clades = [
                 c for c in parent_clade.clades if c not in clade_terms
             ]
             # set current clade as child of parent_clade
             parent_clade.clades.append(clade)
-            # update bitstring
-            # parent = parent ^ bitstr
-            # update clade
-            bitstr_clades[parent_bitstr] = parent_clade
-
-        if child_bitstrs:
-            remove_list = []
-            for c in child_bitstrs:
-                remove_list.extend(c.index_one())
-                child_clade = bitstr_clades[c]
+
+        if child_bits:
+            remove_bits = 0
+            for c in child_bits:
+                remove_bits |= c
+                child_clade = bits_clades[c]
                 parent_clade.clades.remove(child_clade)
                 clade.clades.append(child_clade)
-            remove_terms = [terms[i] for i in remove_list]
+            remove_terms = {terms[i] for i in _bit_indices(remove_bits, len(terms))}
             clade.clades = [c for c in clade.clades if c not in remove_terms]
         # put new clade
-        bitstr_clades[bitstr] = clade
-        if (len(bitstr_clades) == len(terms) - 1) or (
-            len(bitstr_clades) == len(terms) - 2 and len(root.clades) == 3
+        bits_clades[bits] = clade
+        index = bisect.bisect_right(sizes, -_bit_count(bits))
+        sizes.insert(index, -_bit_count(bits))
+        bsckeys.insert(index, bits)
+        if (len(bits_clades) == len(terms) - 1) or (
+            len(bits_clades) == len(terms) - 2 and len(root.clades) == 3
         ):
             break
     return BaseTree.Tree(root=root)
@@ -395,40 +412,42 @@ def _part(clades):
     if len(terms) == 1 or len(terms) == 2:
         new_clade = clades[0]
     else:
-        bitstrs = {_BitString("1" * len(terms))}
+        taxa = _taxon_bits(term_names)
+        bitstrs = {(1 << len(terms)) - 1}
         for clade in clades:
             for child in clade.clades:
-                bitstr = _clade_to_bitstr(child, term_names)
+                bitstr = _clade_bits(child, taxa)[child]
                 to_remove = set()
                 to_add = set()
                 for bs in bitstrs:
+                    common = bs & bitstr
                     if bs == bitstr:
                         continue
-                    elif bs.contains(bitstr):
+                    elif common == bitstr:
                         to_add.add(bitstr)
                         to_add.add(bs ^ bitstr)
                         to_remove.add(bs)
-                    elif bitstr.contains(bs):
+                    elif common == bs:
                         to_add.add(bs ^ bitstr)
-                    elif not bs.independent(bitstr):
-                        to_add.add(bs & bitstr)
-                        to_add.add(bs & bitstr ^ bitstr)
-                        to_add.add(bs & bitstr ^ bs)
+                    elif common:
+                        to_add.add(common)
+                        to_add.add(common ^ bitstr)
+                        to_add.add(common ^ bs)
                         to_remove.add(bs)
                 # bitstrs = bitstrs | to_add
                 bitstrs ^= to_remove
                 if to_add:
-                    for ta in sorted(to_add, key=lambda bs: bs.count("1")):
+                    for ta in sorted(to_add, key=_bit_count):
                         independent = True
                         for bs in bitstrs:
-                            if not ta.independent(bs):
+                            if ta & bs:
                                 independent = False
                                 break
                         if independent:
                             bitstrs.add(ta)
         new_clade = BaseTree.Clade()
         for bitstr in sorted(bitstrs):
-            indices = bitstr.index_one()
+            indices = _bit_indices(bitstr, len(terms))
             if len(indices) == 1:
                 new_clade.clades.append(terms[indices[0]])
             elif len(indices) == 2:
@@ -481,21 +500,40 @@ def _count_clades(trees):
             An iterable that returns the trees to count
 
     """
-    bitstrs = {}
+    trees_iter = iter(trees)
+    first_tree = next(trees_iter)
+    term_names = [term.name for term in first_tree.get_terminals()]
+    bits_counts, tree_count = _count_clade_bits(
+        itertools.chain([first_tree], trees_iter), _taxon_bits(term_names)
+    )
+    bitstrs = {
+        _BitString(format(bits, "0%db" % len(term_names))): tuple(value)
+        for bits, value in bits_counts.items()
+    }
+    return bitstrs, tree_count
+
+
+def _count_clade_bits(trees, taxa):
+    """Count the clades in the trees as bitsets of the given taxa (PRIVATE).
+
+    Return a dict of the integer bitsets of the clades to a list of their
+    count of occurrences and sum of branch lengths, and the number of trees.
+    The trees are processed one at a time, so they can be generated lazily.
+    """
+    bits_counts = {}
     tree_count = 0
     for tree in trees:
         tree_count += 1
-        clade_bitstrs = _tree_to_bitstrs(tree)
-        for clade in tree.find_clades(terminal=False):
-            bitstr = clade_bitstrs[clade]
-            if bitstr in bitstrs:
-                count, sum_bl = bitstrs[bitstr]
-                count += 1
-                sum_bl += clade.branch_length or 0
-                bitstrs[bitstr] = (count, sum_bl)
+        for clade, bits in _clade_bits(tree, taxa).items():
+            if not clade.clades:
+                continue
+            value = bits_counts.get(bits)
+            if value is None:
+                bits_counts[bits] = [1, clade.branch_length or 0]
             else:
-                bitstrs[bitstr] = (1, clade.branch_length or 0)
-    return bitstrs, tree_count
+                value[0] += 1
+                value[1] += clade.branch_length or 0
+    return bits_counts, tree_count
 
 
 def get_support(target_tree, trees, len_trees=None):
@@ -512,7 +550,7 @@ def get_support(target_tree, trees, len_trees=None):
 
     """
     term_names = sorted(term.name for term in target_tree.find_clades(terminal=True))
-    bitstrs = {}
+    taxa = _taxon_bits(term_names)
 
     size = len_trees
     if size is None:
@@ -525,20 +563,22 @@ def get_support(target_tree, trees, len_trees=None):
                 "as the optional parameter len_trees."
             ) from None
 
+    clade_bits = _clade_bits(target_tree, taxa)
+    bits_clades = {}
     for clade in target_tree.find_clades(terminal=False):
-        bitstr = _clade_to_bitstr(clade, term_names)
-        bitstrs[bitstr] = (clade, 0)
+        bits_clades[clade_bits[clade]] = clade
+    counts = dict.fromkeys(bits_clades, 0)
     for tree in trees:
-        for clade in tree.find_clades(terminal=False):
-            bitstr = _clade_to_bitstr(clade, term_names)
-            if bitstr in bitstrs:
-                c, t = bitstrs[bitstr]
-                c.confidence = (t + 1) * 100.0 / size
-                bitstrs[bitstr] = (c, t + 1)
+        for clade, bits in _clade_bits(tree, taxa).items():
+            if clade.clades and bits in counts:
+                counts[bits] += 1
+    for bits, count in counts.items():
+        if count:
+            bits_clades[bits].confidence = count * 100.0 / size
     return target_tree
 
 
-def bootstrap(msa, times):
+def bootstrap(msa, times, seed=None):
     """Generate bootstrap replicates from a multiple sequence alignment object.
 
     :Parameters:
@@ -546,23 +586,55 @@ def bootstrap(msa, times):
             multiple sequence alignment to generate replicates.
         times : int
             number of bootstrap times.
+        seed : int
+            optional seed for the random columns. Replicate i only depends on
+            the seed and on i. By default, the seed is taken from the
+            ``random`` module.
 
     """
-    length = len(msa[0])
-    i = 0
-    while i < times:
-        i += 1
-        item = None
-        for j in range(length):
-            col = random.randint(0, length - 1)
-            if not item:
-                item = msa[:, col : col + 1]
-            else:
-                item += msa[:, col : col + 1]
-        yield item
+    if seed is None:
+        seed = random.getrandbits(64)
+    array = msa.as_array()
+    for i in range(times):
+        yield _bootstrap_replicate(msa, array, seed, i)
+
 
+def _bootstrap_replicate(msa, array, seed, i):
+    """Create bootstrap replicate i of an alignment (PRIVATE).
 
-def bootstrap_trees(msa, times, tree_constructor):
+    The columns are drawn with a random generator seeded with the seed and
+    the replicate number, and taken from the array of the alignment in one
+    step.
+    """
+    length = array.shape[1]
+    columns = numpy.random.default_rng([i, seed]).integers(length, size=length)
+    records = []
+    for record, row in zip(msa, array[:, columns]):
+        new = SeqRecord(
+            Seq(row.tobytes()),
+            id=record.id,
+            name=record.name,
+            description=record.description,
+        )
+        if "molecule_type" in record.annotations:
+            new.annotations["molecule_type"] = record.annotations["molecule_type"]
+        for key, value in record.letter_annotations.items():
+            new.letter_annotations[key] = _resample(value, columns)
+        records.append(new)
+    column_annotations = {
+        key: _resample(value, columns) for key, value in msa.column_annotations.items()
+    }
+    return MultipleSeqAlignment(records, column_annotations=column_annotations)
+
+
+def _resample(value, columns):
+    """Return the elements of a per-column or per-letter annotation (PRIVATE)."""
+    if isinstance(value, str):
+        return "".join([value[column] for column in columns])
+    return [value[column] for column in columns]
+
+
+def bootstrap_trees(msa, times, tree_constructor, workers=1, seed=None):
     """Generate bootstrap replicate trees from a multiple sequence alignment.
 
     :Parameters:
@@ -572,15 +644,61 @@ def bootstrap_trees(msa, times, tree_constructor):
             number of bootstrap times.
         tree_constructor : TreeConstructor
             tree constructor to be used to build trees.
+        workers : int
+            number of worker processes to build the trees in parallel
+            (default 1, building them in the current process). The tree
+            constructor must then be picklable, and the trees are generated
+            in the order they are finished.
+        seed : int
+            optional seed for the bootstrap replicates, see ``bootstrap``.
 
     """
-    msas = bootstrap(msa, times)
-    for aln in msas:
-        tree = tree_constructor.build_tree(aln)
-        yield tree
-
-
-def bootstrap_consensus(msa, times, tree_constructor, consensus):
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if seed is None:
+        seed = random.getrandbits(64)
+    if workers == 1:
+        for aln in bootstrap(msa, times, seed):
+            tree = tree_constructor.build_tree(aln)
+            yield tree
+        return
+    # The workers receive the alignment once, and then create the
+    # replicates themselves from their number.
+    with ProcessPoolExecutor(
+        workers,
+        initializer=_init_bootstrap_worker,
+        initargs=(msa, tree_constructor, seed),
+    ) as executor:
+        replicates = iter(range(times))
+        # keep a limited number of replicates waiting for a worker
+        futures = {
+            executor.submit(_bootstrap_tree, i)
+            for i in itertools.islice(replicates, 2 * workers)
+        }
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                for i in itertools.islice(replicates, 1):
+                    futures.add(executor.submit(_bootstrap_tree, i))
+                yield future.result()
+
+
+_bootstrap_worker = None
+
+
+def _init_bootstrap_worker(msa, tree_constructor, seed):
+    """Store the bootstrap data in a worker process (PRIVATE)."""
+    global _bootstrap_worker
+    _bootstrap_worker = (msa, msa.as_array(), tree_constructor, seed)
+
+
+def _bootstrap_tree(i):
+    """Build the tree of bootstrap replicate i in a worker process (PRIVATE)."""
+    msa, array, tree_constructor, seed = _bootstrap_worker
+    return tree_constructor.build_tree(_bootstrap_replicate(msa, array, seed, i))
+
+
+def bootstrap_consensus(msa, times, tree_constructor, consensus, workers=1, seed=None):
     """Consensus tree of a series of bootstrap trees for a multiple sequence alignment.
 
     :Parameters:
@@ -593,38 +711,75 @@ def bootstrap_consensus(msa, times, tree_constructor, consensus):
         consensus : function
             Consensus method in this module: ``strict_consensus``,
             ``majority_consensus``, ``adam_consensus``.
+        workers : int
+            Number of worker processes to build the trees in parallel
+            (default 1).
+        seed : int
+            Optional seed for the bootstrap replicates, see ``bootstrap``.
 
     """
-    trees = bootstrap_trees(msa, times, tree_constructor)
-    tree = consensus(list(trees))
+    trees = bootstrap_trees(msa, times, tree_constructor, workers, seed)
+    if consensus is adam_consensus:
+        trees = list(trees)
+    tree = consensus(trees)
     return tree
 
 
-def _clade_to_bitstr(clade, tree_term_names):
-    """Create a BitString representing a clade, given ordered tree taxon names (PRIVATE)."""
-    clade_term_names = {term.name for term in clade.find_clades(terminal=True)}
-    return _BitString.from_bool((name in clade_term_names) for name in tree_term_names)
+def _bit_count(bits):
+    """Return the number of taxa in a bitset (PRIVATE)."""
+    return bin(bits).count("1")
+
 
+def _bit_indices(bits, size):
+    """Return the indices of the taxa in a bitset, in increasing order (PRIVATE)."""
+    indices = []
+    while bits:
+        # the highest bit is the taxon with the smallest index
+        length = bits.bit_length()
+        indices.append(size - length)
+        bits ^= 1 << (length - 1)
+    return indices
 
-def _tree_to_bitstrs(tree):
-    """Create a dict of a tree's clades to corresponding BitStrings (PRIVATE)."""
-    clades_bitstrs = {}
-    term_names = [term.name for term in tree.find_clades(terminal=True)]
-    for clade in tree.find_clades(terminal=False):
-        bitstr = _clade_to_bitstr(clade, term_names)
-        clades_bitstrs[clade] = bitstr
-    return clades_bitstrs
 
+def _taxon_bits(names):
+    """Return a dict mapping each taxon name to its bit (PRIVATE)."""
+    size = len(names)
+    return {name: 1 << (size - 1 - i) for i, name in enumerate(names)}
 
-def _bitstring_topology(tree):
-    """Generate a branch length dict for a tree, keyed by BitStrings (PRIVATE).
 
-    Create a dict of all clades' BitStrings to the corresponding branch
+def _clade_bits(tree, taxa):
+    """Create a dict of the clades in a tree to bitsets of their taxa (PRIVATE).
+
+    The bitset of each clade is the union of those of its children, so the
+    whole tree is processed in a single traversal.
+    """
+    clades_bits = {}
+    for clade in tree.find_clades(order="postorder"):
+        if clade.clades:
+            bits = 0
+            for child in clade.clades:
+                bits |= clades_bits[child]
+        else:
+            try:
+                bits = taxa[clade.name]
+            except KeyError:
+                raise ValueError(
+                    "Taxons in provided trees should be consistent"
+                ) from None
+        clades_bits[clade] = bits
+    return clades_bits
+
+
+def _bitstring_topology(tree, taxa):
+    """Generate a branch length dict for a tree, keyed by bitsets (PRIVATE).
+
+    Create a dict of all clades' bitsets to the corresponding branch
     lengths (rounded to 5 decimal places).
     """
     bitstrs = {}
-    for clade, bitstr in _tree_to_bitstrs(tree).items():
-        bitstrs[bitstr] = round(clade.branch_length or 0.0, 5)
+    for clade, bits in _clade_bits(tree, taxa).items():
+        if clade.clades:
+            bitstrs[bits] = round(clade.branch_length or 0.0, 5)
     return bitstrs
 
 
@@ -635,6 +790,7 @@ def _equal_topology(tree1, tree2):
     """
     term_names1 = {term.name for term in tree1.find_clades(terminal=True)}
     term_names2 = {term.name for term in tree2.find_clades(terminal=True)}
-    return (term_names1 == term_names2) and (
-        _bitstring_topology(tree1) == _bitstring_topology(tree2)
-    )
+    if term_names1 != term_names2:
+        return False
+    taxa = _taxon_bits(sorted(term_names1))
+    return _bitstring_topology(tree1, taxa) == _bitstring_topology(tree2, taxa)
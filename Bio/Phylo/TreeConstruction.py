@@ -7,14 +7,25 @@
 
 """Classes and methods for tree construction."""
 
-import itertools
+import collections.abc
 import copy
 import numbers
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+
 from Bio.Phylo import BaseTree
 from Bio.Align import MultipleSeqAlignment
 from Bio.Align import substitution_matrices
 
 
+# Approximate memory used for each block of columns by
+# DistanceCalculator.get_distance, in bytes.
+_DISTANCE_BLOCK_BYTES = 2 ** 26
+
+
 class _Matrix:
     """Base class for distance matrix or scoring matrix.
 
@@ -86,14 +97,7 @@ class _Matrix:
         Arguments are a list of names, and optionally a list of lower
         triangular matrix data (zero matrix used by default).
         """
-        # check names
-        if isinstance(names, list) and all(isinstance(s, str) for s in names):
-            if len(set(names)) == len(names):
-                self.names = names
-            else:
-                raise ValueError("Duplicate names found")
-        else:
-            raise TypeError("'names' should be a list of strings")
+        self._set_names(names)
 
         # check matrix
         if matrix is None:
@@ -122,6 +126,16 @@ class _Matrix:
             else:
                 raise TypeError("'matrix' should be a list of numerical lists")
 
+    def _set_names(self, names):
+        """Check and store the names of the elements (PRIVATE)."""
+        if isinstance(names, list) and all(isinstance(s, str) for s in names):
+            if len(set(names)) == len(names):
+                self.names = names
+            else:
+                raise ValueError("Duplicate names found")
+        else:
+            raise TypeError("'names' should be a list of strings")
+
     def __getitem__(self, item):
         """Access value(s) by the index(s) or name(s).
 
@@ -307,26 +321,319 @@ class _Matrix:
         return matrix_string
 
 
+class _LowerTriangleRow(collections.abc.Sequence):
+    """Row of the lower triangle of a DistanceMatrix (PRIVATE).
+
+    Assigning to an element sets the distance in the DistanceMatrix.
+    """
+
+    def __init__(self, dm, index):
+        """Initialize the class."""
+        self._dm = dm
+        self._index = index
+
+    def __len__(self):
+        """Return the number of elements in the row, including the diagonal."""
+        return self._index + 1
+
+    def _column(self, column):
+        """Check the column index and make it non-negative (PRIVATE)."""
+        if not isinstance(column, numbers.Integral):
+            raise TypeError("Invalid index type.")
+        if not -len(self) <= column < len(self):
+            raise IndexError("Index out of range.")
+        return column % len(self)
+
+    def __getitem__(self, column):
+        """Return the distance, or a list of distances for a slice."""
+        if isinstance(column, slice):
+            return list(self)[column]
+        return self._dm[self._index, self._column(column)]
+
+    def __setitem__(self, column, value):
+        """Set the distance in the DistanceMatrix."""
+        self._dm[self._index, self._column(column)] = value
+
+    def __eq__(self, other):
+        """Compare the row with another sequence as a list."""
+        if isinstance(other, collections.abc.Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        """Return the row as a list."""
+        return repr(list(self))
+
+
+class _LowerTriangle(collections.abc.Sequence):
+    """Nested list view of the distances of a DistanceMatrix (PRIVATE).
+
+    The rows are in lower triangular format. Assigning to a row, or to an
+    element of a row, sets the distances in the DistanceMatrix.
+    """
+
+    def __init__(self, dm):
+        """Initialize the class."""
+        self._dm = dm
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self._dm)
+
+    def _row(self, index):
+        """Check the row index and make it non-negative (PRIVATE)."""
+        if not isinstance(index, numbers.Integral):
+            raise TypeError("Invalid index type.")
+        if not -len(self) <= index < len(self):
+            raise IndexError("Index out of range.")
+        return index % len(self)
+
+    def __getitem__(self, index):
+        """Return a row, or a list of rows for a slice."""
+        if isinstance(index, slice):
+            return list(self)[index]
+        return _LowerTriangleRow(self._dm, self._row(index))
+
+    def __setitem__(self, index, value):
+        """Set the distances of a row in lower triangular format."""
+        index = self._row(index)
+        if not (
+            isinstance(value, list)
+            and all(isinstance(n, numbers.Number) for n in value)
+        ):
+            raise TypeError("Invalid value type.")
+        if len(value) != index + 1:
+            raise ValueError("'matrix' should be in lower triangle format")
+        for column in range(index):
+            self._dm[index, column] = value[column]
+
+    def __eq__(self, other):
+        """Compare the rows with another sequence as nested lists."""
+        if isinstance(other, collections.abc.Sequence):
+            return len(self) == len(other) and all(
+                row == other_row for row, other_row in zip(self, other)
+            )
+        return NotImplemented
+
+    def __repr__(self):
+        """Return the rows as a nested list."""
+        return repr([list(row) for row in self])
+
+
 class DistanceMatrix(_Matrix):
     """Distance matrix class that can be used for distance based tree algorithms.
 
     All diagonal elements will be zero no matter what the users provide.
+
+    The distances below the diagonal are stored in a condensed NumPy array,
+    row by row, so that the distance between elements i and j (with j < i)
+    is at position i * (i - 1) // 2 + j. Besides a nested list in lower
+    triangular format, the matrix can therefore also be given as a square
+    NumPy array (of which the lower triangle is used), or as a condensed
+    one-dimensional NumPy array of this form:
+
+    >>> import numpy as np
+    >>> from Bio.Phylo.TreeConstruction import DistanceMatrix
+    >>> dm = DistanceMatrix(["Alpha", "Beta", "Gamma"], np.array([0.1, 0.2, 0.3]))
+    >>> dm
+    DistanceMatrix(names=['Alpha', 'Beta', 'Gamma'], matrix=[[0], [0.1, 0], [0.2, 0.3, 0]])
+    >>> dm["Gamma", "Beta"]
+    0.3
+
+    The matrix attribute is a view of the distances as a nested list in lower
+    triangular format. Assigning to its elements changes the distances:
+
+    >>> dm.matrix[2][1] = 0.4
+    >>> dm["Beta", "Gamma"]
+    0.4
     """
 
     def __init__(self, names, matrix=None):
         """Initialize the class."""
-        _Matrix.__init__(self, names, matrix)
-        self._set_zero_diagonal()
+        self._set_names(names)
+        if matrix is None:
+            size = len(names)
+            self._distances = numpy.zeros(size * (size - 1) // 2, int)
+        else:
+            self.matrix = matrix
+
+    @property
+    def matrix(self):
+        """Distances as a nested list view in lower triangular format."""
+        return _LowerTriangle(self)
+
+    @matrix.setter
+    def matrix(self, matrix):
+        size = len(self)
+        if isinstance(matrix, numpy.ndarray):
+            if matrix.shape == (size, size):
+                distances = matrix[numpy.tril_indices(size, -1)]
+            elif matrix.shape == (size * (size - 1) // 2,):
+                distances = matrix.copy()
+            else:
+                raise ValueError(
+                    "'matrix' should be a square or condensed array matching 'names'"
+                )
+        elif (
+            isinstance(matrix, list)
+            and all(isinstance(l, list) for l in matrix)
+            and all(isinstance(n, numbers.Number) for l in matrix for n in l)
+        ):
+            # check if the same length with names
+            if len(matrix) != size:
+                raise ValueError("'names' and 'matrix' should be the same size")
+            # check if is lower triangle format
+            if [len(m) for m in matrix] != list(range(1, size + 1)):
+                raise ValueError("'matrix' should be in lower triangle format")
+            distances = numpy.array([n for l in matrix for n in l[:-1]])
+        else:
+            raise TypeError("'matrix' should be a list of numerical lists")
+        if distances.dtype.kind not in "iuf":
+            distances = distances.astype(float)
+        self._distances = distances
+
+    def _index(self, item):
+        """Return the index of an element given as an integer or name (PRIVATE)."""
+        if isinstance(item, numbers.Integral):
+            if not -len(self) <= item < len(self):
+                raise IndexError("Index out of range.")
+            return item % len(self)
+        elif isinstance(item, str):
+            if item in self.names:
+                return self.names.index(item)
+            raise ValueError("Item not found.")
+        raise TypeError("Invalid index type.")
+
+    def _indices(self, item):
+        """Return the pair of indices of a double index (PRIVATE)."""
+        if len(item) != 2:
+            raise TypeError("Invalid index type.")
+        if not (
+            all(isinstance(i, numbers.Integral) for i in item)
+            or all(isinstance(i, str) for i in item)
+        ):
+            raise TypeError("Invalid index type.")
+        return self._index(item[0]), self._index(item[1])
+
+    def _positions(self, index):
+        """Return positions in the condensed array of the distances of index (PRIVATE).
+
+        The positions are returned for the other elements in order, as
+        an array of length len(self) - 1.
+        """
+        start = index * (index - 1) // 2
+        others = numpy.arange(index + 1, len(self))
+        before = numpy.arange(start, start + index)
+        return numpy.concatenate([before, others * (others - 1) // 2 + index])
+
+    def _upcast(self, value):
+        """Switch the distances to floating point values if needed (PRIVATE)."""
+        if self._distances.dtype.kind != "f":
+            if numpy.asarray(value).dtype.kind not in "iub":
+                self._distances = self._distances.astype(float)
+
+    def __getitem__(self, item):
+        """Access value(s) by the index(s) or name(s).
+
+        For a DistanceMatrix object 'dm'::
+
+            dm[i]                   get a value list from the given 'i' to others;
+            dm[i, j]                get the value between 'i' and 'j';
+            dm['name']              map name to index first
+            dm['name1', 'name2']    map name to index first
+
+        """
+        if isinstance(item, (numbers.Integral, str)):
+            index = self._index(item)
+            values = self._distances[self._positions(index)].tolist()
+            values.insert(index, 0)
+            return values
+        elif isinstance(item, tuple):
+            row_index, col_index = self._indices(item)
+            if row_index == col_index:
+                return 0
+            if row_index < col_index:
+                row_index, col_index = col_index, row_index
+            return self._distances[row_index * (row_index - 1) // 2 + col_index].item()
+        else:
+            raise TypeError("Invalid index type.")
 
     def __setitem__(self, item, value):
-        """Set Matrix's items to values."""
-        _Matrix.__setitem__(self, item, value)
-        self._set_zero_diagonal()
+        """Set value by the index(s) or name(s).
+
+        Similar to __getitem__::
+
+            dm[1] = [1, 0, 3, 4]    set values from '1' to others;
+            dm[i, j] = 2            set the value from 'i' to 'j'
+
+        """
+        if isinstance(item, (numbers.Integral, str)):
+            index = self._index(item)
+            # check and assign value
+            if not (
+                isinstance(value, list)
+                and all(isinstance(n, numbers.Number) for n in value)
+            ):
+                raise TypeError("Invalid value type.")
+            if len(value) != len(self):
+                raise ValueError("Value not the same size.")
+            value = value[:index] + value[index + 1 :]
+            self._upcast(value)
+            self._distances[self._positions(index)] = value
+        elif isinstance(item, tuple):
+            row_index, col_index = self._indices(item)
+            if not isinstance(value, numbers.Number):
+                raise TypeError("Invalid value type.")
+            if row_index == col_index:
+                return
+            if row_index < col_index:
+                row_index, col_index = col_index, row_index
+            self._upcast(value)
+            self._distances[row_index * (row_index - 1) // 2 + col_index] = value
+        else:
+            raise TypeError("Invalid index type.")
+
+    def __delitem__(self, item):
+        """Delete related distances by the index or name."""
+        if isinstance(item, str):
+            index = self.names.index(item)
+        elif isinstance(item, numbers.Integral):
+            index = self._index(item)
+        else:
+            raise TypeError("Invalid index type.")
+        keep = numpy.ones(len(self._distances), bool)
+        keep[self._positions(index)] = False
+        self._distances = self._distances[keep]
+        del self.names[index]
 
-    def _set_zero_diagonal(self):
-        """Set all diagonal elements to zero (PRIVATE)."""
-        for i in range(0, len(self)):
-            self.matrix[i][i] = 0
+    def insert(self, name, value, index=None):
+        """Insert distances given the name and value.
+
+        :Parameters:
+            name : str
+                name of a row/col to be inserted
+            value : list
+                a row/col of values to be inserted
+
+        """
+        if not isinstance(name, str):
+            raise TypeError("Invalid name type.")
+        # insert at the given index or at the end
+        if index is None:
+            index = len(self)
+        if not isinstance(index, numbers.Integral):
+            raise TypeError("Invalid index type.")
+        if not 0 <= index <= len(self):
+            raise IndexError("Index out of range.")
+        self.names.insert(index, name)
+        # insert elements of 0, to be assigned
+        distances = numpy.zeros(len(self) * (len(self) - 1) // 2, self._distances.dtype)
+        keep = numpy.ones(len(distances), bool)
+        keep[self._positions(index)] = False
+        distances[keep] = self._distances
+        self._distances = distances
+        # assign value
+        self[index] = value
 
     def format_phylip(self, handle):
         """Write data in Phylip format to a given file-like object or handle.
@@ -344,19 +651,48 @@ class DistanceMatrix(_Matrix):
         handle.write(f"    {len(self.names)}\n")
         # Phylip needs space-separated, vertically aligned columns
         name_width = max(12, max(map(len, self.names)) + 1)
-        value_fmts = ("{" + str(x) + ":.4f}" for x in range(1, len(self.matrix) + 1))
+        value_fmts = ("{" + str(x) + ":.4f}" for x in range(1, len(self) + 1))
         row_fmt = "{0:" + str(name_width) + "s}" + "  ".join(value_fmts) + "\n"
-        for i, (name, values) in enumerate(zip(self.names, self.matrix)):
-            # Mirror the matrix values across the diagonal
-            mirror_values = (self.matrix[j][i] for j in range(i + 1, len(self.matrix)))
-            fields = itertools.chain([name], values, mirror_values)
-            handle.write(row_fmt.format(*fields))
+        for i, name in enumerate(self.names):
+            handle.write(row_fmt.format(name, *self[i]))
+
+    def _square(self):
+        """Return the distances as a square array (PRIVATE).
+
+        The distances are in the lower triangle, with infinity elsewhere. This
+        is the working array of the tree construction methods.
+        """
+        size = len(self)
+        square = numpy.full((size, size), numpy.inf)
+        square[numpy.tril_indices(size, -1)] = self._distances
+        return square
 
 
 # Shim for compatibility with Biopython<1.70 (#1304)
 _DistanceMatrix = DistanceMatrix
 
 
+def _run_blocks(function, count, workers):
+    """Call function(first, last) on blocks covering range(count) (PRIVATE).
+
+    If workers is more than one, the blocks are processed in parallel by
+    a pool of threads; function should then release the Global Interpreter
+    Lock for most of its work, as NumPy does for array operations.
+    """
+    if workers == 1 or count < 2:
+        function(0, count)
+        return
+    # Use a few blocks per thread to balance the load
+    size = -(-count // (4 * workers))
+    with ThreadPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(function, first, min(first + size, count))
+            for first in range(0, count, size)
+        ]
+        for future in futures:
+            future.result()
+
+
 class DistanceCalculator:
     """Class to calculate the distance matrix from a DNA or Protein.
 
@@ -516,22 +852,154 @@ class DistanceCalculator:
             return 1  # max possible scaled distance
         return 1 - (score * 1.0 / max_score)
 
-    def get_distance(self, msa):
+    def get_distance(self, msa, workers=1):
         """Return a DistanceMatrix for MSA object.
 
         :Parameters:
             msa : MultipleSeqAlignment
                 DNA or Protein multiple sequence alignment.
-
+            workers : int
+                Number of threads used to calculate the distances (default 1).
+
+        The alignment is encoded once as an integer array, and the scores of
+        all pairs of sequences are calculated together as matrix products,
+        processing blocks of columns at a time to limit the memory used.  The
+        matrix products release the Python Global Interpreter Lock, so the
+        column blocks are processed in parallel if workers is more than one.
         """
         if not isinstance(msa, MultipleSeqAlignment):
             raise TypeError("Must provide a MultipleSeqAlignment object.")
+        if workers < 1:
+            raise ValueError("workers must be at least 1, not %r" % workers)
 
         names = [s.id for s in msa]
-        dm = DistanceMatrix(names)
-        for seq1, seq2 in itertools.combinations(msa, 2):
-            dm[seq1.id, seq2.id] = self._pairwise(seq1, seq2)
-        return dm
+        return DistanceMatrix(names, self._distances(msa, workers).transpose())
+
+    def _distances(self, msa, workers=1):
+        """Calculate the distances between all pairs of sequences (PRIVATE).
+
+        Returns a square NumPy array; for i < j, element [i, j] is the distance
+        that _pairwise would give for sequences i and j of the alignment.
+        """
+        codes = msa.as_array()
+        nrows, ncols = codes.shape
+        letters = numpy.flatnonzero(numpy.bincount(codes.ravel(), minlength=256))
+        skip = [ord(letter) for letter in self.skip_letters if len(letter) == 1]
+        letters = [chr(code) for code in letters if code not in skip]
+        if self.scoring_matrix is None:
+            score = self._identity_scores(codes, skip, workers)
+            max_score = ncols
+        else:
+            self._check_letters(msa, codes, letters, skip)
+            score, max_score = self._matrix_scores(codes, letters, workers)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            distances = 1 - score / max_score
+        distances[max_score == 0] = 1  # max possible scaled distance
+        return distances
+
+    def _identity_scores(self, codes, skip, workers):
+        """Count the identical letters for all pairs of sequences (PRIVATE).
+
+        Element [i, j] of the returned array, for i < j, is the number of
+        columns in which sequences i and j have the same letter, not counting
+        skipped letters.
+        """
+        nrows, ncols = codes.shape
+        score = numpy.zeros((nrows, nrows))
+        valid = ~numpy.isin(codes, skip)
+        step = max(1, _DISTANCE_BLOCK_BYTES // max(nrows, 1))
+
+        def calculate(first, last):
+            for start in range(0, ncols, step):
+                block = codes[:, start : start + step]
+                for i in range(first, last):
+                    equal = block[i + 1 :] == block[i]
+                    equal &= valid[i, start : start + step]
+                    score[i, i + 1 :] += numpy.count_nonzero(equal, axis=1)
+
+        _run_blocks(calculate, nrows, workers)
+        return score
+
+    def _matrix_scores(self, codes, letters, workers):
+        """Sum the scoring matrix values for all pairs of sequences (PRIVATE).
+
+        Returns the score of each pair of sequences and the higher of the two
+        self scores, skipping columns where either sequence has a skipped
+        letter.  These are calculated as matrix products of a one-hot encoding
+        of the sequences with the scoring matrix rows of their letters,
+        processing blocks of columns at a time.
+        """
+        nrows, ncols = codes.shape
+        alphabet = self.scoring_matrix.alphabet
+        # letters missing from the matrix are only aligned to skipped ones
+        letters = [letter for letter in letters if letter in alphabet]
+        size = len(letters)
+        indices = [alphabet.index(letter) for letter in letters]
+        scores = numpy.asarray(self.scoring_matrix)[numpy.ix_(indices, indices)]
+        # use single precision if the sums are exact integers anyway
+        if numpy.all(scores == numpy.round(scores)) and (
+            size == 0 or numpy.abs(scores).max() * ncols < 2 ** 24
+        ):
+            dtype = numpy.float32
+        else:
+            dtype = numpy.float64
+        # skipped letters are mapped to an extra row and column of zeros
+        matrix = numpy.zeros((size + 1, size + 1), dtype)
+        matrix[:size, :size] = scores
+        identity = numpy.identity(size + 1, dtype)[:, :size]
+        diagonal = matrix.diagonal()
+        table = numpy.full(256, size, numpy.intp)
+        for index, letter in enumerate(letters):
+            table[ord(letter)] = index
+        score = numpy.zeros((nrows, nrows))
+        max_score = numpy.zeros((nrows, nrows))
+        step = _DISTANCE_BLOCK_BYTES // (8 * max(nrows, 1) * (size + 1))
+        step = max(1, step)
+
+        def calculate(first, last):
+            for start in range(first * step, min(last * step, ncols), step):
+                block = table[codes[:, start : start + step]]
+                onehot = identity[block].reshape(nrows, -1)
+                rows = matrix[block, :size].reshape(nrows, -1)
+                block_score = numpy.dot(rows, onehot.transpose())
+                valid = (block < size).astype(dtype)
+                block_max_score = numpy.dot(diagonal[block], valid.transpose())
+                with lock:
+                    numpy.add(score, block_score, out=score)
+                    numpy.add(max_score, block_max_score, out=max_score)
+
+        lock = threading.Lock()
+        _run_blocks(calculate, -(-ncols // step), workers)
+        # Take the higher score if the matrix is asymmetrical
+        numpy.maximum(max_score, max_score.transpose(), out=max_score)
+        return score, max_score
+
+    def _check_letters(self, msa, codes, letters, skip):
+        """Raise a ValueError for letters missing from the scoring matrix (PRIVATE).
+
+        As in _pairwise, a letter is only used if it is aligned to a letter
+        that is not skipped in another sequence, and the first bad letter is
+        reported in the order in which _pairwise compares the sequences.
+        """
+        alphabet = self.scoring_matrix.alphabet
+        bad = [ord(letter) for letter in letters if letter not in alphabet]
+        if not bad:
+            return
+        used = ~numpy.isin(codes, skip)
+        bad = numpy.isin(codes, bad)
+        for i in range(len(codes) - 1):
+            found = used[i] & used[i + 1 :] & (bad[i] | bad[i + 1 :])
+            rows, columns = numpy.nonzero(found)
+            if len(rows) > 0:
+                # the first pair of sequences, at the first position
+                row = i + 1 + rows[0]
+                column = columns[rows == rows[0]].min()
+                if bad[i, column]:
+                    row = i
+                raise ValueError(
+                    "Bad letter '%s' in sequence '%s' at position '%s'"
+                    % (chr(codes[row, column]), msa[int(row)].id, column)
+                )
 
 
 class TreeConstructor:
@@ -648,24 +1116,50 @@ class DistanceTreeConstructor(TreeConstructor):
         """
         if not isinstance(distance_matrix, DistanceMatrix):
             raise TypeError("Must provide a DistanceMatrix object.")
-
-        # make a copy of the distance matrix to be used
-        dm = copy.deepcopy(distance_matrix)
+        if not numpy.isfinite(distance_matrix._distances).all():
+            raise ValueError("Distances must be finite numbers.")
+
+        # The distances are kept in the lower triangle of a square array,
+        # with infinity elsewhere. Merged clusters are put in the row of the
+        # second cluster, and the row of the first is set to infinity, so the
+        # rows of the remaining clusters stay in their original order; the
+        # array is compacted if more than half of the rows are unused.
+        dm = distance_matrix._square()
         # init terminal clades
-        clades = [BaseTree.Clade(None, name) for name in dm.names]
-        # init minimum index
-        min_i = 0
-        min_j = 0
+        clades = [BaseTree.Clade(None, name) for name in distance_matrix.names]
+        active = numpy.ones(len(dm), bool)
+        # height of each clade, as calculated by _height_of
+        heights = [0] * len(dm)
+        # minimum distance in each row, and the last column where it occurs
+        row_min = numpy.full(len(dm), numpy.inf)
+        row_arg = numpy.zeros(len(dm), int)
+
+        def update_row(i):
+            if i > 0:
+                values = dm[i, :i]
+                j = i - 1 - numpy.argmin(values[::-1])
+                row_min[i] = values[j]
+                row_arg[i] = j
+
+        for i in range(len(dm)):
+            update_row(i)
         inner_count = 0
-        while len(dm) > 1:
-            min_dist = dm[1, 0]
-            # find minimum index
-            for i in range(1, len(dm)):
-                for j in range(0, i):
-                    if min_dist >= dm[i, j]:
-                        min_dist = dm[i, j]
-                        min_i = i
-                        min_j = j
+        count = len(dm)
+        while count > 1:
+            if count <= len(dm) // 2:
+                rows = numpy.flatnonzero(active)
+                dm = dm[numpy.ix_(rows, rows)]
+                clades = [clades[i] for i in rows]
+                heights = [heights[i] for i in rows]
+                active = active[rows]
+                row_min = numpy.full(len(dm), numpy.inf)
+                row_arg = numpy.zeros(len(dm), int)
+                for i in range(len(dm)):
+                    update_row(i)
+            # find the last occurrence of the minimum distance
+            min_dist = float(row_min.min())
+            min_i = numpy.flatnonzero(row_min == min_dist)[-1]
+            min_j = row_arg[min_i]
 
             # create clade
             clade1 = clades[min_i]
@@ -677,27 +1171,45 @@ class DistanceTreeConstructor(TreeConstructor):
             # assign branch length
             if clade1.is_terminal():
                 clade1.branch_length = min_dist * 1.0 / 2
+                heights[min_i] = clade1.branch_length
             else:
-                clade1.branch_length = min_dist * 1.0 / 2 - self._height_of(clade1)
+                clade1.branch_length = min_dist * 1.0 / 2 - heights[min_i]
 
             if clade2.is_terminal():
                 clade2.branch_length = min_dist * 1.0 / 2
+                heights[min_j] = clade2.branch_length
             else:
-                clade2.branch_length = min_dist * 1.0 / 2 - self._height_of(clade2)
+                clade2.branch_length = min_dist * 1.0 / 2 - heights[min_j]
 
             # update node list
             clades[min_j] = inner_clade
-            del clades[min_i]
+            heights[min_j] = max(heights[min_i], heights[min_j])
+            active[min_i] = False
+            count -= 1
 
-            # rebuild distance matrix,
             # set the distances of new node at the index of min_j
-            for k in range(0, len(dm)):
-                if k != min_i and k != min_j:
-                    dm[min_j, k] = (dm[min_i, k] + dm[min_j, k]) * 1.0 / 2
-
-            dm.names[min_j] = "Inner" + str(inner_count)
-
-            del dm[min_i]
+            row_i = numpy.concatenate([dm[min_i, :min_i], [0], dm[min_i + 1 :, min_i]])
+            row_j = numpy.concatenate([dm[min_j, :min_j], [0], dm[min_j + 1 :, min_j]])
+            row = (row_i + row_j) * 1.0 / 2
+            row[min_i] = numpy.inf
+            dm[min_j, :min_j] = row[:min_j]
+            dm[min_j + 1 :, min_j] = row[min_j + 1 :]
+            dm[min_i, :] = numpy.inf
+            dm[:, min_i] = numpy.inf
+            row_min[min_i] = numpy.inf
+            update_row(min_j)
+            # the rows below min_j have a new distance in column min_j
+            rows = min_j + 1 + numpy.flatnonzero(active[min_j + 1 :])
+            changed = (row_arg[rows] == min_j) | (row_arg[rows] == min_i)
+            for k in rows[changed]:
+                update_row(k)
+            rows = rows[~changed]
+            values = row[rows]
+            better = (values < row_min[rows]) | (
+                (values == row_min[rows]) & (min_j > row_arg[rows])
+            )
+            row_min[rows[better]] = values[better]
+            row_arg[rows[better]] = min_j
         inner_clade.branch_length = 0
         return BaseTree.Tree(inner_clade)
 
@@ -711,13 +1223,15 @@ class DistanceTreeConstructor(TreeConstructor):
         """
         if not isinstance(distance_matrix, DistanceMatrix):
             raise TypeError("Must provide a DistanceMatrix object.")
+        if not numpy.isfinite(distance_matrix._distances).all():
+            raise ValueError("Distances must be finite numbers.")
 
-        # make a copy of the distance matrix to be used
-        dm = copy.deepcopy(distance_matrix)
+        # The distances are kept in a symmetric square array, with infinity
+        # on the diagonal and for the nodes that were already joined.
+        dm = distance_matrix._square()
+        dm = numpy.minimum(dm, dm.transpose())
         # init terminal clades
-        clades = [BaseTree.Clade(None, name) for name in dm.names]
-        # init node distance
-        node_dist = [0] * len(dm)
+        clades = [BaseTree.Clade(None, name) for name in distance_matrix.names]
         # init minimum index
         min_i = 0
         min_j = 0
@@ -742,25 +1256,193 @@ class DistanceTreeConstructor(TreeConstructor):
             root = clades[0]
 
             return BaseTree.Tree(root, rooted=False)
-        while len(dm) > 2:
+
+        def full_row(i):
+            row = dm[i].copy()
+            row[i] = 0
+            return row
+
+        def sort_rows():
+            # Sort the distances in each row, recording the time each row
+            # was sorted so that entries to nodes created later (reusing the
+            # index of a joined node) are recognized as outdated. The last
+            # column is infinity, to stop the scan of the row.
+            nonlocal created, sorted_at, sorted_len, offsets, values, columns
+            size = len(dm)
+            created = numpy.zeros(size, int)
+            sorted_at = numpy.zeros(size, int)
+            sorted_len = numpy.full(size, size + 1)
+            offsets = numpy.zeros(size, int)
+            order = numpy.argsort(dm, axis=1)
+            values = numpy.full((size, size + 1), numpy.inf)
+            values[:, :-1] = numpy.take_along_axis(dm, order, axis=1)
+            columns = numpy.empty((size, size + 1), int)
+            columns[:, :-1] = order
+            columns[:, -1] = numpy.arange(size)
+
+        def sort_row(i):
+            # Only sort the smallest distances in the row of a new node, the
+            # others are sorted by extend_row if needed.
+            sorted_len[i] = min(len(dm), 64)
+            order = numpy.argpartition(dm[i], sorted_len[i] - 1)[: sorted_len[i]]
+            order = order[numpy.argsort(dm[i, order])]
+            columns[i, : len(order)] = order
+            values[i, : len(order)] = dm[i, order]
+            offsets[i] = 0
+            sorted_at[i] = step
+
+        def extend_row(i):
+            mask = numpy.ones(len(dm), bool)
+            mask[columns[i, : sorted_len[i]]] = False
+            order = numpy.flatnonzero(mask)
+            order = order[numpy.argsort(dm[i, order])]
+            columns[i, sorted_len[i] : -1] = order
+            values[i, sorted_len[i] : -1] = dm[i, order]
+            sorted_len[i] = len(dm) + 1
+
+        def scan_all():
+            # Find the first pair with the minimum value of Q by scanning
+            # all pairs in blocks of rows.
+            min_dist = numpy.inf
+            min_j, min_i = numpy.flatnonzero(active)[:2]
+            first = 1
+            while first < len(dm):
+                last = min(len(dm), first + max(16, 2 ** 18 // first))
+                block = dm[first:last, :last] - node_dist[first:last, None]
+                block -= node_dist[:last]
+                block[
+                    numpy.arange(last) >= numpy.arange(first, last)[:, None]
+                ] = numpy.inf
+                i, j = divmod(numpy.argmin(block), last)
+                temp = block[i, j]
+                if min_dist > temp:
+                    min_dist = temp
+                    min_i = first + i
+                    min_j = j
+                first = last
+            return min_i, min_j
+
+        def scan_rows(rows, min_dist, min_key, budget):
+            # Scan the sorted rows in blocks of increasing width until their
+            # lower bound on Q exceeds the minimum found. Returns None if
+            # more than budget entries would be scanned.
+            size = len(dm) + 1
+            positions = offsets[rows]
+            leading = numpy.ones(len(rows), bool)
+            width = 1
+            while len(rows):
+                budget -= len(rows) * width
+                if budget < 0:
+                    return None
+                for i in rows[positions + width > sorted_len[rows]]:
+                    extend_row(i)
+                index = numpy.minimum(
+                    positions[:, None] + numpy.arange(width), size - 1
+                )
+                index += (rows * size)[:, None]
+                value = values.take(index)
+                column = columns.take(index)
+                valid = (
+                    active.take(column)
+                    & (created.take(column) <= sorted_at[rows, None])
+                    & (column != rows[:, None])
+                )
+                # skip the entries to joined nodes at the start of each row
+                skip = numpy.where(valid.any(1), valid.argmax(1), width)
+                offsets[rows[leading]] += skip[leading]
+                leading &= skip == width
+                i = numpy.maximum(rows[:, None], column)[valid]
+                j = numpy.minimum(rows[:, None], column)[valid]
+                q = value[valid] - node_dist[i] - node_dist[j]
+                if len(q):
+                    temp = q.min()
+                    if temp <= min_dist:
+                        key = (i * len(dm) + j)[q == temp].min()
+                        if temp < min_dist or key < min_key:
+                            min_dist = temp
+                            min_key = key
+                keep = lower_bound(rows, value[:, -1]) <= min_dist
+                rows = rows[keep]
+                positions = positions[keep] + width
+                leading = leading[keep]
+                width *= 2
+            return min_dist, min_key, budget
+
+        def lower_bound(rows, distances):
+            # Lower bound on Q for the pairs of the rows with distances not
+            # smaller than those given, checking both orders of subtraction
+            # as they may round differently.
+            return numpy.minimum(
+                distances - node_dist[rows] - max_dist,
+                distances - max_dist - node_dist[rows],
+            )
+
+        def min_pair():
+            # Find the first pair with the minimum value of
+            #     Q = (dm[i, j] - node_dist[i]) - node_dist[j]
+            # with i > j, as in RapidNJ: each row is scanned in order of
+            # increasing distance until the distance is too large for the
+            # row to give a smaller Q. Every pair is found in the row of the
+            # node created last. The rows with the smallest lower bound are
+            # scanned first, to avoid scanning most of the others.
+            rows = numpy.flatnonzero(active)
+            bound = lower_bound(rows, values.take(rows * (len(dm) + 1) + offsets[rows]))
+            order = numpy.argpartition(bound, min(16, len(rows) - 1))
+            best = scan_rows(rows[order[:16]], numpy.inf, None, count * count // 8)
+            if best is not None:
+                min_dist, min_key, budget = best
+                rows = rows[order[16:][bound[order[16:]] <= min_dist]]
+                best = scan_rows(rows, min_dist, min_key, budget)
+            if best is None or best[1] is None:
+                # the bounds are not effective, so scan all pairs
+                return scan_all()
+            return divmod(int(best[1]), len(dm))
+
+        active = numpy.ones(len(dm), bool)
+        # sum of the distances of each node to the others
+        sums = numpy.array([full_row(i).sum() for i in range(len(dm))])
+        # distances of each row in increasing order, with their columns
+        step = 0
+        created = sorted_at = sorted_len = offsets = values = columns = None
+        sort_rows()
+        count = len(dm)
+        while count > 2:
+            if count <= len(dm) // 2:
+                rows = numpy.flatnonzero(active)
+                dm = dm[numpy.ix_(rows, rows)]
+                clades = [clades[i] for i in rows]
+                active = active[rows]
+                sums = numpy.array([full_row(i)[active].sum() for i in range(len(dm))])
+                sort_rows()
             # calculate nodeDist
-            for i in range(0, len(dm)):
-                node_dist[i] = 0
-                for j in range(0, len(dm)):
-                    node_dist[i] += dm[i, j]
-                node_dist[i] = node_dist[i] / (len(dm) - 2)
-
-            # find minimum distance pair
-            min_dist = dm[1, 0] - node_dist[1] - node_dist[0]
-            min_i = 0
-            min_j = 1
-            for i in range(1, len(dm)):
-                for j in range(0, i):
+            node_dist = sums / (count - 2)
+            max_dist = node_dist[active].max()
+
+            if count == 3:
+                # all pairs tie exactly with three nodes left
+                min_j, min_i = numpy.flatnonzero(active)[:2]
+            elif count == 4:
+                # With four nodes left, each pair ties exactly with its
+                # complement, so recalculate the sums from scratch to avoid
+                # rounding errors from the incremental updates deciding ties.
+                rows = numpy.flatnonzero(active)
+                for i in rows:
+                    node_dist[i] = sum(full_row(i)[active].tolist()) / 2
+                min_dist = numpy.inf
+                for i, j in ((1, 0), (2, 0), (2, 1), (3, 0), (3, 1), (3, 2)):
+                    i = rows[i]
+                    j = rows[j]
                     temp = dm[i, j] - node_dist[i] - node_dist[j]
                     if min_dist > temp:
                         min_dist = temp
                         min_i = i
                         min_j = j
+            else:
+                min_i, min_j = min_pair()
+            rows = numpy.flatnonzero(active[: min_i + 1])
+            if len(rows) == 2 and min_j == rows[0]:
+                # a minimum in the first pair is reported in reverse order
+                min_i, min_j = min_j, min_i
             # create clade
             clade1 = clades[min_i]
             clade2 = clades[min_j]
@@ -769,35 +1451,47 @@ class DistanceTreeConstructor(TreeConstructor):
             inner_clade.clades.append(clade1)
             inner_clade.clades.append(clade2)
             # assign branch length
+            distance = float(dm[min_i, min_j])
             clade1.branch_length = (
-                dm[min_i, min_j] + node_dist[min_i] - node_dist[min_j]
+                distance + float(node_dist[min_i]) - float(node_dist[min_j])
             ) / 2.0
-            clade2.branch_length = dm[min_i, min_j] - clade1.branch_length
+            clade2.branch_length = distance - clade1.branch_length
 
             # update node list
             clades[min_j] = inner_clade
-            del clades[min_i]
+            active[min_i] = False
+            count -= 1
 
-            # rebuild distance matrix,
             # set the distances of new node at the index of min_j
-            for k in range(0, len(dm)):
-                if k != min_i and k != min_j:
-                    dm[min_j, k] = (
-                        dm[min_i, k] + dm[min_j, k] - dm[min_i, min_j]
-                    ) / 2.0
-
-            dm.names[min_j] = "Inner" + str(inner_count)
-            del dm[min_i]
-
+            row_i = full_row(min_i)
+            row_j = full_row(min_j)
+            row = (row_i + row_j - distance) / 2.0
+            # update the sums of the distances
+            sums[active] += row[active] - row_i[active] - row_j[active]
+            sums[min_j] = row[active].sum()
+            sums[min_i] = 0
+            row[min_i] = numpy.inf
+            row[min_j] = numpy.inf
+            dm[min_j, :] = row
+            dm[:, min_j] = row
+            dm[min_i, :] = numpy.inf
+            dm[:, min_i] = numpy.inf
+            step += 1
+            created[min_j] = step
+            sort_row(min_j)
+
+        rows = numpy.flatnonzero(active)
+        distance = float(dm[rows[1], rows[0]])
+        clades = [clades[i] for i in rows]
         # set the last clade as one of the child of the inner_clade
         root = None
         if clades[0] == inner_clade:
             clades[0].branch_length = 0
-            clades[1].branch_length = dm[1, 0]
+            clades[1].branch_length = distance
             clades[0].clades.append(clades[1])
             root = clades[0]
         else:
-            clades[0].branch_length = dm[1, 0]
+            clades[0].branch_length = distance
             clades[1].branch_length = 0
             clades[1].clades.append(clades[0])
             root = clades[1]
@@ -842,19 +1536,29 @@ class TreeSearcher:
 class NNITreeSearcher(TreeSearcher):
     """Tree searching with Nearest Neighbor Interchanges (NNI) algorithm.
 
+    With a ParsimonyScorer, the neighbor trees are not built; instead the
+    score of each interchange is calculated incrementally, by updating the
+    parsimony states of the two clades involved and of their ancestors only.
+
     :Parameters:
         scorer : ParsimonyScorer
             parsimony scorer to calculate the parsimony score of
             different trees during NNI algorithm.
+        workers : int
+            number of processes used to score the interchanges with a
+            ParsimonyScorer (default 1, scoring them in this process).
 
     """
 
-    def __init__(self, scorer):
+    def __init__(self, scorer, workers=1):
         """Initialize the class."""
         if isinstance(scorer, Scorer):
             self.scorer = scorer
         else:
             raise TypeError("Must provide a Scorer object.")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
 
     def search(self, starting_tree, alignment):
         """Implement the TreeSearcher.search method.
@@ -871,6 +1575,14 @@ class NNITreeSearcher(TreeSearcher):
 
     def _nni(self, starting_tree, alignment):
         """Search for the best parsimony tree using the NNI algorithm (PRIVATE)."""
+        if (
+            isinstance(self.scorer, ParsimonyScorer)
+            and type(self.scorer).get_score is ParsimonyScorer.get_score
+        ):
+            if self.workers == 1:
+                return self._nni_parsimony(starting_tree, alignment, None)
+            with ProcessPoolExecutor(self.workers) as executor:
+                return self._nni_parsimony(starting_tree, alignment, executor)
         best_tree = starting_tree
         while True:
             best_score = self.scorer.get_score(best_tree, alignment)
@@ -885,6 +1597,53 @@ class NNITreeSearcher(TreeSearcher):
                 break
         return best_tree
 
+    def _nni_parsimony(self, starting_tree, alignment, executor):
+        """Search for the best parsimony tree with a ParsimonyScorer (PRIVATE).
+
+        This makes the same choices as _nni, but scores the neighbor trees
+        incrementally and only builds the best one.
+        """
+        state = self.scorer._get_state(starting_tree, alignment)
+        best_tree = starting_tree
+        clades = list(starting_tree.find_clades(order="postorder"))
+        # The changed scores of each interchange remain valid as long as
+        # the clades used to calculate them do not change.
+        cache = {}
+        while True:
+            moves = state.get_moves()
+            versions = state.versions
+            todo = [
+                move
+                for move in moves
+                if move not in cache
+                or any(versions[k] != version for k, version in cache[move][1])
+            ]
+            if executor is None or len(todo) < 2:
+                results = _score_moves(state, todo)
+            else:
+                size = -(-len(todo) // self.workers)
+                chunks = [todo[i : i + size] for i in range(0, len(todo), size)]
+                results = []
+                for chunk_results in executor.map(
+                    _score_moves, [state] * len(chunks), chunks
+                ):
+                    results.extend(chunk_results)
+            for move, (scores, used) in zip(todo, results):
+                cache[move] = (scores, [(k, versions[k]) for k in used])
+            cache = {move: cache[move] for move in moves}
+            scores = [state.get_score(cache[move][0]) for move in moves]
+            # stop if no smaller score exist
+            if not scores or min(scores) >= state.score:
+                break
+            move = moves[scores.index(min(scores))]
+            if best_tree is starting_tree:
+                best_tree = copy.deepcopy(starting_tree)
+                clades = list(best_tree.find_clades(order="postorder"))
+            state.apply_move(move)
+            for index, children in move:
+                clades[index].clades = [clades[child] for child in children]
+        return best_tree
+
     def _get_neighbors(self, tree):
         """Get all neighbor trees of the given tree (PRIVATE).
 
@@ -1015,6 +1774,16 @@ class ParsimonyScorer(Scorer):
         Calculate and return the parsimony score given a tree and the
         MSA using either the Fitch algorithm (without a penalty matrix)
         or the Sankoff algorithm (with a matrix).
+
+        Identical alignment columns are scored once, and the Fitch states
+        are stored as bitsets, with one bit for each letter.
+        """
+        return self._get_state(tree, alignment).score
+
+    def _get_state(self, tree, alignment):
+        """Calculate the parsimony states of all clades of the tree (PRIVATE).
+
+        The clades are numbered in postorder.
         """
         # make sure the tree is rooted and bifurcating
         if not tree.is_bifurcating():
@@ -1025,71 +1794,211 @@ class ParsimonyScorer(Scorer):
         terms = tree.get_terminals()
         terms.sort(key=lambda term: term.name)
         alignment.sort()
-        if not all(t.name == a.id for t, a in zip(terms, alignment)):
+        if len(alignment) < len(terms) or not all(
+            t.name == a.id for t, a in zip(terms, alignment)
+        ):
             raise ValueError(
                 "Taxon names of the input tree should be the same with the alignment."
             )
-        # term_align = dict(zip(terms, alignment))
+        array = alignment.as_array()[: len(terms)]
+        # score each distinct column once, skipping non-informative columns
+        patterns, weights = numpy.unique(array, axis=1, return_counts=True)
+        informative = (patterns != patterns[:1]).any(axis=0)
+        patterns = patterns[:, informative]
+        weights = weights[informative]
+        if self.matrix:
+            # Sankoff algorithm with the penalty matrix
+            alphabet = self.matrix.names
+            size = len(alphabet)
+            costs = numpy.array(
+                [[self.matrix[i, j] for j in range(size)] for i in range(size)], float
+            )
+            indices = numpy.full(256, -1)
+            for i, letter in enumerate(alphabet):
+                if len(letter) == 1 and ord(letter) < 256:
+                    indices[ord(letter)] = i
+            indices = indices[patterns]
+            if (indices < 0).any():
+                letter = chr(patterns[indices < 0][0])
+                raise ValueError(f"'{letter}' is not in the scoring matrix")
+            states = numpy.full(indices.shape + (size,), numpy.inf)
+            numpy.put_along_axis(states, indices[:, :, None], 0, axis=2)
+        else:
+            # Fitch algorithm without the penalty matrix, with bitsets
+            costs = None
+            letters = numpy.unique(patterns)
+            bits = numpy.zeros(256, numpy.uint64 if len(letters) <= 64 else object)
+            for i, letter in enumerate(letters):
+                bits[letter] = 1 << i
+            states = bits[patterns]
+        terminals = dict(zip(map(id, terms), states))
+        clades = list(tree.find_clades(order="postorder"))
+        index = {id(clade): i for i, clade in enumerate(clades)}
+        children = [[index[id(child)] for child in clade.clades] for clade in clades]
+        states = [terminals.get(id(clade)) for clade in clades]
+        return _ParsimonyState(children, states, weights, costs)
+
+
+class _ParsimonyState:
+    """Parsimony states of the clades of a tree, for incremental scoring (PRIVATE).
+
+    The clades are numbered in postorder, so that the root is the last one,
+    and their states are arrays with one element (a bitset of letters for
+    the Fitch algorithm) or one row (of costs for each letter for the
+    Sankoff algorithm) for each site pattern. The score of the tree is the
+    sum of the scores of the clades.
+    """
+
+    def __init__(self, children, states, weights, costs=None):
+        """Calculate the states of the internal clades (PRIVATE)."""
+        self.children = children
+        self.parents = [None] * len(children)
+        for i, clade_children in enumerate(children):
+            for child in clade_children:
+                self.parents[child] = i
+        self.weights = weights
+        self.costs = costs
+        self.root = len(children) - 1
+        self.states = states
+        self.scores = [0] * len(children)
+        # incremented whenever the state or score of a clade changes
+        self.versions = [0] * len(children)
+        for i, clade_children in enumerate(children):
+            if clade_children:
+                states[i], self.scores[i] = self._combine(
+                    i, [states[child] for child in clade_children]
+                )
+        self.score = sum(self.scores)
+
+    def _combine(self, i, states):
+        """Return the state and score of clade i from those of its children (PRIVATE)."""
+        if self.costs is None:
+            # Fitch algorithm
+            state = states[0]
+            score = 0
+            for other in states[1:]:
+                common = state & other
+                empty = common == 0
+                state = numpy.where(empty, state | other, common)
+                score += int(empty.dot(self.weights))
+            return state, score
+        # Sankoff algorithm
+        costs = self.costs
+        state = sum((costs + child[:, None, :]).min(axis=2) for child in states)
         score = 0
-        for i in range(len(alignment[0])):
-            # parsimony score for column_i
-            score_i = 0
-            # get column
-            column_i = alignment[:, i]
-            # skip non-informative column
-            if column_i == len(column_i) * column_i[0]:
-                continue
+        if i == self.root:
+            score = float((self.weights * state.min(axis=1)).sum())
+        return state, score
 
-            # start calculating score_i using the tree and column_i
-
-            # Fitch algorithm without the penalty matrix
-            if not self.matrix:
-                # init by mapping terminal clades and states in column_i
-                clade_states = dict(zip(terms, [{c} for c in column_i]))
-                for clade in tree.get_nonterminals(order="postorder"):
-                    clade_childs = clade.clades
-                    left_state = clade_states[clade_childs[0]]
-                    right_state = clade_states[clade_childs[1]]
-                    state = left_state & right_state
-                    if not state:
-                        state = left_state | right_state
-                        score_i = score_i + 1
-                    clade_states[clade] = state
-            # Sankoff algorithm with the penalty matrix
-            else:
-                inf = float("inf")
-                # init score arrays for terminal clades
-                alphabet = self.matrix.names
-                length = len(alphabet)
-                clade_scores = {}
-                for j in range(len(column_i)):
-                    array = [inf] * length
-                    index = alphabet.index(column_i[j])
-                    array[index] = 0
-                    clade_scores[terms[j]] = array
-                # bottom up calculation
-                for clade in tree.get_nonterminals(order="postorder"):
-                    clade_childs = clade.clades
-                    left_score = clade_scores[clade_childs[0]]
-                    right_score = clade_scores[clade_childs[1]]
-                    array = []
-                    for m in range(length):
-                        min_l = inf
-                        min_r = inf
-                        for n in range(length):
-                            sl = self.matrix[alphabet[m], alphabet[n]] + left_score[n]
-                            sr = self.matrix[alphabet[m], alphabet[n]] + right_score[n]
-                            if min_l > sl:
-                                min_l = sl
-                            if min_r > sr:
-                                min_r = sr
-                        array.append(min_l + min_r)
-                    clade_scores[clade] = array
-                # minimum from root score
-                score_i = min(array)
-                # TODO: resolve internal states
-            score = score + score_i
-        return score
+    def _update(self, move):
+        """Calculate the states and scores changed by an interchange (PRIVATE).
+
+        The move gives the new children of two clades, either a clade and
+        its parent, or the two children of the root. Returns the changed
+        states and scores, and the clades whose state or score was used.
+        """
+        (i, children_i), (j, children_j) = move
+        states = {}
+        scores = {}
+        used = set()
+        for k, children in ((i, children_i), (j, children_j)):
+            used.update(children)
+            states[k], scores[k] = self._combine(
+                k, [states.get(child, self.states[child]) for child in children]
+            )
+        k = self.parents[j]
+        while k is not None:
+            used.update(self.children[k])
+            state, scores[k] = self._combine(
+                k, [states.get(child, self.states[child]) for child in self.children[k]]
+            )
+            if numpy.array_equal(state, self.states[k]):
+                # the ancestors are not affected
+                break
+            states[k] = state
+            k = self.parents[k]
+        used.update(scores)
+        return states, scores, used
+
+    def get_score(self, scores):
+        """Return the score of the tree with some changed clade scores (PRIVATE)."""
+        if self.costs is None:
+            return self.score + sum(
+                score - self.scores[k] for k, score in scores.items()
+            )
+        # only the root has a score with the Sankoff algorithm
+        return scores.get(self.root, self.score)
+
+    def apply_move(self, move):
+        """Make an interchange, updating the states and scores (PRIVATE)."""
+        states, scores, used = self._update(move)
+        for k, children in move:
+            self.children[k] = list(children)
+            for child in children:
+                self.parents[child] = k
+        for k, state in states.items():
+            self.states[k] = state
+        self.score = self.get_score(scores)
+        for k, score in scores.items():
+            self.scores[k] = score
+            self.versions[k] += 1
+
+    def get_moves(self):
+        """Return the interchanges giving the neighbors of the tree (PRIVATE).
+
+        Each move is a tuple of two pairs of a clade and a tuple of its new
+        children, listed in the same order as the trees from _get_neighbors
+        of NNITreeSearcher.
+        """
+        moves = []
+        children = self.children
+        root = self.root
+        level = [root] if children[root] else []
+        for k in level:
+            level.extend(child for child in children[k] if children[child])
+        root_children = children[root][:2]
+        for k in level:
+            if k == root:
+                left, right = root_children
+                if children[left] and children[right]:
+                    left_left, left_right = children[left]
+                    right_left, right_right = children[right]
+                    moves.append(
+                        (
+                            (left, (left_left, right_right)),
+                            (right, (right_left, left_right)),
+                        )
+                    )
+                    moves.append(
+                        (
+                            (left, (left_left, right_left)),
+                            (right, (left_right, right_right)),
+                        )
+                    )
+            elif k not in root_children:
+                left, right = children[k]
+                parent = self.parents[k]
+                siblings = children[parent]
+                if k == siblings[0]:
+                    sister = siblings[1]
+                    others = tuple(siblings[2:])
+                    moves.append(((k, (left, sister)), (parent, (k, *others, right))))
+                    moves.append(((k, (sister, right)), (parent, (k, *others, left))))
+                else:
+                    sister = siblings[0]
+                    others = tuple(siblings[1:])
+                    moves.append(((k, (left, sister)), (parent, (right, *others))))
+                    moves.append(((k, (sister, right)), (parent, (left, *others))))
+        return moves
+
+
+def _score_moves(state, moves):
+    """Return the changed scores and the clades used for each interchange (PRIVATE)."""
+    results = []
+    for move in moves:
+        states, scores, used = state._update(move)
+        results.append((scores, used))
+    return results
 
 
 class ParsimonyTreeConstructor(TreeConstructor):
@@ -361,6 +361,8 @@ import warnings
 
 from math import log
 
+import numpy as np
+
 from Bio import BiopythonParserWarning
 from Bio import BiopythonWarning
 from Bio import StreamModeError
@@ -522,6 +524,72 @@ def phred_quality_from_solexa(solexa_quality):
     return 10 * log(10 ** (solexa_quality / 10.0) + 1, 10)
 
 
+def quality_trim_index(phred_quality, threshold=20):
+    """Return the index at which to trim low quality bases from the 3' end.
+
+    This uses the same algorithm as BWA and cutadapt: working backwards from
+    the 3' end, the threshold minus each PHRED quality is summed, and the
+    read is cut where this partial sum is largest (stopping as soon as the
+    partial sum goes negative). The PHRED qualities can be a list of integers
+    or a NumPy array (as from FastqPhredIterator with as_array=True):
+
+    >>> qualities = [30, 30, 30, 30, 30, 5, 30, 10, 3, 2]
+    >>> quality_trim_index(qualities, 20)
+    5
+    >>> quality_trim_index(qualities, 4)
+    8
+
+    If no bases need trimming, the length of the read is returned, so you can
+    always use this as the end of a slice, for example on a SeqRecord:
+
+    >>> quality_trim_index([40, 40, 40], 20)
+    3
+    """
+    qualities = np.asarray(phred_quality)
+    length = len(qualities)
+    if not length:
+        return 0
+    # Work from the 3' end, with the partial sums as in BWA:
+    partial_sums = np.cumsum(threshold - qualities[::-1].astype(np.int64))
+    negative = np.flatnonzero(partial_sums < 0)
+    if len(negative):
+        partial_sums = partial_sums[: negative[0]]
+        if not len(partial_sums):
+            return length
+    best = int(np.argmax(partial_sums))
+    if partial_sums[best] <= 0:
+        return length
+    return length - 1 - best
+
+
+def expected_errors(phred_quality):
+    """Return the expected number of errors in a read from its PHRED qualities.
+
+    This is the sum of the error probabilities, 10**(-Q/10), over all the
+    bases, and is the measure used by the maximum expected error filters in
+    tools like USEARCH and DADA2. The PHRED qualities can be a list of
+    integers or a NumPy array (as from FastqPhredIterator with as_array=True):
+
+    >>> print("%0.3f" % expected_errors([10, 20, 30]))
+    0.111
+    >>> print("%0.3f" % expected_errors([]))
+    0.000
+
+    For example, to keep only those reads with at most one expected error:
+
+    >>> from Bio.SeqIO.QualityIO import FastqPhredIterator
+    >>> good = [
+    ...     record
+    ...     for record in FastqPhredIterator("Quality/example.fastq", as_array=True)
+    ...     if expected_errors(record.letter_annotations["phred_quality"]) <= 1
+    ... ]
+    >>> len(good)
+    3
+    """
+    qualities = np.asarray(phred_quality, dtype=float)
+    return float(np.sum(10.0 ** (-qualities / 10.0)))
+
+
 def _get_phred_quality(record):
     """Extract PHRED qualities from a SeqRecord's letter_annotations (PRIVATE).
 
@@ -544,6 +612,36 @@ def _get_phred_quality(record):
         ) from None
 
 
+def _quality_table(mapping):
+    """Turn a quality to character dictionary into a lookup table (PRIVATE).
+
+    Returns the lowest quality score in the mapping, and a NumPy array of the
+    ASCII codes for each consecutive quality score from there on.
+    """
+    low = min(mapping)
+    high = max(mapping)
+    codes = "".join(mapping[q] for q in range(low, high + 1))
+    return low, np.frombuffer(codes.encode("ascii"), np.uint8)
+
+
+def _quality_str_from_array(qualities, table):
+    """Encode an integer NumPy quality array using a lookup table (PRIVATE).
+
+    Returns None if the array is not of an integer type, or holds a value
+    outside the lookup table, in which case the caller should fall back on
+    the slower pure Python code (which deals with truncation warnings etc).
+    """
+    if not isinstance(qualities, np.ndarray) or qualities.dtype.kind not in "iu":
+        return None
+    low, codes = table
+    if not len(qualities):
+        return ""
+    indices = qualities.astype(np.intp) - low
+    if indices.min() < 0 or indices.max() >= len(codes):
+        return None
+    return codes[indices].tobytes().decode("ascii")
+
+
 # Only map 0 to 93, we need to give a warning on truncating at 93
 _phred_to_sanger_quality_str = {
     qp: chr(min(126, qp + SANGER_SCORE_OFFSET)) for qp in range(0, 93 + 1)
@@ -553,6 +651,8 @@ _solexa_to_sanger_quality_str = {
     qs: chr(min(126, int(round(phred_quality_from_solexa(qs)) + SANGER_SCORE_OFFSET)))
     for qs in range(-5, 93 + 1)
 }
+_phred_to_sanger_quality_table = _quality_table(_phred_to_sanger_quality_str)
+_solexa_to_sanger_quality_table = _quality_table(_solexa_to_sanger_quality_str)
 
 
 def _get_sanger_quality_str(record):
@@ -624,6 +724,10 @@ def _get_sanger_quality_str(record):
         # Fall back on solexa scores...
         pass
     else:
+        # Vectorised lookup for NumPy integer arrays:
+        quality_str = _quality_str_from_array(qualities, _phred_to_sanger_quality_table)
+        if quality_str is not None:
+            return quality_str
         # Try and use the precomputed mapping:
         try:
             return "".join(_phred_to_sanger_quality_str[qp] for qp in qualities)
@@ -648,6 +752,10 @@ def _get_sanger_quality_str(record):
             "No suitable quality scores found in "
             "letter_annotations of SeqRecord (id=%s)." % record.id
         ) from None
+    # Vectorised lookup for NumPy integer arrays:
+    quality_str = _quality_str_from_array(qualities, _solexa_to_sanger_quality_table)
+    if quality_str is not None:
+        return quality_str
     # Try and use the precomputed mapping:
     try:
         return "".join(_solexa_to_sanger_quality_str[qs] for qs in qualities)
@@ -679,6 +787,8 @@ _solexa_to_illumina_quality_str = {
     qs: chr(int(round(phred_quality_from_solexa(qs))) + SOLEXA_SCORE_OFFSET)
     for qs in range(-5, 62 + 1)
 }
+_phred_to_illumina_quality_table = _quality_table(_phred_to_illumina_quality_str)
+_solexa_to_illumina_quality_table = _quality_table(_solexa_to_illumina_quality_str)
 
 
 def _get_illumina_quality_str(record):
@@ -699,6 +809,12 @@ def _get_illumina_quality_str(record):
         # Fall back on solexa scores...
         pass
     else:
+        # Vectorised lookup for NumPy integer arrays:
+        quality_str = _quality_str_from_array(
+            qualities, _phred_to_illumina_quality_table
+        )
+        if quality_str is not None:
+            return quality_str
         # Try and use the precomputed mapping:
         try:
             return "".join(_phred_to_illumina_quality_str[qp] for qp in qualities)
@@ -723,6 +839,10 @@ def _get_illumina_quality_str(record):
             "No suitable quality scores found in "
             "letter_annotations of SeqRecord (id=%s)." % record.id
         ) from None
+    # Vectorised lookup for NumPy integer arrays:
+    quality_str = _quality_str_from_array(qualities, _solexa_to_illumina_quality_table)
+    if quality_str is not None:
+        return quality_str
     # Try and use the precomputed mapping:
     try:
         return "".join(_solexa_to_illumina_quality_str[qs] for qs in qualities)
@@ -754,6 +874,8 @@ _phred_to_solexa_quality_str = {
     qp: chr(min(126, int(round(solexa_quality_from_phred(qp))) + SOLEXA_SCORE_OFFSET))
     for qp in range(0, 62 + 1)
 }
+_solexa_to_solexa_quality_table = _quality_table(_solexa_to_solexa_quality_str)
+_phred_to_solexa_quality_table = _quality_table(_phred_to_solexa_quality_str)
 
 
 def _get_solexa_quality_str(record):
@@ -774,6 +896,12 @@ def _get_solexa_quality_str(record):
         # Fall back on PHRED scores...
         pass
     else:
+        # Vectorised lookup for NumPy integer arrays:
+        quality_str = _quality_str_from_array(
+            qualities, _solexa_to_solexa_quality_table
+        )
+        if quality_str is not None:
+            return quality_str
         # Try and use the precomputed mapping:
         try:
             return "".join(_solexa_to_solexa_quality_str[qs] for qs in qualities)
@@ -798,6 +926,10 @@ def _get_solexa_quality_str(record):
             "No suitable quality scores found in "
             "letter_annotations of SeqRecord (id=%s)." % record.id
         ) from None
+    # Vectorised lookup for NumPy integer arrays:
+    quality_str = _quality_str_from_array(qualities, _phred_to_solexa_quality_table)
+    if quality_str is not None:
+        return quality_str
     # Try and use the precomputed mapping:
     try:
         return "".join(_phred_to_solexa_quality_str[qp] for qp in qualities)
@@ -819,6 +951,36 @@ def _get_solexa_quality_str(record):
     )
 
 
+def _decode_table(offset, low, high, dtype):
+    """Build a lookup table from ASCII codes to quality scores (PRIVATE).
+
+    Characters outside the valid range map to a sentinel value which cannot
+    be a valid score (the maximum or minimum of the data type).
+    """
+    info = np.iinfo(dtype)
+    sentinel = info.max if low >= 0 else info.min
+    table = np.full(256, sentinel, dtype)
+    table[low + offset : high + offset + 1] = np.arange(low, high + 1)
+    return table
+
+
+_sanger_to_phred_table = _decode_table(SANGER_SCORE_OFFSET, 0, 93, np.uint8)
+_illumina_to_phred_table = _decode_table(SOLEXA_SCORE_OFFSET, 0, 62, np.uint8)
+_solexa_to_solexa_table = _decode_table(SOLEXA_SCORE_OFFSET, -5, 62, np.int8)
+
+
+def _quality_array(quality_string, table):
+    """Decode a FASTQ quality string into a NumPy array via a lookup table (PRIVATE)."""
+    try:
+        codes = np.frombuffer(quality_string.encode("latin-1"), np.uint8)
+    except UnicodeEncodeError:
+        raise ValueError("Invalid character in quality string") from None
+    qualities = table[codes]
+    if len(qualities) and (qualities == table[0]).any():
+        raise ValueError("Invalid character in quality string")
+    return qualities
+
+
 # TODO - Default to nucleotide or even DNA?
 def FastqGeneralIterator(source):
     """Iterate over Fastq records as string tuples (not as SeqRecord objects).
@@ -991,10 +1153,176 @@ def FastqGeneralIterator(source):
             handle.close()
 
 
+class FastqBatch:
+    """A block of FASTQ records held in NumPy arrays.
+
+    This is what the FastqBatchReader returns, with the following attributes:
+
+     - titles - list of the title lines (without the leading "@") as strings
+     - sequences - all the sequences concatenated together, as a NumPy array
+       of ASCII codes (numpy.uint8)
+     - qualities - all the quality strings concatenated together, again as
+       a NumPy array of ASCII codes (numpy.uint8), still offset encoded
+     - offsets - NumPy array of len(titles) + 1 integers, where the sequence
+       and quality of record i are sequences[offsets[i]:offsets[i + 1]] and
+       qualities[offsets[i]:offsets[i + 1]]
+
+    >>> batch = next(FastqBatchReader("Quality/example.fastq"))
+    >>> len(batch)
+    3
+    >>> print(batch.offsets)
+    [ 0 25 50 75]
+    >>> title, seq, qual = batch[0]
+    >>> print(title)
+    EAS54_6_R1_2_1_413_324
+    >>> print(seq)
+    CCCTTCTTGTCTTCAGCGTTTCTCC
+    >>> print(qual)
+    ;;3;;;;;;;;;;;;7;;;;;;;88
+    """
+
+    def __init__(self, titles, sequences, qualities, offsets):
+        """Initialize the batch (normally done by FastqBatchReader)."""
+        self.titles = titles
+        self.sequences = sequences
+        self.qualities = qualities
+        self.offsets = offsets
+
+    def __len__(self):
+        """Return the number of records in the batch."""
+        return len(self.titles)
+
+    def __getitem__(self, index):
+        """Return record index as a (title, sequence, quality) tuple of strings.
+
+        This matches the tuples returned by the FastqGeneralIterator.
+        """
+        if index < 0:
+            index += len(self.titles)
+        if not 0 <= index < len(self.titles):
+            raise IndexError("record index out of range")
+        start = self.offsets[index]
+        end = self.offsets[index + 1]
+        return (
+            self.titles[index],
+            self.sequences[start:end].tobytes().decode("ascii"),
+            self.qualities[start:end].tobytes().decode("ascii"),
+        )
+
+    def __iter__(self):
+        """Iterate over the records as (title, sequence, quality) tuples."""
+        for index in range(len(self.titles)):
+            yield self[index]
+
+    @property
+    def lengths(self):
+        """Return the sequence lengths as a NumPy array."""
+        return np.diff(self.offsets)
+
+    def phred_quality(self, offset=SANGER_SCORE_OFFSET):
+        """Return the concatenated PHRED qualities as a numpy.uint8 array.
+
+        The default offset of 33 is for Sanger style FASTQ files, use 64 for
+        Illumina 1.3 to 1.7 files. Old Solexa style files do not hold PHRED
+        scores, and are not supported here.
+
+        >>> batch = next(FastqBatchReader("Quality/example.fastq"))
+        >>> qualities = batch.phred_quality()
+        >>> print(qualities[batch.offsets[1] : batch.offsets[2]])
+        [26 26 26 26 26 26 26 26 26 26 26 22 26 26 26 26 26 12 26 26 26 18 26 23 18]
+
+        The mean PHRED quality of each read can then be computed as follows,
+        (this simple example would fail on an empty read), taking care to sum
+        the qualities as larger integers to avoid overflow:
+
+        >>> totals = np.add.reduceat(qualities, batch.offsets[:-1], dtype=np.int64)
+        >>> print(totals / batch.lengths)
+        [ 25.28  24.52  23.4 ]
+        """
+        if offset == SANGER_SCORE_OFFSET:
+            table = _sanger_to_phred_table
+        elif offset == SOLEXA_SCORE_OFFSET:
+            table = _illumina_to_phred_table
+        else:
+            raise ValueError("Offset should be 33 or 64, not %r" % offset)
+        qualities = table[self.qualities]
+        if len(qualities) and (qualities == table[0]).any():
+            raise ValueError("Invalid character in quality string")
+        return qualities
+
+
+class FastqBatchReader:
+    """Iterate over FASTQ files returning blocks of records as NumPy arrays.
+
+    Arguments:
+     - source - input stream opened in text mode, or a path to a file
+     - batch_size - maximum number of records in each batch (default 10000)
+
+    This is built on the FastqGeneralIterator, and like it does not try to
+    interpret the quality strings numerically. Rather than a (title, sequence,
+    quality) tuple of strings per record, this returns FastqBatch objects
+    holding many records, which avoids the per-record object overhead when
+    working on huge files. The sequences and qualities of all the records in
+    the batch are concatenated into two NumPy arrays, with an array of offsets
+    marking where each record starts and ends. This allows calculations over
+    all the records in a batch at once, for example the GC content of reads:
+
+    >>> with open("Quality/example.fastq") as handle:
+    ...     for batch in FastqBatchReader(handle, batch_size=2):
+    ...         gc = np.isin(batch.sequences, np.frombuffer(b"GCgc", np.uint8))
+    ...         counts = np.add.reduceat(gc, batch.offsets[:-1], dtype=np.int64)
+    ...         print(len(batch), batch.lengths, counts)
+    ...
+    2 [25 25] [13 15]
+    1 [25] [18]
+
+    If the file contains empty reads, np.add.reduceat should be applied to
+    only the non-empty records (i.e. those with batch.lengths > 0).
+    """
+
+    def __init__(self, source, batch_size=10000):
+        """Create the iterator, see the class docstring for details."""
+        if batch_size < 1:
+            raise ValueError("batch_size should be at least one, not %r" % batch_size)
+        self.batch_size = batch_size
+        self.records = FastqGeneralIterator(source)
+
+    def __iter__(self):
+        """Iterate over the batches."""
+        return self
+
+    def __next__(self):
+        """Return the next FastqBatch."""
+        titles = []
+        sequences = []
+        qualities = []
+        for title, seq, qual in self.records:
+            titles.append(title)
+            sequences.append(seq)
+            qualities.append(qual)
+            if len(titles) == self.batch_size:
+                break
+        if not titles:
+            raise StopIteration
+        offsets = np.zeros(len(titles) + 1, np.int64)
+        np.cumsum([len(seq) for seq in sequences], out=offsets[1:])
+        try:
+            sequences = "".join(sequences).encode("ascii")
+            qualities = "".join(qualities).encode("ascii")
+        except UnicodeEncodeError:
+            raise ValueError("Non-ASCII character in FASTQ record") from None
+        return FastqBatch(
+            titles,
+            np.frombuffer(sequences, np.uint8),
+            np.frombuffer(qualities, np.uint8),
+            offsets,
+        )
+
+
 class FastqPhredIterator(SequenceIterator):
     """Parser for FASTQ files."""
 
-    def __init__(self, source, alphabet=None, title2ids=None):
+    def __init__(self, source, alphabet=None, title2ids=None, as_array=False):
         """Iterate over FASTQ records as SeqRecord objects.
 
         Arguments:
@@ -1005,6 +1333,9 @@ class FastqPhredIterator(SequenceIterator):
            description (in that order) for the record as a tuple of strings.
            If this is not given, then the entire title line will be used as
            the description, and the first word as the id and name.
+         - as_array - If True, the qualities are stored as a NumPy array of
+           unsigned 8-bit integers (numpy.uint8) rather than a list of Python
+           integers. This is much faster and uses far less memory.
 
         Note that use of title2ids matches that of Bio.SeqIO.FastaIO.
 
@@ -1057,10 +1388,25 @@ class FastqPhredIterator(SequenceIterator):
         >>> print(record.letter_annotations["phred_quality"])
         [26, 26, 26, 26, 26, 26, 26, 26, 26, 26, 26, 24, 26, 22, 26, 26, 13, 22, 26, 18, 24, 18, 18, 18, 18]
 
+        For large files, you can ask for the qualities as NumPy arrays instead:
+
+        >>> with open("Quality/example.fastq") as handle:
+        ...     for record in FastqPhredIterator(handle, as_array=True):
+        ...         pass
+        >>> qualities = record.letter_annotations["phred_quality"]
+        >>> print(qualities.dtype)
+        uint8
+        >>> print(qualities[:5])
+        [26 26 26 26 26]
+
+        These can be written out again, or used with helper functions like
+        quality_trim_index and expected_errors in this module.
+
         """
         if alphabet is not None:
             raise ValueError("The alphabet argument is no longer supported")
         self.title2ids = title2ids
+        self.as_array = as_array
         super().__init__(source, mode="t", fmt="Fastq")
 
     def parse(self, handle):
@@ -1071,6 +1417,7 @@ class FastqPhredIterator(SequenceIterator):
     def iterate(self, handle):
         """Parse the file and generate SeqRecord objects."""
         title2ids = self.title2ids
+        as_array = self.as_array
         assert SANGER_SCORE_OFFSET == ord("!")
         # Originally, I used a list expression for each record:
         #
@@ -1090,10 +1437,13 @@ class FastqPhredIterator(SequenceIterator):
                 id = descr.split()[0]
                 name = id
             record = SeqRecord(Seq(seq_string), id=id, name=name, description=descr)
-            try:
-                qualities = [q_mapping[letter] for letter in quality_string]
-            except KeyError:
-                raise ValueError("Invalid character in quality string") from None
+            if as_array:
+                qualities = _quality_array(quality_string, _sanger_to_phred_table)
+            else:
+                try:
+                    qualities = [q_mapping[letter] for letter in quality_string]
+                except KeyError:
+                    raise ValueError("Invalid character in quality string") from None
             # For speed, will now use a dirty trick to speed up assigning the
             # qualities. We do this to bypass the length check imposed by the
             # per-letter-annotations restricted dict (as this has already been
@@ -1103,10 +1453,11 @@ class FastqPhredIterator(SequenceIterator):
             yield record
 
 
-def FastqSolexaIterator(source, alphabet=None, title2ids=None):
+def FastqSolexaIterator(source, alphabet=None, title2ids=None, as_array=False):
     r"""Parse old Solexa/Illumina FASTQ like files (which differ in the quality mapping).
 
     The optional arguments are the same as those for the FastqPhredIterator.
+    With as_array=True the Solexa qualities are held as a numpy.int8 array.
 
     For each sequence in Solexa/Illumina FASTQ files there is a matching string
     encoding the Solexa integer qualities using ASCII values with an offset
@@ -1253,21 +1604,25 @@ def FastqSolexaIterator(source, alphabet=None, title2ids=None):
             id = descr.split()[0]
             name = id
         record = SeqRecord(Seq(seq_string), id=id, name=name, description=descr)
-        try:
-            qualities = [q_mapping[letter] for letter in quality_string]
-        # DO NOT convert these into PHRED qualities automatically!
-        except KeyError:
-            raise ValueError("Invalid character in quality string") from None
+        if as_array:
+            qualities = _quality_array(quality_string, _solexa_to_solexa_table)
+        else:
+            try:
+                qualities = [q_mapping[letter] for letter in quality_string]
+            # DO NOT convert these into PHRED qualities automatically!
+            except KeyError:
+                raise ValueError("Invalid character in quality string") from None
         # Dirty trick to speed up this line:
         # record.letter_annotations["solexa_quality"] = qualities
         dict.__setitem__(record._per_letter_annotations, "solexa_quality", qualities)
         yield record
 
 
-def FastqIlluminaIterator(source, alphabet=None, title2ids=None):
+def FastqIlluminaIterator(source, alphabet=None, title2ids=None, as_array=False):
     """Parse Illumina 1.3 to 1.7 FASTQ like files (which differ in the quality mapping).
 
     The optional arguments are the same as those for the FastqPhredIterator.
+    With as_array=True the PHRED qualities are held as a numpy.uint8 array.
 
     For each sequence in Illumina 1.3+ FASTQ files there is a matching string
     encoding PHRED integer qualities using ASCII values with an offset of 64.
@@ -1309,10 +1664,13 @@ def FastqIlluminaIterator(source, alphabet=None, title2ids=None):
             id = descr.split()[0]
             name = id
         record = SeqRecord(Seq(seq_string), id=id, name=name, description=descr)
-        try:
-            qualities = [q_mapping[letter] for letter in quality_string]
-        except KeyError:
-            raise ValueError("Invalid character in quality string") from None
+        if as_array:
+            qualities = _quality_array(quality_string, _illumina_to_phred_table)
+        else:
+            try:
+                qualities = [q_mapping[letter] for letter in quality_string]
+            except KeyError:
+                raise ValueError("Invalid character in quality string") from None
         # Dirty trick to speed up this line:
         # record.letter_annotations["phred_quality"] = qualities
         dict.__setitem__(record._per_letter_annotations, "phred_quality", qualities)
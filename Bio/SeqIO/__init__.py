@@ -114,11 +114,14 @@ Many but not all of the supported input file formats can be indexed like
 this. For example "fasta", "fastq", "qual" and even the binary format "sff"
 work, but alignment formats like "phylip", "clustalw" and "nexus" will not.
 
-In most cases you can also use SeqIO.index to get the record from the file
-as a raw string (not a SeqRecord). This can be useful for example to extract
-a sub-set of records from a file where SeqIO cannot output the file format
-(e.g. the plain text SwissProt format, "swiss") or where it is important to
-keep the output 100% identical to the input). For example,
+If you just need to filter or route the records by their identifiers, the
+iter_raw function will give you the identifier and the raw bytes of each
+record without building SeqRecord objects. In most cases you can also use
+SeqIO.index to get the record from the file as a raw string (not a
+SeqRecord). This can be useful for example to extract a sub-set of records
+from a file where SeqIO cannot output the file format (e.g. the plain text
+SwissProt format, "swiss") or where it is important to keep the output 100%
+identical to the input). For example,
 
 >>> from Bio import SeqIO
 >>> record_dict = SeqIO.index("Fasta/f002", "fasta")
@@ -736,7 +739,7 @@ def to_dict(sequences, key_function=None):
     return d
 
 
-def index(filename, format, alphabet=None, key_function=None):
+def index(filename, format, alphabet=None, key_function=None, persist=False):
     """Indexes a sequence file and returns a dictionary like object.
 
     Arguments:
@@ -746,6 +749,8 @@ def index(filename, format, alphabet=None, key_function=None):
      - key_function - Optional callback function which when given a
        SeqRecord identifier string should return a unique key for the
        dictionary.
+     - persist - Optional boolean, if True the index is saved next to the
+       indexed file (with the extension ".bidx" added) for reuse.
 
     This indexing function will return a dictionary like object, giving the
     SeqRecord objects as values.
@@ -840,6 +845,15 @@ def index(filename, format, alphabet=None, key_function=None):
     to be completely parsed while building the index. Right now this is
     usually avoided.
 
+    For very large files, scanning the file to build the index each time
+    can be slow. Using persist=True saves the keys and offsets to a compact
+    binary index file next to the indexed file (the filename plus ".bidx").
+    Whenever this index file exists and the size and modification time of
+    the indexed file still match, SeqIO.index will use it automatically.
+    The saved index is memory mapped rather than loaded into memory, so
+    this is also much more memory efficient. It cannot be combined with
+    a key_function.
+
     See Also: Bio.SeqIO.index_db() and Bio.SeqIO.to_dict()
 
     """
@@ -855,9 +869,14 @@ def index(filename, format, alphabet=None, key_function=None):
     if alphabet is not None:
         raise ValueError("The alphabet argument is no longer supported")
 
+    if persist and key_function:
+        raise ValueError("Cannot persist the index when using a key_function")
+
     # Map the file format to a sequence iterator:
     from ._index import _FormatToRandomAccess  # Lazy import
     from Bio.File import _IndexedSeqFileDict
+    from Bio.File import _load_offsets_index
+    from Bio.File import _offsets_index_filename
 
     try:
         proxy_class = _FormatToRandomAccess[format]
@@ -869,13 +888,83 @@ def index(filename, format, alphabet=None, key_function=None):
         alphabet,
         key_function,
     )
-    return _IndexedSeqFileDict(
-        proxy_class(filename, format), key_function, repr, "SeqRecord"
+    index_filename = _offsets_index_filename(filename)
+    offsets = None
+    if not key_function:
+        offsets = _load_offsets_index(index_filename, filename, format)
+    records = _IndexedSeqFileDict(
+        proxy_class(filename, format), key_function, repr, "SeqRecord", offsets
     )
+    if persist and offsets is None:
+        records._save_offsets(index_filename, filename, format)
+    return records
+
+
+def iter_raw(handle, format):
+    """Iterate over the raw records in a file without parsing them.
+
+    Arguments:
+     - handle   - filename, or a handle to a file opened in binary mode
+     - format   - lower case string describing the file format, any of
+       the formats supported by Bio.SeqIO.index(...)
+
+    This returns an iterator giving (id, offset, length, data) tuples, where
+    data is a memoryview of the raw bytes of the record. This is useful for
+    jobs which just need to filter or route records by their identifier, as
+    it avoids creating SeqRecord objects:
+
+    >>> from Bio import SeqIO
+    >>> records = SeqIO.iter_raw("Quality/example.fastq", "fastq")
+    >>> for id, offset, length, data in records:
+    ...     print("%s at %i, %i bytes" % (id, offset, length))
+    EAS54_6_R1_2_1_413_324 at 0, 78 bytes
+    EAS54_6_R1_2_1_540_792 at 78, 78 bytes
+    EAS54_6_R1_2_1_443_348 at 156, 78 bytes
+
+    Where possible the file is memory mapped, so no copy of the record is
+    made, otherwise (e.g. for a pipe) the file contents are read into memory.
+    Writing the data back out gives the records exactly as in the input:
+
+    >>> wanted = ["EAS54_6_R1_2_1_413_324", "EAS54_6_R1_2_1_443_348"]
+    >>> with open("Quality/example.fastq", "rb") as handle:
+    ...     for id, offset, length, data in SeqIO.iter_raw(handle, "fastq"):
+    ...         if id in wanted:
+    ...             print(bytes(data).decode(), end="")
+    @EAS54_6_R1_2_1_413_324
+    CCCTTCTTGTCTTCAGCGTTTCTCC
+    +
+    ;;3;;;;;;;;;;;;7;;;;;;;88
+    @EAS54_6_R1_2_1_443_348
+    GTTGCTTCTGGCGTGGGTGGGGGGG
+    +
+    ;;;;;;;;;;;9;7;;.7;393333
+
+    BGZF compressed files are also supported, but as these cannot be memory
+    mapped, each record is decompressed into memory (and the offsets are BGZF
+    virtual offsets). Ordinary GZIP files are not supported.
+
+    The records are given in the order they are found by Bio.SeqIO.index(...),
+    which except for SFF files with an index is the order of the file.
+    """
+    if not isinstance(format, str):
+        raise TypeError("Need a string for the file format (lower case)")
+    if not format:
+        raise ValueError("Format required (lower case string)")
+    if not format.islower():
+        raise ValueError("Format string '%s' should be lower case" % format)
+
+    from ._index import _iter_raw  # Lazy import
+
+    return _iter_raw(handle, format)
 
 
 def index_db(
-    index_filename, filenames=None, format=None, alphabet=None, key_function=None
+    index_filename,
+    filenames=None,
+    format=None,
+    alphabet=None,
+    key_function=None,
+    processes=1,
 ):
     """Index several sequence files and return a dictionary like object.
 
@@ -893,6 +982,8 @@ def index_db(
      - key_function - Optional callback function which when given a
        SeqRecord identifier string should return a unique
        key for the dictionary.
+     - processes - Optional number of worker processes to use when building
+       a new index (default 1).
 
     This indexing function will return a dictionary like object, giving the
     SeqRecord objects as values:
@@ -919,6 +1010,12 @@ def index_db(
     BGZF compressed files are supported, and detected automatically. Ordinary
     GZIP compressed files are not supported.
 
+    When building a new index of many files, or of very large files, you can
+    use the processes argument to scan the files in parallel. Large FASTA and
+    FASTQ files (uncompressed) are also split into pieces at record boundaries
+    which are scanned in parallel. The offsets are then added to the SQLite
+    database in a single transaction.
+
     See Also: Bio.SeqIO.index() and Bio.SeqIO.to_dict(), and the Python module
     glob which is useful for building lists of files.
 
@@ -940,7 +1037,7 @@ def index_db(
         raise ValueError("The alphabet argument is no longer supported")
 
     # Map the file format to a sequence iterator:
-    from ._index import _FormatToRandomAccess  # Lazy import
+    from ._index import _proxy_factory  # Lazy import
     from Bio.File import _SQLiteManySeqFilesDict
 
     repr = "SeqIO.index_db(%r, filenames=%r, format=%r, key_function=%r)" % (
@@ -950,15 +1047,14 @@ def index_db(
         key_function,
     )
 
-    def proxy_factory(format, filename=None):
-        """Given a filename returns proxy object, else boolean if format OK."""
-        if filename:
-            return _FormatToRandomAccess[format](filename, format)
-        else:
-            return format in _FormatToRandomAccess
-
     return _SQLiteManySeqFilesDict(
-        index_filename, filenames, proxy_factory, format, key_function, repr
+        index_filename,
+        filenames,
+        _proxy_factory,
+        format,
+        key_function,
+        repr,
+        processes=processes,
     )
 
 
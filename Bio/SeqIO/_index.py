@@ -25,6 +25,8 @@ sequencing. If memory is an issue, the index_db(...) interface stores the
 keys and offsets in an SQLite database - which can be re-used to avoid
 re-indexing the file for use another time.
 """
+import io
+import mmap
 import re
 
 from io import BytesIO
@@ -40,7 +42,11 @@ class SeqFileRandomAccess(_IndexedSeqFileProxy):
 
     def __init__(self, filename, format):
         """Initialize the class."""
-        self._handle = _open_for_random_access(filename)
+        if isinstance(filename, mmap.mmap):
+            # Used by _iter_raw, this can be used just like a binary handle
+            self._handle = filename
+        else:
+            self._handle = _open_for_random_access(filename)
         self._format = format
         # Load the parser class/function once an avoid the dict lookup in each
         # __getitem__ call:
@@ -711,3 +717,83 @@ _FormatToRandomAccess = {
     "qual": SequentialSeqFileRandomAccess,
     "uniprot-xml": UniprotRandomAccess,
 }
+
+
+def _proxy_factory(format, filename=None):
+    """Given a filename returns proxy object, else boolean if format OK (PRIVATE).
+
+    This is used by Bio.SeqIO.index_db(...), and is defined at module level
+    so that it can be passed to worker processes.
+    """
+    if filename:
+        return _FormatToRandomAccess[format](filename, format)
+    else:
+        return format in _FormatToRandomAccess
+
+
+def _map_for_raw_access(handle):
+    """Return a memory map of a binary handle, or None if not possible (PRIVATE)."""
+    try:
+        fileno = handle.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        return None
+    try:
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # e.g. a pipe, or an empty file
+        return None
+
+
+def _iter_raw(handle, format):
+    """Iterate over (id, offset, length, memoryview) tuples (PRIVATE).
+
+    This is the implementation of Bio.SeqIO.iter_raw(...).
+    """
+    try:
+        proxy_class = _FormatToRandomAccess[format]
+    except KeyError:
+        raise ValueError("Unsupported format %r" % format) from None
+    try:
+        stream = open(handle, "rb")
+    except TypeError:
+        stream = handle
+    try:
+        magic = stream.read(2)
+        if isinstance(magic, str):
+            raise ValueError("Need a handle in binary mode, not text mode")
+        if magic == b"\x1f\x8b":
+            if stream is handle:
+                raise ValueError(
+                    "Compressed files are only supported by filename, not handle"
+                )
+            # Cannot memory map a compressed file, must decompress each record
+            proxy = proxy_class(handle, format)
+            try:
+                for key, offset, length in proxy:
+                    yield key, offset, length, memoryview(proxy.get_raw(offset))
+            finally:
+                proxy._handle.close()
+            return
+        data = _map_for_raw_access(stream)
+        if data is None:
+            # Not a regular file (e.g. a pipe), or empty, so read it into memory
+            content = magic + stream.read()
+            if not content:
+                return
+            data = mmap.mmap(-1, len(content))
+            data.write(content)
+            data.seek(0)
+            del content
+    finally:
+        if stream is not handle:
+            stream.close()
+    view = memoryview(data)
+    proxy = proxy_class(data, format)
+    for key, offset, length in proxy:
+        if not length:
+            # e.g. SFF files with an index, restore the position afterwards
+            # as the proxy may still be reading the index
+            position = data.tell()
+            length = len(proxy.get_raw(offset))
+            data.seek(position)
+        yield key, offset, length, view[offset : offset + length]
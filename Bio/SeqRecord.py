@@ -13,6 +13,8 @@
 from io import StringIO
 import numbers
 
+import numpy as np
+
 from Bio import StreamModeError
 from Bio.Seq import UndefinedSequenceError
 
@@ -928,7 +930,15 @@ class SeqRecord:
         # Can append matching per-letter-annotation
         for k, v in self.letter_annotations.items():
             if k in other.letter_annotations:
-                answer.letter_annotations[k] = v + other.letter_annotations[k]
+                w = other.letter_annotations[k]
+                if hasattr(v, "__array_interface__") or hasattr(
+                    w, "__array_interface__"
+                ):
+                    # NumPy arrays (e.g. from FASTQ parsed with as_array=True)
+                    # would be added element-wise, so concatenate explicitly:
+                    answer.letter_annotations[k] = np.concatenate((v, w))
+                else:
+                    answer.letter_annotations[k] = v + w
         return answer
 
     def __radd__(self, other):
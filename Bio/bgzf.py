@@ -247,11 +247,15 @@ If your data is in UTF-8 or any other incompatible encoding, you must use
 binary mode, and decode the appropriate fragments yourself.
 """
 
+import os
 import struct
 import sys
+import threading
 import zlib
 
 from builtins import open as _open
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 _bgzf_magic = b"\x1f\x8b\x08\x04"
 _bgzf_header = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00\x42\x43\x02\x00"
@@ -429,11 +433,11 @@ def BgzfBlocks(handle):
         data_start += data_len
 
 
-def _load_bgzf_block(handle, text_mode=False):
-    """Load the next BGZF block of compressed data (PRIVATE).
+def _read_bgzf_block(handle):
+    """Read the next BGZF block of compressed data without inflating it (PRIVATE).
 
-    Returns a tuple (block size and data), or at end of file
-    will raise StopIteration.
+    Returns a tuple (block size, deflate data, CRC, uncompressed size),
+    or at end of file will raise StopIteration.
     """
     magic = handle.read(4)
     if not magic:
@@ -465,10 +469,23 @@ def _load_bgzf_block(handle, text_mode=False):
     assert block_size is not None, "Missing BC, this isn't a BGZF file!"
     # Now comes the compressed data, CRC, and length of uncompressed data.
     deflate_size = block_size - 1 - extra_len - 19
-    d = zlib.decompressobj(-15)  # Negative window size means no headers
-    data = d.decompress(handle.read(deflate_size)) + d.flush()
+    compressed = handle.read(deflate_size)
     expected_crc = handle.read(4)
     expected_size = struct.unpack("<I", handle.read(4))[0]
+    return block_size, compressed, expected_crc, expected_size
+
+
+def _inflate_bgzf_block(
+    block_size, compressed, expected_crc, expected_size, text_mode=False
+):
+    """Decompress and check the raw data of a BGZF block (PRIVATE).
+
+    Takes the values returned by _read_bgzf_block, and returns a tuple
+    (block size and data). This does not touch the file handle, so can
+    safely be called from a worker thread (zlib releases the GIL).
+    """
+    d = zlib.decompressobj(-15)  # Negative window size means no headers
+    data = d.decompress(compressed) + d.flush()
     if expected_size != len(data):
         raise RuntimeError("Decompressed to %i, not %i" % (len(data), expected_size))
     # Should cope with a mix of Python platforms...
@@ -487,6 +504,175 @@ def _load_bgzf_block(handle, text_mode=False):
         return block_size, data
 
 
+def _load_bgzf_block(handle, text_mode=False):
+    """Load the next BGZF block of compressed data (PRIVATE).
+
+    Returns a tuple (block size and data), or at end of file
+    will raise StopIteration.
+    """
+    return _inflate_bgzf_block(*_read_bgzf_block(handle), text_mode)
+
+
+def _compress_bgzf_block(block, compresslevel=6):
+    """Compress data as a single BGZF block, returning the raw bytes (PRIVATE).
+
+    This does not touch any file handle, so can safely be called from
+    a worker thread (zlib releases the GIL).
+    """
+    assert len(block) <= 65536
+    # Giving a negative window bits means no gzip/zlib headers,
+    # -15 used in samtools
+    c = zlib.compressobj(compresslevel, zlib.DEFLATED, -15, zlib.DEF_MEM_LEVEL, 0)
+    compressed = c.compress(block) + c.flush()
+    del c
+    if len(compressed) > 65536:
+        raise RuntimeError("TODO - Didn't compress enough, try less data in this block")
+    bsize = struct.pack("<H", len(compressed) + 25)  # includes -1
+    crc = struct.pack("<I", zlib.crc32(block) & 0xFFFFFFFF)
+    uncompressed_length = struct.pack("<I", len(block))
+    # Fixed 16 bytes,
+    # gzip magic bytes (4) mod time (4),
+    # gzip flag (1), os (1), extra length which is six (2),
+    # sub field which is BC (2), sub field length of two (2),
+    # Variable data,
+    # 2 bytes: block length as BC sub field (2)
+    # X bytes: the data
+    # 8 bytes: crc (4), uncompressed data length (4)
+    return _bgzf_header + bsize + compressed + crc + uncompressed_length
+
+
+class _HandleToken:
+    """Identifies the blocks cached for a handle without a file name (PRIVATE)."""
+
+
+def _file_identity(handle):
+    """Return a hashable key identifying the file of a handle (PRIVATE).
+
+    For a file on disk, this is the absolute file name together with the
+    device, inode, size and modification time, so that handles on the same
+    file share cached blocks while a file replaced under the same name does
+    not. Otherwise, a new token unique to the handle is returned.
+    """
+    name = getattr(handle, "name", None)
+    if isinstance(name, (str, bytes)):
+        try:
+            stat = os.fstat(handle.fileno())
+        except (AttributeError, OSError, ValueError):
+            pass
+        else:
+            return (
+                os.path.abspath(name),
+                stat.st_dev,
+                stat.st_ino,
+                stat.st_size,
+                stat.st_mtime_ns,
+            )
+    return _HandleToken()
+
+
+class BgzfBlockCache:
+    """Least recently used (LRU) cache of decompressed BGZF blocks.
+
+    This is used by the BgzfReader class to keep recently used blocks in
+    memory, which is important for the performance of random access. The
+    cache can be limited by the number of blocks (max_blocks), and/or by
+    the total size of the decompressed data (max_bytes). When either limit
+    would be exceeded, the least recently used blocks are discarded.
+
+    A single cache can be shared by several BgzfReader handles, e.g. when
+    the same file is opened more than once, by passing it as the cache
+    argument. The blocks are stored under the file name and its identity on
+    disk, so sharing a cache between different files is also safe.
+
+    >>> cache = BgzfBlockCache(max_bytes=2**20)
+    >>> handle1 = BgzfReader("SamBam/ex1.bam", "rb", cache=cache)
+    >>> handle2 = BgzfReader("SamBam/ex1.bam", "rb", cache=cache)
+    >>> cache.hits, cache.misses
+    (1, 1)
+    >>> handle1.close()
+    >>> handle2.close()
+
+    The hits and misses counters record how many times a requested block
+    was (or was not) found in the cache, which is useful for tuning the
+    cache size.
+    """
+
+    def __init__(self, max_blocks=100, max_bytes=None):
+        """Initialize the class."""
+        if max_blocks is not None and max_blocks < 1:
+            raise ValueError("Use max_blocks with a minimum of 1")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("Use max_bytes with a minimum of 1")
+        self.max_blocks = max_blocks
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        # Python dictionaries keep their insertion order, so the
+        # first entry is always the least recently used block:
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of blocks in the cache."""
+        return len(self._blocks)
+
+    def __contains__(self, key):
+        """Return True if the block is in the cache (does not count as a hit)."""
+        return key in self._blocks
+
+    def get(self, key):
+        """Return the cached (data, raw block length) tuple, or None if missing.
+
+        Found blocks are marked as the most recently used.
+        """
+        with self._lock:
+            try:
+                value = self._blocks.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._blocks[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Add a (data, raw block length) tuple to the cache.
+
+        Least recently used blocks are discarded as needed to respect the
+        size limits, but the new block itself is always kept.
+        """
+        size = len(value[0])
+        with self._lock:
+            blocks = self._blocks
+            old = blocks.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old[0])
+            while blocks and (
+                (self.max_blocks is not None and len(blocks) >= self.max_blocks)
+                or (self.max_bytes is not None and self.nbytes + size > self.max_bytes)
+            ):
+                self.nbytes -= len(blocks.pop(next(iter(blocks)))[0])
+            blocks[key] = value
+            self.nbytes += size
+
+    def _discard(self, prefix):
+        """Remove the blocks whose keys start with the given tuple (PRIVATE)."""
+        n = len(prefix)
+        with self._lock:
+            blocks = self._blocks
+            for key in [key for key in blocks if key[:n] == prefix]:
+                self.nbytes -= len(blocks.pop(key)[0])
+
+    def clear(self):
+        """Remove all the blocks from the cache (and reset the counters)."""
+        with self._lock:
+            self._blocks = {}
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
 class BgzfReader:
     r"""BGZF reader, acts like a read only handle but seek/tell differ.
 
@@ -550,14 +736,43 @@ class BgzfReader:
     block can be up to 64kb, the default cache could take up to 6MB of
     RAM. The cache is not important for reading through the file in one
     pass, but is important for improving performance of random access.
+    Alternatively, use the max_cache_bytes argument to limit the total
+    size of the cached (decompressed) data. The least recently used blocks
+    are discarded first. You can also pass a BgzfBlockCache object as the
+    cache argument, for example to share one cache between several handles
+    on the same file. The cache is available as the cache attribute, which
+    records the number of cache hits and misses.
+
+    You can use the threads argument to decompress BGZF blocks using a
+    pool of worker threads (zlib releases the GIL while it is working).
+    The raw blocks following the current block are read ahead from disk,
+    and decompressed in the background. This speeds up reading through
+    large files, while the virtual offsets used by seek and tell are
+    exactly the same as with the default single thread:
+
+    >>> with BgzfReader("SamBam/ex1.bam", "rb", threads=4) as handle:
+    ...     data = handle.read(65540)
+    ...     print(handle.tell())
+    1195311108
     """
 
-    def __init__(self, filename=None, mode="r", fileobj=None, max_cache=100):
+    def __init__(
+        self,
+        filename=None,
+        mode="r",
+        fileobj=None,
+        max_cache=100,
+        threads=1,
+        max_cache_bytes=None,
+        cache=None,
+    ):
         """Initialize the class."""
         # TODO - Assuming we can seek, check for 28 bytes EOF empty block
         # and if missing warn about possible truncation (as in samtools)?
         if max_cache < 1:
             raise ValueError("Use max_cache with a minimum of 1")
+        if threads < 1:
+            raise ValueError("Use threads with a minimum of 1")
         # Must open the BGZF file in binary mode, but we may want to
         # treat the contents as either text or binary (unicode or
         # bytes under Python 3)
@@ -578,9 +793,23 @@ class BgzfReader:
             self._newline = b"\n"
         self._handle = handle
         self.max_cache = max_cache
-        self._buffers = {}
+        self.threads = threads
+        if cache is None:
+            cache = BgzfBlockCache(max_cache, max_cache_bytes)
+        self.cache = cache
+        # Blocks are cached under the file name and its identity on disk (if
+        # any), so that a cache can be shared between handles on the same
+        # file; binary and text data must be kept apart as well:
+        self._cache_key = (_file_identity(handle), self._text)
         self._block_start_offset = None
         self._block_raw_length = None
+        # Blocks being decompressed in the background, keyed by start offset
+        self._pending = {}
+        self._read_ahead_offset = None
+        if threads > 1:
+            self._executor = ThreadPoolExecutor(threads)
+        else:
+            self._executor = None
         self._load_block(handle.tell())
 
     def _load_block(self, start_offset=None):
@@ -592,23 +821,21 @@ class BgzfReader:
         if start_offset == self._block_start_offset:
             self._within_block_offset = 0
             return
-        elif start_offset in self._buffers:
+        cached = self.cache.get(self._cache_key + (start_offset,))
+        if cached is not None:
             # Already in cache
-            self._buffer, self._block_raw_length = self._buffers[start_offset]
+            self._buffer, self._block_raw_length = cached
             self._within_block_offset = 0
             self._block_start_offset = start_offset
             return
-        # Must hit the disk... first check cache limits,
-        while len(self._buffers) >= self.max_cache:
-            # TODO - Implemente LRU cache removal?
-            self._buffers.popitem()
-        # Now load the block
-        handle = self._handle
-        if start_offset is not None:
-            handle.seek(start_offset)
-        self._block_start_offset = handle.tell()
+        # Must hit the disk...
+        if self._executor is not None:
+            load = self._load_threaded_block
+        else:
+            load = self._load_serial_block
+        self._block_start_offset = start_offset
         try:
-            block_size, self._buffer = _load_bgzf_block(handle, self._text)
+            block_size, self._buffer = load(start_offset)
         except StopIteration:
             # EOF
             block_size = 0
@@ -618,8 +845,55 @@ class BgzfReader:
                 self._buffer = b""
         self._within_block_offset = 0
         self._block_raw_length = block_size
-        # Finally save the block in our cache,
-        self._buffers[self._block_start_offset] = self._buffer, block_size
+        # Finally save the block in our cache (discarding old blocks if full),
+        self.cache.put(
+            self._cache_key + (self._block_start_offset,), (self._buffer, block_size)
+        )
+
+    def _load_serial_block(self, start_offset):
+        """Read and decompress the block at the given offset (PRIVATE)."""
+        handle = self._handle
+        handle.seek(start_offset)
+        return _load_bgzf_block(handle, self._text)
+
+    def _load_threaded_block(self, start_offset):
+        """Return the block at the given offset using the worker threads (PRIVATE).
+
+        If the block was not already read ahead (e.g. at the start of the
+        file or after a seek), any pending blocks are discarded and the read
+        ahead restarts from this block.
+        """
+        future = self._pending.pop(start_offset, None)
+        if future is None:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending = {}
+            self._read_ahead_offset = start_offset
+            self._read_ahead()
+            future = self._pending.pop(start_offset, None)
+            if future is None:
+                # EOF
+                raise StopIteration
+        self._read_ahead()
+        return future.result()
+
+    def _read_ahead(self):
+        """Read raw blocks from disk and queue them for decompression (PRIVATE)."""
+        if self._read_ahead_offset is None:
+            # Already reached EOF
+            return
+        handle = self._handle
+        handle.seek(self._read_ahead_offset)
+        while len(self._pending) < 2 * self.threads:
+            try:
+                raw = _read_bgzf_block(handle)
+            except StopIteration:
+                self._read_ahead_offset = None
+                break
+            self._pending[self._read_ahead_offset] = self._executor.submit(
+                _inflate_bgzf_block, *raw, self._text
+            )
+            self._read_ahead_offset += raw[0]
 
     def tell(self):
         """Return a 64-bit unsigned BGZF virtual offset."""
@@ -732,10 +1006,19 @@ class BgzfReader:
 
     def close(self):
         """Close BGZF file."""
+        if self._executor is not None:
+            for future in self._pending.values():
+                future.cancel()
+            self._executor.shutdown()
+            self._executor = None
+        self._pending = None
         self._handle.close()
         self._buffer = None
         self._block_start_offset = None
-        self._buffers = None
+        if isinstance(self._cache_key[0], _HandleToken):
+            # No other handle can use these blocks
+            self.cache._discard(self._cache_key)
+        self.cache = None
 
     def seekable(self):
         """Return True indicating the BGZF supports random access."""
@@ -759,10 +1042,21 @@ class BgzfReader:
 
 
 class BgzfWriter:
-    """Define a BGZFWriter object."""
+    """Define a BGZFWriter object.
+
+    Use the threads argument to compress the BGZF blocks in parallel
+    using a pool of worker threads (zlib releases the GIL while it is
+    compressing). The blocks are still written to disk in order, so the
+    output is identical to that produced with a single thread. Note that
+    calling the tell method must wait for any queued blocks to be written.
+    """
 
-    def __init__(self, filename=None, mode="w", fileobj=None, compresslevel=6):
+    def __init__(
+        self, filename=None, mode="w", fileobj=None, compresslevel=6, threads=1
+    ):
         """Initilize the class."""
+        if threads < 1:
+            raise ValueError("Use threads with a minimum of 1")
         if fileobj:
             assert filename is None
             handle = fileobj
@@ -778,42 +1072,33 @@ class BgzfWriter:
         self._handle = handle
         self._buffer = b""
         self.compresslevel = compresslevel
+        self.threads = threads
+        self._pending = deque()
+        if threads > 1:
+            self._executor = ThreadPoolExecutor(threads)
+        else:
+            self._executor = None
 
     def _write_block(self, block):
         """Write provided data to file as a single BGZF compressed block (PRIVATE)."""
         # print("Saving %i bytes" % len(block))
-        start_offset = self._handle.tell()
-        assert len(block) <= 65536
-        # Giving a negative window bits means no gzip/zlib headers,
-        # -15 used in samtools
-        c = zlib.compressobj(
-            self.compresslevel, zlib.DEFLATED, -15, zlib.DEF_MEM_LEVEL, 0
+        if self._executor is None:
+            self._handle.write(_compress_bgzf_block(block, self.compresslevel))
+            return
+        self._pending.append(
+            self._executor.submit(_compress_bgzf_block, block, self.compresslevel)
         )
-        compressed = c.compress(block) + c.flush()
-        del c
-        if len(compressed) > 65536:
-            raise RuntimeError(
-                "TODO - Didn't compress enough, try less data in this block"
-            )
-        crc = zlib.crc32(block)
-        # Should cope with a mix of Python platforms...
-        if crc < 0:
-            crc = struct.pack("<i", crc)
-        else:
-            crc = struct.pack("<I", crc)
-        bsize = struct.pack("<H", len(compressed) + 25)  # includes -1
-        crc = struct.pack("<I", zlib.crc32(block) & 0xFFFFFFFF)
-        uncompressed_length = struct.pack("<I", len(block))
-        # Fixed 16 bytes,
-        # gzip magic bytes (4) mod time (4),
-        # gzip flag (1), os (1), extra length which is six (2),
-        # sub field which is BC (2), sub field length of two (2),
-        # Variable data,
-        # 2 bytes: block length as BC sub field (2)
-        # X bytes: the data
-        # 8 bytes: crc (4), uncompressed data length (4)
-        data = _bgzf_header + bsize + compressed + crc + uncompressed_length
-        self._handle.write(data)
+        # Write out any finished blocks (in order), but wait on the oldest
+        # block if too many are queued up to limit the memory used:
+        pending = self._pending
+        while pending and (pending[0].done() or len(pending) > 2 * self.threads):
+            self._handle.write(pending.popleft().result())
+
+    def _write_pending(self):
+        """Wait for and write out any blocks still being compressed (PRIVATE)."""
+        pending = self._pending
+        while pending:
+            self._handle.write(pending.popleft().result())
 
     def write(self, data):
         """Write method for the class."""
@@ -844,6 +1129,7 @@ class BgzfWriter:
             self._buffer = self._buffer[65535:]
         self._write_block(self._buffer)
         self._buffer = b""
+        self._write_pending()
         self._handle.flush()
 
     def close(self):
@@ -856,12 +1142,21 @@ class BgzfWriter:
         """
         if self._buffer:
             self.flush()
+        self._write_pending()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
         self._handle.write(_bgzf_eof)
         self._handle.flush()
         self._handle.close()
 
     def tell(self):
-        """Return a BGZF 64-bit virtual offset."""
+        """Return a BGZF 64-bit virtual offset.
+
+        When using multiple threads, this must first wait for all the
+        blocks queued for compression to be written to disk.
+        """
+        self._write_pending()
         return make_virtual_offset(self._handle.tell(), len(self._buffer))
 
     def seekable(self):
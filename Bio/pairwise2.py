@@ -262,16 +262,27 @@ Some examples:
   Self-defined match functions must take the two residues to be compared and
   return a score.
 
+For two strings (or sequence objects), with the match scores given as
+numbers or a dictionary and the same gap scores for both sequences, the C
+implementation of ``Bio.Align.PairwiseAligner`` is used to calculate the score
+if only the score is requested (``score_only=True``), and to find the global
+alignment if there is only one optimal alignment. In all other cases, and for
+local alignments with ``penalize_end_gaps`` (for which the scores differ), the
+alignments are found by the dynamic programming code in this module.
+
 To see a description of the parameters for a function, please look at
 the docstring for the function via the help function, e.g.
 type ``help(pairwise2.align.localds)`` at the Python prompt.
 
 """  # noqa: W291
 
+import functools
 import warnings
 from collections import namedtuple
 
 from Bio import BiopythonWarning
+from Bio.Align import PairwiseAligner
+from Bio.Align import substitution_matrices
 
 
 MAX_ALIGNMENTS = 1000  # maximum alignments recovered in traceback
@@ -550,6 +561,24 @@ def _align(
             BiopythonWarning,
         )
 
+    if not force_generic:
+        aligner = _get_aligner(
+            sequenceA,
+            sequenceB,
+            match_fn,
+            gap_A_fn,
+            gap_B_fn,
+            penalize_end_gaps,
+            align_globally,
+        )
+        if aligner is not None:
+            if score_only:
+                return aligner.score(sequenceA, sequenceB)
+            if align_globally:
+                alignments = _unique_alignment(aligner, sequenceA, sequenceB, gap_char)
+                if alignments is not None:
+                    return alignments
+
     if (
         (not force_generic)
         and isinstance(gap_A_fn, affine_penalty)
@@ -628,6 +657,186 @@ def _align(
     return alignments
 
 
+def _configure_aligner(aligner, align_globally, gap_scores):
+    """Set the mode and gap scores of a PairwiseAligner (PRIVATE).
+
+    gap_scores is a tuple (open, extend, penalize_extend_when_opening,
+    penalize_end_gaps) with the gap scores of both sequences.
+    """
+    open, extend, penalize_extend, end_gaps = gap_scores
+    if penalize_extend:
+        open += extend
+    aligner.mode = "global" if align_globally else "local"
+    aligner.open_gap_score = open
+    aligner.extend_gap_score = extend
+    # Gaps in sequenceA are gaps in the target of the aligner
+    if not end_gaps[0]:
+        aligner.target_end_gap_score = 0
+    if not end_gaps[1]:
+        aligner.query_end_gap_score = 0
+    return aligner
+
+
+@functools.lru_cache(maxsize=32)
+def _identity_aligner(align_globally, gap_scores, match, mismatch):
+    """Return a PairwiseAligner for an identity_match (PRIVATE)."""
+    aligner = PairwiseAligner()
+    aligner.match_score = match
+    aligner.mismatch_score = mismatch
+    return _configure_aligner(aligner, align_globally, gap_scores)
+
+
+@functools.lru_cache(maxsize=32)
+def _dictionary_aligner(align_globally, gap_scores, items, symmetric):
+    """Return a PairwiseAligner for a dictionary_match (PRIVATE).
+
+    Returns a tuple of the aligner and the set of letter pairs which are not
+    in the score dictionary, or None if the keys are not pairs of letters.
+    """
+    score_dict = dict(items)
+    letters = set()
+    for key in score_dict:
+        try:
+            charA, charB = key
+        except (TypeError, ValueError):
+            return None
+        if not (isinstance(charA, str) and isinstance(charB, str)):
+            return None
+        if len(charA) != 1 or len(charB) != 1:
+            return None
+        letters.update(key)
+    alphabet = "".join(sorted(letters))
+    matrix = substitution_matrices.Array(alphabet, dims=2)
+    missing = set()
+    for charA in alphabet:
+        for charB in alphabet:
+            if (charA, charB) in score_dict:
+                matrix[charA, charB] = score_dict[(charA, charB)]
+            elif symmetric and (charB, charA) in score_dict:
+                matrix[charA, charB] = score_dict[(charB, charA)]
+            else:
+                missing.add((charA, charB))
+    aligner = PairwiseAligner()
+    aligner.substitution_matrix = matrix
+    return _configure_aligner(aligner, align_globally, gap_scores), missing
+
+
+def _get_aligner(
+    sequenceA,
+    sequenceB,
+    match_fn,
+    gap_A_fn,
+    gap_B_fn,
+    penalize_end_gaps,
+    align_globally,
+):
+    """Return a C PairwiseAligner giving the same scores, if possible (PRIVATE).
+
+    Returns None if the score may differ from the dynamic programming in this
+    module, or would not be faster, so that the caller falls back to it.
+    This is the case for lists and Python callback functions, different gap
+    scores for both sequences, local alignments with penalized end gaps, and
+    short sequences with an identity_match.
+    """
+    if isinstance(sequenceA, list) or isinstance(sequenceB, list):
+        return None
+    if type(gap_A_fn) is not affine_penalty or type(gap_B_fn) is not affine_penalty:
+        return None
+    gap_scores = (
+        gap_A_fn.open,
+        gap_A_fn.extend,
+        gap_A_fn.penalize_extend_when_opening,
+    )
+    if gap_scores != (
+        gap_B_fn.open,
+        gap_B_fn.extend,
+        gap_B_fn.penalize_extend_when_opening,
+    ):
+        return None
+    end_gaps = (bool(penalize_end_gaps[0]), bool(penalize_end_gaps[1]))
+    if not align_globally and (end_gaps[0] or end_gaps[1]):
+        return None
+    gap_scores = (gap_scores[0], gap_scores[1], bool(gap_scores[2]), end_gaps)
+    if type(match_fn) is identity_match:
+        if len(sequenceA) * len(sequenceB) < 400:
+            return None
+        aligner = _identity_aligner(
+            align_globally, gap_scores, match_fn.match, match_fn.mismatch
+        )
+    elif type(match_fn) is dictionary_match:
+        score_dict = match_fn.score_dict
+        if isinstance(score_dict, substitution_matrices.Array):
+            if score_dict.ndim != 2:
+                return None
+            alphabet = score_dict.alphabet
+            if not isinstance(alphabet, str):
+                return None
+            missing = ()
+            aligner = PairwiseAligner()
+            aligner.substitution_matrix = score_dict
+            _configure_aligner(aligner, align_globally, gap_scores)
+        elif isinstance(score_dict, dict):
+            try:
+                items = tuple(score_dict.items())
+                value = _dictionary_aligner(
+                    align_globally, gap_scores, items, bool(match_fn.symmetric)
+                )
+            except TypeError:  # unhashable scores
+                return None
+            if value is None:
+                return None
+            aligner, missing = value
+            alphabet = aligner.substitution_matrix.alphabet
+        else:
+            return None
+        # Fall back if a score is not defined, raising the same KeyError
+        lettersA = set(sequenceA)
+        lettersB = set(sequenceB)
+        if not lettersA.issubset(alphabet) or not lettersB.issubset(alphabet):
+            return None
+        for charA, charB in missing:
+            if charA in lettersA and charB in lettersB:
+                return None
+    else:
+        return None
+    return aligner
+
+
+def _unique_alignment(aligner, sequenceA, sequenceB, gap_char):
+    """Return the optimal global alignment found by a PairwiseAligner (PRIVATE).
+
+    If there is only one optimal alignment, the traceback in this module finds
+    the same one, unless it has a gap in sequenceA followed by a gap in
+    sequenceB, which the traceback does not allow. Returns None if there are
+    several optimal alignments or if the gaps are in that order.
+    """
+    alignments = iter(aligner.align(sequenceA, sequenceB))
+    alignment = next(alignments)
+    if next(alignments, None) is not None:
+        return None
+    ali_seqA = []
+    ali_seqB = []
+    gap_in_A = False
+    coordinates = alignment.coordinates.transpose().tolist()
+    for (startA, startB), (endA, endB) in zip(coordinates[:-1], coordinates[1:]):
+        if startA == endA:
+            ali_seqA.append(gap_char * (endB - startB))
+            ali_seqB.append(sequenceB[startB:endB])
+            gap_in_A = True
+        elif startB == endB:
+            if gap_in_A:
+                return None
+            ali_seqA.append(sequenceA[startA:endA])
+            ali_seqB.append(gap_char * (endA - startA))
+        else:
+            ali_seqA.append(sequenceA[startA:endA])
+            ali_seqB.append(sequenceB[startB:endB])
+            gap_in_A = False
+    ali_seqA = "".join(ali_seqA)
+    ali_seqB = "".join(ali_seqB)
+    return _clean_alignments([(ali_seqA, ali_seqB, alignment.score, 0, None)])
+
+
 def _make_score_matrix_generic(
     sequenceA,
     sequenceB,
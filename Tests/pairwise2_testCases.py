@@ -843,6 +843,146 @@ AAAABBBAAAACCCCCCCCCCCCCCAAAABBBAAAA
         )
 
 
+class TestPairwiseAlignerScores(unittest.TestCase):
+    """Compare scores calculated by PairwiseAligner with the generic functions."""
+
+    seq1 = "GAACTTGCAGTCAATGGAACTTGCAGTCAATG"
+    seq2 = "GACTTCCAGATTCAAGGACTTCCAGATTCAAG"
+
+    def check(self, function, *args, **kwargs):
+        """Check the score against those of the dynamic programming code."""
+        score = function(*args, score_only=True, **kwargs)
+        expected = function(*args, score_only=True, force_generic=True, **kwargs)
+        self.assertAlmostEqual(score, expected)
+        alignments = function(*args, **kwargs)
+        if alignments:
+            self.assertAlmostEqual(score, alignments[0].score)
+
+    def test_global(self):
+        seq1, seq2 = self.seq1, self.seq2
+        self.check(pairwise2.align.globalxx, seq1, seq2)
+        self.check(pairwise2.align.globalms, seq1, seq2, 2, -1, -2, -0.5)
+        self.check(pairwise2.align.globalmd, seq1, seq2, 5, -4, -10, -1, -10, -1)
+        for penalize_end_gaps in [(True, False), (False, True), False]:
+            self.check(
+                pairwise2.align.globalms,
+                seq1,
+                seq2[5:],
+                2,
+                -1,
+                -2,
+                -1,
+                penalize_end_gaps=penalize_end_gaps,
+                penalize_extend_when_opening=True,
+            )
+
+    def test_local(self):
+        seq1, seq2 = self.seq1, self.seq2
+        self.check(pairwise2.align.localxx, seq1, seq2)
+        self.check(pairwise2.align.localms, seq1, seq2, 2, -1, -2, -0.5)
+        self.check(pairwise2.align.localms, seq1, seq2, 1, -2, -1, -1)
+        self.assertEqual(pairwise2.align.localxx("A" * 20, "C" * 20), [])
+        self.assertEqual(
+            pairwise2.align.localxx("A" * 20, "C" * 20, score_only=True), 0
+        )
+
+    def test_matrix(self):
+        blosum62 = substitution_matrices.load("BLOSUM62")
+        seq1 = "LSPADKTNVKAAWGKVGAHAGEY"
+        seq2 = "LTPEEKSAVTALWGKVNVDEVGGE"
+        self.check(pairwise2.align.globalds, seq1, seq2, blosum62, -10, -0.5)
+        self.check(pairwise2.align.localds, seq1, seq2, blosum62, -10, -0.5)
+        # Only one triangle of the dictionary is given:
+        match_dict = {("A", "A"): 1.5, ("A", "T"): 0.5, ("T", "T"): 1.0}
+        self.check(pairwise2.align.globaldx, "ATAT", "ATT", match_dict)
+        self.check(pairwise2.align.localds, "ATAT", "ATT", match_dict, -1, -0.5)
+
+    def test_fallback(self):
+        """Test the cases where the scores of PairwiseAligner differ."""
+        # Different gap scores for both sequences
+        self.assertEqual(
+            pairwise2.align.globalmd(
+                "I", "R", 5, -3, -5, -0.5, -1, -0.5, score_only=True
+            ),
+            -2.5,
+        )
+        # Local alignments with penalized end gaps
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", BiopythonWarning)
+            self.assertEqual(
+                pairwise2.align.localms(
+                    "GTTTATC",
+                    "AGGCTGATTGG",
+                    5,
+                    0,
+                    -5,
+                    0,
+                    penalize_end_gaps=(True, False),
+                    score_only=True,
+                ),
+                15,
+            )
+
+    def test_alignments(self):
+        """Test the alignments are found by the dynamic programming code."""
+        # Tutorial example
+        seq1 = "MVLSPADKTNVKAAWGKVGAHAGEYGAEALERMFLSFPTTKTYFPHFDLSHGSAQVKGHGKKVADALTNAVAHVDDMPNALSALSDLHAHKLRVDPVNFKLLSHCLLVTLAAHLPAEFTPAVHASLDKFLASVSTVLTSKYR"
+        seq2 = "MVHLTPEEKSAVTALWGKVNVDEVGGEALGRLLVVYPWTQRFFESFGDLSTPDAVMGNPKVKAHGKKVLGAFSDGLAHLDNLKGTFATLSELHCDKLHVDPENFRLLGNVLVCVLAHHFGKEFTPPVQAAYQKVVAGVANALAHKYH"
+        alignments = pairwise2.align.globalxx(seq1, seq2)
+        self.assertEqual(len(alignments), 80)
+        self.assertEqual(
+            alignments, pairwise2.align.globalxx(seq1, seq2, force_generic=True)
+        )
+        self.assertEqual(
+            pairwise2.align.globalxx(seq1, seq2, one_alignment_only=True),
+            alignments[:1],
+        )
+        self.assertEqual(pairwise2.align.globalxx(seq1, seq2, score_only=True), 72)
+
+    def test_unique_alignment(self):
+        """Test a unique optimal global alignment is found by PairwiseAligner."""
+        blosum62 = substitution_matrices.load("BLOSUM62")
+        seq1 = "PADKTNVKAAWGKVGAHAGEYGAEALERMFLSFPTTKTYFPHF"
+        seq2 = "PEEKSAVTALWGKVNVDEVGGEALGRLLVVYPWTQRFFESF"
+        aligner = pairwise2._get_aligner(
+            seq1,
+            seq2,
+            pairwise2.dictionary_match(blosum62),
+            pairwise2.affine_penalty(-10, -0.5, False),
+            pairwise2.affine_penalty(-10, -0.5, False),
+            (True, True),
+            True,
+        )
+        expected = pairwise2.align.globalds(
+            seq1, seq2, blosum62, -10, -0.5, force_generic=True
+        )
+        self.assertEqual(len(expected), 1)
+        self.assertEqual(
+            pairwise2._unique_alignment(aligner, seq1, seq2, "-"), expected
+        )
+        self.assertEqual(
+            pairwise2.align.globalds(seq1, seq2, blosum62, -10, -0.5), expected
+        )
+        self.assertEqual(
+            pairwise2.align.globalds(
+                seq1, seq2, blosum62, -10, -0.5, one_alignment_only=True
+            ),
+            expected,
+        )
+        # Several optimal alignments are found by the dynamic programming code
+        seq1, seq2 = "GA" * 15, "GA" * 10
+        aligner = pairwise2._get_aligner(
+            seq1,
+            seq2,
+            pairwise2.identity_match(1, 0),
+            pairwise2.affine_penalty(0, 0, False),
+            pairwise2.affine_penalty(0, 0, False),
+            (True, True),
+            True,
+        )
+        self.assertIsNone(pairwise2._unique_alignment(aligner, seq1, seq2, "-"))
+
+
 class TestOtherFunctions(unittest.TestCase):
     """Test remaining non-tested private methods."""
 
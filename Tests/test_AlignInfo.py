@@ -162,6 +162,42 @@ X  0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0
         )
         self.assertAlmostEqual(ic, 7.546, places=3)
 
+    def test_weights(self):
+        a = MultipleSeqAlignment(
+            [
+                SeqRecord(Seq("GTATC"), id="ID001", annotations={"weight": 0.5}),
+                SeqRecord(Seq("AT--C"), id="ID002", annotations={"weight": 0.8}),
+                SeqRecord(Seq("CTGTC"), id="ID003", annotations={"weight": 1.0}),
+            ]
+        )
+        s = SummaryInfo(a)
+        self.assertEqual(s.dumb_consensus(), "XTXTC")
+        self.assertEqual(s.dumb_consensus(threshold=0.5), "XTXTC")
+        self.assertEqual(s.dumb_consensus(require_multiple=True), "XTXTC")
+        self.assertEqual(s.gap_consensus(), "XTXXC")
+        self.assertEqual(s.gap_consensus(threshold=0.6), "XTXTC")
+        m = s.pos_specific_score_matrix()
+        self.assertEqual(
+            str(m),
+            """    A   C   G   T
+X  0.8 1.0 0.5 0.0
+T  0.0 0.0 0.0 2.3
+X  0.5 0.0 1.0 0.0
+T  0.0 0.0 0.0 1.5
+C  0.0 2.3 0.0 0.0
+""",
+        )
+        expected = {"A": 0.25, "G": 0.25, "T": 0.25, "C": 0.25}
+        ic = s.information_content(e_freq_table=expected, chars_to_ignore=["-"])
+        self.assertAlmostEqualList(
+            s.ic_vector, [0.4690, 2.0, 1.0817, 2.0, 2.0], places=4
+        )
+        self.assertAlmostEqual(ic, sum(s.ic_vector))
+        ic = s.information_content(start=1, end=3, e_freq_table=expected)
+        self.assertAlmostEqualList(s.ic_vector, [2.0, 0.3033], places=4)
+        with self.assertRaises(ValueError):
+            s.information_content(e_freq_table={"A": 0.5, "C": 0.5})
+
 
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
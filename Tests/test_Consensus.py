@@ -9,7 +9,8 @@ import os
 import unittest
 import tempfile
 
-# from io import StringIO
+from io import StringIO
+
 from Bio import AlignIO
 from Bio import Phylo
 from Bio.Phylo import BaseTree
@@ -66,6 +67,23 @@ class ConsensusTest(unittest.TestCase):
         self.assertEqual(bitstr_counts[_BitString("00011")][0], 1)
         self.assertEqual(bitstr_counts[_BitString("01111")][0], 1)
 
+    def test_count_clades_terminal_order(self):
+        # the clades are matched by the names of their terminals
+        trees = [
+            Phylo.read(StringIO("((A,B),(C,(D,E)));"), "newick"),
+            Phylo.read(StringIO("(((E,D),C),(B,A));"), "newick"),
+        ]
+        bitstr_counts, len_trees = Consensus._count_clades(trees)
+        self.assertEqual(len_trees, 2)
+        self.assertEqual(len(bitstr_counts), 4)
+        self.assertEqual(bitstr_counts[_BitString("11111")][0], 2)
+        self.assertEqual(bitstr_counts[_BitString("11000")][0], 2)
+        self.assertEqual(bitstr_counts[_BitString("00111")][0], 2)
+        self.assertEqual(bitstr_counts[_BitString("00011")][0], 2)
+        trees.append(Phylo.read(StringIO("((A,B),(C,(D,F)));"), "newick"))
+        self.assertRaises(ValueError, Consensus._count_clades, trees)
+        self.assertRaises(ValueError, Consensus.majority_consensus, trees)
+
     def test_strict_consensus(self):
         ref_trees = list(Phylo.parse("./TreeConstruction/strict_refs.tre", "newick"))
         # three trees
@@ -149,6 +167,37 @@ class BootstrapTest(unittest.TestCase):
         self.assertEqual(len(trees), 100)
         self.assertIsInstance(trees[0], BaseTree.Tree)
 
+    def test_bootstrap_seed(self):
+        msa_list = list(Consensus.bootstrap(self.msa, 10, seed=42))
+        self.assertEqual(len(msa_list), 10)
+        columns = {self.msa[:, i] for i in range(self.msa.get_alignment_length())}
+        for replicate in msa_list:
+            self.assertEqual(
+                [record.id for record in replicate], [record.id for record in self.msa]
+            )
+            for i in range(replicate.get_alignment_length()):
+                self.assertIn(replicate[:, i], columns)
+        # replicate i only depends on the seed and on i
+        for replicate, other in zip(
+            msa_list, Consensus.bootstrap(self.msa, 3, seed=42)
+        ):
+            self.assertEqual(format(replicate, "fasta"), format(other, "fasta"))
+
+    def test_bootstrap_trees_workers(self):
+        calculator = DistanceCalculator("blosum62")
+        constructor = DistanceTreeConstructor(calculator)
+        trees = Consensus.bootstrap_trees(self.msa, 10, constructor, seed=1)
+        parallel_trees = Consensus.bootstrap_trees(
+            self.msa, 10, constructor, workers=2, seed=1
+        )
+        # the parallel trees are generated as they are finished
+        self.assertEqual(
+            sorted(tree.format("newick") for tree in parallel_trees),
+            sorted(tree.format("newick") for tree in trees),
+        )
+        with self.assertRaises(ValueError):
+            next(Consensus.bootstrap_trees(self.msa, 10, constructor, workers=0))
+
     def test_bootstrap_consensus(self):
         calculator = DistanceCalculator("blosum62")
         constructor = DistanceTreeConstructor(calculator, "nj")
@@ -207,6 +207,65 @@ class MMCIF2dictTests(unittest.TestCase):
             ],
         )
 
+    def test_categories(self):
+        """Store only the data items of the requested categories."""
+        filename = "PDB/1A8O.cif"
+        mmcif = MMCIF2Dict(filename)
+        atom_site = MMCIF2Dict(filename, ["_atom_site"])
+        self.assertEqual(atom_site["data_"], "1A8O")
+        keys = [key for key in mmcif if key.startswith("_atom_site.")]
+        self.assertEqual(sorted(atom_site), sorted(keys + ["data_"]))
+        for key in keys:
+            self.assertEqual(atom_site[key], mmcif[key])
+        cell = MMCIF2Dict(filename, ["_cell", "_symmetry"])
+        self.assertEqual(cell["_cell.length_a"], mmcif["_cell.length_a"])
+        self.assertEqual(
+            cell["_symmetry.space_group_name_H-M"],
+            mmcif["_symmetry.space_group_name_H-M"],
+        )
+        self.assertNotIn("_atom_site.id", cell)
+        # a single category
+        atom_site = MMCIF2Dict(filename, "_atom_site")
+        self.assertEqual(sorted(atom_site), sorted(keys + ["data_"]))
+
+    def test_as_arrays(self):
+        """Store numeric data items as NumPy arrays."""
+        mmcif_dict = MMCIF2Dict(
+            io.StringIO(
+                "data_test\n"
+                "_cell.length_a 44.770\n"
+                "_cell.Z_PDB 4\n"
+                "_symmetry.space_group_name_H-M 'P 21 21 21'\n"
+                "loop_\n"
+                "_test.int\n"
+                "_test.float\n"
+                "_test.mixed\n"
+                "_test.symmetry\n"
+                "_test.zeros\n"
+                "_test.sign\n"
+                "_test.float_zeros\n"
+                "1 1.5 1 1_555 1 1 0.5\n"
+                "-2 -.5e3 ? 1_555 007 +2 1.5\n"
+                "0 7 2.0 1_555 010 3 00.5\n"
+            ),
+            as_arrays=True,
+        )
+        self.assertEqual(mmcif_dict["data_"], "test")
+        self.assertEqual(mmcif_dict["_cell.length_a"].dtype, float)
+        self.assertEqual(mmcif_dict["_cell.length_a"].tolist(), [44.77])
+        self.assertEqual(mmcif_dict["_cell.Z_PDB"].dtype, int)
+        self.assertEqual(mmcif_dict["_symmetry.space_group_name_H-M"], ["P 21 21 21"])
+        self.assertEqual(mmcif_dict["_test.int"].dtype, int)
+        self.assertEqual(mmcif_dict["_test.int"].tolist(), [1, -2, 0])
+        self.assertEqual(mmcif_dict["_test.float"].dtype, float)
+        self.assertEqual(mmcif_dict["_test.float"].tolist(), [1.5, -500.0, 7.0])
+        self.assertEqual(mmcif_dict["_test.mixed"], ["1", "?", "2.0"])
+        self.assertEqual(mmcif_dict["_test.symmetry"], ["1_555"] * 3)
+        # identifiers that would not read back as the same text
+        self.assertEqual(mmcif_dict["_test.zeros"], ["1", "007", "010"])
+        self.assertEqual(mmcif_dict["_test.sign"], ["1", "+2", "3"])
+        self.assertEqual(mmcif_dict["_test.float_zeros"], ["0.5", "1.5", "00.5"])
+
     def test_splitline(self):
         filename = "PDB/4Q9R_min.cif"
         mmcif = MMCIF2Dict(filename)
@@ -14,6 +14,8 @@ import tempfile
 import unittest
 import warnings
 
+from io import StringIO
+
 try:
     import numpy
     from numpy import dot  # Missing on old PyPy's micronumpy
@@ -225,6 +227,76 @@ class ParseReal(unittest.TestCase):
         structure = parser.get_structure("example", "PDB/2OFG.cif")
         self.assertEqual(len(structure), 3)
 
+    def test_iter_models(self):
+        """Iterate over the models in a file."""
+        parser = MMCIFParser(QUIET=1)
+        for filename, count in (
+            ("PDB/1A8O.cif", 1),
+            ("PDB/1LCD.cif", 3),
+            ("PDB/2BEG.cif", 1),
+            ("PDB/2OFG.cif", 3),
+        ):
+            structure = parser.get_structure("example", filename)
+            models = []
+            for model in parser.iter_models(filename, "example"):
+                models.append(model)
+                self.assertEqual(model.get_parent().id, "example")
+                self.assertEqual(model.get_parent().header, structure.header)
+                other = structure[model.id]
+                self.assertEqual(model.serial_num, other.serial_num)
+                atoms = list(model.get_atoms())
+                other_atoms = list(other.get_atoms())
+                self.assertEqual(len(atoms), len(other_atoms))
+                for atom, other_atom in zip(atoms, other_atoms):
+                    self.assertEqual(atom.get_full_id(), other_atom.get_full_id())
+                    self.assertEqual(atom.serial_number, other_atom.serial_number)
+                    self.assertEqual(atom.bfactor, other_atom.bfactor)
+                    self.assertEqual(atom.occupancy, other_atom.occupancy)
+                    numpy.testing.assert_array_equal(atom.coord, other_atom.coord)
+            self.assertEqual(len(models), len(structure))
+            # the models of 2BEG have the same atoms, so they are reused
+            self.assertEqual(len({id(model) for model in models}), count)
+
+    def test_iter_models_disordered(self):
+        """Select the altlocs with the highest occupancy in each model."""
+        with open("PDB/4CUP.cif") as handle:
+            lines = handle.readlines()
+        start = end = [line.strip() for line in lines].index("_atom_site.group_PDB")
+        while lines[end].startswith("_atom_site."):
+            end += 1
+        keys = [line.strip() for line in lines[start:end]]
+        altloc = keys.index("_atom_site.label_alt_id")
+        occupancy = keys.index("_atom_site.occupancy")
+        model_num = keys.index("_atom_site.pdbx_PDB_model_num")
+        rows = [line.split() for line in lines[end:]]
+        rows = [row for row in rows if row[0] in ("ATOM", "HETATM")]
+        data = lines[:end]
+        for i in range(3):
+            for row in rows:
+                row[model_num] = str(i + 1)
+                if row[altloc] != ".":
+                    value = 0.3 if (row[altloc] == "A") == (i == 2) else 0.7
+                    row[occupancy] = str(value)
+                data.append(" ".join(row) + "\n")
+        data = "".join(data) + "#\n"
+        parser = MMCIFParser()
+        structure = parser.get_structure("example", StringIO(data))
+        models = []
+        for model in parser.iter_models(StringIO(data), "example"):
+            models.append(model)
+            atoms = list(model.get_atoms())
+            other_atoms = list(structure[model.id].get_atoms())
+            self.assertEqual(len(atoms), len(other_atoms))
+            for atom, other_atom in zip(atoms, other_atoms):
+                self.assertEqual(atom.get_full_id(), other_atom.get_full_id())
+                self.assertEqual(atom.get_altloc(), other_atom.get_altloc())
+                self.assertEqual(atom.occupancy, other_atom.occupancy)
+                numpy.testing.assert_array_equal(atom.coord, other_atom.coord)
+        # the atoms of the first model are reused for the second, but not for
+        # the third, in which other altlocs have the highest occupancy
+        self.assertIs(models[0], models[1])
+        self.assertIsNot(models[1], models[2])
+
     def test_insertions(self):
         """Test file with residue insertion codes."""
         parser = MMCIFParser(QUIET=1)
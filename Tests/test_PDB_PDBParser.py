@@ -29,7 +29,7 @@ except ImportError:
     ) from None
 
 from Bio import BiopythonWarning
-from Bio.PDB import PDBParser
+from Bio.PDB import PDBParser, FastPDBParser, PDBIO
 from Bio.PDB.PDBExceptions import PDBConstructionException, PDBConstructionWarning
 
 
@@ -647,6 +647,357 @@ class ParseRealPDB_tests(unittest.TestCase):
             _ = self.strict.get_structure("example", StringIO(data))
 
 
+class FastPDBParserFlawedPDB_tests(FlawedPDB_tests):
+    """Errors and warnings while parsing flawed PDB files with FastPDBParser."""
+
+    def setUp(self):
+        self.permissive = FastPDBParser(PERMISSIVE=True)
+        self.strict = FastPDBParser(PERMISSIVE=False)
+
+
+class FastPDBParserRealPDB_tests(ParseRealPDB_tests):
+    """Testing FastPDBParser with real PDB files."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.permissive = FastPDBParser()
+        cls.strict = FastPDBParser(PERMISSIVE=False)
+
+
+class FastPDBParser_tests(unittest.TestCase):
+    """Compare FastPDBParser to PDBParser."""
+
+    def compare(self, filename):
+        with warnings.catch_warnings(record=True) as messages:
+            warnings.simplefilter("always", PDBConstructionWarning)
+            parser = PDBParser()
+            structure = parser.get_structure("test", filename)
+        with warnings.catch_warnings(record=True) as fast_messages:
+            warnings.simplefilter("always", PDBConstructionWarning)
+            fast_parser = FastPDBParser()
+            fast_structure = fast_parser.get_structure("test", filename)
+        # the same warnings, in the same order
+        self.assertEqual(
+            [str(message.message) for message in fast_messages],
+            [str(message.message) for message in messages],
+        )
+        self.assertEqual(fast_parser.get_header(), parser.get_header())
+        self.assertEqual(fast_parser.get_trailer(), parser.get_trailer())
+        self.assertEqual(len(fast_structure), len(structure))
+        for fast_model, model in zip(fast_structure, structure):
+            self.assertEqual(fast_model.serial_num, model.serial_num)
+            fast_atoms = list(fast_model.get_atoms())
+            atoms = list(model.get_atoms())
+            self.assertEqual(len(fast_atoms), len(atoms))
+            for fast_atom, atom in zip(fast_atoms, atoms):
+                self.assertEqual(fast_atom.get_full_id(), atom.get_full_id())
+                self.assertEqual(fast_atom.full_id, atom.full_id)
+                self.assertEqual(fast_atom.fullname, atom.fullname)
+                self.assertEqual(fast_atom.serial_number, atom.serial_number)
+                self.assertEqual(fast_atom.element, atom.element)
+                self.assertEqual(fast_atom.bfactor, atom.bfactor)
+                self.assertEqual(fast_atom.occupancy, atom.occupancy)
+                self.assertEqual(fast_atom.coord.dtype, atom.coord.dtype)
+                self.assertTrue(numpy.array_equal(fast_atom.coord, atom.coord))
+                fast_residue = fast_atom.get_parent()
+                residue = atom.get_parent()
+                self.assertEqual(fast_residue.resname, residue.resname)
+                self.assertEqual(fast_residue.segid, residue.segid)
+        return fast_structure
+
+    def test_real_files(self):
+        """Parse real PDB files."""
+        for filename in ("PDB/1A8O.pdb", "PDB/1LCD.pdb", "PDB/2BEG.pdb"):
+            self.compare(filename)
+
+    def test_flawed_files(self):
+        """Parse PDB files with errors, disordered atoms, and point mutations."""
+        for filename in (
+            "PDB/a_structure.pdb",
+            "PDB/disordered.pdb",
+            "PDB/occupancy.pdb",
+            "PDB/1SSU_mod.pdb",
+        ):
+            self.compare(filename)
+
+    def test_empty_models(self):
+        """Create empty models for MODEL blocks without atoms."""
+        with open("PDB/1A8O.pdb") as handle:
+            atoms = [line for line in handle if line.startswith("ATOM")][:20]
+        atoms = "".join(atoms)
+        empty = "MODEL        %i\nENDMDL\n"
+        full = "MODEL        %i\n" + atoms + "ENDMDL\n"
+        for blocks, sizes in (
+            ([empty], [0]),
+            ([full, empty], [20, 0]),
+            ([empty, full], [0, 20]),
+            ([full, empty, full], [20, 0, 20]),
+        ):
+            data = "".join(block % (i + 1) for i, block in enumerate(blocks)) + "END\n"
+            with tempfile.TemporaryDirectory() as directory:
+                filename = os.path.join(directory, "empty.pdb")
+                with open(filename, "w") as handle:
+                    handle.write(data)
+                self.compare(filename)
+                structure = FastPDBParser().get_structure("test", filename)
+                self.assertEqual(
+                    [len(list(model.get_atoms())) for model in structure], sizes
+                )
+                coordinates = FastPDBParser().get_coordinates(filename)
+                self.assertEqual([len(coord) for coord in coordinates], sizes)
+
+    def test_warnings(self):
+        """Issue a warning for each flawed record, in the order of the file."""
+        data = (
+            "ATOM      1  N   ASP A 152      21.554  34.953  27.691 -1.00 19.26           N\n"
+            "FOOBAR\n"
+            "ATOM      2  CA  ASP A 152      21.835  36.306  28.144 -1.00 17.85           C\n"
+            "ATOM      3  C  AASP A 152      20.660  36.711  29.045  0.50 17.50           C\n"
+            "ATOM      4  C  BASP A 152      20.660  36.711  29.045 -0.50 17.50           C\n"
+            "ATOM      5  O   ASP A 152      20.399  37.867  29.221  1.00 17.74           \n"
+            "END   \n"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "flawed.pdb")
+            with open(filename, "w") as handle:
+                handle.write(data)
+            with warnings.catch_warnings(record=True) as messages:
+                warnings.simplefilter("always", PDBConstructionWarning)
+                PDBParser().get_structure("test", filename)
+            self.assertEqual(
+                [str(message.message) for message in messages][:4],
+                [
+                    "Negative occupancy in one or more atoms",
+                    "Ignoring unrecognized record 'FOOBAR' at line 2",
+                    "Negative occupancy in one or more atoms",
+                    "Negative occupancy in one or more atoms",
+                ],
+            )
+            self.compare(filename)
+
+    def test_atom_arrays(self):
+        """Check that the data are stored in the atom arrays of each model."""
+        structure = self.compare("PDB/1LCD.pdb")
+        for model in structure:
+            arrays = model.get_atom_arrays()
+            atoms = list(model.get_atoms())
+            self.assertEqual(len(arrays), len(atoms))
+            self.assertIs(arrays.atoms[0], atoms[0])
+            arrays.coord[0] += 1
+            self.assertTrue(numpy.array_equal(atoms[0].coord, arrays.coord[0]))
+
+    def test_anisou(self):
+        """Parse ANISOU records."""
+        data = (
+            "ATOM      1  N   ASP A 152      21.554  34.953  27.691  1.00 19.26           N\n"
+            "ANISOU    1  N   ASP A 152     2406   1892   1614    198    519   -328       N\n"
+            "ATOM      2  CA  ASP A 152      21.835  36.306  28.144  1.00 17.85           C\n"
+            "END   \n"
+        )
+        structure = PDBParser().get_structure("example", StringIO(data))
+        anisou = next(structure.get_atoms()).get_anisou()
+        structure = FastPDBParser().get_structure("example", StringIO(data))
+        atoms = list(structure.get_atoms())
+        self.assertTrue(numpy.array_equal(atoms[0].get_anisou(), anisou))
+        self.assertTrue(
+            numpy.allclose(
+                atoms[0].get_anisou(),
+                [0.2406, 0.1892, 0.1614, 0.0198, 0.0519, -0.0328],
+            )
+        )
+        self.assertIsNone(atoms[1].get_anisou())
+
+    def test_sigatm(self):
+        """Parse SIGATM records, using the regular parser."""
+        data = (
+            "ATOM      1  N   ASP A 152      21.554  34.953  27.691  1.00 19.26           N\n"
+            "SIGATM    1  N   ASP A 152       0.010   0.020   0.030  0.00  0.10           N\n"
+            "END   \n"
+        )
+        structure = FastPDBParser().get_structure("example", StringIO(data))
+        atom = next(structure.get_atoms())
+        self.assertTrue(numpy.allclose(atom.get_sigatm(), [0.01, 0.02, 0.03, 0.0, 0.1]))
+
+    def test_get_coordinates(self):
+        """Read the coordinates of each model without creating a structure."""
+        parser = FastPDBParser()
+        models = parser.get_coordinates("PDB/1LCD.pdb")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", PDBConstructionWarning)
+            structure = PDBParser().get_structure("1LCD", "PDB/1LCD.pdb")
+        self.assertEqual(len(models), len(structure))
+        for coord, model in zip(models, structure):
+            atoms = [
+                atom
+                for residue in model.get_residues()
+                for atom in residue.get_unpacked_list()
+            ]
+            self.assertEqual(coord.shape, (len(atoms), 3))
+            self.assertEqual(coord.dtype, numpy.float32)
+            # the rows are in the order of the atoms in the file
+            serial_numbers = [atom.serial_number for atom in atoms]
+            atoms = [atoms[i] for i in numpy.argsort(serial_numbers)]
+            self.assertTrue(numpy.array_equal(coord, [atom.coord for atom in atoms]))
+        data = "ATOM      9  N   ASP A 152      21.ish  34.953  27.691  1.00 19.26           N\n"
+        with self.assertRaises(PDBConstructionException):
+            parser.get_coordinates(StringIO(data))
+
+
+class IterModels_tests(unittest.TestCase):
+    """Iterate over the models in a PDB file."""
+
+    def compare(self, handle, structure):
+        parser = PDBParser(QUIET=True)
+        models = []
+        for model in parser.iter_models(handle, "test"):
+            self.assertEqual(model.get_parent().id, "test")
+            self.assertEqual(model.get_parent().header, parser.get_header())
+            models.append(model)
+            other = structure[model.id]
+            self.assertEqual(model.serial_num, other.serial_num)
+            atoms = list(model.get_atoms())
+            other_atoms = list(other.get_atoms())
+            self.assertEqual(len(atoms), len(other_atoms))
+            for atom, other_atom in zip(atoms, other_atoms):
+                self.assertEqual(atom.get_full_id(), other_atom.get_full_id())
+                self.assertEqual(atom.serial_number, other_atom.serial_number)
+                self.assertEqual(atom.bfactor, other_atom.bfactor)
+                self.assertEqual(atom.occupancy, other_atom.occupancy)
+                self.assertTrue(numpy.array_equal(atom.coord, other_atom.coord))
+        self.assertEqual(len(models), len(structure))
+        return parser, models
+
+    def test_real_files(self):
+        """Compare the models to those created by get_structure."""
+        for filename in (
+            "PDB/1A8O.pdb",
+            "PDB/1LCD.pdb",
+            "PDB/2BEG.pdb",
+            "PDB/a_structure.pdb",
+        ):
+            parser = PDBParser(QUIET=True)
+            structure = parser.get_structure("test", filename)
+            iter_parser, models = self.compare(filename, structure)
+            self.assertEqual(iter_parser.get_header(), parser.get_header())
+            self.assertEqual(iter_parser.get_trailer(), parser.get_trailer())
+            if filename == "PDB/1LCD.pdb":
+                # the models have different water molecules
+                self.assertEqual(len({id(model) for model in models}), 3)
+
+    def test_reuse_atoms(self):
+        """Reuse the atoms of the previous model if the records match."""
+        structure = PDBParser(QUIET=True).get_structure("2BEG", "PDB/2BEG.pdb")
+        model = structure[0]
+        rotation = numpy.array([[0, -1, 0], [1, 0, 0], [0, 0, 1]], "f")
+        for i in (1, 2):
+            model = model.copy()
+            model.id = i
+            model.serial_num = i + 1
+            model.transform(rotation, numpy.array([1, 2, 3], "f"))
+            next(model.get_atoms()).bfactor = i
+            structure.add(model)
+        handle = StringIO()
+        io = PDBIO()
+        io.set_structure(structure)
+        io.save(handle)
+        handle.seek(0)
+        structure = PDBParser(QUIET=True).get_structure("test", handle)
+        handle.seek(0)
+        parser, models = self.compare(handle, structure)
+        self.assertEqual(len({id(model) for model in models}), 1)
+        self.assertEqual(models[0].id, 2)
+        self.assertEqual(parser.get_trailer(), ["END   \n"])
+        # changing the atoms of the model stops the reuse
+        handle.seek(0)
+        models = []
+        for model in parser.iter_models(handle):
+            models.append(model)
+            model["A"].detach_child((" ", 17, " "))
+        self.assertEqual(len({id(model) for model in models}), 3)
+
+    def test_disordered_occupancy(self):
+        """Select the altlocs with the highest occupancy in each model."""
+        with open("PDB/disordered.pdb") as handle:
+            lines = [line for line in handle if line.startswith("ATOM")]
+        # atom name, residue and chain of the disordered atoms
+        disordered = {line[12:16] + line[17:27] for line in lines if line[16] != " "}
+        # skip the atoms with a blank altloc, which give a warning in each model
+        lines = [
+            line
+            for line in lines
+            if line[16] != " " or line[12:16] + line[17:27] not in disordered
+        ]
+        ordered = [line[12:16] + line[17:27] not in disordered for line in lines]
+        data = ""
+        for i in range(3):
+            data += "MODEL        %i\n" % (i + 1)
+            for line, is_ordered in zip(lines, ordered):
+                altloc = line[16]
+                if altloc != " ":
+                    occupancy = 0.3 if (altloc == "A") == (i == 2) else 0.7
+                    line = "%s%6.2f%s" % (line[:54], occupancy, line[60:])
+                elif i == 1 and is_ordered:
+                    # negative occupancies give a warning for each atom
+                    line = "%s%6.2f%s" % (line[:54], -1, line[60:])
+                data += line
+            data += "ENDMDL\n"
+        data += "END   \n"
+        with warnings.catch_warnings(record=True) as messages:
+            warnings.simplefilter("always", PDBConstructionWarning)
+            structure = PDBParser().get_structure("test", StringIO(data))
+        self.assertEqual(
+            [str(message.message) for message in messages].count(
+                "Negative occupancy in one or more atoms"
+            ),
+            sum(ordered),
+        )
+        parser, models = self.compare(StringIO(data), structure)
+        # the atoms of the first model are reused for the second, but not for
+        # the third, in which other altlocs have the highest occupancy
+        self.assertIs(models[0], models[1])
+        self.assertIsNot(models[1], models[2])
+        with warnings.catch_warnings(record=True) as iter_messages:
+            warnings.simplefilter("always", PDBConstructionWarning)
+            for model in PDBParser().iter_models(StringIO(data)):
+                pass
+        self.assertEqual(
+            [str(message.message) for message in iter_messages],
+            [str(message.message) for message in messages],
+        )
+
+    def test_construction_warnings(self):
+        """Issue the warnings of building the structure in each model."""
+        with open("PDB/disordered.pdb") as handle:
+            lines = [line for line in handle if line.startswith("ATOM")]
+        data = ""
+        for i in range(3):
+            data += "MODEL        %i\n" % (i + 1)
+            data += "".join(lines)
+            data += "ENDMDL\n"
+        data += "END   \n"
+        with warnings.catch_warnings(record=True) as messages:
+            warnings.simplefilter("always", PDBConstructionWarning)
+            structure = PDBParser().get_structure("test", StringIO(data))
+        self.assertEqual(len(messages), 3)
+        parser, models = self.compare(StringIO(data), structure)
+        self.assertIsNot(models[0], models[1])
+        with warnings.catch_warnings(record=True) as iter_messages:
+            warnings.simplefilter("always", PDBConstructionWarning)
+            for model in PDBParser().iter_models(StringIO(data)):
+                pass
+        self.assertEqual(
+            [str(message.message) for message in iter_messages],
+            [str(message.message) for message in messages],
+        )
+
+    def test_empty(self):
+        """Parse an empty file."""
+        parser = PDBParser()
+        handle = StringIO()
+        with self.assertRaises(ValueError):
+            next(parser.iter_models(handle))
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
     unittest.main(testRunner=runner)
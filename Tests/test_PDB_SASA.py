@@ -8,6 +8,7 @@
 """Unit tests for the Bio.PDB.SASA module: Surface Accessibility Calculations."""
 
 import copy
+import math
 import pathlib
 import unittest
 import warnings
@@ -104,6 +105,35 @@ class TestShrakeRupley(unittest.TestCase):
             atom_sum = sum(a.sasa for a in c.get_atoms())
             self.assertAlmostEqual(atom_sum, c.sasa, places=2)
 
+    def test_threads(self):
+        """Run Shrake-Rupley with several threads."""
+        m1 = copy.deepcopy(self.model)  # modifies atom.sasa
+        m2 = copy.deepcopy(self.model)
+
+        sasa = ShrakeRupley()
+        sasa.compute(m1, level="R")
+        sasa.compute(m2, level="R", threads=4)
+
+        self.assertEqual(
+            [a.sasa for a in m1.get_atoms()], [a.sasa for a in m2.get_atoms()]
+        )
+        self.assertEqual(
+            [r.sasa for r in m1.get_residues()], [r.sasa for r in m2.get_residues()]
+        )
+
+    def test_isolated_atom(self):
+        """Run Shrake-Rupley on a residue with a single atom."""
+        r = copy.deepcopy(self.model["A"].child_list[0])
+        for a in list(r)[1:]:
+            r.detach_child(a.name)
+
+        sasa = ShrakeRupley()
+        sasa.compute(r)
+
+        atom = r.child_list[0]
+        radius = sasa.radii_dict[atom.element] + sasa.probe_radius
+        self.assertAlmostEqual(atom.sasa, 4 * math.pi * radius ** 2)
+
     # Exceptions
     def test_fail_probe_radius(self):
         """Raise exception on bad probe_radius parameter."""
@@ -128,6 +158,12 @@ class TestShrakeRupley(unittest.TestCase):
             sasa = ShrakeRupley()
             sasa.compute(atom)
 
+    def test_fail_compute_threads(self):
+        """Raise exception on bad threads parameter."""
+        with self.assertRaisesRegex(ValueError, "must be at least 1"):
+            sasa = ShrakeRupley()
+            sasa.compute(self.model, threads=0)
+
     def test_fail_compute_level_1(self):
         """Raise exception on invalid level parameter: X."""
         with self.assertRaisesRegex(ValueError, "Invalid level"):
@@ -36,6 +36,7 @@ from Bio.PDB import PDBParser
 from Bio.PDB.PDBExceptions import PDBConstructionWarning
 from Bio.PDB import rotmat, Vector
 from Bio.PDB import Atom
+from Bio.PDB.Entity import AtomArrays
 
 
 class Atom_Element(unittest.TestCase):
@@ -469,6 +470,115 @@ class CopyTests(unittest.TestCase):
             self.assertIsNot(e.get_list()[0], ee.get_list()[0])
 
 
+class AtomArraysTests(unittest.TestCase):
+    """Tests storing atomic data in the arrays of a Model."""
+
+    def setUp(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", PDBConstructionWarning)
+            self.s = PDBParser(PERMISSIVE=True).get_structure(
+                "X", "PDB/a_structure.pdb"
+            )
+        self.m = self.s[0]
+
+    def test_shared_data(self):
+        """Atoms and arrays share the atomic data."""
+        arrays = self.m.get_atom_arrays()
+        self.assertIs(arrays, self.m.get_atom_arrays())
+        atoms = list(self.m.get_atoms())
+        self.assertEqual(len(arrays), len(arrays.atoms))
+        self.assertGreaterEqual(len(arrays), len(atoms))
+        for atom in atoms:
+            self.assertIn(atom.get_full_id(), [a.get_full_id() for a in arrays.atoms])
+        atom = arrays.atoms[0]
+        self.assertTrue(numpy.array_equal(atom.coord, arrays.coord[0]))
+        self.assertEqual(atom.bfactor, arrays.bfactor[0])
+        self.assertEqual(atom.occupancy, arrays.occupancy[0])
+        self.assertEqual(atom.element, arrays.element[0])
+        arrays.coord[0] = (1, 2, 3)
+        self.assertEqual(list(atom.get_coord()), [1, 2, 3])
+        atom.set_coord(numpy.array((4, 5, 6), "f"))
+        self.assertEqual(list(arrays.coord[0]), [4, 5, 6])
+        atom.set_bfactor(12.5)
+        self.assertEqual(arrays.bfactor[0], 12.5)
+        atom.occupancy = None
+        self.assertIsNone(atom.get_occupancy())
+        self.assertTrue(numpy.isnan(arrays.occupancy[0]))
+
+    def test_transform_float64(self):
+        """Transforming with float64 values keeps their precision."""
+        arrays = self.m.get_atom_arrays()
+        self.assertEqual(arrays.coord.dtype, numpy.float32)
+        coords = arrays.coord.copy()
+        rotation = numpy.identity(3)
+        translation = numpy.array((0.1, 0.2, 0.3))
+        self.s.transform(rotation, translation)
+        self.assertEqual(arrays.coord.dtype, numpy.float64)
+        self.assertTrue(numpy.allclose(arrays.coord, coords + translation))
+        for atom in self.m.get_atoms():
+            self.assertEqual(atom.get_coord().dtype, numpy.float64)
+
+    def test_copy(self):
+        """Copies of atoms do not share data with the original atoms."""
+        arrays = self.m.get_atom_arrays()
+        atom = arrays.atoms[0]
+        coord = atom.get_coord().copy()
+        atom_copy = atom.copy()
+        atom_copy.set_coord(atom_copy.get_coord() + 1)
+        self.assertTrue(numpy.array_equal(atom.get_coord(), coord))
+        self.assertTrue(numpy.array_equal(arrays.coord[0], coord))
+        model_copy = deepcopy(self.m)
+        arrays_copy = model_copy.get_atom_arrays()
+        self.assertIsNot(arrays_copy, arrays)
+        self.assertTrue(numpy.array_equal(arrays_copy.coord, arrays.coord))
+        arrays_copy.coord += 1
+        self.assertTrue(numpy.array_equal(arrays.coord[0], coord))
+
+    def test_detach_child(self):
+        """Removing atoms from a model creates new arrays."""
+        structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+        model = structure[0]
+        arrays = model.get_atom_arrays()
+        chain = model["A"]
+        residue = chain.child_list[0]
+        n = len(residue.get_unpacked_list())
+        chain.detach_child(residue.id)
+        new_arrays = model.get_atom_arrays()
+        self.assertIsNot(new_arrays, arrays)
+        self.assertEqual(len(new_arrays), len(arrays) - n)
+        # atoms in the model use the new arrays
+        atom = new_arrays.atoms[0]
+        atom.set_coord(numpy.array((7, 8, 9), "f"))
+        self.assertEqual(list(new_arrays.coord[0]), [7, 8, 9])
+        # the detached atoms keep their coordinates
+        for atom in residue.get_unpacked_list():
+            self.assertEqual(len(atom.get_coord()), 3)
+
+    def test_disordered_atoms(self):
+        """Each alternative location of a disordered atom has its own row."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", PDBConstructionWarning)
+            s = PDBParser().get_structure("d", "PDB/disordered.pdb")
+        arrays = s[0].get_atom_arrays()
+        disordered = [a for a in s.get_atoms() if a.is_disordered()]
+        self.assertTrue(disordered)
+        for atom in disordered:
+            for child in atom.disordered_get_list():
+                index = [a is child for a in arrays.atoms].index(True)
+                self.assertTrue(numpy.array_equal(arrays.coord[index], child.coord))
+
+    def test_pqr(self):
+        """Atoms without B factor and occupancy store them as NaN."""
+        coord = numpy.array((1.0, 2.0, 3.0), "f")
+        atom = Atom.Atom("CA", coord, None, None, " ", " CA ", 1, "C")
+        arrays = AtomArrays([atom])
+        self.assertTrue(numpy.isnan(arrays.bfactor[0]))
+        self.assertIsNone(atom.get_bfactor())
+        self.assertIsNone(atom.get_occupancy())
+        atom.set_bfactor(1.5)
+        self.assertEqual(atom.get_bfactor(), 1.5)
+
+
 class CenterOfMassTests(unittest.TestCase):
     """Tests calculating centers of mass/geometry."""
 
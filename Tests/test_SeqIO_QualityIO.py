@@ -10,6 +10,8 @@ import warnings
 from io import BytesIO
 from io import StringIO
 
+import numpy as np
+
 from Bio import BiopythonParserWarning
 from Bio import BiopythonWarning
 from Bio import SeqIO
@@ -990,6 +992,174 @@ class TestSFF(unittest.TestCase):
                 self.assertRaises(ValueError, SeqIO.write, record, h, "sff")
 
 
+class ArrayTests(unittest.TestCase):
+    """Tests for qualities held as NumPy arrays."""
+
+    iterators = {
+        "fastq": QualityIO.FastqPhredIterator,
+        "fastq-solexa": QualityIO.FastqSolexaIterator,
+        "fastq-illumina": QualityIO.FastqIlluminaIterator,
+    }
+
+    def check_parse(self, filename, fmt):
+        key = "solexa_quality" if fmt == "fastq-solexa" else "phred_quality"
+        dtype = np.int8 if fmt == "fastq-solexa" else np.uint8
+        iterator = self.iterators[fmt]
+        old = list(iterator(filename))
+        new = list(iterator(filename, as_array=True))
+        self.assertEqual(len(old), len(new))
+        for old_record, new_record in zip(old, new):
+            self.assertEqual(old_record.id, new_record.id)
+            self.assertEqual(old_record.seq, new_record.seq)
+            qualities = new_record.letter_annotations[key]
+            self.assertIsInstance(qualities, np.ndarray)
+            self.assertEqual(qualities.dtype, dtype)
+            self.assertEqual(old_record.letter_annotations[key], qualities.tolist())
+            for out_fmt in ("fastq", "fastq-solexa", "fastq-illumina", "qual"):
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", BiopythonWarning)
+                    self.assertEqual(
+                        old_record.format(out_fmt), new_record.format(out_fmt)
+                    )
+
+    def test_sanger(self):
+        self.check_parse("Quality/example.fastq", "fastq")
+        self.check_parse("Quality/sanger_full_range_original_sanger.fastq", "fastq")
+        self.check_parse("Quality/longreads_original_sanger.fastq", "fastq")
+
+    def test_solexa(self):
+        self.check_parse("Quality/solexa_example.fastq", "fastq-solexa")
+        self.check_parse(
+            "Quality/solexa_full_range_original_solexa.fastq", "fastq-solexa"
+        )
+
+    def test_illumina(self):
+        self.check_parse("Quality/illumina_faked.fastq", "fastq-illumina")
+        self.check_parse(
+            "Quality/illumina_full_range_original_illumina.fastq", "fastq-illumina"
+        )
+
+    def test_invalid(self):
+        for fmt, iterator in self.iterators.items():
+            for qual in ("IIII I", "IIII\x7f", "IIII\xe9", " "):
+                handle = StringIO("@Test\n%s\n+\n%s\n" % ("N" * len(qual), qual))
+                generator = iterator(handle, as_array=True)
+                self.assertRaises(ValueError, next, generator)
+        # Illumina and Solexa encodings start at "@" and ";" respectively
+        handle = StringIO("@Test\nNN\n+\n5I\n")
+        generator = QualityIO.FastqIlluminaIterator(handle, as_array=True)
+        self.assertRaises(ValueError, next, generator)
+
+    def test_add_and_slice(self):
+        handle = StringIO("@Test\nACGTN\n+\n!+5?I\n")
+        record = next(QualityIO.FastqPhredIterator(handle, as_array=True))
+        joined = record[3:] + record[:2]
+        self.assertEqual(joined.seq, "TNAC")
+        self.assertEqual(
+            joined.letter_annotations["phred_quality"].tolist(), [30, 40, 0, 10]
+        )
+        self.assertEqual(record.reverse_complement().format("fastq")[-6:], "I?5+!\n")
+
+    def test_trim_index(self):
+        def trim_index(qualities, threshold):
+            # Reference implementation of the BWA algorithm
+            total = maximum = 0
+            index = len(qualities)
+            for i in reversed(range(len(qualities))):
+                total += threshold - qualities[i]
+                if total < 0:
+                    break
+                if total > maximum:
+                    maximum = total
+                    index = i
+            return index
+
+        rng = np.random.default_rng(42)
+        for length in (0, 1, 2, 10, 150):
+            for threshold in (0, 10, 20, 30, 45):
+                for _ in range(20):
+                    qualities = rng.integers(0, 42, length).astype(np.uint8)
+                    self.assertEqual(
+                        QualityIO.quality_trim_index(qualities, threshold),
+                        trim_index(qualities.tolist(), threshold),
+                    )
+                    self.assertEqual(
+                        QualityIO.quality_trim_index(qualities.tolist(), threshold),
+                        trim_index(qualities.tolist(), threshold),
+                    )
+
+    def test_expected_errors(self):
+        self.assertAlmostEqual(QualityIO.expected_errors([0, 10, 20]), 1.11)
+        qualities = np.array([30] * 100, np.uint8)
+        self.assertAlmostEqual(QualityIO.expected_errors(qualities), 0.1)
+
+
+class BatchReaderTests(unittest.TestCase):
+    """Tests for the FastqBatchReader."""
+
+    def check_batches(self, filename, batch_size):
+        with open(filename) as handle:
+            expected = list(QualityIO.FastqGeneralIterator(handle))
+        batches = list(QualityIO.FastqBatchReader(filename, batch_size=batch_size))
+        self.assertEqual(
+            [len(batch) for batch in batches[:-1]], [batch_size] * (len(batches) - 1),
+        )
+        records = []
+        for batch in batches:
+            self.assertEqual(batch.sequences.dtype, np.uint8)
+            self.assertEqual(batch.qualities.dtype, np.uint8)
+            self.assertEqual(len(batch.offsets), len(batch) + 1)
+            self.assertEqual(batch.offsets[-1], len(batch.sequences))
+            self.assertEqual(batch.offsets[-1], len(batch.qualities))
+            self.assertEqual(batch[-1], list(batch)[-1])
+            records.extend(batch)
+        self.assertEqual(records, expected)
+        return batches
+
+    def test_files(self):
+        for filename in (
+            "Quality/example.fastq",
+            "Quality/tricky.fastq",
+            "Quality/zero_length.fastq",
+            "Quality/wrapping_original_sanger.fastq",
+            "Quality/longreads_original_sanger.fastq",
+        ):
+            for batch_size in (1, 2, 3, 10000):
+                self.check_batches(filename, batch_size)
+
+    def test_phred_quality(self):
+        batches = self.check_batches("Quality/sanger_faked.fastq", 1)
+        record = SeqIO.read("Quality/sanger_faked.fastq", "fastq")
+        qualities = batches[0].phred_quality()
+        self.assertEqual(qualities.dtype, np.uint8)
+        self.assertEqual(qualities.tolist(), record.letter_annotations["phred_quality"])
+        self.assertRaises(ValueError, batches[0].phred_quality, 64)
+        self.assertRaises(ValueError, batches[0].phred_quality, 59)
+        batches = self.check_batches("Quality/illumina_faked.fastq", 1)
+        record = SeqIO.read("Quality/illumina_faked.fastq", "fastq-illumina")
+        self.assertEqual(
+            batches[0].phred_quality(64).tolist(),
+            record.letter_annotations["phred_quality"],
+        )
+
+    def test_lengths(self):
+        batch = self.check_batches("Quality/zero_length.fastq", 100)[0]
+        self.assertEqual(
+            batch.lengths.tolist(), [len(seq) for title, seq, qual in batch],
+        )
+        self.assertRaises(IndexError, batch.__getitem__, len(batch))
+
+    def test_errors(self):
+        self.assertRaises(ValueError, QualityIO.FastqBatchReader, StringIO(""), 0)
+        handle = StringIO("@Test\nACGT\n+\nIIII\n@Test\nAC\n+\nIII\n")
+        reader = QualityIO.FastqBatchReader(handle, batch_size=1)
+        self.assertEqual(len(next(reader)), 1)
+        self.assertRaises(ValueError, next, reader)
+        handle = StringIO("@Test\nAC\xe9T\n+\nIIII\n")
+        self.assertRaises(ValueError, next, QualityIO.FastqBatchReader(handle))
+        self.assertEqual(list(QualityIO.FastqBatchReader(StringIO(""))), [])
+
+
 class NonFastqTests(unittest.TestCase):
     def check_wrong_format(self, filename):
         for f in ("fastq", "fastq-sanger", "fastq-solexa", "fastq-illumina"):
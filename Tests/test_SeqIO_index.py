@@ -11,6 +11,7 @@ except ImportError:
     sqlite3 = None
 
 import os
+import shutil
 import unittest
 import tempfile
 import threading
@@ -22,6 +23,10 @@ from io import StringIO
 from Bio.SeqRecord import SeqRecord
 from Bio import SeqIO
 from Bio.SeqIO._index import _FormatToRandomAccess
+from Bio.SeqIO._index import _proxy_factory
+from Bio import File
+from Bio.File import _OffsetsIndex
+from Bio.File import _load_offsets_index
 
 from Bio import BiopythonParserWarning
 from Bio import MissingPythonDependencyError
@@ -451,6 +456,8 @@ class IndexDictTests(SeqRecordTestBaseClass, SeqIOTestBaseClass):
             self.check_dict_methods(rec_dict, id_list, id_list, msg=msg)
             rec_dict.close()
 
+            self.persist_check(filename, fmt, id_list, msg)
+
             if not sqlite3:
                 return
 
@@ -499,6 +506,41 @@ class IndexDictTests(SeqRecordTestBaseClass, SeqIOTestBaseClass):
 
             os.remove(index_tmp)
 
+    def persist_check(self, filename, fmt, id_list, msg):
+        """Check indexing with a persistent index file."""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            tmp_filename = os.path.join(tmp_dir, os.path.basename(filename))
+            shutil.copyfile(filename, tmp_filename)
+            index_filename = tmp_filename + ".bidx"
+
+            rec_dict = SeqIO.index(tmp_filename, fmt, persist=True)
+            self.assertNotIsInstance(rec_dict._offsets, _OffsetsIndex, msg=msg)
+            self.check_dict_methods(rec_dict, id_list, id_list, msg=msg)
+            keys = list(rec_dict)
+            rec_dict.close()
+            self.assertTrue(os.path.isfile(index_filename), msg=msg)
+
+            # Should now reuse the saved index, keeping the same order
+            rec_dict = SeqIO.index(tmp_filename, fmt)
+            self.assertIsInstance(rec_dict._offsets, _OffsetsIndex, msg=msg)
+            self.assertEqual(list(rec_dict), keys, msg=msg)
+            self.check_dict_methods(rec_dict, id_list, id_list, msg=msg)
+            rec_dict.close()
+
+            # Not if a different format was requested
+            other = "fasta" if fmt != "fasta" else "ace"
+            self.assertIsNone(_load_offsets_index(index_filename, tmp_filename, other))
+
+            # Nor if the file has changed
+            stat = os.stat(tmp_filename)
+            os.utime(tmp_filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            rec_dict = SeqIO.index(tmp_filename, fmt)
+            self.assertNotIsInstance(rec_dict._offsets, _OffsetsIndex, msg=msg)
+            rec_dict.close()
+        finally:
+            shutil.rmtree(tmp_dir)
+
     def add_prefix(self, key):
         """Sample key_function for testing index code."""
         return "id_" + key
@@ -700,6 +742,65 @@ class IndexDictTests(SeqRecordTestBaseClass, SeqIOTestBaseClass):
         """Index file with duplicate identifiers with Bio.SeqIO.index()."""
         self.assertRaises(ValueError, SeqIO.index, "Fasta/dups.fasta", "fasta")
 
+    def test_iter_raw(self):
+        """Check iterating over raw records matches the index."""
+        for filename1, fmt in self.tests:
+            tasks = [filename1]
+            if os.path.isfile(filename1 + ".bgz"):
+                tasks.append(filename1 + ".bgz")
+            for filename in tasks:
+                msg = "Test failure parsing file %s with format %s" % (filename, fmt)
+                with warnings.catch_warnings():
+                    # BiopythonParserWarning for the SFF alt_index examples
+                    warnings.simplefilter("ignore", BiopythonParserWarning)
+                    raw = list(SeqIO.iter_raw(filename, fmt))
+                    rec_dict = SeqIO.index(filename, fmt)
+                    self.assertEqual([r[0] for r in raw], list(rec_dict), msg=msg)
+                    for key, offset, length, data in raw:
+                        self.assertIsInstance(data, memoryview, msg=msg)
+                        self.assertEqual(len(data), length, msg=msg)
+                        self.assertEqual(bytes(data), rec_dict.get_raw(key), msg=msg)
+                    rec_dict.close()
+                if filename.endswith(".bgz"):
+                    continue
+                with open(filename, "rb") as handle:
+                    data = handle.read()
+                    handle.seek(0)
+                    raw2 = list(SeqIO.iter_raw(handle, fmt))
+                self.assertEqual(
+                    [(k, o, l, bytes(d)) for (k, o, l, d) in raw],
+                    [(k, o, l, bytes(d)) for (k, o, l, d) in raw2],
+                    msg=msg,
+                )
+                # Not a memory mappable handle:
+                raw3 = list(SeqIO.iter_raw(BytesIO(data), fmt))
+                self.assertEqual(
+                    [(k, o, l, bytes(d)) for (k, o, l, d) in raw],
+                    [(k, o, l, bytes(d)) for (k, o, l, d) in raw3],
+                    msg=msg,
+                )
+                if fmt in ("fasta", "fastq"):
+                    # Writing the records back out should give the same file
+                    self.assertEqual(b"".join(r[3] for r in raw), data, msg=msg)
+
+    def test_iter_raw_errors(self):
+        """Check iter_raw error conditions."""
+        with self.assertRaises(ValueError):
+            list(SeqIO.iter_raw("Quality/example.fastq", "dummy"))
+        with self.assertRaises(ValueError):
+            list(SeqIO.iter_raw("Quality/example.fastq", "FASTQ"))
+        with open("Quality/example.fastq") as handle:
+            with self.assertRaises(ValueError):
+                list(SeqIO.iter_raw(handle, "fastq"))
+        self.assertEqual(list(SeqIO.iter_raw(BytesIO(b""), "fastq")), [])
+
+    def test_persist_key_function(self):
+        """Persistent index with a key_function is not supported."""
+        with self.assertRaises(ValueError):
+            SeqIO.index(
+                "GenBank/NC_000932.faa", "fasta", key_function=str.upper, persist=True
+            )
+
     def test_duplicates_to_dict(self):
         """Index file with duplicate identifiers with Bio.SeqIO.to_dict()."""
         with open("Fasta/dups.fasta") as handle:
@@ -734,6 +835,76 @@ class IndexDictTests(SeqRecordTestBaseClass, SeqIOTestBaseClass):
                 self.get_raw_check(filename2, fmt, comp)
 
 
+class IndexParallelBuild(unittest.TestCase):
+    """Check building an index using multiple processes."""
+
+    def check_split(self, filename, fmt):
+        expected = list(_FormatToRandomAccess[fmt](filename, fmt))
+        for chunk_size in (50, 200, 500):
+            chunks = File._split_for_scanning(filename, fmt, chunk_size)
+            self.assertGreater(len(chunks), 1)
+            self.assertEqual(chunks[0][0], 0)
+            self.assertEqual(chunks[-1][1], os.path.getsize(filename))
+            offsets = []
+            for start, end in chunks:
+                offsets.extend(
+                    File._scan_offsets(_proxy_factory, fmt, filename, start, end)
+                )
+            self.assertEqual(offsets, expected)
+
+    def test_split_fasta(self):
+        """Split a FASTA file at record boundaries."""
+        self.check_split("GenBank/NC_005816.ffn", "fasta")
+
+    def test_split_fastq(self):
+        """Split a FASTQ file at record boundaries."""
+        # Includes quality lines starting with "@"
+        self.check_split("Quality/misc_dna_as_illumina.fastq", "fastq-illumina")
+        self.check_split("Quality/longreads_as_sanger.fastq", "fastq")
+        self.check_split("Quality/zero_length.fastq", "fastq")
+
+    def test_no_split(self):
+        """Compressed files and other formats are not split."""
+        for filename, fmt in [
+            ("GenBank/NC_000932.gb.bgz", "gb"),
+            ("Quality/example.fastq.bgz", "fastq"),
+            ("GenBank/NC_005816.gb", "gb"),
+        ]:
+            chunks = File._split_for_scanning(filename, fmt, 100)
+            self.assertEqual(chunks, [(0, None)])
+
+    if sqlite3:
+
+        def test_processes(self):
+            """Build an index_db using worker processes."""
+            files = [
+                "GenBank/NC_000932.faa",
+                "GenBank/NC_005816.faa",
+                "GenBank/NC_005816.ffn",
+            ]
+            ids = []
+            for f in files:
+                ids.extend(r.id for r in SeqIO.parse(f, "fasta"))
+            chunk_size = File._INDEX_CHUNK_SIZE
+            File._INDEX_CHUNK_SIZE = 1000
+            try:
+                d = SeqIO.index_db(":memory:", files, "fasta", processes=2)
+            finally:
+                File._INDEX_CHUNK_SIZE = chunk_size
+            self.assertEqual(ids, list(d))
+            self.assertEqual(len(ids), len(d))
+            for key in ids:
+                self.assertEqual(key, d[key].id)
+            d.close()
+            with self.assertRaises(ValueError):
+                SeqIO.index_db(":memory:", files, "fasta", processes=0)
+
+        def test_processes_duplicates(self):
+            """Build an index_db of duplicates using worker processes."""
+            with self.assertRaises(ValueError):
+                SeqIO.index_db(":memory:", "Fasta/dups.fasta", "fasta", processes=2)
+
+
 class IndexOrderingSingleFile(unittest.TestCase):
     f = "GenBank/NC_000932.faa"
     ids = [r.id for r in SeqIO.parse(f, "fasta")]
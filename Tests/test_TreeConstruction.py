@@ -6,10 +6,14 @@
 """Unit tests for the Bio.Phylo.TreeConstruction module."""
 
 import os
+import random
 import unittest
 import tempfile
 
 from io import StringIO
+
+import numpy
+
 from Bio import AlignIO
 from Bio import Phylo
 from Bio.Phylo import BaseTree
@@ -22,6 +26,8 @@ from Bio.Phylo.TreeConstruction import DistanceTreeConstructor
 from Bio.Phylo.TreeConstruction import ParsimonyScorer
 from Bio.Phylo.TreeConstruction import NNITreeSearcher
 from Bio.Phylo.TreeConstruction import ParsimonyTreeConstructor
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
 
 
 temp_dir = tempfile.mkdtemp()
@@ -46,6 +52,35 @@ class DistanceMatrixTest(unittest.TestCase):
             "matrix=[[0], [1, 0], [2, 3, 0], [4, 5, 6, 0]])",
         )
 
+    def test_array_construction(self):
+        square = numpy.array([[0, 1, 2, 4], [1, 0, 3, 5], [2, 3, 0, 6], [4, 5, 6, 0]])
+        dm = DistanceMatrix(self.names, square)
+        self.assertEqual(dm.matrix, self.matrix)
+        dm = DistanceMatrix(self.names, numpy.array([1, 2, 3, 4, 5, 6]))
+        self.assertEqual(dm.matrix, self.matrix)
+        self.assertEqual(dm["Delta", "Beta"], 5)
+        dm = DistanceMatrix(self.names, numpy.array([0.5, 2, 3, 4, 5, 6]))
+        self.assertEqual(dm.matrix[1], [0.5, 0])
+        self.assertRaises(ValueError, DistanceMatrix, self.names, numpy.zeros((3, 3)))
+        self.assertRaises(ValueError, DistanceMatrix, self.names, numpy.zeros(5))
+
+    def test_matrix_view(self):
+        dm = DistanceMatrix(self.names, self.matrix)
+        matrix = dm.matrix
+        matrix[2][1] = 7
+        self.assertEqual(dm["Gamma", "Beta"], 7)
+        dm.matrix[3] = [8, 9, 10, 0]
+        self.assertEqual(dm["Delta"], [8, 9, 10, 0])
+        dm.matrix[1][-2] = 0.5
+        self.assertEqual(dm["Alpha", "Beta"], 0.5)
+        self.assertEqual(matrix, [[0], [0.5, 0], [2, 7, 0], [8, 9, 10, 0]])
+        self.assertEqual(matrix[3][1:3], [9, 10])
+        self.assertEqual(repr(matrix[1]), "[0.5, 0]")
+        self.assertRaises(IndexError, matrix[1].__setitem__, 2, 1)
+        self.assertRaises(TypeError, matrix[1].__setitem__, 0, "x")
+        self.assertRaises(ValueError, matrix.__setitem__, 1, [1, 2, 0])
+        self.assertRaises(AttributeError, getattr, matrix[1], "append")
+
     def test_bad_construction(self):
         self.assertRaises(
             TypeError,
@@ -170,6 +205,55 @@ class DistanceCalculatorTest(unittest.TestCase):
         self.assertEqual(dmat["Alpha", "Alpha"], 0.0)
         self.assertAlmostEqual(dmat["Alpha", "Gamma"], 4.0 / 5.0)
 
+    def test_pairwise_consistency(self):
+        """Check that get_distance agrees with _pairwise for all pairs."""
+        aln = AlignIO.read("TreeConstruction/msa.phy", "phylip")
+        aln.append(SeqRecord(Seq("AAC-TGGC--CA-"), id="Zeta"))
+        for model in ("identity", "blastn", "trans", "blosum62", "pam250"):
+            calculator = DistanceCalculator(model)
+            for workers in (1, 3):
+                dm = calculator.get_distance(aln, workers=workers)
+                for seq1 in aln:
+                    for seq2 in aln:
+                        if seq1.id == seq2.id:
+                            expected = 0
+                        else:
+                            expected = calculator._pairwise(seq1, seq2)
+                        self.assertAlmostEqual(
+                            dm[seq1.id, seq2.id], expected, places=12, msg=model
+                        )
+
+    def test_bad_letter(self):
+        aln = AlignIO.read(StringIO(">Alpha\nAC-J\n>Gamma\nAC-A"), "fasta")
+        with self.assertRaises(ValueError) as cm:
+            DistanceCalculator("blosum62").get_distance(aln)
+        self.assertEqual(
+            str(cm.exception), "Bad letter 'J' in sequence 'Alpha' at position '3'"
+        )
+        # the first bad letter found comparing the sequences pairwise
+        aln = AlignIO.read(
+            StringIO(">Alpha\nAAAU\n>Beta\nAUAA\n>Gamma\nAAOA\n>Delta\nAAAA"), "fasta"
+        )
+        with self.assertRaises(ValueError) as cm:
+            DistanceCalculator("blosum62").get_distance(aln)
+        self.assertEqual(
+            str(cm.exception), "Bad letter 'U' in sequence 'Beta' at position '1'"
+        )
+        aln = AlignIO.read(
+            StringIO(">Alpha\nAA--\n>Beta\nA-UA\n>Gamma\nAOAA\n>Delta\nAAAA"), "fasta"
+        )
+        with self.assertRaises(ValueError) as cm:
+            DistanceCalculator("blosum62").get_distance(aln)
+        self.assertEqual(
+            str(cm.exception), "Bad letter 'O' in sequence 'Gamma' at position '1'"
+        )
+        # a letter aligned only to skipped letters is not scored
+        aln = AlignIO.read(StringIO(">Alpha\nAC-J\n>Gamma\nAC--"), "fasta")
+        dm = DistanceCalculator("blosum62").get_distance(aln)
+        self.assertAlmostEqual(dm["Alpha", "Gamma"], 0.0)
+        with self.assertRaises(ValueError):
+            DistanceCalculator().get_distance(aln, workers=0)
+
 
 class DistanceTreeConstructorTest(unittest.TestCase):
     """Test DistanceTreeConstructor."""
@@ -210,6 +294,65 @@ class DistanceTreeConstructorTest(unittest.TestCase):
         ref_min_tree = Phylo.read("./TreeConstruction/nj_min.tre", "newick")
         self.assertTrue(Consensus._equal_topology(min_tree, ref_min_tree))
 
+    def _splits(self, tree):
+        """Return the branch lengths of the splits of an unrooted tree."""
+        names = {terminal.name for terminal in tree.get_terminals()}
+        first = min(names)
+        splits = {}
+        for clade in tree.find_clades():
+            if clade == tree.root:
+                continue
+            split = {terminal.name for terminal in clade.get_terminals()}
+            if first in split:
+                split = names - split
+            split = frozenset(split)
+            splits[split] = splits.get(split, 0) + clade.branch_length
+        return {split: round(length, 6) for split, length in splits.items()}
+
+    def test_nj_additive(self):
+        # neighbor joining recovers the tree from its path lengths
+        random.seed(1)
+        ref_tree = BaseTree.Tree.randomized(60, branch_stdev=0.4)
+        terminals = ref_tree.get_terminals()
+        names = [terminal.name for terminal in terminals]
+        matrix = [
+            [ref_tree.distance(terminal1, terminal2) for terminal2 in terminals[:i]]
+            + [0]
+            for i, terminal1 in enumerate(terminals)
+        ]
+        tree = self.constructor.nj(DistanceMatrix(names, matrix))
+        self.assertEqual(self._splits(tree), self._splits(ref_tree))
+
+    def test_upgma_ultrametric(self):
+        # UPGMA recovers the clusters of an ultrametric matrix
+        random.seed(2)
+        size = 50
+        clusters = [{i} for i in range(size)]
+        matrix = numpy.zeros((size, size))
+        expected = []
+        height = 0.0
+        while len(clusters) > 1:
+            height += random.random()
+            cluster1 = clusters.pop(random.randrange(len(clusters)))
+            cluster2 = clusters.pop(random.randrange(len(clusters)))
+            for i in cluster1:
+                for j in cluster2:
+                    matrix[i, j] = matrix[j, i] = 2 * height
+            clusters.append(cluster1 | cluster2)
+            expected.append(frozenset("t%d" % i for i in clusters[-1]))
+        names = ["t%d" % i for i in range(size)]
+        tree = self.constructor.upgma(DistanceMatrix(names, matrix))
+        clusters = [
+            frozenset(terminal.name for terminal in clade.get_terminals())
+            for clade in tree.get_nonterminals()
+        ]
+        self.assertCountEqual(clusters, expected)
+
+    def test_non_finite(self):
+        dm = DistanceMatrix(["A", "B", "C"], [[0], [1, 0], [float("inf"), 2, 0]])
+        self.assertRaises(ValueError, self.constructor.upgma, dm)
+        self.assertRaises(ValueError, self.constructor.nj, dm)
+
     def test_built_tree(self):
         tree = self.constructor.build_tree(self.aln)
         self.assertIsInstance(tree, BaseTree.Tree)
@@ -293,6 +436,24 @@ class ParsimonyScorerTest(unittest.TestCase):
         score = scorer.get_score(tree, aln)
         self.assertEqual(score, 3 + 1 + 3 + 3 + 2 + 1 + 2 + 5)
 
+    def test_repeated_columns(self):
+        aln = AlignIO.read("TreeConstruction/msa.phy", "phylip")
+        tree = Phylo.read("./TreeConstruction/upgma.tre", "newick")
+        alphabet = ["A", "T", "C", "G"]
+        step_matrix = [[0], [2.5, 0], [2.5, 1, 0], [1, 2.5, 2.5, 0]]
+        for matrix in (None, _Matrix(alphabet, step_matrix)):
+            scorer = ParsimonyScorer(matrix)
+            score = scorer.get_score(tree, aln)
+            self.assertEqual(scorer.get_score(tree, aln + aln + aln), 3 * score)
+
+    def test_unknown_letter(self):
+        aln = AlignIO.read("TreeConstruction/msa.phy", "phylip")
+        tree = Phylo.read("./TreeConstruction/upgma.tre", "newick")
+        matrix = _Matrix(["A", "T", "G"], [[0], [2.5, 0], [1, 2.5, 0]])
+        scorer = ParsimonyScorer(matrix)
+        with self.assertRaises(ValueError):
+            scorer.get_score(tree, aln)
+
 
 class NNITreeSearcherTest(unittest.TestCase):
     """Test NNITreeSearcher."""
@@ -308,6 +469,20 @@ class NNITreeSearcherTest(unittest.TestCase):
         self.assertEqual(len(trees), 2 * (5 - 3))
         Phylo.write(trees, os.path.join(temp_dir, "neighbor_trees.tre"), "newick")
 
+    def test_search(self):
+        aln = AlignIO.read("TreeConstruction/msa.phy", "phylip")
+        tree = Phylo.read("./TreeConstruction/upgma.tre", "newick")
+        scorer = ParsimonyScorer()
+        best_tree = NNITreeSearcher(scorer).search(tree, aln)
+        score = scorer.get_score(best_tree, aln)
+        self.assertLessEqual(score, scorer.get_score(tree, aln))
+        for neighbor in NNITreeSearcher(scorer)._get_neighbors(best_tree):
+            self.assertGreaterEqual(scorer.get_score(neighbor, aln), score)
+        parallel_tree = NNITreeSearcher(scorer, workers=2).search(tree, aln)
+        self.assertEqual(parallel_tree.format("newick"), best_tree.format("newick"))
+        with self.assertRaises(ValueError):
+            NNITreeSearcher(scorer, workers=0)
+
 
 class ParsimonyTreeConstructorTest(unittest.TestCase):
     """Test ParsimonyTreeConstructor."""
@@ -16,9 +16,20 @@ Right now we've got tests for:
 """
 
 # standard library
+import copyreg
 import os
+import pickle
 import unittest
-from io import StringIO
+from io import BytesIO, StringIO
+
+try:
+    import numpy as np
+except ImportError:
+    from Bio import MissingPythonDependencyError
+
+    raise MissingPythonDependencyError(
+        "Install numpy if you want to use Bio.Align.MultipleSeqAlignment.as_array."
+    ) from None
 
 # biopython
 from Bio.Seq import Seq
@@ -197,6 +208,105 @@ class TestBasics(unittest.TestCase):
         self.assertEqual(alignment[::-1][2].id, "mixed")
 
 
+class TestArray(unittest.TestCase):
+    def setUp(self):
+        self.alignment = MultipleSeqAlignment(
+            [
+                SeqRecord(Seq("ACGT"), id="seq1"),
+                SeqRecord(Seq("A--A"), id="seq2"),
+                SeqRecord(Seq("ACGT"), id="seq3"),
+                SeqRecord(Seq("TTTC"), id="seq4"),
+            ]
+        )
+
+    def test_as_array(self):
+        """Check the array of ASCII codes and its cache."""
+        alignment = self.alignment
+        array = alignment.as_array()
+        self.assertEqual(array.shape, (4, 4))
+        self.assertEqual(array.dtype, np.uint8)
+        self.assertEqual(bytes(array[:, 1]), b"C-CT")
+        self.assertFalse(array.flags.writeable)
+        self.assertIs(alignment.as_array(), array)
+        self.assertEqual(alignment[:, 1], "C-CT")
+        self.assertEqual(alignment[1:3, -1], "AT")
+        # assigning a new sequence to a row invalidates the array
+        alignment[1].seq = Seq("GGGG")
+        self.assertEqual(alignment[:, 1], "CGCT")
+        self.assertIsNot(alignment.as_array(), array)
+        self.assertEqual(bytes(alignment.as_array()[1]), b"GGGG")
+        # as does adding a row
+        array = alignment.as_array()
+        alignment.append(SeqRecord(Seq("CCCC"), id="seq5"))
+        self.assertEqual(alignment.as_array().shape, (5, 4))
+        self.assertEqual(alignment[:, 0], "AGATC")
+        # and sorting the rows
+        alignment.sort(reverse=True)
+        self.assertEqual(alignment[:, 0], "CTAGA")
+
+    def test_empty(self):
+        """Check the array of an empty alignment."""
+        alignment = MultipleSeqAlignment([])
+        self.assertEqual(alignment.as_array().shape, (0, 0))
+
+    def test_pickle(self):
+        """Check pickling, also of alignments pickled without the array cache."""
+
+        class OldPickler(pickle.Pickler):
+            # pickles alignments as older versions did, without _array
+            def reducer_override(self, obj):
+                if not isinstance(obj, MultipleSeqAlignment):
+                    return NotImplemented
+                state = obj.__dict__.copy()
+                del state["_array"]
+                return copyreg.__newobj__, (MultipleSeqAlignment,), state
+
+        self.alignment.as_array()
+        alignment = pickle.loads(pickle.dumps(self.alignment))
+        self.assertEqual(
+            alignment.as_array().tolist(), self.alignment.as_array().tolist()
+        )
+        handle = BytesIO()
+        OldPickler(handle).dump(self.alignment)
+        alignment = pickle.loads(handle.getvalue())
+        self.assertEqual(alignment[:, 1], self.alignment[:, 1])
+        self.assertEqual(
+            alignment.as_array().tolist(), self.alignment.as_array().tolist()
+        )
+
+    def test_gap_fraction(self):
+        """Check the fraction of gaps in each column."""
+        self.assertEqual(self.alignment.gap_fraction().tolist(), [0.0, 0.25, 0.25, 0.0])
+        self.assertEqual(
+            self.alignment.gap_fraction("-A").tolist(), [0.75, 0.25, 0.25, 0.25]
+        )
+
+    def test_substitutions(self):
+        """Check the substitution counts, with and without weights."""
+        m = self.alignment.substitutions
+        self.assertEqual(m.alphabet, "ACGT")
+        self.assertEqual(m["A", "A"], 3.0)
+        self.assertEqual(m["A", "T"], 2.5)
+        self.assertEqual(m["T", "A"], 2.5)
+        self.assertEqual(m["C", "T"], 2.0)
+        self.assertEqual(m["G", "G"], 1.0)
+        alignment = MultipleSeqAlignment(
+            [
+                SeqRecord(Seq("GTATC"), id="seq1", annotations={"weight": 0.5}),
+                SeqRecord(Seq("AT--C"), id="seq2", annotations={"weight": 0.8}),
+                SeqRecord(Seq("CTGTC"), id="seq3", annotations={"weight": 1.0}),
+            ]
+        )
+        m = alignment.substitutions
+        self.assertEqual(m.alphabet, "ACGT")
+        self.assertAlmostEqual(m["A", "G"], 0.45)
+        self.assertAlmostEqual(m["C", "G"], 0.25)
+        self.assertAlmostEqual(m["A", "C"], 0.4)
+        self.assertAlmostEqual(m["T", "T"], 2.2)
+        self.assertAlmostEqual(m["C", "C"], 1.7)
+        self.assertAlmostEqual(m["G", "T"], 0.0)
+
+
 class TestReading(unittest.TestCase):
     def test_read_clustal1(self):
         """Parse an alignment file and get an alignment object."""
@@ -24,7 +24,11 @@ import unittest
 
 import numpy
 from Bio import SeqIO
+from Bio.Align import MultipleSeqAlignment
+from Bio.Align import PairwiseAligner
 from Bio.Align import substitution_matrices
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
 
 from Bio.Data import IUPACData
 
@@ -272,6 +276,79 @@ Z  0.0
             for c2 in matrix.alphabet:
                 self.assertAlmostEqual(matrix[c1, c2], loaded[c1, c2])
 
+    def test_contains(self):
+        matrix = substitution_matrices.load("BLOSUM62")
+        self.assertIn(("A", "W"), matrix)
+        self.assertNotIn(("A", "U"), matrix)
+        self.assertNotIn("A", matrix)
+        self.assertNotIn(["A", "W"], matrix)
+        vector = substitution_matrices.Array("ACGT")
+        self.assertIn("G", vector)
+        self.assertNotIn("U", vector)
+
+
+class TestBulkScoring(unittest.TestCase):
+    def setUp(self):
+        self.matrix = substitution_matrices.load("BLOSUM62")
+
+    def test_score_pairs(self):
+        matrix = self.matrix
+        seqA = "HEAGAWGHEE"
+        seqB = "PAWHEAEHEE"
+        expected = [matrix[c1, c2] for c1, c2 in zip(seqA, seqB)]
+        for a, b in (
+            (seqA, seqB),
+            (seqA.encode(), seqB.encode()),
+            (Seq(seqA), Seq(seqB)),
+        ):
+            scores = matrix.score_pairs(a, b)
+            self.assertIsInstance(scores, numpy.ndarray)
+            self.assertEqual(list(scores), expected)
+        codes = numpy.frombuffer(seqA.encode(), numpy.uint8)
+        self.assertEqual(list(matrix.score_pairs(codes, seqB)), expected)
+        with self.assertRaises(IndexError):
+            matrix.score_pairs("HEAGAWGHEU", seqB)
+        with self.assertRaises(IndexError):
+            matrix.score_pairs("HEAGAWGHE\u00e9", seqB)
+        with self.assertRaises(ValueError):
+            matrix.score_pairs(seqA, seqB[:-1])
+
+    def test_score_alignment(self):
+        matrix = self.matrix
+        aligner = PairwiseAligner()
+        aligner.substitution_matrix = matrix
+        aligner.gap_score = 0
+        for alignment in aligner.align("HEAGAWGHEE", "PAWHEAE"):
+            self.assertEqual(matrix.score_alignment(alignment), alignment.score)
+        aligner.mode = "local"
+        alignment = aligner.align("XHEAGAWGHEEX", "PAWHEAE")[0]
+        self.assertEqual(matrix.score_alignment(alignment), alignment.score)
+        # reverse strand
+        matrix = substitution_matrices.load("NUC.4.4")
+        aligner = PairwiseAligner()
+        aligner.substitution_matrix = matrix
+        aligner.gap_score = 0
+        target = "ACGTTGCAGGTCAGT"
+        query = str(Seq("CGTTGAAGGTCA").reverse_complement())
+        alignment = aligner.align(target, query, strand="-")[0]
+        self.assertEqual(matrix.score_alignment(alignment), alignment.score)
+
+    def test_score_multiple_alignment(self):
+        matrix = self.matrix
+        rows = ["HEAG-WGHEE", "PAW-HEAE--", "HEAGAWGHEE"]
+        alignment = MultipleSeqAlignment(
+            SeqRecord(Seq(row), id="seq%d" % i) for i, row in enumerate(rows)
+        )
+        score = 0
+        for i, row1 in enumerate(rows):
+            for row2 in rows[i + 1 :]:
+                for c1, c2 in zip(row1, row2):
+                    if c1 != "-" and c2 != "-":
+                        score += matrix[c1, c2]
+        self.assertEqual(matrix.score_alignment(alignment), score)
+        with self.assertRaises(ValueError):
+            substitution_matrices.Array("ACGT").score_alignment(alignment)
+
 
 class TestScoringMatrices(unittest.TestCase):
     @classmethod
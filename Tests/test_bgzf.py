@@ -26,11 +26,11 @@ class BgzfTests(unittest.TestCase):
         if os.path.isfile(self.temp_file):
             os.remove(self.temp_file)
 
-    def rewrite(self, compressed_input_file, output_file):
+    def rewrite(self, compressed_input_file, output_file, threads=1):
         with gzip.open(compressed_input_file, "rb") as h:
             data = h.read()
 
-        with bgzf.BgzfWriter(output_file, "wb") as h:
+        with bgzf.BgzfWriter(output_file, "wb", threads=threads) as h:
             h.write(data)
             self.assertFalse(h.seekable())
             self.assertFalse(h.isatty())
@@ -85,7 +85,7 @@ class BgzfTests(unittest.TestCase):
         self.assertEqual(len(old), len(new))
         self.assertEqual(old, new)
 
-    def check_by_line(self, old_file, new_file, old_gzip=False):
+    def check_by_line(self, old_file, new_file, old_gzip=False, threads=1):
         if old_gzip:
             with gzip.open(old_file) as handle:
                 old = handle.read()
@@ -101,7 +101,9 @@ class BgzfTests(unittest.TestCase):
                 old = old.decode("latin1")
 
             for cache in [1, 10]:
-                with bgzf.BgzfReader(new_file, mode, max_cache=cache) as h:
+                with bgzf.BgzfReader(
+                    new_file, mode, max_cache=cache, threads=threads
+                ) as h:
                     if "b" in mode:
                         new = b"".join(line for line in h)
                     else:
@@ -150,7 +152,7 @@ class BgzfTests(unittest.TestCase):
                 )
                 self.assertEqual(old, new)
 
-    def check_random(self, filename):
+    def check_random(self, filename, threads=1):
         """Check BGZF random access by reading blocks in forward & reverse order."""
         with gzip.open(filename, "rb") as h:
             old = h.read()
@@ -160,7 +162,7 @@ class BgzfTests(unittest.TestCase):
 
         # Forward, using explicit open/close
         new = b""
-        h = bgzf.BgzfReader(filename, "rb")
+        h = bgzf.BgzfReader(filename, "rb", threads=threads)
         self.assertTrue(h.seekable())
         self.assertFalse(h.isatty())
         self.assertEqual(h.fileno(), h._handle.fileno())
@@ -177,7 +179,7 @@ class BgzfTests(unittest.TestCase):
 
         # Reverse, using with statement
         new = b""
-        with bgzf.BgzfReader(filename, "rb") as h:
+        with bgzf.BgzfReader(filename, "rb", threads=threads) as h:
             for start, raw_len, data_start, data_len in blocks[::-1]:
                 h.seek(bgzf.make_virtual_offset(start, 0))
                 data = h.read(data_len)
@@ -189,7 +191,7 @@ class BgzfTests(unittest.TestCase):
 
         # Jump back - non-sequential seeking
         if len(blocks) >= 3:
-            h = bgzf.BgzfReader(filename, "rb", max_cache=1)
+            h = bgzf.BgzfReader(filename, "rb", max_cache=1, threads=threads)
             # Seek to a late block in the file,
             # half way into the third last block
             start, raw_len, data_start, data_len = blocks[-3]
@@ -222,7 +224,7 @@ class BgzfTests(unittest.TestCase):
                 real_offset = data_start + within_offset
                 v_offsets.append((voffset, real_offset))
         shuffle(v_offsets)
-        h = bgzf.BgzfReader(filename, "rb", max_cache=1)
+        h = bgzf.BgzfReader(filename, "rb", max_cache=1, threads=threads)
         for voffset, real_offset in v_offsets:
             h.seek(0)
             self.assertTrue(voffset >= 0 and real_offset >= 0)
@@ -261,6 +263,11 @@ class BgzfTests(unittest.TestCase):
         """Check random access to GenBank/cor6_6.gb.bgz."""
         self.check_random("GenBank/cor6_6.gb.bgz")
 
+    def test_random_threads(self):
+        """Check random access using multiple threads."""
+        self.check_random("SamBam/ex1.bam", threads=3)
+        self.check_random("GenBank/cor6_6.gb.bgz", threads=2)
+
     def test_text_wnts_xml(self):
         """Check text mode access to Blast/wnts.xml.bgz."""
         self.check_text("Blast/wnts.xml", "Blast/wnts.xml.bgz")
@@ -303,6 +310,13 @@ class BgzfTests(unittest.TestCase):
         # this example BAM file has simple block usage)
         self.check_blocks("SamBam/ex1.bam", temp_file)
 
+    def test_iter_threads(self):
+        """Check iteration using multiple threads."""
+        self.check_by_line("Blast/wnts.xml", "Blast/wnts.xml.bgz", threads=2)
+        self.check_by_line(
+            "GenBank/NC_000932.gb", "GenBank/NC_000932.gb.bgz", threads=4
+        )
+
     def test_iter_bam_ex1(self):
         """Check iteration over SamBam/ex1.bam."""
         self.check_by_char("SamBam/ex1.bam", "SamBam/ex1.bam", True)
@@ -313,6 +327,12 @@ class BgzfTests(unittest.TestCase):
         self.rewrite("Quality/example.fastq.gz", temp_file)
         self.check_blocks("Quality/example.fastq.bgz", temp_file)
 
+    def test_bam_ex1_threads(self):
+        """Reproduce BGZF compression for BAM file using multiple threads."""
+        temp_file = self.temp_file
+        self.rewrite("SamBam/ex1.bam", temp_file, threads=4)
+        self.check_blocks("SamBam/ex1.bam", temp_file)
+
     def test_example_gb(self):
         """Reproduce BGZF compression for NC_000932 GenBank file."""
         temp_file = self.temp_file
@@ -383,6 +403,114 @@ class BgzfTests(unittest.TestCase):
             self.assertEqual(offset1, h.tell())
             self.assertEqual(h.read(5), "Magic")
 
+    def test_write_tell_threads(self):
+        """Check offsets agree when writing with multiple threads."""
+        offsets = []
+        for threads in (1, 3):
+            with bgzf.BgzfWriter(self.temp_file, "wb", threads=threads) as h:
+                values = []
+                for i in range(20):
+                    h.write(b"%i" % i * 10000)
+                    values.append(h.tell())
+                h.flush()
+                values.append(h.tell())
+            offsets.append(values)
+            with open(self.temp_file, "rb") as h:
+                blocks = list(bgzf.BgzfBlocks(h))
+            self.assertEqual(
+                blocks[-1][2:], (sum(len(b"%i" % i) for i in range(20)) * 10000, 0)
+            )
+        self.assertEqual(offsets[0], offsets[1])
+
+    def test_bad_threads(self):
+        """Check threads must be at least one."""
+        with self.assertRaises(ValueError):
+            bgzf.BgzfReader("SamBam/ex1.bam", "rb", threads=0)
+        with self.assertRaises(ValueError):
+            bgzf.BgzfWriter(self.temp_file, "wb", threads=0)
+
+    def test_cache_lru(self):
+        """Check the block cache discards the least recently used block."""
+        cache = bgzf.BgzfBlockCache(max_blocks=2)
+        cache.put("a", (b"A" * 10, 5))
+        cache.put("b", (b"B" * 10, 5))
+        self.assertEqual(cache.get("a"), (b"A" * 10, 5))
+        cache.put("c", (b"C" * 10, 5))
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.nbytes, 20)
+
+    def test_cache_max_bytes(self):
+        """Check the block cache respects the byte budget."""
+        cache = bgzf.BgzfBlockCache(max_blocks=None, max_bytes=25)
+        for key in "abcd":
+            cache.put(key, (key.encode() * 10, 5))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nbytes, 20)
+        # A block larger than the budget is still kept on its own
+        cache.put("e", (b"E" * 100, 5))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.nbytes, 100)
+        with self.assertRaises(ValueError):
+            bgzf.BgzfBlockCache(max_bytes=0)
+
+    def test_shared_cache(self):
+        """Check a block cache can be shared between handles."""
+        filename = "SamBam/ex1.bam"
+        with open(filename, "rb") as h:
+            blocks = list(bgzf.BgzfBlocks(h))
+        cache = bgzf.BgzfBlockCache(max_blocks=None, max_bytes=2 ** 20)
+        with bgzf.BgzfReader(filename, "rb", cache=cache) as h1:
+            data = h1.read(blocks[-1][2])
+        # Does not need to load the final empty EOF marker block
+        self.assertEqual(cache.misses, len(blocks) - 1)
+        self.assertEqual(cache.hits, 0)
+        with bgzf.BgzfReader(filename, "rb", cache=cache) as h2:
+            # Loading the first block is a hit, and so are the seeks
+            for start, raw_len, data_start, data_len in blocks[-2::-1]:
+                h2.seek(bgzf.make_virtual_offset(start, 0))
+                self.assertEqual(
+                    h2.read(data_len), data[data_start : data_start + data_len]
+                )
+        self.assertEqual(cache.misses, len(blocks) - 1)
+        self.assertEqual(cache.hits, len(blocks))
+        # Text mode handles must not share the binary blocks
+        with bgzf.BgzfReader(filename, "r", cache=cache) as h3:
+            self.assertIsInstance(h3.read(4), str)
+        self.assertEqual(cache.misses, len(blocks))
+
+    def test_shared_cache_handles(self):
+        """Check a shared block cache keeps different files apart."""
+        cache = bgzf.BgzfBlockCache()
+        with bgzf.BgzfWriter(self.temp_file, "wb") as h:
+            h.write(b"first")
+        with bgzf.BgzfReader(self.temp_file, "rb", cache=cache) as h:
+            self.assertEqual(h.read(100), b"first")
+        # The same file name, but a different file
+        with bgzf.BgzfWriter(self.temp_file, "wb") as h:
+            h.write(b"second file")
+        with bgzf.BgzfReader(self.temp_file, "rb", cache=cache) as h:
+            self.assertEqual(h.read(100), b"second file")
+        self.assertEqual(cache.hits, 0)
+        # Handles without a file name
+        for i in range(3):
+            with open(os.open(self.temp_file, os.O_RDONLY), "rb") as handle:
+                with bgzf.BgzfReader(fileobj=handle, mode="rb", cache=cache) as h:
+                    self.assertEqual(h.read(100), b"second file")
+        self.assertEqual(cache.hits, 0)
+        # Only the blocks of the two named files (with their EOF blocks) remain
+        self.assertEqual(len(cache), 4)
+
+    def test_max_cache_bytes(self):
+        """Check limiting the cache of a handle by the number of bytes."""
+        self.check_random("SamBam/ex1.bam")
+        with bgzf.BgzfReader("SamBam/ex1.bam", "rb", max_cache_bytes=100000) as h:
+            while h.read(10000):
+                self.assertLessEqual(h.cache.nbytes, 100000)
+
     def test_append_mode(self):
         with self.assertRaises(NotImplementedError):
             bgzf.open(self.temp_file, "ab")
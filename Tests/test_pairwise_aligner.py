@@ -4357,6 +4357,426 @@ query	16	target	7	255	17M5S	*	0	0	ACGATCGAGCNGCTACGCCCNC	*	AS:i:13
         )
 
 
+class TestAlignMany(unittest.TestCase):
+    """Check score_many and align_many against score and align."""
+
+    def setUp(self):
+        import random
+
+        rng = random.Random(7)
+        self.pairs = []
+        for _ in range(50):
+            seqA = "".join(rng.choice("ACGT") for _ in range(rng.randint(1, 60)))
+            seqB = "".join(rng.choice("ACGT") for _ in range(rng.randint(1, 60)))
+            self.pairs.append((seqA, Seq(seqB)))
+
+    def check(self, aligner, strand="+"):
+        expected = [aligner.score(seqA, seqB, strand) for seqA, seqB in self.pairs]
+        for threads in (1, 2, 4):
+            scores = aligner.score_many(self.pairs, strand, threads=threads)
+            self.assertEqual(scores.shape, (len(self.pairs),))
+            self.assertEqual(list(scores), expected)
+            results = aligner.align_many(iter(self.pairs), strand, threads=threads)
+            for (seqA, seqB), alignments in zip(self.pairs, results):
+                self.assertEqual(alignments.sequences, [seqA, seqB])
+                self.assertEqual(
+                    alignments[0].coordinates.tolist(),
+                    aligner.align(seqA, seqB, strand)[0].coordinates.tolist(),
+                )
+                self.assertAlmostEqual(
+                    alignments.score, aligner.score(seqA, seqB, strand)
+                )
+
+    def test_needlemanwunsch_smithwaterman(self):
+        aligner = Align.PairwiseAligner(match_score=2, mismatch_score=-1, gap_score=-1)
+        self.assertEqual(aligner.algorithm, "Needleman-Wunsch")
+        self.check(aligner)
+        self.check(aligner, "-")
+        aligner.mode = "local"
+        self.assertEqual(aligner.algorithm, "Smith-Waterman")
+        self.check(aligner)
+
+    def test_gotoh(self):
+        from Bio.Align import substitution_matrices
+
+        aligner = Align.PairwiseAligner(mismatch_score=-1)
+        aligner.open_gap_score = -2
+        aligner.extend_gap_score = -0.5
+        aligner.substitution_matrix = substitution_matrices.load("NUC.4.4")
+        self.assertEqual(aligner.algorithm, "Gotoh global alignment algorithm")
+        self.check(aligner)
+        aligner.mode = "local"
+        self.assertEqual(aligner.algorithm, "Gotoh local alignment algorithm")
+        self.check(aligner)
+
+    def test_waterman_smith_beyer(self):
+        def gap_score(i, n):
+            return -2 - n
+
+        aligner = Align.PairwiseAligner(gap_score=gap_score)
+        self.check(aligner)
+
+    def test_empty_and_errors(self):
+        aligner = Align.PairwiseAligner()
+        self.assertEqual(aligner.score_many([], threads=2).shape, (0,))
+        self.assertEqual(list(aligner.align_many([], threads=2)), [])
+        self.assertRaises(ValueError, aligner.score_many, self.pairs, threads=0)
+        self.assertRaises(ValueError, next, aligner.align_many(self.pairs, threads=0))
+        pairs = [("ACGT", "ACGT"), ("ACGT", "")]
+        self.assertRaises(ValueError, aligner.score_many, pairs, threads=2)
+
+
+class TestBandedAlignment(unittest.TestCase):
+    """Check the banded and X-drop aligners against the full aligners."""
+
+    def setUp(self):
+        import random
+
+        rng = random.Random(11)
+        self.pairs = []
+        for _ in range(40):
+            seqA = "".join(rng.choice("ACGT") for _ in range(rng.randint(1, 30)))
+            if rng.random() < 0.5:
+                seqB = seqA[rng.randint(0, 3) :] + rng.choice("ACGT")
+            else:
+                seqB = "".join(rng.choice("ACGT") for _ in range(rng.randint(1, 30)))
+            self.pairs.append((seqA, seqB))
+
+    def check(self, aligner, strand="+"):
+        for seqA, seqB in self.pairs:
+            aligner.band_width = None
+            aligner.xdrop = None
+            score = aligner.score(seqA, seqB, strand)
+            paths = [
+                alignment.coordinates.tolist()
+                for alignment in aligner.align(seqA, seqB, strand)
+            ]
+            # a band covering the whole matrix gives an optimal alignment
+            aligner.band_width = 100
+            self.assertAlmostEqual(aligner.score(seqA, seqB, strand), score)
+            alignments = aligner.align(seqA, seqB, strand)
+            self.assertAlmostEqual(alignments.score, score)
+            self.assertEqual(len(alignments), len(paths[:1]))
+            for alignment in alignments:
+                self.assertIn(alignment.coordinates.tolist(), paths)
+            # a narrow band can only give a lower score
+            aligner.band_width = 1
+            banded_score = aligner.score(seqA, seqB, strand)
+            self.assertLessEqual(banded_score, score + 1e-9)
+            self.assertAlmostEqual(
+                aligner.align(seqA, seqB, strand).score, banded_score
+            )
+
+    def test_needlemanwunsch_smithwaterman(self):
+        aligner = Align.PairwiseAligner(match_score=2, mismatch_score=-1, gap_score=-1)
+        self.check(aligner)
+        self.check(aligner, "-")
+        aligner.mode = "local"
+        self.check(aligner)
+
+    def test_gotoh(self):
+        from Bio.Align import substitution_matrices
+
+        aligner = Align.PairwiseAligner()
+        aligner.substitution_matrix = substitution_matrices.load("NUC.4.4")
+        aligner.open_gap_score = -5
+        aligner.extend_gap_score = -1
+        aligner.target_end_gap_score = 0
+        aligner.query_left_open_gap_score = -2
+        self.check(aligner)
+        self.check(aligner, "-")
+        aligner.mode = "local"
+        self.check(aligner)
+        self.check(aligner, "-")
+
+    def test_band(self):
+        aligner = Align.PairwiseAligner(match_score=2, mismatch_score=-1, gap_score=-1)
+        aligner.band_width = 0
+        self.assertEqual(aligner.band_width, 0)
+        # only the diagonal is available if the sequences have the same length
+        alignments = aligner.align("AAACGT", "ACGTTT")
+        self.assertEqual(len(alignments), 1)
+        alignment = alignments[0]
+        self.assertAlmostEqual(alignment.score, 0.0)
+        self.assertEqual(alignment.coordinates.tolist(), [[0, 6], [0, 6]])
+        aligner.band_width = 3
+        alignment = aligner.align("AAACGT", "ACGTTT")[0]
+        self.assertAlmostEqual(alignment.score, 4.0)
+        self.assertEqual(str(alignment), "AAACG--T\n--|||--|\n--ACGTTT\n")
+        aligner.band_width = None
+        self.assertIsNone(aligner.band_width)
+        with self.assertRaises(ValueError):
+            aligner.band_width = -1
+        with self.assertRaises(TypeError):
+            aligner.band_width = 1.5
+
+    def test_xdrop(self):
+        aligner = Align.PairwiseAligner(mode="local", match_score=1)
+        aligner.mismatch_score = -2
+        aligner.gap_score = -2
+        seqA = "GATTACA" + "C" * 20 + "GATTACA"
+        seqB = "GATTACA" + "G" * 20 + "GATTACA"
+        self.assertAlmostEqual(aligner.score(seqA, seqB), 7.0)
+        aligner.xdrop = 3
+        self.assertAlmostEqual(aligner.xdrop, 3.0)
+        self.assertAlmostEqual(aligner.score(seqA, seqB), 7.0)
+        alignments = aligner.align(seqA, seqB)
+        self.assertEqual(len(alignments), 1)
+        self.assertEqual(alignments[0].coordinates.tolist(), [[0, 7], [0, 7]])
+        # X-drop may miss a local alignment that is separated by a bad region
+        seqA = "GA" + "C" * 5 + "GATTACAGATTACA"
+        seqB = "GA" + "G" * 5 + "GATTACAGATTACA"
+        aligner.xdrop = 1
+        self.assertAlmostEqual(aligner.score(seqA, seqB), 2.0)
+        aligner.xdrop = None
+        self.assertAlmostEqual(aligner.score(seqA, seqB), 14.0)
+        aligner.xdrop = 0
+        self.assertAlmostEqual(aligner.score("ACGT", "TTTT"), 1.0)
+        self.assertEqual(len(aligner.align("ACTT", "GGGG")), 0)
+        with self.assertRaises(ValueError):
+            aligner.xdrop = -1
+
+    def test_errors(self):
+        def gap_score(i, n):
+            return -2 - n
+
+        aligner = Align.PairwiseAligner(gap_score=gap_score, band_width=3)
+        with self.assertRaises(ValueError):
+            aligner.score("ACGT", "ACT")
+        aligner = Align.PairwiseAligner(xdrop=10)
+        with self.assertRaises(ValueError):
+            aligner.align("ACGT", "ACT")
+        aligner.mode = "local"
+        self.assertAlmostEqual(aligner.score("ACGT", "ACT"), 3.0)
+
+    def test_pickle(self):
+        import pickle
+
+        aligner = Align.PairwiseAligner(mode="local", band_width=5, xdrop=12.5)
+        pickled_aligner = pickle.loads(pickle.dumps(aligner))
+        self.assertEqual(pickled_aligner.band_width, 5)
+        self.assertAlmostEqual(pickled_aligner.xdrop, 12.5)
+        self.assertIn("band_width: 5", str(aligner))
+        self.assertIn("xdrop: 12.5", str(aligner))
+
+
+class TestLinearMemory(unittest.TestCase):
+    """Check the linear-memory traceback against the full traceback."""
+
+    def check(self, aligner, pairs, strand="+"):
+        for seqA, seqB in pairs:
+            aligner.memory_mode = "quadratic"
+            score = aligner.score(seqA, seqB, strand)
+            alignments = aligner.align(seqA, seqB, strand)
+            if len(alignments) < 1000:
+                paths = [alignment.coordinates.tolist() for alignment in alignments]
+            else:
+                paths = None
+            aligner.memory_mode = "linear"
+            alignments = aligner.align(seqA, seqB, strand)
+            self.assertAlmostEqual(alignments.score, score)
+            if aligner.mode == "local" and score == 0:
+                self.assertEqual(len(alignments), 0)
+                continue
+            self.assertEqual(len(alignments), 1)
+            alignment = alignments[0]
+            self.assertEqual(alignment.sequences, [seqA, seqB])
+            if paths is not None and aligner.mode == "global":
+                self.assertIn(alignment.coordinates.tolist(), paths)
+
+    def setUp(self):
+        import random
+
+        rng = random.Random(13)
+        self.short_pairs = []
+        for _ in range(20):
+            seqA = "".join(rng.choice("ACGT") for _ in range(rng.randint(1, 25)))
+            seqB = "".join(rng.choice("ACGT") for _ in range(rng.randint(1, 25)))
+            self.short_pairs.append((seqA, seqB))
+        # long enough to be split by the divide-and-conquer algorithm
+        self.long_pairs = []
+        for _ in range(3):
+            seqA = "".join(rng.choice("ACGT") for _ in range(400))
+            seqB = list(seqA[rng.randint(0, 20) :])
+            for _ in range(40):
+                seqB[rng.randrange(len(seqB))] = rng.choice("ACGT")
+            del seqB[100 : 100 + rng.randint(1, 10)]
+            self.long_pairs.append((seqA, "".join(seqB)))
+
+    def test_needlemanwunsch_smithwaterman(self):
+        aligner = Align.PairwiseAligner(match_score=2, mismatch_score=-1, gap_score=-1)
+        self.check(aligner, self.short_pairs)
+        self.check(aligner, self.long_pairs)
+        self.check(aligner, self.short_pairs, "-")
+        aligner.mode = "local"
+        self.check(aligner, self.short_pairs)
+        self.check(aligner, self.long_pairs)
+
+    def test_gotoh(self):
+        from Bio.Align import substitution_matrices
+
+        aligner = Align.PairwiseAligner()
+        aligner.substitution_matrix = substitution_matrices.load("NUC.4.4")
+        aligner.open_gap_score = -10
+        aligner.extend_gap_score = -0.5
+        aligner.target_end_gap_score = 0
+        aligner.query_left_extend_gap_score = -1
+        self.check(aligner, self.short_pairs)
+        self.check(aligner, self.long_pairs)
+        self.check(aligner, self.short_pairs, "-")
+        self.check(aligner, self.long_pairs, "-")
+        aligner.mode = "local"
+        self.check(aligner, self.short_pairs)
+        self.check(aligner, self.long_pairs, "-")
+
+    def test_memory_mode(self):
+        aligner = Align.PairwiseAligner()
+        self.assertEqual(aligner.memory_mode, "quadratic")
+        aligner.memory_mode = "linear"
+        self.assertEqual(aligner.memory_mode, "linear")
+        self.assertIn("memory_mode: linear", str(aligner))
+        with self.assertRaises(ValueError):
+            aligner.memory_mode = "constant"
+        aligner.band_width = 5
+        with self.assertRaises(ValueError):
+            aligner.align("ACGT", "AGT")
+        aligner.band_width = None
+
+        def gap_score(i, n):
+            return -2 - n
+
+        aligner.gap_score = gap_score
+        with self.assertRaises(ValueError):
+            aligner.align("ACGT", "AGT")
+        # the score method is not affected
+        self.assertAlmostEqual(aligner.score("ACGT", "AGT"), 0.0)
+
+    def test_pickle(self):
+        import pickle
+
+        aligner = Align.PairwiseAligner(memory_mode="linear")
+        pickled_aligner = pickle.loads(pickle.dumps(aligner))
+        self.assertEqual(pickled_aligner.memory_mode, "linear")
+
+
+class TestAlignmentCountAndSampling(unittest.TestCase):
+    def aligners(self):
+        def gap_score(i, n):
+            return -1 - 0.5 * n * n
+
+        for mode in ("global", "local"):
+            aligner = Align.PairwiseAligner(mode=mode, mismatch_score=-1)
+            yield aligner
+            aligner = Align.PairwiseAligner(mode=mode, mismatch_score=-1)
+            aligner.open_gap_score = -1
+            aligner.extend_gap_score = -0.5
+            yield aligner
+            aligner = Align.PairwiseAligner(mode=mode, mismatch_score=-1)
+            aligner.gap_score = gap_score
+            yield aligner
+
+    def test_count(self):
+        # all alignments of these sequences are optimal, so the number of
+        # alignments is the Delannoy number
+        delannoy = [[1] * 61 for i in range(61)]
+        for i in range(1, 61):
+            for j in range(1, 61):
+                delannoy[i][j] = (
+                    delannoy[i - 1][j] + delannoy[i][j - 1] + delannoy[i - 1][j - 1]
+                )
+        aligner = Align.PairwiseAligner()
+        alignments = aligner.align("A" * 20, "C" * 20)
+        self.assertEqual(len(alignments), delannoy[20][20])
+        self.assertEqual(alignments.count(), delannoy[20][20])
+        for n in (40, 60):
+            alignments = aligner.align("A" * n, "C" * n)
+            with self.assertRaises(OverflowError):
+                len(alignments)
+            self.assertEqual(alignments.count(), delannoy[n][n])
+        alignments = aligner.align("A" * 60, "C" * 60, max_alignments=100)
+        self.assertEqual(len(alignments), 100)
+        self.assertEqual(alignments.count(), 100)
+        for aligner in self.aligners():
+            for strand in "+-":
+                alignments = aligner.align("GAACTTGCAG", "GACTTCCAGA", strand)
+                n = len(alignments)
+                self.assertEqual(alignments.count(), n)
+                for modulus in (2, 3, 7, 1000003):
+                    self.assertEqual(
+                        alignments.paths.count_modulo(modulus), n % modulus
+                    )
+
+    def test_max_alignments(self):
+        aligner = Align.PairwiseAligner()
+        seqA = "GAACTTGCAGTCAAT"
+        seqB = "GACTTCCAGATTCAAG"
+        expected = [format(alignment) for alignment in aligner.align(seqA, seqB)]
+        self.assertEqual(len(expected), 48)
+        alignments = aligner.align(seqA, seqB, max_alignments=5)
+        self.assertEqual(len(alignments), 5)
+        self.assertEqual([format(alignment) for alignment in alignments], expected[:5])
+        # the traceback was released, but we can iterate again
+        self.assertNotIsInstance(alignments.paths, type(aligner.align("A", "A").paths))
+        self.assertEqual([format(alignment) for alignment in alignments], expected[:5])
+        self.assertEqual(format(alignments[3]), expected[3])
+        self.assertEqual(format(alignments[1]), expected[1])
+        with self.assertRaises(IndexError):
+            alignments[5]
+        alignments = aligner.align(seqA, seqB, max_alignments=1)
+        self.assertEqual(format(alignments[0]), expected[0])
+        self.assertEqual(len(alignments.paths), 1)
+        self.assertEqual(len(alignments), 1)
+        alignments = aligner.align(seqA, seqB, max_alignments=100)
+        self.assertEqual(len(alignments), 48)
+        self.assertEqual([format(alignment) for alignment in alignments], expected)
+        self.assertEqual(len(alignments.paths), 48)
+        with self.assertRaises(ValueError):
+            aligner.align(seqA, seqB, max_alignments=0)
+
+    def test_sample(self):
+        seqA = "GAACTTG"
+        seqB = "GACTTCCAG"
+        for aligner in self.aligners():
+            for strand in "+-":
+                alignments = aligner.align(seqA, seqB, strand)
+                expected = [format(alignment) for alignment in alignments]
+                n = len(expected)
+                sample = alignments.sample(200 * n, seed=5)
+                self.assertEqual(len(sample), 200 * n)
+                counts = {}
+                for alignment in sample:
+                    self.assertAlmostEqual(alignment.score, alignments.score)
+                    text = format(alignment)
+                    counts[text] = counts.get(text, 0) + 1
+                self.assertCountEqual(counts, expected)
+                for count in counts.values():
+                    self.assertGreater(count, 100)
+                    self.assertLess(count, 300)
+                # sampling does not affect the iteration
+                self.assertEqual(
+                    [format(alignment) for alignment in alignments], expected
+                )
+        self.assertEqual(
+            [format(alignment) for alignment in alignments.sample(5, seed=1)],
+            [format(alignment) for alignment in alignments.sample(5, seed=1)],
+        )
+        # with max_alignments, only the first alignments are sampled
+        aligner = Align.PairwiseAligner()
+        seqA = "GAACTTGCAGTCAAT"
+        seqB = "GACTTCCAGATTCAAG"
+        expected = [format(alignment) for alignment in aligner.align(seqA, seqB)]
+        alignments = aligner.align(seqA, seqB, max_alignments=2)
+        next(alignments)
+        sample = {format(alignment) for alignment in alignments.sample(50, seed=2)}
+        self.assertEqual(sample, set(expected[:2]))
+        self.assertEqual(format(next(alignments)), expected[1])
+        aligner = Align.PairwiseAligner(mode="local", mismatch_score=-1, gap_score=-1)
+        alignments = aligner.align("AAA", "CCC")
+        self.assertEqual(len(alignments), 0)
+        with self.assertRaises(ValueError):
+            alignments.sample()
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
     unittest.main(testRunner=runner)
@@ -19,7 +19,7 @@ except ImportError:
     ) from None
 
 from Bio.Seq import Seq
-from Bio.Align import PairwiseAligner
+from Bio.Align import Alignment, PairwiseAligner
 
 
 class TestSimple(unittest.TestCase):
@@ -476,6 +476,81 @@ CTAATGCGCCTTGGTTTTGGCTTAACTAGAAGCAA-CC-TGTAAGATTGCCAATTCTTCAGTCGAAGTAAATCTTCAATG
         )
 
 
+class TestMapMany(unittest.TestCase):
+    def setUp(self):
+        aligner = PairwiseAligner()
+        aligner.internal_open_gap_score = -1
+        aligner.internal_extend_gap_score = -0.0
+        aligner.match_score = +1
+        aligner.mismatch_score = -1
+        aligner.mode = "local"
+        self.aligner = aligner
+
+    def test_strands(self):
+        aligner = self.aligner
+        chromosome = Seq("AAAAAAAACCCCCCCAAAAAAAAAAAGGGGGGAAAAAAAA")
+        transcript = Seq("CCCCCCCGGGGGG")
+        sequences = [Seq("CCCCGGGG"), Seq("CCGG"), Seq("GGGGG"), Seq("CCCC")]
+        for strand1 in ("+", "-"):
+            if strand1 == "+":
+                alignment1 = aligner.align(chromosome, transcript)[0]
+            else:
+                alignment1 = aligner.align(
+                    chromosome.reverse_complement(), transcript, strand="-"
+                )[0]
+            alignments2 = []
+            for sequence in sequences:
+                alignments2.append(aligner.align(transcript, sequence)[0])
+                alignments2.append(
+                    aligner.align(
+                        transcript, sequence.reverse_complement(), strand="-"
+                    )[0]
+                )
+            alignments = alignment1.map_many(alignments2)
+            self.assertEqual(len(alignments), len(alignments2))
+            for alignment, alignment2 in zip(alignments, alignments2):
+                self.assertIs(alignment.target, alignment1.target)
+                self.assertIs(alignment.query, alignment2.query)
+                self.assertTrue(
+                    numpy.array_equal(
+                        alignment.coordinates, alignment1.map(alignment2).coordinates
+                    )
+                )
+            if strand1 == "+":
+                self.assertTrue(
+                    numpy.array_equal(
+                        alignments[0].coordinates,
+                        numpy.array([[11, 15, 26, 30], [0, 4, 4, 8]]),
+                    )
+                )
+                self.assertTrue(
+                    numpy.array_equal(
+                        alignments[1].coordinates,
+                        numpy.array([[11, 15, 26, 30], [8, 4, 4, 0]]),
+                    )
+                )
+        self.assertEqual(alignment1.map_many([]), [])
+
+    def test_adjacent_blocks(self):
+        # two aligned blocks of the chain alignment without a gap in between,
+        # as found for example in PSL files
+        alignment1 = Alignment(
+            [Seq(None, 30), Seq(None, 20)], numpy.array([[5, 15, 25], [0, 10, 20]])
+        )
+        alignment2 = Alignment(
+            [Seq(None, 20), Seq(None, 8)], numpy.array([[12, 18], [1, 7]])
+        )
+        alignment = alignment1.map(alignment2)
+        self.assertTrue(
+            numpy.array_equal(alignment.coordinates, numpy.array([[17, 23], [1, 7]]))
+        )
+        alignment3 = Alignment(
+            [Seq(None, 19), Seq(None, 8)], numpy.array([[12, 18], [1, 7]])
+        )
+        with self.assertRaises(ValueError):
+            alignment1.map_many([alignment2, alignment3])
+
+
 def map_check(alignment1, alignment2):
     psl1 = format(alignment1, "psl")
     handle = open("transcript.psl", "w")